@@ -8,6 +8,8 @@ from __future__ import annotations
 from dataclasses import dataclass
 from typing import Any, Dict, List, Optional, Tuple
 
+from Geometry import KM_PER_NM, haversine_km
+
 
 @dataclass
 class AircraftResp:
@@ -182,21 +184,7 @@ class AircraftResp:
         pos = self.position()
         if pos is None:
             return None
-        lat1, lon1 = pos
-        import math
-
-        def _deg2rad(d: float) -> float:
-            return d * (math.pi / 180.0)
-
-        r_km = 6371.0088
-        phi1 = _deg2rad(lat1)
-        phi2 = _deg2rad(lat)
-        dphi = _deg2rad(lat - lat1)
-        dlambda = _deg2rad(lon - lon1)
-
-        a = math.sin(dphi / 2.0) ** 2 + math.cos(phi1) * math.cos(phi2) * math.sin(dlambda / 2.0) ** 2
-        c = 2 * math.atan2(math.sqrt(a), math.sqrt(max(0.0, 1 - a)))
-        dist_km = r_km * c
+        dist_km = haversine_km(pos[0], pos[1], lat, lon)
         if unit == "km":
             return dist_km
-        return dist_km / 1.852
+        return dist_km / KM_PER_NM
@@ -1,17 +1,13 @@
-from dataclasses import dataclass
+from collections import Counter
+from dataclasses import dataclass, fields
 import json
-from typing import List
-
-class AircraftTypes:
-    def __get_aircraft_types(self) -> List[dict]:
-        with open("AircraftTypes.json", "r") as f:
-            data = json.load(f)
-        return data
-    
-    def __init__(self):
-        self.aircraft_types:List[dict] = self.__get_aircraft_types()
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Mapping, Optional, Sequence, Tuple, Union
 
+import RefDataCache
+from RefDataCache import DATA_DIR, LazyMapping, TableSpec
 
+ROTORCRAFT_DESCRIPTIONS = frozenset({"Helicopter", "Tiltrotor"})
 
 
 """    {
@@ -27,7 +23,7 @@ class AircraftTypes:
         "EngineType": "Electric"
     },"""
 
-@dataclass
+@dataclass(frozen=True, slots=True)
 class AircraftType:
     ModelFullName: str
     Description: str
@@ -38,4 +34,199 @@ class AircraftType:
     ShowInPart3Only: bool
     AircraftDescription: str
     EngineCount: str
-    EngineType: str 
\ No newline at end of file
+    EngineType: str
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "AircraftType":
+        return cls(
+            ModelFullName=data.get("ModelFullName") or "",
+            Description=data.get("Description") or "",
+            WTC=data.get("WTC") or "",
+            WTG=data.get("WTG") or "",
+            Designator=data.get("Designator") or "",
+            ManufacturerCode=data.get("ManufacturerCode") or "",
+            ShowInPart3Only=bool(data.get("ShowInPart3Only", False)),
+            AircraftDescription=data.get("AircraftDescription") or "",
+            EngineCount=data.get("EngineCount") or "",
+            EngineType=data.get("EngineType") or "",
+        )
+
+    @property
+    def is_rotorcraft(self) -> bool:
+        return self.AircraftDescription in ROTORCRAFT_DESCRIPTIONS
+
+
+@dataclass(frozen=True, slots=True)
+class TypeClass:
+    """Classification of a designator, resolved once across all its models.
+
+    A designator can map to several models (AS32 has 40+ entries from
+    different manufacturers) and the models occasionally disagree. Each
+    attribute takes the value shared by most models, ties going to the
+    first entry in the source file.
+    """
+    designator: str
+    aircraft_description: str
+    wtc: str
+    engine_type: str
+    engine_count: Optional[int]
+
+    @property
+    def is_rotorcraft(self) -> bool:
+        return self.aircraft_description in ROTORCRAFT_DESCRIPTIONS
+
+
+def _predominant(values: Iterable[str]) -> str:
+    counts = Counter(values)
+    if not counts:
+        return ""
+    best = max(counts.values())
+    # Counter preserves insertion order, so this picks the earliest of the ties
+    return next(v for v, n in counts.items() if n == best)
+
+
+def _engine_count(value: str) -> Optional[int]:
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def _type_class(designator: str, models: Sequence[AircraftType]) -> TypeClass:
+    return TypeClass(
+        designator=designator,
+        aircraft_description=_predominant(m.AircraftDescription for m in models),
+        wtc=_predominant(m.WTC for m in models),
+        engine_type=_predominant(m.EngineType for m in models),
+        engine_count=_engine_count(_predominant(m.EngineCount for m in models)),
+    )
+
+
+_MODEL_COLUMNS = [(f.name, "bool" if f.type in (bool, "bool") else "str") for f in fields(AircraftType)]
+_CLASS_COLUMNS = [(f.name, "str") for f in fields(TypeClass)]
+
+
+def _group(records: Iterable[dict]) -> Dict[str, List[AircraftType]]:
+    grouped: Dict[str, List[AircraftType]] = {}
+    for record in records:
+        model = AircraftType.from_dict(record)
+        grouped.setdefault(model.Designator, []).append(model)
+    return grouped
+
+
+def _compile(path: Path) -> Dict[str, TableSpec]:
+    """Cache tables: the raw models plus one precomputed TypeClass per designator."""
+    with open(path, "r") as f:
+        records = json.load(f)
+    models = TableSpec(
+        _MODEL_COLUMNS,
+        [[r.get(name) for name, _ in _MODEL_COLUMNS] for r in records],
+        {"designator": [(r.get("Designator") or "", i) for i, r in enumerate(records)]},
+    )
+    classes = TableSpec(_CLASS_COLUMNS, [], {"designator": []})
+    for i, (designator, group) in enumerate(_group(records).items()):
+        cls = _type_class(designator, group)
+        classes.rows.append([getattr(cls, name) for name, _ in _CLASS_COLUMNS])
+        classes.indexes["designator"].append((designator, i))
+    return {"models": models, "classes": classes}
+
+
+def _class_from_row(row: Dict[str, Any]) -> TypeClass:
+    return TypeClass(
+        designator=row["designator"],
+        aircraft_description=row["aircraft_description"],
+        wtc=row["wtc"],
+        engine_type=row["engine_type"],
+        engine_count=_engine_count(row["engine_count"]),
+    )
+
+
+class AircraftTypes:
+    """Registry of ICAO aircraft types keyed by designator.
+
+    By default the records come from the memory-mapped cache of
+    AircraftTypes.json (see RefDataCache.py), which is compiled on first
+    use and decoded lazily per designator. Records passed in directly are
+    indexed in memory instead. Either way every lookup is a single
+    mapping access instead of a scan over the ~7,400 entries.
+    """
+
+    DEFAULT_PATH = DATA_DIR / "AircraftTypes.json"
+
+    def __init__(
+        self,
+        aircraft_types: Optional[List[dict]] = None,
+        path: Union[str, Path, None] = None,
+    ):
+        self._aircraft_types: Sequence[dict] = []
+        self._models: Mapping[str, Tuple[AircraftType, ...]] = {}
+        self._classes: Mapping[str, TypeClass] = {}
+        if aircraft_types is not None:
+            self.aircraft_types = aircraft_types
+        else:
+            self._load_cached(Path(path) if path else self.DEFAULT_PATH)
+
+    def _load_cached(self, path: Path) -> None:
+        cache = RefDataCache.load(path, _compile)
+        models = cache.table("models")
+        classes = cache.table("classes")
+        self._aircraft_types = models
+        self._models = LazyMapping(
+            models.index("designator"),
+            lambda rows: tuple(AircraftType.from_dict(models[i]) for i in rows),
+        )
+        self._classes = LazyMapping(
+            classes.index("designator"), lambda rows: _class_from_row(classes[rows[0]])
+        )
+
+    @property
+    def aircraft_types(self) -> Sequence[dict]:
+        """The raw records as loaded from AircraftTypes.json."""
+        return self._aircraft_types
+
+    @aircraft_types.setter
+    def aircraft_types(self, records: List[dict]) -> None:
+        self._aircraft_types = records
+        self._build_index()
+
+    def _build_index(self) -> None:
+        self._models = {k: tuple(v) for k, v in _group(self._aircraft_types).items()}
+        self._classes = {
+            designator: _type_class(designator, models)
+            for designator, models in self._models.items()
+        }
+
+    def __len__(self) -> int:
+        return len(self._models)
+
+    def __contains__(self, designator: object) -> bool:
+        return designator in self._models
+
+    def models(self, designator: Optional[str]) -> Tuple[AircraftType, ...]:
+        """All models registered under a designator (empty if unknown)."""
+        if not designator:
+            return ()
+        return self._models.get(designator, ())
+
+    def classify(self, designator: Optional[str]) -> Optional[TypeClass]:
+        if not designator:
+            return None
+        return self._classes.get(designator)
+
+    def is_rotorcraft(self, designator: Optional[str]) -> bool:
+        """True for helicopters and tiltrotors."""
+        cls = self.classify(designator)
+        return cls is not None and cls.is_rotorcraft
+
+    def wtc(self, designator: Optional[str]) -> Optional[str]:
+        """ICAO wake turbulence category (L, M, H, J or L/M)."""
+        cls = self.classify(designator)
+        return cls.wtc if cls else None
+
+    def engine_type(self, designator: Optional[str]) -> Optional[str]:
+        cls = self.classify(designator)
+        return cls.engine_type if cls else None
+
+    def engine_count(self, designator: Optional[str]) -> Optional[int]:
+        cls = self.classify(designator)
+        return cls.engine_count if cls else None
@@ -1,8 +1,10 @@
-"""Simple httpx-based client for the Airplanes.live REST API.
+"""Simple httpx-based clients for the Airplanes.live REST API.
 
-This module provides a small synchronous client that respects the documented
-rate limit (1 request per second) and does simple retries with exponential
-backoff for transient errors.
+This module provides a small synchronous client and an asyncio variant with
+the same endpoint helpers. Both respect the documented rate limit (1 request
+per second) through a token bucket that several clients can share (see
+RateLimiter.py), and retry transient errors with jittered exponential
+backoff, honoring Retry-After.
 
 Usage:
     from airplanes_client import AirplanesClient
@@ -10,160 +12,364 @@ Usage:
     c = AirplanesClient()
     data = c.get_icao('45211e')
 
+    async with AsyncAirplanesClient() as ac:
+        data = await ac.get_point(42.5, -71.4, 10)
+
 """
 from __future__ import annotations
 
+import asyncio
 import time
 import logging
-from typing import Any, Dict, Iterable, List, Optional, Sequence, Mapping
+from abc import ABC, abstractmethod
+from typing import TYPE_CHECKING, Any, Callable, Dict, Iterable, List, Optional, Sequence, Mapping, Union
 
 import httpx
 
+from ConnectionPool import SharedPool
+from Decoders import JsonDecoder, aircraft_list, get_decoder
+from Instrumentation import Metrics
+from RateLimiter import TokenBucket, backoff_delay, parse_retry_after
+
+if TYPE_CHECKING:
+    from Recording import ResponseRecorder
+
 logger = logging.getLogger(__name__)
 
 
+def _point_path(lat: float, lon: float, radius_nm: float) -> str:
+    """Validate /point arguments and build the request path."""
+    if not (-90.0 <= lat <= 90.0):
+        raise ValueError("Latitude must be between -90 and 90")
+
+    if not (-180.0 <= lon <= 180.0):
+        raise ValueError("Longitude must be between -180 and 180")
+
+    if radius_nm <= 0 or radius_nm > 250:
+        raise ValueError("Radius must be between 0 and 250 nautical miles")
+
+    return f"/point/{lat}/{lon}/{radius_nm}"
+
+
+def _hex_path(hex_ids: Sequence[str]) -> str:
+    return "/hex/" + ",".join(str(h).strip() for h in hex_ids)
+
+
+def _log_request_failure(path: str, exc: Exception) -> None:
+    if isinstance(exc, httpx.HTTPStatusError):
+        logger.warning(
+            "HTTP error on request %s (status=%s): %s",
+            path,
+            exc.response.status_code,
+            exc,
+        )
+    else:
+        logger.warning("Request error on %s: %s", path, exc)
+
+
+def _retry_after(exc: Exception) -> float | None:
+    """Retry-After of a 429/503 response, in seconds."""
+    if isinstance(exc, httpx.HTTPStatusError) and exc.response.status_code in (429, 503):
+        return parse_retry_after(exc.response.headers.get("Retry-After"))
+    return None
+
+
+def _retry_backoff(exc: Exception, attempt: int, max_retries: int) -> float | None:
+    """Seconds to wait before retrying after `exc`, or None to re-raise.
+
+    429 and 5xx responses and transport errors are retried up to
+    `max_retries` attempts; other HTTP errors are raised immediately. The
+    server's Retry-After wins over the jittered exponential backoff.
+    """
+    if isinstance(exc, httpx.HTTPStatusError):
+        status = exc.response.status_code
+        if not (status == 429 or 500 <= status < 600):
+            return None
+    if attempt >= max_retries:
+        return None
+    retry_after = _retry_after(exc)
+    if retry_after is not None:
+        return retry_after
+    return backoff_delay(attempt)
+
+
+class _Endpoints(ABC):
+    """Endpoint helpers shared by the sync and async clients.
+
+    Each helper returns whatever `_request` returns, so on
+    AsyncAirplanesClient they return awaitables. A subclass without
+    `_request` cannot be instantiated.
+    """
+
+    limiter: TokenBucket
+
+    @abstractmethod
+    def _request(
+        self,
+        path: str,
+        params: Optional[Mapping[str, Any]] = None,
+        decode: Optional[Callable[[httpx.Response], Any]] = None,
+    ) -> Any:
+        """Fetch `path` and return the decoded body (an awaitable on async clients)."""
+
+    def _penalize(self, exc: Exception) -> None:
+        """Make everyone sharing the limiter honor a Retry-After."""
+        retry_after = _retry_after(exc)
+        if retry_after:
+            self.limiter.penalize(retry_after)
+
+    def get_icao(self, icao: str) -> Any:
+        """GET /icao/[icao]"""
+        icao = str(icao).strip()
+        return self._request(f"/icao/{icao}")
+
+    def get_hex(self, hex_ids: Sequence[str]) -> Any:
+        """GET /hex/[hex] - accepts comma-separated ids or iterable"""
+        return self._request(_hex_path(hex_ids))
 
-class AirplanesClient:
+    def get_hex_aircraft(self, hex_ids: Sequence[str]) -> Any:
+        """GET /hex/[hex,...] decoded like get_point: just the aircraft list.
+
+        /hex answers with the same envelope as /point, so the schema
+        decoder applies and the cost grows with the number of ids asked
+        for, not with an area.
+        """
+        return self._request(_hex_path(hex_ids), decode=self.decoder.decode_point_response)
+
+    def get_callsign(self, callsign: str) -> Any:
+        """GET /callsign/[callsign]"""
+        return self._request(f"/callsign/{str(callsign).strip()}")
+
+    def get_reg(self, regs: Sequence[str]) -> Any:
+        """GET /reg/[reg] - accepts comma-separated list"""
+        val = ",".join(str(r).strip() for r in regs)
+        return self._request(f"/reg/{val}")
+
+    def get_type(self, types: Sequence[str]) -> Any:
+        """GET /type/[type] - accepts comma-separated ICAO type codes"""
+        val = ",".join(str(t).strip() for t in types)
+        return self._request(f"/type/{val}")
+
+    def get_squawk(self, squawk: str) -> Any:
+        return self._request(f"/squawk/{str(squawk).strip()}")
+
+    def get_mil(self) -> Any:
+        return self._request("/mil")
+
+    def get_ladd(self) -> Any:
+        return self._request("/ladd")
+
+    def get_pia(self) -> Any:
+        return self._request("/pia")
+
+
+class AirplanesClient(_Endpoints):
     """Sync client for the Airplanes.live API using httpx.Client.
 
     Behavior / contract:
     - Inputs: endpoint parameters as strings / numeric values
-    - Output: parsed JSON (Python objects) returned from the API on success
+    - Output: parsed JSON (Python objects) returned from the API on success,
+      decoded by the configured backend (see Decoders.py)
     - Errors: Raises httpx.RequestError or RuntimeError on repeated failures
 
     Notes:
     - The public API is intentionally small and maps directly to documented
       endpoints (icao, hex, callsign, reg, type, point, etc.).
-    - The API is rate limited to 1 request/sec; the client enforces a default
-      1.0s delay between requests.
+    - The API is rate limited to 1 request/sec. Every attempt, retries
+      included, takes a token from `limiter`; share one TokenBucket between
+      clients to keep them under the limit together. Without one, the
+      client gets a private bucket of one request per `rate_limit_seconds`.
+    - Connections come from `pool` (see ConnectionPool.py). Pass the same
+      SharedPool to several clients to have them reuse keep-alive
+      connections; without one the client gets a private pool.
+    - With a `recorder`, every response (errors included) is appended to
+      a recording that Recording.Replay can play back offline.
     """
 
     def __init__(
         self,
         base_url: str = "https://api.airplanes.live/v2",
         timeout: float = 10.0,
-        rate_limit_seconds: float = 2.0,
+        rate_limit_seconds: float = 1.0,
         max_retries: int = 3,
+        decoder: Union[str, JsonDecoder] = "json",
+        pool: Optional[SharedPool] = None,
+        limiter: Optional[TokenBucket] = None,
+        recorder: Optional[ResponseRecorder] = None,
+        metrics: Optional[Metrics] = None,
     ) -> None:
         self.base_url = base_url.rstrip("/")
-        self.client: httpx.Client = httpx.Client(base_url=self.base_url, timeout=timeout)
-        self.rate_limit_seconds: float = float(rate_limit_seconds)
+        self._owns_pool: bool = pool is None
+        self.pool: SharedPool = pool if pool is not None else SharedPool()
+        self.client: httpx.Client = self.pool.client(self.base_url, timeout)
+        self.decoder: JsonDecoder = get_decoder(decoder)
+        self.limiter: TokenBucket = limiter if limiter is not None else TokenBucket.per_interval(rate_limit_seconds)
         self.max_retries: int = int(max_retries)
-        self._last_request_ts: float = 0.0
+        # every response received is appended here (see Recording.py)
+        self.recorder: Optional[ResponseRecorder] = recorder
+        # stage timings and retry counts (see Instrumentation.py)
+        self.metrics: Metrics = metrics if metrics is not None else Metrics()
 
     def close(self) -> None:
         try:
             self.client.close()
+            if self._owns_pool:
+                self.pool.close()
         except Exception:
             pass
 
     def _throttle(self) -> None:
-        """Ensure at least `rate_limit_seconds` between requests."""
-        now = time.time()
-        elapsed = now - self._last_request_ts
-        wait = self.rate_limit_seconds - elapsed
+        """Wait for a token from the rate limiter."""
+        wait = self.limiter.acquire()
+        self.metrics.observe("throttle_wait_seconds", wait)
         if wait > 0:
-            logger.debug("Throttling for %.3fs to respect rate limit", wait)
-            time.sleep(wait)
+            logger.debug("Throttled for %.3fs to respect rate limit", wait)
 
-    def _request(self, path: str, params: Optional[Mapping[str, Any]] = None) -> Any:
+    def _request(
+        self,
+        path: str,
+        params: Optional[Mapping[str, Any]] = None,
+        decode: Optional[Callable[[httpx.Response], Any]] = None,
+    ) -> Any:
         """Perform a GET request to an API path (path is relative to base_url).
 
         Retries on network errors and 5xx responses with exponential backoff.
+        The body is decoded with `decode`, defaulting to the client's decoder.
         """
         attempt = 0
         while True:
             attempt += 1
             self._throttle()
             try:
-                resp: httpx.Response = self.client.get(path, params=params)
+                self.metrics.count("requests_total")
+                with self.metrics.time("http_seconds"):
+                    resp: httpx.Response = self.client.get(path, params=params)
                 #print(resp.url)
-                self._last_request_ts = time.time()
+                if self.recorder is not None:
+                    self.recorder.record(path, params, resp)
                 resp.raise_for_status()
-                return resp.json()
-            except httpx.HTTPStatusError as e:
-                status = e.response.status_code
-                logger.warning(
-                    "HTTP error on request %s (status=%s): %s",
-                    path,
-                    status,
-                    e,
-                )
-                # 429 or 5xx -> retry (up to max_retries), others -> raise
-                if status == 429 or 500 <= status < 600:
-                    if attempt >= self.max_retries:
-                        raise
-                    backoff = 2 ** attempt
-                    logger.info("Sleeping %.1fs before retrying (attempt %d)", backoff, attempt)
-                    time.sleep(backoff)
-                    continue
-                raise
-            except httpx.RequestError as e:
-                logger.warning("Request error on %s: %s", path, e)
-                if attempt >= self.max_retries:
+                with self.metrics.time("decode_seconds"):
+                    return (decode or self.decoder.decode_response)(resp)
+            except (httpx.HTTPStatusError, httpx.RequestError) as e:
+                _log_request_failure(path, e)
+                self._penalize(e)
+                backoff = _retry_backoff(e, attempt, self.max_retries)
+                if backoff is None:
+                    self.metrics.count("request_errors_total")
                     raise
-                backoff = 2 ** attempt
+                self.metrics.count("retries_total")
                 logger.info("Sleeping %.1fs before retrying (attempt %d)", backoff, attempt)
                 time.sleep(backoff)
-                continue
 
-    # --- Endpoint helpers ---
-    def get_icao(self, icao: str) -> Any:
-        """GET /icao/[icao]"""
-        icao = str(icao).strip()
-        return self._request(f"/icao/{icao}")
+    def get_point(self, lat: float, lon: float, radius_nm: float) -> List[Dict[str, Any]] | None:
+        """GET /point/[lat]/[lon]/[radius]
 
-    def get_hex(self, hex_ids: Sequence[str]) -> Any:
-        """GET /hex/[hex] - accepts comma-separated ids or iterable"""
-        val = ",".join(str(h).strip() for h in hex_ids)
-        return self._request(f"/hex/{val}")
+        radius is in nautical miles (the API allows up to 250 nm).
+        """
+        return self._request(
+            _point_path(lat, lon, radius_nm), decode=self.decoder.decode_point_response
+        )
 
-    def get_callsign(self, callsign: str) -> Any:
-        """GET /callsign/[callsign]"""
-        return self._request(f"/callsign/{str(callsign).strip()}")
+    def __enter__(self) -> "AirplanesClient":
+        return self
 
-    def get_reg(self, regs: Sequence[str]) -> Any:
-        """GET /reg/[reg] - accepts comma-separated list"""
-        val = ",".join(str(r).strip() for r in regs)
-        return self._request(f"/reg/{val}")
+    def __exit__(self, exc_type, exc, tb) -> None:
+        self.close()
 
-    def get_type(self, types: Sequence[str]) -> Any:
-        """GET /type/[type] - accepts comma-separated ICAO type codes"""
-        val = ",".join(str(t).strip() for t in types)
-        return self._request(f"/type/{val}")
 
-    def get_squawk(self, squawk: str) -> Any:
-        return self._request(f"/squawk/{str(squawk).strip()}")
+class AsyncAirplanesClient(_Endpoints):
+    """Asyncio variant of AirplanesClient built on httpx.AsyncClient.
 
-    def get_mil(self) -> Any:
-        return self._request("/mil")
+    Same endpoints, throttling and retry policy as the sync client, but
+    waiting (throttle and backoff) is done with `asyncio.sleep` so the event
+    loop keeps running while a request is slow or being retried.
+    """
 
-    def get_ladd(self) -> Any:
-        return self._request("/ladd")
+    def __init__(
+        self,
+        base_url: str = "https://api.airplanes.live/v2",
+        timeout: float = 10.0,
+        rate_limit_seconds: float = 1.0,
+        max_retries: int = 3,
+        decoder: Union[str, JsonDecoder] = "json",
+        pool: Optional[SharedPool] = None,
+        limiter: Optional[TokenBucket] = None,
+        recorder: Optional[ResponseRecorder] = None,
+        metrics: Optional[Metrics] = None,
+    ) -> None:
+        self.base_url = base_url.rstrip("/")
+        self._owns_pool: bool = pool is None
+        self.pool: SharedPool = pool if pool is not None else SharedPool()
+        self.client: httpx.AsyncClient = self.pool.async_client(self.base_url, timeout)
+        self.decoder: JsonDecoder = get_decoder(decoder)
+        self.limiter: TokenBucket = limiter if limiter is not None else TokenBucket.per_interval(rate_limit_seconds)
+        self.max_retries: int = int(max_retries)
+        # every response received is appended here (see Recording.py)
+        self.recorder: Optional[ResponseRecorder] = recorder
+        # stage timings and retry counts (see Instrumentation.py)
+        self.metrics: Metrics = metrics if metrics is not None else Metrics()
 
-    def get_pia(self) -> Any:
-        return self._request("/pia")
+    async def aclose(self) -> None:
+        try:
+            await self.client.aclose()
+            if self._owns_pool:
+                await self.pool.aclose()
+        except Exception:
+            pass
 
-    def get_point(self, lat: float, lon: float, radius_nm: float) -> List[Dict[str, Any]] | None:
+    async def _throttle(self) -> None:
+        """Wait for a token from the rate limiter."""
+        wait = await self.limiter.acquire_async()
+        self.metrics.observe("throttle_wait_seconds", wait)
+        if wait > 0:
+            logger.debug("Throttled for %.3fs to respect rate limit", wait)
+
+    async def _request(
+        self,
+        path: str,
+        params: Optional[Mapping[str, Any]] = None,
+        decode: Optional[Callable[[httpx.Response], Any]] = None,
+    ) -> Any:
+        """Async counterpart of AirplanesClient._request.
+
+        Concurrent tasks queue on the shared token bucket, so the limit
+        applies across all of them.
+        """
+        attempt = 0
+        while True:
+            attempt += 1
+            await self._throttle()
+            try:
+                self.metrics.count("requests_total")
+                with self.metrics.time("http_seconds"):
+                    resp: httpx.Response = await self.client.get(path, params=params)
+                if self.recorder is not None:
+                    self.recorder.record(path, params, resp)
+                resp.raise_for_status()
+                with self.metrics.time("decode_seconds"):
+                    return (decode or self.decoder.decode_response)(resp)
+            except (httpx.HTTPStatusError, httpx.RequestError) as e:
+                _log_request_failure(path, e)
+                self._penalize(e)
+                backoff = _retry_backoff(e, attempt, self.max_retries)
+                if backoff is None:
+                    self.metrics.count("request_errors_total")
+                    raise
+                self.metrics.count("retries_total")
+                logger.info("Sleeping %.1fs before retrying (attempt %d)", backoff, attempt)
+                await asyncio.sleep(backoff)
+
+    async def get_point(self, lat: float, lon: float, radius_nm: float) -> List[Dict[str, Any]] | None:
         """GET /point/[lat]/[lon]/[radius]
 
         radius is in nautical miles (the API allows up to 250 nm).
         """
-        if not (-90.0 <= lat <= 90.0):
-            raise ValueError("Latitude must be between -90 and 90")
-        
-        if not (-180.0 <= lon <= 180.0):
-            raise ValueError("Longitude must be between -180 and 180")
-        
-        if radius_nm <= 0 or radius_nm > 250:
-            raise ValueError("Radius must be between 0 and 250 nautical miles")
-        
-        data = self._request(f"/point/{lat}/{lon}/{radius_nm}")
-        if data:
-            return data.get('ac',[])
+        return await self._request(
+            _point_path(lat, lon, radius_nm), decode=self.decoder.decode_point_response
+        )
 
-    def __enter__(self) -> "AirplanesClient":
+    async def __aenter__(self) -> "AsyncAirplanesClient":
         return self
 
-    def __exit__(self, exc_type, exc, tb) -> None:
-        self.close()
+    async def __aexit__(self, exc_type, exc, tb) -> None:
+        await self.aclose()
@@ -1,20 +1,176 @@
-from typing import List, Any
+from dataclasses import dataclass
+from pathlib import Path
+from typing import AbstractSet, Any, Dict, List, Mapping, Optional, Sequence, Tuple, Union
 import csv
 
+import RefDataCache
+from RefDataCache import DATA_DIR, LazyMapping, TableSpec
+
+
+@dataclass(frozen=True, slots=True)
+class AlertRecord:
+    """One row of alertlist.csv."""
+    icao: str
+    registration: str = ""
+    operator: str = ""
+    type: str = ""
+    icao_type: str = ""
+    cmpg: str = ""
+    tags: Tuple[str, ...] = ()
+    category: str = ""
+    link: str = ""
+    images: Tuple[str, ...] = ()
+
+    @classmethod
+    def from_row(cls, row: Dict[str, Any]) -> "AlertRecord":
+        def col(name: str) -> str:
+            return (row.get(name) or "").strip()
+
+        return cls(
+            icao=normalize_hex(col("$ICAO")),
+            registration=col("$Registration"),
+            operator=col("$Operator"),
+            type=col("$Type"),
+            icao_type=col("$ICAO Type"),
+            cmpg=col("#CMPG"),
+            tags=tuple(t for t in (col("$Tag 1"), col("$#Tag 2"), col("$#Tag 3")) if t),
+            category=col("Category"),
+            link=col("$#Link"),
+            images=tuple(
+                i
+                for i in (
+                    col("#ImageLink"),
+                    col("#ImageLink2"),
+                    col("#ImageLink3"),
+                    col("#ImageLink4"),
+                )
+                if i
+            ),
+        )
+
+
+def normalize_hex(hex: Optional[str]) -> str:
+    return (hex or "").strip().lower()
+
+
+def _normalize_key(value: Optional[str]) -> str:
+    return (value or "").strip().casefold()
+
+
+def _index_keys(record: AlertRecord) -> Dict[str, List[str]]:
+    """Index name -> keys for one record, as AlertList._index files them."""
+    if not record.icao:
+        return {}
+    return {
+        "hex": [record.icao],
+        "registration": [_normalize_key(record.registration)] if record.registration else [],
+        "icao_type": [_normalize_key(record.icao_type)] if record.icao_type else [],
+        "category": [_normalize_key(record.category)] if record.category else [],
+        "tag": [_normalize_key(t) for t in record.tags],
+    }
+
+
+def _compile(path: Path) -> Dict[str, TableSpec]:
+    with open(path, "r", newline="") as f:
+        reader = csv.DictReader(f)
+        columns = list(reader.fieldnames or [])
+        rows = list(reader)
+    spec = TableSpec(
+        [(c, "str") for c in columns],
+        [[row.get(c) for c in columns] for row in rows],
+        {name: [] for name in ("hex", "registration", "icao_type", "category", "tag")},
+    )
+    for i, row in enumerate(rows):
+        for name, keys in _index_keys(AlertRecord.from_row(row)).items():
+            spec.indexes[name].extend((k, i) for k in keys)
+    return {"rows": spec}
+
+
 class AlertList:
-    def load(self):
-        with open("alertlist.csv", "r") as f:
-            reader = csv.DictReader(f)
-            for row in reader:
-                self.interesting_aircraft.append(row)
-            
+    """Alert list loaded from alertlist.csv with hash indexes for lookups.
+
+    The primary index maps the normalized ICAO hex to its record; secondary
+    indexes map registration, ICAO type, category and tag to the matching
+    records. By default the indexes are read from the memory-mapped cache
+    of alertlist.csv (see RefDataCache.py) and records are decoded on first
+    lookup; rows passed in directly are indexed in memory.
+    """
+
+    DEFAULT_PATH = DATA_DIR / "alertlist.csv"
+
+    def __init__(
+        self,
+        rows: Optional[List[dict[str, Any]]] = None,
+        path: Union[str, Path, None] = None,
+    ):
+        self.interesting_aircraft: Sequence[dict[str,Any]] = []
+        self._by_hex: Mapping[str, AlertRecord] = {}
+        self._by_registration: Mapping[str, List[AlertRecord]] = {}
+        self._by_icao_type: Mapping[str, List[AlertRecord]] = {}
+        self._by_category: Mapping[str, List[AlertRecord]] = {}
+        self._by_tag: Mapping[str, List[AlertRecord]] = {}
+        if rows is None:
+            self._load_cached(Path(path) if path else self.DEFAULT_PATH)
+        else:
+            self.interesting_aircraft = list(rows)
+            for row in self.interesting_aircraft:
+                self._index(AlertRecord.from_row(row))
+
+        self.interesting_hexes: AbstractSet[str] = self._by_hex.keys()
+
+    def _load_cached(self, path: Path) -> None:
+        table = RefDataCache.load(path, _compile).table("rows")
+        self.interesting_aircraft = table
+
+        def one(rows: Tuple[int, ...]) -> AlertRecord:
+            # on duplicate hexes the first row wins
+            return AlertRecord.from_row(table[rows[0]])
+
+        def many(rows: Tuple[int, ...]) -> List[AlertRecord]:
+            return [AlertRecord.from_row(table[i]) for i in rows]
+
+        self._by_hex = LazyMapping(table.index("hex"), one)
+        self._by_registration = LazyMapping(table.index("registration"), many)
+        self._by_icao_type = LazyMapping(table.index("icao_type"), many)
+        self._by_category = LazyMapping(table.index("category"), many)
+        self._by_tag = LazyMapping(table.index("tag"), many)
+
+    def _index(self, record: AlertRecord) -> None:
+        if not record.icao:
+            return
+        # on duplicate hexes the first row wins
+        self._by_hex.setdefault(record.icao, record)
+        if record.registration:
+            self._by_registration.setdefault(_normalize_key(record.registration), []).append(record)
+        if record.icao_type:
+            self._by_icao_type.setdefault(_normalize_key(record.icao_type), []).append(record)
+        if record.category:
+            self._by_category.setdefault(_normalize_key(record.category), []).append(record)
+        for tag in record.tags:
+            self._by_tag.setdefault(_normalize_key(tag), []).append(record)
+
+    def __len__(self) -> int:
+        return len(self._by_hex)
+
+    def __contains__(self, hex: object) -> bool:
+        return isinstance(hex, str) and normalize_hex(hex) in self._by_hex
+
+    def get(self, hex: Optional[str]) -> Optional[AlertRecord]:
+        return self._by_hex.get(normalize_hex(hex))
+
+    def by_registration(self, registration: str) -> Tuple[AlertRecord, ...]:
+        return tuple(self._by_registration.get(_normalize_key(registration), ()))
+
+    def by_icao_type(self, icao_type: str) -> Tuple[AlertRecord, ...]:
+        return tuple(self._by_icao_type.get(_normalize_key(icao_type), ()))
+
+    def by_category(self, category: str) -> Tuple[AlertRecord, ...]:
+        return tuple(self._by_category.get(_normalize_key(category), ()))
 
-    def __init__(self):
-        self.interesting_aircraft: List[dict[str,Any]] = []
-        self.load()
-        self.interesting_hexes: List[str] = [item['$ICAO'].lower() for item in self.interesting_aircraft]
+    def by_tag(self, tag: str) -> Tuple[AlertRecord, ...]:
+        return tuple(self._by_tag.get(_normalize_key(tag), ()))
 
 
 if __name__ == "__main__":
     al = AlertList()
-    print(al.interesting_aircraft)
\ No newline at end of file
+    print(al.interesting_aircraft)
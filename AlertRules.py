@@ -0,0 +1,379 @@
+"""Declarative alert rules evaluated against each snapshot.
+
+Rules are plain frozen dataclasses (or dicts, e.g. from a JSON file, via
+`rules_from_dicts`):
+
+- SquawkRule: transponder code in a set (7500/7600/7700 by default)
+- AltitudeInPolygonRule: below an altitude inside a polygon
+- AlertListRule: aircraft on the alert list, optionally by tag/category
+- TypeClassRule: aircraft description, WTC, engine type or designator
+- SpeedRule: ground speed above and/or below a threshold
+
+RuleEngine compiles them once into per-field indexes. Each aircraft then
+costs a squawk dict lookup, a bisect into the sorted speed thresholds and
+a cached lookup for the rules that depend only on hex and type. Polygon
+rules go through the snapshot's spatial index instead of visiting every
+aircraft. So the per-aircraft work barely grows with the number of rules.
+
+The engine tracks which (rule, aircraft) pairs are active and only
+reports transitions as AlertEvents:
+- "enter": a pair becomes active
+- "change": its detail changes, e.g. squawk 7600 -> 7700 under one rule
+- "leave": the pair has not matched for `leave_after` snapshots in a row
+A condition that holds for an hour produces one event, not one per poll.
+"""
+from __future__ import annotations
+
+import json
+from bisect import bisect_left, bisect_right
+from dataclasses import dataclass, fields as dataclass_fields
+from datetime import datetime
+from typing import Any, Dict, FrozenSet, Iterable, List, Mapping, Optional, Sequence, Tuple, Union
+
+from AircraftTypes import AircraftTypes
+from AlertList import AlertList
+from Snapshot import MISSING_ALT, Snapshot
+from SpatialIndex import Polygon
+
+EMERGENCY_SQUAWKS: FrozenSet[str] = frozenset({"7500", "7600", "7700"})
+
+# per-hex static matches are dropped wholesale past this many aircraft
+_STATIC_CACHE_LIMIT = 50_000
+
+
+def _folded(values: Iterable[str]) -> FrozenSet[str]:
+    return frozenset(v.strip().casefold() for v in values if v and v.strip())
+
+
+@dataclass(frozen=True)
+class SquawkRule:
+    name: str
+    squawks: FrozenSet[str] = EMERGENCY_SQUAWKS
+
+    def __post_init__(self) -> None:
+        # JSON rule files may give codes as numbers: 7700 -> "7700", 20 -> "0020"
+        if isinstance(self.squawks, (str, int)):
+            raise ValueError(f"Squawk rule {self.name!r}: squawks must be a list of codes")
+        squawks = frozenset(str(s).zfill(4) for s in self.squawks)
+        for code in squawks:
+            if len(code) != 4 or not set(code) <= set("01234567"):
+                raise ValueError(f"Squawk rule {self.name!r}: {code!r} is not a 4-digit octal squawk")
+        object.__setattr__(self, "squawks", squawks)
+
+
+@dataclass(frozen=True)
+class AltitudeInPolygonRule:
+    name: str
+    polygon: Polygon
+    below_ft: float
+    include_ground: bool = False
+
+
+@dataclass(frozen=True)
+class AlertListRule:
+    """Matches alert-list aircraft; with tags/categories, only those."""
+
+    name: str
+    tags: FrozenSet[str] = frozenset()
+    categories: FrozenSet[str] = frozenset()
+
+    def __post_init__(self) -> None:
+        object.__setattr__(self, "tags", _folded(self.tags))
+        object.__setattr__(self, "categories", _folded(self.categories))
+
+
+@dataclass(frozen=True)
+class TypeClassRule:
+    """Matches when every given criterion matches (empty ones are ignored)."""
+
+    name: str
+    descriptions: FrozenSet[str] = frozenset()
+    wtc: FrozenSet[str] = frozenset()
+    engine_types: FrozenSet[str] = frozenset()
+    designators: FrozenSet[str] = frozenset()
+
+    def __post_init__(self) -> None:
+        for field in ("descriptions", "wtc", "engine_types", "designators"):
+            object.__setattr__(self, field, _folded(getattr(self, field)))
+
+    def matches(self, designator: str, aircraft_types: AircraftTypes) -> bool:
+        if self.designators and designator.casefold() not in self.designators:
+            return False
+        if not (self.descriptions or self.wtc or self.engine_types):
+            return bool(self.designators)
+        cls = aircraft_types.classify(designator)
+        if cls is None:
+            return False
+        return (
+            (not self.descriptions or cls.aircraft_description.casefold() in self.descriptions)
+            and (not self.wtc or cls.wtc.casefold() in self.wtc)
+            and (not self.engine_types or cls.engine_type.casefold() in self.engine_types)
+        )
+
+
+@dataclass(frozen=True)
+class SpeedRule:
+    """Ground speed strictly above `above_kt` and/or below `below_kt`."""
+
+    name: str
+    above_kt: Optional[float] = None
+    below_kt: Optional[float] = None
+
+    def __post_init__(self) -> None:
+        if self.above_kt is None and self.below_kt is None:
+            raise ValueError(f"Speed rule {self.name!r} needs above_kt or below_kt")
+
+
+Rule = Union[SquawkRule, AltitudeInPolygonRule, AlertListRule, TypeClassRule, SpeedRule]
+
+
+@dataclass(frozen=True, slots=True)
+class AlertEvent:
+    kind: str  # "enter", "change" or "leave"
+    rule: str
+    hex: str
+    at: datetime
+    detail: Optional[str] = None
+    previous: Optional[str] = None
+
+
+class _Active:
+    __slots__ = ("detail", "since", "misses")
+
+    def __init__(self, detail: Optional[str], since: datetime) -> None:
+        self.detail = detail
+        self.since = since
+        self.misses = 0
+
+
+class RuleEngine:
+    def __init__(
+        self,
+        rules: Sequence[Rule],
+        aircraft_types: AircraftTypes,
+        alert_list: AlertList,
+        leave_after: int = 2,
+    ) -> None:
+        names = [r.name for r in rules]
+        if len(set(names)) != len(names):
+            raise ValueError("Rule names must be unique")
+        if leave_after < 1:
+            raise ValueError("leave_after must be at least 1")
+        self.rules: Tuple[Rule, ...] = tuple(rules)
+        self.aircraft_types = aircraft_types
+        self.alert_list = alert_list
+        self.leave_after = leave_after
+
+        self._by_squawk: Dict[str, List[SquawkRule]] = {}
+        self._polygons: List[AltitudeInPolygonRule] = []
+        self._type_rules: List[TypeClassRule] = []
+        self._list_any: List[AlertListRule] = []
+        self._list_by_tag: Dict[str, List[AlertListRule]] = {}
+        self._list_by_category: Dict[str, List[AlertListRule]] = {}
+        above: List[Tuple[float, SpeedRule]] = []
+        below: List[Tuple[float, SpeedRule]] = []
+        bands: List[SpeedRule] = []
+
+        for rule in self.rules:
+            if isinstance(rule, SquawkRule):
+                for code in rule.squawks:
+                    self._by_squawk.setdefault(code, []).append(rule)
+            elif isinstance(rule, AltitudeInPolygonRule):
+                self._polygons.append(rule)
+            elif isinstance(rule, TypeClassRule):
+                self._type_rules.append(rule)
+            elif isinstance(rule, AlertListRule):
+                if not rule.tags and not rule.categories:
+                    self._list_any.append(rule)
+                for tag in rule.tags:
+                    self._list_by_tag.setdefault(tag, []).append(rule)
+                for category in rule.categories:
+                    self._list_by_category.setdefault(category, []).append(rule)
+            elif isinstance(rule, SpeedRule):
+                if rule.above_kt is not None and rule.below_kt is not None:
+                    bands.append(rule)
+                elif rule.above_kt is not None:
+                    above.append((rule.above_kt, rule))
+                else:
+                    below.append((rule.below_kt, rule))
+            else:
+                raise TypeError(f"Unsupported rule {rule!r}")
+
+        # sorted thresholds: for a speed v, the matching "above" rules are a
+        # prefix (threshold < v) and the matching "below" rules a suffix
+        above.sort(key=lambda t: t[0])
+        below.sort(key=lambda t: t[0])
+        self._above_kt = [t for t, _ in above]
+        self._above = [r for _, r in above]
+        self._below_kt = [t for t, _ in below]
+        self._below = [r for _, r in below]
+        self._bands = bands
+
+        self._type_cache: Dict[str, Tuple[TypeClassRule, ...]] = {}
+        self._static_cache: Dict[str, Tuple[str, Tuple[Rule, ...]]] = {}
+        self._active: Dict[Tuple[str, str], _Active] = {}
+
+    def set_reference(self, aircraft_types: AircraftTypes, alert_list: AlertList) -> None:
+        """Swap in new reference data (e.g. once a background load finishes).
+
+        Cached static matches are dropped. Alerts that are active now stay
+        active, and newly matching rules "enter" on the next evaluate().
+        """
+        self.aircraft_types = aircraft_types
+        self.alert_list = alert_list
+        self._type_cache.clear()
+        self._static_cache.clear()
+
+    # static rules depend only on hex (alert list) and type designator
+
+    def _type_matches(self, designator: str) -> Tuple[TypeClassRule, ...]:
+        cached = self._type_cache.get(designator)
+        if cached is None:
+            cached = tuple(r for r in self._type_rules if r.matches(designator, self.aircraft_types))
+            self._type_cache[designator] = cached
+        return cached
+
+    def _list_matches(self, hex: str) -> Tuple[AlertListRule, ...]:
+        record = self.alert_list.get(hex)
+        if record is None:
+            return ()
+        matched: Dict[str, AlertListRule] = {r.name: r for r in self._list_any}
+        for tag in record.tags:
+            for rule in self._list_by_tag.get(tag.casefold(), ()):
+                matched[rule.name] = rule
+        for rule in self._list_by_category.get(record.category.casefold(), ()):
+            matched[rule.name] = rule
+        return tuple(matched.values())
+
+    def _static(self, hex: str, designator: str) -> Tuple[Rule, ...]:
+        cached = self._static_cache.get(hex)
+        if cached is not None and cached[0] == designator:
+            return cached[1]
+        if len(self._static_cache) >= _STATIC_CACHE_LIMIT:
+            self._static_cache.clear()
+        rules = self._list_matches(hex) + self._type_matches(designator or "")
+        self._static_cache[hex] = (designator, rules)
+        return rules
+
+    def matches(self, snap: Snapshot) -> Dict[Tuple[str, str], Optional[str]]:
+        """Currently matching (rule name, hex) pairs and their detail."""
+        found: Dict[Tuple[str, str], Optional[str]] = {}
+        by_squawk = self._by_squawk
+        has_static = bool(self._type_rules or self._list_any or self._list_by_tag or self._list_by_category)
+        has_speed = bool(self._above or self._below or self._bands)
+        gs_col = snap.gs
+
+        for i, hex in enumerate(snap.hex):
+            if not hex:
+                continue
+            if by_squawk:
+                squawk = snap.squawk[i]
+                if squawk:
+                    for rule in by_squawk.get(squawk, ()):
+                        found[(rule.name, hex)] = squawk
+            if has_static:
+                for rule in self._static(hex, snap.t[i]):
+                    found[(rule.name, hex)] = None
+            if has_speed:
+                gs = gs_col[i]
+                if gs == gs:
+                    for rule in self._above[: bisect_left(self._above_kt, gs)]:
+                        found[(rule.name, hex)] = None
+                    for rule in self._below[bisect_right(self._below_kt, gs):]:
+                        found[(rule.name, hex)] = None
+                    for rule in self._bands:
+                        if rule.above_kt < gs < rule.below_kt:
+                            found[(rule.name, hex)] = None
+
+        if self._polygons:
+            index = snap.spatial_index()
+            for rule in self._polygons:
+                for i in index.in_polygon(rule.polygon):
+                    alt = snap.alt_baro[i]
+                    if snap.on_ground[i]:
+                        if not rule.include_ground:
+                            continue
+                    elif alt == MISSING_ALT or alt >= rule.below_ft:
+                        continue
+                    if snap.hex[i]:
+                        found[(rule.name, snap.hex[i])] = None
+        return found
+
+    def evaluate(self, snap: Snapshot, now: Optional[datetime] = None) -> List[AlertEvent]:
+        """Match `snap` and return the transitions since the previous call."""
+        now = now or datetime.now()
+        found = self.matches(snap)
+        events: List[AlertEvent] = []
+        active = self._active
+
+        for key, detail in found.items():
+            state = active.get(key)
+            if state is None:
+                active[key] = _Active(detail, now)
+                events.append(AlertEvent("enter", key[0], key[1], now, detail))
+            else:
+                state.misses = 0
+                if state.detail != detail:
+                    events.append(AlertEvent("change", key[0], key[1], now, detail, state.detail))
+                    state.detail = detail
+
+        for key in [k for k in active if k not in found]:
+            state = active[key]
+            state.misses += 1
+            if state.misses >= self.leave_after:
+                del active[key]
+                events.append(AlertEvent("leave", key[0], key[1], now, None, state.detail))
+        return events
+
+    def active(self, hex: Optional[str] = None) -> List[Tuple[str, str]]:
+        """Active (rule name, hex) pairs, optionally for one aircraft."""
+        return [k for k in self._active if hex is None or k[1] == hex]
+
+
+_RULE_TYPES = {
+    "squawk": SquawkRule,
+    "altitude_in_polygon": AltitudeInPolygonRule,
+    "alert_list": AlertListRule,
+    "type_class": TypeClassRule,
+    "speed": SpeedRule,
+}
+
+
+def rules_from_dicts(items: Iterable[Mapping[str, Any]]) -> List[Rule]:
+    """Build rules from plain dicts: {"type": "squawk", "name": ..., ...}.
+
+    Raises ValueError naming the rule for an unknown type, an unknown or
+    misspelled field, or a missing one.
+    """
+    rules: List[Rule] = []
+    for item in items:
+        fields = dict(item)
+        kind = fields.pop("type", None)
+        try:
+            cls = _RULE_TYPES[kind]
+        except KeyError:
+            raise ValueError(f"Unknown rule type {kind!r}; choose from {', '.join(_RULE_TYPES)}")
+        name = fields.get("name", "(unnamed)")
+        known = [f.name for f in dataclass_fields(cls)]
+        unknown = [k for k in fields if k not in known]
+        if unknown:
+            raise ValueError(
+                f"rule {name}: unknown field {', '.join(map(repr, unknown))} for type {kind!r}; "
+                f"expected {', '.join(known)}"
+            )
+        if "polygon" in fields:
+            fields["polygon"] = Polygon([tuple(v) for v in fields["polygon"]])
+        try:
+            rules.append(cls(**fields))
+        except TypeError as e:  # a required field is missing
+            raise ValueError(f"rule {name}: {e}")
+    return rules
+
+
+def load_rules(path: str) -> List[Rule]:
+    """Read a JSON list of rule dicts (see rules_from_dicts)."""
+    with open(path, "r") as f:
+        return rules_from_dicts(json.load(f))
+
+
+DEFAULT_RULES: Tuple[Rule, ...] = (SquawkRule("emergency squawk"),)
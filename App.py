@@ -1,26 +1,130 @@
-from typing import List
+import time
+
+_T0 = time.perf_counter()
+
+import asyncio
+from typing import TYPE_CHECKING, List, Optional
+
+from textual import work
 from textual.app import App, ComposeResult
+from textual.message import Message
 from textual.widgets import Footer, Header
 from textual.containers import HorizontalGroup, VerticalScroll
 from textual.widgets import Button, Digits, Footer, Header, DataTable
 
-from PlaneWatcher import PlaneWatcher
+from Decoders import DECODERS
+from Instrumentation import Metrics, MetricsServer, write_metrics
 from textual.widget import Widget
 
-from datetime import datetime
+from datetime import datetime, timedelta
 import click
 
 from SeenAircraft import SeenAircraft
+from StartupProfile import StartupProfile
+from StatsPanel import StatsPanel
+from TableSync import TableSync
+
+# PlaneWatcher and everything behind it (httpx, NumPy, the reference data)
+# load after the first paint, see SkyAlertApp.start_watcher
+if TYPE_CHECKING:
+    from AlertRules import Rule
 
 
 class SkyAlertApp(App):
 
     CSS_PATH = "skyalert.tss"
     ENABLE_COMMAND_PALETTE = False
+    # default base interval; PollScheduler speeds up and backs off from it
+    POLL_INTERVAL = 5
+    # the current table moves aircraft by dead reckoning between polls
+    PREDICT_INTERVAL = 1
+    BINDINGS = [("s", "toggle_stats", "Stats")]
+
+    class SnapshotReady(Message):
+        """Posted by the polling worker after each successful refresh."""
+
+        def __init__(self, refreshed_at: datetime) -> None:
+            super().__init__()
+            self.refreshed_at = refreshed_at
 
-    def __init__(self, lat, lon, range, **kwargs) -> None:
+    class ReferenceDataReady(Message):
+        """Posted from the loader thread once the reference data has loaded."""
+
+    def __init__(
+        self,
+        lat: float,
+        lon: float,
+        range: int,
+        max_seen: Optional[int] = None,
+        max_seen_age: Optional[timedelta] = None,
+        decoder: str = "json",
+        http2: bool = False,
+        rules: Optional[List["Rule"]] = None,
+        profile_startup: bool = False,
+        record: Optional[str] = None,
+        replay: Optional[str] = None,
+        replay_speed: float = 1.0,
+        show_stats: bool = False,
+        metrics_port: Optional[int] = None,
+        metrics_file: Optional[str] = None,
+        metrics_format: str = "prometheus",
+        history: Optional[str] = None,
+        history_hours: float = 24.0,
+        interval: Optional[float] = None,
+        fast_interval: float = 2.0,
+        idle_interval: float = 15.0,
+        quota: Optional[int] = None,
+        follow: bool = False,
+        **kwargs,
+    ) -> None:
         super().__init__(**kwargs)
-        self.watcher = PlaneWatcher(lat, lon, range)
+        self.startup = StartupProfile(_T0)
+        self.startup.mark("imports")
+        self.profile_startup = profile_startup
+        self.http2 = http2
+        # record: append every API response to this file
+        # replay: poll a recording instead of the API (see Recording.py)
+        self.record_path = record
+        self.replay_path = replay
+        self.replay_speed = replay_speed
+        self.recorder = None
+        # history: SQLite file of sightings, restored for `history_hours`
+        self.history_path = history
+        self.history_hours = history_hours
+        self.history = None
+        # adaptive poll interval (see PollScheduler.py), built with the watcher
+        self.scheduler_args = dict(
+            interval=self.POLL_INTERVAL if interval is None else interval,
+            fast_interval=fast_interval,
+            idle_interval=idle_interval,
+            quota_per_hour=quota,
+        )
+        self.scheduler = None
+        # follow alert list aircraft with /hex after they leave the zone
+        self.follow = follow
+        # stage timings for the stats panel and the metrics exports
+        self.metrics = Metrics()
+        self.show_stats = show_stats
+        self.metrics_port = metrics_port
+        self.metrics_file = metrics_file
+        self.metrics_format = metrics_format
+        self.metrics_server = None
+        # rules=None means the default rules; pass [] for no rules
+        self.watcher_args = dict(
+            lat=lat,
+            lon=lon,
+            rad=range,
+            max_seen=max_seen,
+            max_seen_age=max_seen_age,
+            decoder=decoder,
+            rules=rules,
+        )
+        self.pool = None
+        self.watcher = None
+        # hex -> cells last rendered in the seen and interesting tables,
+        # reused until the aircraft shows up in a snapshot again
+        self.seen_cells: dict[str, tuple[str, ...]] = {}
+        self.seen_cells_classified = False
         self.title = f"Plane Watcher ({lat}, {lon}) Range: {range}nm"
 
     def compose(self) -> ComposeResult:
@@ -39,6 +143,10 @@ class SkyAlertApp(App):
         seentable.cursor_type = "none"
         seentable.zebra_stripes = True
 
+        stats = StatsPanel(id="stats_panel", classes="stats_panel")
+        stats.display = self.show_stats
+
+        yield stats
         yield currenttable
         yield interestingtable
         yield seentable
@@ -61,12 +169,14 @@ class SkyAlertApp(App):
             ("Fastest GS", "Fastest GS"),
             ("Slowest GS", "Slowest GS"),
             ("Interesting Desc", "Interesting Desc"),
+            ("CPA", "CPA"),
             #("Emergency", "Emergency")
         ]
 
         currenttable = self.get_widget_by_id("current_table", expect_type=DataTable)
         for label, key in columns:
             currenttable.add_column(label=label, key=key)
+        current_keys = [key for _, key in columns]
 
         columns = [
             ("Hex", "Hex"),
@@ -99,66 +209,253 @@ class SkyAlertApp(App):
         for label, key in columns:
             seentable.add_column(label=label, key=key)
 
+        column_keys = [key for _, key in columns]
+        self.table_syncs: dict[str, TableSync] = {
+            table.id: TableSync(table, keys)
+            for table, keys in ((currenttable, current_keys), (interestingtable, column_keys), (seentable, column_keys))
+        }
+
+        if self.metrics_port is not None:
+            self.metrics_server = MetricsServer(self.metrics, self.metrics_port)
+            self.log.info(f"Serving metrics on port {self.metrics_server.port}")
+        self.startup.mark("mount")
+        self.call_after_refresh(self.startup.mark, "first paint")
+        self.poll_aircraft()
+        self.set_interval(self.PREDICT_INTERVAL, self.tick_prediction)
+
+    async def on_unmount(self) -> None:
+        if self.watcher is not None:
+            await self.watcher.aclose()
+        if self.pool is not None:
+            await self.pool.aclose()
+        if self.recorder is not None:
+            self.recorder.close()
+        if self.history is not None:
+            self.history.close()
+        if self.metrics_server is not None:
+            self.metrics_server.close()
+
+    def build_watcher(self):
+        """Import and construct the PlaneWatcher (runs on a worker thread)."""
+        from AlertRules import DEFAULT_RULES
+        from ConnectionPool import PoolConfig, SharedPool
+        from FollowList import FollowList
+        from PlaneWatcher import PlaneWatcher
+        from PollScheduler import MAX_INTERVAL, PollScheduler
+
+        self.startup.mark("import watcher")
+        args = dict(self.watcher_args)
+        if args["rules"] is None:
+            args["rules"] = DEFAULT_RULES
+        self.pool = SharedPool(PoolConfig(http2=self.http2))
+        if self.replay_path:
+            from Recording import Replay
+
+            replay = Replay(self.replay_path, speed=self.replay_speed)
+            args.update(
+                client=replay.client(args["decoder"]),
+                async_client=replay.async_client(args["decoder"]),
+                clock=replay.now,
+            )
+        elif self.record_path:
+            from Recording import ResponseRecorder
+
+            self.recorder = args["recorder"] = ResponseRecorder(self.record_path)
+        if not self.replay_path:
+            # a replay paces itself to the recording
+            # a long --idle-interval raises the error backoff cap with it
+            max_interval = max(MAX_INTERVAL, self.scheduler_args["idle_interval"])
+            self.scheduler = PollScheduler(max_interval=max_interval, metrics=self.metrics, **self.scheduler_args)
+            if self.follow:
+                args["follow"] = FollowList()
+        if self.history_path:
+            from HistoryStore import HistoryStore
+
+            self.history = args["history"] = HistoryStore(
+                self.history_path, restore_hours=self.history_hours, metrics=self.metrics
+            )
+        return PlaneWatcher(pool=self.pool, background_load=True, metrics=self.metrics, **args)
+
+    async def start_watcher(self) -> None:
+        # off the event loop, so the UI stays live while modules import
+        self.watcher = await asyncio.to_thread(self.build_watcher)
+        self.startup.mark("watcher ready")
+        # post_message is thread-safe; fires immediately if already loaded
+        self.watcher.reference.add_done_callback(lambda _: self.post_message(self.ReferenceDataReady()))
+
+    @work(exclusive=True, group="poll")
+    async def poll_aircraft(self) -> None:
+        """Background polling loop.
+
+        Runs as an async worker on the app's event loop, so waiting on the
+        API (including throttling and retry backoff) never blocks input or
+        redraws. Each finished refresh is published as a SnapshotReady
+        message and the tables are redrawn from its handler. The first
+        request goes out while the reference data is still loading. The
+        scheduler picks the wait before the next poll, part of which may go
+        to /hex requests for followed aircraft.
+        """
+        if self.watcher is None:
+            await self.start_watcher()
+        # already loaded by the watcher
+        import httpx
+        from PollScheduler import follow_between_polls
+        from Recording import ReplayFinished
+
+        scheduler = self.scheduler
+        while True:
+            interval = 0
+            if scheduler is not None:
+                scheduler.limit_retries(self.watcher.async_client)
+            try:
+                await self.watcher.refresh_async()
+            except ReplayFinished:
+                self.notify("Replay finished")
+                return
+            except (httpx.HTTPError, ValueError) as e:
+                self.log.error(f"Refresh failed: {e}")
+                self.notify(f"Refresh failed: {e}", severity="error")
+                if scheduler is not None:
+                    interval = scheduler.after_error(e)
+            else:
+                self.post_message(self.SnapshotReady(self.watcher.last_refresh))
+                if scheduler is not None:
+                    interval = scheduler.after_poll(self.watcher)
+                    interval, _ = await follow_between_polls(self.watcher, scheduler, interval)
+            if scheduler is not None:
+                status = scheduler.summary()
+                if self.watcher.follow:
+                    status += f", following {len(self.watcher.follow)}"
+                self.sub_title = status
+            await asyncio.sleep(interval)
+
+    def on_sky_alert_app_snapshot_ready(self, message: SnapshotReady) -> None:
+        self.startup.mark("first poll")
+        self.invalidate_seen_cells()
         self.refresh_data()
-        self.set_interval(5, self.refresh_data)
+        self.notify_alerts()
+        self.startup_rendered()
+        self.update_stats()
 
-    def update_aircraft_table(self, table: DataTable, data: list[SeenAircraft]) -> None:
+    def update_stats(self) -> None:
+        if self.show_stats:
+            self.get_widget_by_id("stats_panel", expect_type=StatsPanel).update_from(self.metrics)
+        if self.metrics_file:
+            write_metrics(self.metrics, self.metrics_file, self.metrics_format)
+
+    def action_toggle_stats(self) -> None:
+        self.show_stats = not self.show_stats
+        self.get_widget_by_id("stats_panel", expect_type=StatsPanel).display = self.show_stats
+        self.update_stats()
+
+    def on_sky_alert_app_reference_data_ready(self, message: ReferenceDataReady) -> None:
+        for stage, seconds in self.watcher.reference.timings.items():
+            self.startup.add(f"load {stage} (background)", seconds)
+        if self.watcher.apply_reference():
+            self.startup.mark("reference data")
+            # fill in helicopter/interesting for the rows already shown
+            self.invalidate_seen_cells()
+            self.refresh_data()
+        self.startup_rendered()
+
+    def startup_rendered(self) -> None:
+        if not self.watcher.reference_ready or "first poll" not in self.startup:
+            return
+        self.startup.mark("first classified render")
+        if self.profile_startup:
+            self.exit()
+
+    def notify_alerts(self) -> None:
+        for event in self.watcher.alert_events:
+            if event.kind == "leave":
+                self.log.info(f"Alert cleared: {event.rule} {event.hex}")
+                continue
+            detail = f" ({event.detail})" if event.detail else ""
+            self.notify(f"{event.rule}: {event.hex.upper()}{detail}", severity="warning")
+
+    def invalidate_seen_cells(self) -> None:
+        """Forget cached rows for the aircraft the last refresh touched.
+
+        Everything in the snapshot got a new lastSeen; the delta adds the
+        aircraft that were evicted. Once the reference data is applied
+        every row may change colour, so the whole cache goes.
+        """
+        cells = self.seen_cells
+        if self.seen_cells_classified != self.watcher.reference_ready:
+            self.seen_cells_classified = self.watcher.reference_ready
+            cells.clear()
+            return
+        for hex in self.watcher.aircraft.hex:
+            cells.pop(hex, None)
+        for hex in self.watcher.delta.evicted:
+            cells.pop(hex, None)
+
+    def tick_prediction(self) -> None:
+        """Move the current table to where the aircraft should be by now."""
+        if self.watcher is None or not self.watcher.aircraft:
+            return
+        with self.metrics.time("render_seconds", table="current"):
+            self.update_current(self.watcher.clock())
+
+    def update_aircraft_table(self, table: DataTable, data: list[SeenAircraft], cache: Optional[dict] = None, extra: Optional[dict] = None) -> None:
         self.log.info(f"{table.id}:\t Updating with {len(data)} entries")
-        table.clear()
+        rows = []
         for ac in data:
             if ac.hex.startswith("~"):
                 self.log.debug(f"{table.id}:\t Skipping invalid hex {ac.hex}")
                 continue
-            closest = (
-                f"{ac.closestApproach:.2f}" if ac.closestApproach is not None else "N/A"
-            )
-            first_seen = ac.firstSeen.strftime("%Y-%m-%d %H:%M:%S")
-            last_seen = ac.lastSeen.strftime("%Y-%m-%d %H:%M:%S")
-            color: str = "white"
-            interestingdesc = self.watcher.get_interesting(ac.hex)
-            color = "white"
-            if ac.is_interesting and ac.is_helicopter:
-                color = "red"
-            elif ac.is_interesting:
-                color = "yellow"
-            elif ac.is_helicopter:
-                color = "blue"
-            elif ac.emergency and ac.emergency != "none":
-                color = "magenta"
-            self.log.debug(f"{table.id}:\t Adding row for {ac.hex} to table {table.id}")
-            self.log.debug(f"{table.id}:\t {ac.highest_altitude}")
-            rk = table.add_row(
-                f"[{color}]{ac.hex.upper()}[/{color}]",
-                f"[{color}]{ac.type}[/{color}]",
-                f"[{color}]{ac.tail}[/{color}]",
-                f"[{color}]{ac.flight}[/{color}]",
-                f"[{color}]{closest}[/{color}]",
-                f"[{color}]{first_seen}[/{color}]",
-                f"[{color}]{last_seen}[/{color}]",
-                #f"[{color}]{ac.is_helicopter}[/{color}]",
-                #f"[{color}]{ac.is_interesting}[/{color}]",
-                f"[{color}]{ac.groundSpeed} kt[/{color}]",
-                f"[{color}]{ac.altitude} ft[/{color}]",
-                f"[{color}]{ac.highest_altitude} ft[/{color}]",
-                f"[{color}]{ac.lowest_altitude} ft[/{color}]",
-                f"[{color}]{ac.fastestGs} kt[/{color}]",
-                f"[{color}]{ac.slowestGs} kt[/{color}]",
-                f'[{color}]{interestingdesc.get("$Operator")}[/{color}]',
-                
-                #f"[{color}]{ac.emergency}[/{color}]",
-                
-                key=ac.hex,
-            )
+            if cache is None:
+                cells = self.row_cells(ac)
+                rows.append((ac.hex, cells + extra[ac.hex] if extra is not None else cells))
+                continue
+            cells = cache.get(ac.hex)
+            if cells is None:
+                cells = cache[ac.hex] = self.row_cells(ac)
+            rows.append((ac.hex, cells))
+        stats = self.table_syncs[table.id].sync(rows)
+        self.log.debug(f"{table.id}:\t {stats}")
+
+    def row_cells(self, ac: SeenAircraft) -> tuple[str, ...]:
+        closest = (
+            f"{ac.closestApproach:.2f}" if ac.closestApproach is not None else "N/A"
+        )
+        first_seen = ac.firstSeen.strftime("%Y-%m-%d %H:%M:%S")
+        last_seen = ac.lastSeen.strftime("%Y-%m-%d %H:%M:%S")
+        interestingdesc = self.watcher.get_interesting(ac.hex)
+        color = "white"
+        if ac.is_interesting and ac.is_helicopter:
+            color = "red"
+        elif ac.is_interesting:
+            color = "yellow"
+        elif ac.is_helicopter:
+            color = "blue"
+        elif ac.emergency and ac.emergency != "none":
+            color = "magenta"
+        return (
+            f"[{color}]{ac.hex.upper()}[/{color}]",
+            f"[{color}]{ac.type}[/{color}]",
+            f"[{color}]{ac.tail}[/{color}]",
+            f"[{color}]{ac.flight}[/{color}]",
+            f"[{color}]{closest}[/{color}]",
+            f"[{color}]{first_seen}[/{color}]",
+            f"[{color}]{last_seen}[/{color}]",
+            #f"[{color}]{ac.is_helicopter}[/{color}]",
+            #f"[{color}]{ac.is_interesting}[/{color}]",
+            f"[{color}]{ac.groundSpeed} kt[/{color}]",
+            f"[{color}]{ac.altitude} ft[/{color}]",
+            f"[{color}]{_with_unit(ac.highest_altitude, 'ft')}[/{color}]",
+            f"[{color}]{_with_unit(ac.lowest_altitude, 'ft')}[/{color}]",
+            f"[{color}]{_with_unit(ac.fastestGs, 'kt')}[/{color}]",
+            f"[{color}]{_with_unit(ac.slowestGs, 'kt')}[/{color}]",
+            f"[{color}]{interestingdesc.operator if interestingdesc else None}[/{color}]",
+
+            #f"[{color}]{ac.emergency}[/{color}]",
+        )
 
     def update_seen(self) -> None:
         seentable = self.get_widget_by_id("seen_table", expect_type=DataTable)
-        sortedac = sorted(
-            self.watcher.seen.values(),
-            key=lambda ac: (ac.lastSeen, -ac.closestApproach),
-            reverse=True,
-        )
-        self.log.debug(sortedac)
-        self.update_aircraft_table(seentable, sortedac)
+        sortedac = self.watcher.seen.sorted_view("recent")
+        self.update_aircraft_table(seentable, sortedac, self.seen_cells)
 
     def update_interesting(self) -> None:
         interestingtable = self.get_widget_by_id(
@@ -166,65 +463,278 @@ class SkyAlertApp(App):
         )
         interestingac = [
             ac
-            for ac in self.watcher.seen.values()
+            for ac in self.watcher.seen.sorted_view("recent")
             if ac.is_interesting or ac.is_helicopter
         ]
-        sortedac = sorted(
-            interestingac,
-            key=lambda ac: (ac.lastSeen, -ac.closestApproach),
-            reverse=True,
-        )
-        self.update_aircraft_table(interestingtable, sortedac)
+        self.update_aircraft_table(interestingtable, interestingac, self.seen_cells)
+
+    def update_current(self, at: Optional[datetime] = None) -> None:
+        """Show the latest snapshot, dead-reckoned to `at` (default: the poll time)."""
+        from Snapshot import Snapshot
 
-    def update_current(self) -> None:
         currenttable = self.get_widget_by_id("current_table", expect_type=DataTable)
         aircraft: List[SeenAircraft] = []
-        for ac in self.watcher.aircraft:
-            dist = ac.distance_to(lat=self.watcher.lat, lon=self.watcher.lon, unit="nm")
+        cpa_cells: dict[str, tuple[str]] = {}
+        snap = self.watcher.aircraft
+        prediction = self.watcher.prediction
+        at = at or self.watcher.last_refresh
+        for i, hex in enumerate(snap.hex):
+            dist = prediction.distance(i, at)
+            alt = prediction.altitude(i, at)
             seenac = SeenAircraft(
-                hex=ac.hex,
-                type=ac.t,
-                typeDesc=ac.desc,
-                tail=ac.r,
-                flight=ac.flight,
+                hex=hex,
+                type=snap.t[i],
+                typeDesc=snap.desc[i],
+                tail=snap.r[i],
+                flight=snap.flight[i],
                 closestApproach=dist if dist is not None else float("inf"),
                 firstSeen=self.watcher.last_refresh,
                 lastSeen=self.watcher.last_refresh,
-                is_helicopter=self.watcher.is_helicopter(ac.t),
-                is_interesting=self.watcher.is_interesting(ac.hex),
-                groundSpeed=ac.gs,
-                altitude=ac.alt_geom if ac.alt_geom else 0,
-                emergency=ac.emergency,
+                is_helicopter=self.watcher.is_helicopter(snap.t[i]),
+                is_interesting=self.watcher.is_interesting(hex),
+                groundSpeed=Snapshot.value(snap.gs, i),
+                altitude=round(alt) if alt is not None else 0,
+                emergency=snap.emergency[i],
             )
             aircraft.append(seenac)
+            cpa_cells[hex] = (_cpa_cell(prediction.cpa(i), at),)
         sortedac = sorted(
             aircraft, key=lambda ac: (ac.lastSeen, -ac.closestApproach), reverse=True
         )
-        self.update_aircraft_table(currenttable, sortedac)
+        self.update_aircraft_table(currenttable, sortedac, extra=cpa_cells)
 
     def refresh_data(self) -> None:
-        self.watcher.refresh()
-        self.update_seen()
-        self.update_current()
-        self.update_interesting()
+        with self.metrics.time("render_seconds", table="seen"):
+            self.update_seen()
+        with self.metrics.time("render_seconds", table="current"):
+            self.update_current()
+        with self.metrics.time("render_seconds", table="interesting"):
+            self.update_interesting()
+
+
+def _cpa_cell(cpa, at: datetime) -> str:
+    """"0.42 nm in 35s" while the closest approach is still ahead."""
+    if cpa is None:
+        return ""
+    when, dist = cpa
+    remaining = (when - at).total_seconds()
+    return f"{dist:.2f} nm in {remaining:.0f}s" if remaining >= 1 else ""
+
+
+def _with_unit(value, unit: str) -> str:
+    return "N/A" if value is None else f"{value} {unit}"
+
+
+def _load_rules(path: str):
+    from AlertRules import load_rules
+
+    try:
+        return load_rules(path)
+    except ValueError as e:
+        raise click.UsageError(f"{path}: {e}")
 
 
 @click.command()
 @click.option(
-    "--lat", type=float, required=True, help="Latitude of the location to monitor"
+    "--lat", type=float, default=None, help="Latitude of the location to monitor"
 )
 @click.option(
-    "--lon", type=float, required=True, help="Longitude of the location to monitor"
+    "--lon", type=float, default=None, help="Longitude of the location to monitor"
 )
 @click.option(
     "--range",
     type=int,
-    default=5,
+    default=None,
     help="Range in nautical miles to monitor (default: 5)",
 )
-def main(lat: float, lon: float, range: int) -> None:
-    app = SkyAlertApp(lat=lat, lon=lon, range=range)
+@click.option(
+    "--interval",
+    type=click.FloatRange(min=0, min_open=True),
+    default=SkyAlertApp.POLL_INTERVAL,
+    help="Seconds between polls for ordinary traffic (default: 5)",
+)
+@click.option(
+    "--fast-interval",
+    type=click.FloatRange(min=0, min_open=True),
+    default=2.0,
+    help="Seconds between polls while a notable aircraft or close pass is in range (default: 2)",
+)
+@click.option(
+    "--idle-interval",
+    type=click.FloatRange(min=0, min_open=True),
+    default=15.0,
+    help="Longest wait between polls while the sky is empty (default: 15)",
+)
+@click.option(
+    "--quota",
+    type=click.IntRange(min=1),
+    default=None,
+    help="Never make more than this many API requests in any hour",
+)
+@click.option(
+    "--follow",
+    is_flag=True,
+    default=False,
+    help="Keep following alert list aircraft with /hex after they leave the range",
+)
+@click.option(
+    "--max-seen",
+    type=int,
+    default=None,
+    help="Keep at most this many aircraft in the seen table (interesting aircraft are always kept)",
+)
+@click.option(
+    "--max-seen-age",
+    type=float,
+    default=None,
+    help="Drop aircraft not seen for this many hours (interesting aircraft are always kept)",
+)
+@click.option(
+    "--decoder",
+    type=click.Choice(["auto", *DECODERS]),
+    default="json",
+    help="JSON decoder backend for API responses (default: json)",
+)
+@click.option(
+    "--rules",
+    "rules_path",
+    type=click.Path(exists=True, dir_okay=False),
+    default=None,
+    help="JSON file of alert rules (default: emergency squawks)",
+)
+@click.option(
+    "--http2/--no-http2",
+    default=False,
+    help="Talk HTTP/2 to the API (needs the http2 extra)",
+)
+@click.option(
+    "--profile-startup",
+    is_flag=True,
+    default=False,
+    help="Exit after the first classified render and print a startup timing breakdown",
+)
+@click.option(
+    "--stats",
+    "show_stats",
+    is_flag=True,
+    default=False,
+    help="Show the per-stage timing panel (toggle with 's')",
+)
+@click.option(
+    "--metrics-port",
+    type=int,
+    default=None,
+    help="Serve Prometheus metrics on this port (/metrics, /metrics.json)",
+)
+@click.option(
+    "--metrics-file",
+    type=click.Path(dir_okay=False),
+    default=None,
+    help="Rewrite this file with the metrics after every refresh",
+)
+@click.option(
+    "--metrics-format",
+    type=click.Choice(["prometheus", "json"]),
+    default="prometheus",
+    help="Format of --metrics-file (default: prometheus)",
+)
+@click.option(
+    "--record",
+    type=click.Path(dir_okay=False),
+    default=None,
+    help="Append every API response to this recording (.ndjson.gz)",
+)
+@click.option(
+    "--history",
+    type=click.Path(dir_okay=False),
+    default=None,
+    help="Keep sightings and positions in this SQLite database and restore them on startup",
+)
+@click.option(
+    "--history-hours",
+    type=click.FloatRange(min=0),
+    default=24.0,
+    help="Hours of history to restore into the seen table on startup (default: 24)",
+)
+@click.option(
+    "--replay",
+    type=click.Path(exists=True, dir_okay=False),
+    default=None,
+    help="Run offline from a recording; --lat/--lon/--range default to the recorded ones",
+)
+@click.option(
+    "--replay-speed",
+    type=click.FloatRange(min=0),
+    default=1.0,
+    help="Replay speed as a multiple of real time, 0 for as fast as possible (default: 1)",
+)
+def main(
+    lat: float | None,
+    lon: float | None,
+    range: int | None,
+    interval: float,
+    fast_interval: float,
+    idle_interval: float,
+    quota: int | None,
+    follow: bool,
+    max_seen: int | None,
+    max_seen_age: float | None,
+    decoder: str,
+    http2: bool,
+    rules_path: str | None,
+    profile_startup: bool,
+    record: str | None,
+    replay: str | None,
+    replay_speed: float,
+    show_stats: bool,
+    metrics_port: int | None,
+    metrics_file: str | None,
+    metrics_format: str,
+    history: str | None,
+    history_hours: float,
+) -> None:
+    if record and replay:
+        raise click.UsageError("--record and --replay cannot be combined")
+    # --interval alone moves the other two out of its way
+    fast_interval, idle_interval = min(fast_interval, interval), max(idle_interval, interval)
+    if replay and (lat is None or lon is None):
+        from Recording import first_point
+
+        point = first_point(replay)
+        if point is None:
+            raise click.UsageError(f"{replay} has no /point responses to replay")
+        lat, lon, recorded_range = point
+        range = recorded_range if range is None else range
+    if lat is None or lon is None:
+        raise click.UsageError("--lat and --lon are required (unless replaying)")
+    app = SkyAlertApp(
+        lat=lat,
+        lon=lon,
+        range=5 if range is None else range,
+        max_seen=max_seen,
+        max_seen_age=timedelta(hours=max_seen_age) if max_seen_age else None,
+        decoder=decoder,
+        http2=http2,
+        rules=_load_rules(rules_path) if rules_path else None,
+        profile_startup=profile_startup,
+        record=record,
+        replay=replay,
+        replay_speed=replay_speed,
+        show_stats=show_stats,
+        metrics_port=metrics_port,
+        metrics_file=metrics_file,
+        metrics_format=metrics_format,
+        history=history,
+        history_hours=history_hours,
+        interval=interval,
+        fast_interval=fast_interval,
+        idle_interval=idle_interval,
+        quota=quota,
+        follow=follow,
+    )
     app.run()
+    if profile_startup:
+        print(app.startup.report())
 
 
 if __name__ == "__main__":
@@ -0,0 +1,183 @@
+"""Shared HTTP connection pools for the Airplanes.live clients.
+
+Every AirplanesClient used to build its own httpx.Client with default
+limits, so each watcher (and the sync and async client of one watcher) kept
+separate connections. A SharedPool owns one sync and one async httpx
+transport. Any number of clients can be built on top of it and they all
+reuse the same keep-alive connections. Pool limits, keep-alive expiry and
+opt-in HTTP/2 are set through PoolConfig.
+
+Clients that are not given a pool create a private one and close it with
+themselves; a pool passed in is owned by the caller.
+
+The transports are instrumented with httpcore's `trace` extension, so the
+pool counts requests, new TCP connections and TLS handshakes
+(`SharedPool.metrics`). `requests - tcp_connects` is the number of requests
+that went over a reused connection.
+
+HTTP/2 needs the `h2` package (`pip install skyalert[http2]`).
+"""
+from __future__ import annotations
+
+import threading
+from dataclasses import dataclass
+from typing import Any, Dict, Optional
+
+import httpx
+
+try:
+    import h2
+except ImportError:  # pragma: no cover - optional dependency
+    h2 = None
+
+
+@dataclass(frozen=True)
+class PoolConfig:
+    max_connections: int = 10
+    max_keepalive_connections: int = 5
+    # the API is polled every few seconds; keep idle connections well past that
+    keepalive_expiry: float = 60.0
+    http2: bool = False
+
+    def limits(self) -> httpx.Limits:
+        return httpx.Limits(
+            max_connections=self.max_connections,
+            max_keepalive_connections=self.max_keepalive_connections,
+            keepalive_expiry=self.keepalive_expiry,
+        )
+
+
+class PoolMetrics:
+    """Thread-safe counters fed by the transport trace hooks."""
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self.requests: int = 0
+        self.tcp_connects: int = 0
+        self.tls_handshakes: int = 0
+        self.http2_connections: int = 0
+
+    def _incr(self, name: str) -> None:
+        with self._lock:
+            setattr(self, name, getattr(self, name) + 1)
+
+    def on_trace(self, event: str) -> None:
+        if event == "connection.connect_tcp.complete":
+            self._incr("tcp_connects")
+        elif event == "connection.start_tls.complete":
+            self._incr("tls_handshakes")
+        elif event == "http2.send_connection_init.complete":
+            self._incr("http2_connections")
+
+    @property
+    def reused(self) -> int:
+        """Requests served over an already-open connection."""
+        return max(0, self.requests - self.tcp_connects)
+
+    @property
+    def reuse_ratio(self) -> float:
+        return self.reused / self.requests if self.requests else 0.0
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {
+            "requests": self.requests,
+            "tcp_connects": self.tcp_connects,
+            "tls_handshakes": self.tls_handshakes,
+            "http2_connections": self.http2_connections,
+            "reused": self.reused,
+            "reuse_ratio": round(self.reuse_ratio, 4),
+        }
+
+
+class _SharedTransport(httpx.BaseTransport):
+    """Counts traffic and ignores close() from individual clients."""
+
+    def __init__(self, inner: httpx.HTTPTransport, metrics: PoolMetrics) -> None:
+        self._inner = inner
+        self._metrics = metrics
+
+    def handle_request(self, request: httpx.Request) -> httpx.Response:
+        self._metrics._incr("requests")
+        outer = request.extensions.get("trace")
+
+        def trace(event: str, info: Dict[str, Any]) -> None:
+            self._metrics.on_trace(event)
+            if outer is not None:
+                outer(event, info)
+
+        request.extensions["trace"] = trace
+        return self._inner.handle_request(request)
+
+    def close(self) -> None:
+        # owned by the SharedPool, which closes the inner transport
+        pass
+
+
+class _SharedAsyncTransport(httpx.AsyncBaseTransport):
+    def __init__(self, inner: httpx.AsyncHTTPTransport, metrics: PoolMetrics) -> None:
+        self._inner = inner
+        self._metrics = metrics
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        self._metrics._incr("requests")
+        outer = request.extensions.get("trace")
+
+        async def trace(event: str, info: Dict[str, Any]) -> None:
+            self._metrics.on_trace(event)
+            if outer is not None:
+                await outer(event, info)
+
+        request.extensions["trace"] = trace
+        return await self._inner.handle_async_request(request)
+
+    async def aclose(self) -> None:
+        pass
+
+
+class SharedPool:
+    """One set of keep-alive connections for any number of clients."""
+
+    def __init__(self, config: Optional[PoolConfig] = None) -> None:
+        self.config: PoolConfig = config or PoolConfig()
+        if self.config.http2 and h2 is None:
+            raise ImportError("HTTP/2 needs the h2 package: pip install skyalert[http2]")
+        self.metrics: PoolMetrics = PoolMetrics()
+        self._lock = threading.Lock()
+        self._sync: Optional[httpx.HTTPTransport] = None
+        self._async: Optional[httpx.AsyncHTTPTransport] = None
+
+    def _transport_kwargs(self) -> Dict[str, Any]:
+        return {"limits": self.config.limits(), "http2": self.config.http2}
+
+    @property
+    def transport(self) -> httpx.BaseTransport:
+        with self._lock:
+            if self._sync is None:
+                self._sync = httpx.HTTPTransport(**self._transport_kwargs())
+            return _SharedTransport(self._sync, self.metrics)
+
+    @property
+    def async_transport(self) -> httpx.AsyncBaseTransport:
+        with self._lock:
+            if self._async is None:
+                self._async = httpx.AsyncHTTPTransport(**self._transport_kwargs())
+            return _SharedAsyncTransport(self._async, self.metrics)
+
+    def client(self, base_url: str, timeout: float) -> httpx.Client:
+        return httpx.Client(base_url=base_url, timeout=timeout, transport=self.transport)
+
+    def async_client(self, base_url: str, timeout: float) -> httpx.AsyncClient:
+        return httpx.AsyncClient(base_url=base_url, timeout=timeout, transport=self.async_transport)
+
+    def close(self) -> None:
+        with self._lock:
+            sync, self._sync = self._sync, None
+        if sync is not None:
+            sync.close()
+
+    async def aclose(self) -> None:
+        self.close()
+        with self._lock:
+            transport, self._async = self._async, None
+        if transport is not None:
+            await transport.aclose()
@@ -0,0 +1,474 @@
+"""Headless polling loop that writes an NDJSON event stream.
+
+Runs PlaneWatcher's refresh/tracking loop without Textual and turns each
+refresh into events, one JSON object per line:
+
+    {"event": "new", "time": "...", "hex": "a1b2c3", "flight": "N123AB", "type": "R44", ...}
+    {"event": "closest", "time": "...", "hex": "a1b2c3", "distance_nm": 1.42, ...}
+    {"event": "left", "time": "...", "hex": "a1b2c3", "closest_nm": 0.87, ...}
+    {"event": "alert", "time": "...", "hex": "a1b2c3", "kind": "enter", "rule": "emergency", ...}
+
+- new: first sighting of a hex since the daemon started
+- closest: the closest approach improved by at least `closest_step` nm
+- left: the hex has been missing from `leave_after` polls in a row
+- alert: an alert rule fired, changed or cleared (AlertRules.AlertEvent)
+- follow: with --follow, a /hex report of an alert list aircraft that
+  left the zone (see FollowList.py)
+
+With one or more `--zone NAME,LAT,LON,RADIUS_NM` the daemon watches
+every zone through a MultiSiteWatcher, which covers them with as few
+/point queries as it can, and each event carries `"zone": NAME`.
+
+All events from one poll go to the sinks in a single batch (see
+EventStream.py). With a PollScheduler the wait between polls adapts to
+the traffic and to API errors; without one it is a fixed `interval`.
+Run `python Daemon.py --lat .. --lon .. -o - -o unix:/tmp/skyalert.sock`.
+"""
+from __future__ import annotations
+
+import asyncio
+import logging
+import signal
+from datetime import timedelta
+from typing import Any, Dict, List, Optional, Union
+
+import click
+import httpx
+
+from Decoders import DECODERS
+from EventStream import EventStream, open_sink
+from FollowList import FollowedAircraft, FollowList
+from HistoryStore import HistoryStore
+from Instrumentation import Metrics, MetricsServer, write_metrics
+from MultiSiteWatcher import MultiSiteWatcher, WatchZone
+from PlaneWatcher import PlaneWatcher
+from PollScheduler import MAX_INTERVAL, PollScheduler, follow_between_polls
+from Recording import ReplayFinished
+from Snapshot import Snapshot
+
+logger = logging.getLogger(__name__)
+
+
+class ZoneEvents:
+    """Turns one PlaneWatcher's refreshes into events; `zone` tags them."""
+
+    def __init__(
+        self,
+        watcher: PlaneWatcher,
+        zone: Optional[str] = None,
+        closest_step: float = 0.1,
+        leave_after: int = 2,
+    ) -> None:
+        self.watcher = watcher
+        self.zone = zone
+        self.closest_step = closest_step
+        self.leave_after = leave_after
+        # hex -> consecutive polls it has been missing from (absent ones only)
+        self._misses: Dict[str, int] = {}
+        # hex -> closest approach last reported, until evicted from seen
+        self._closest: Dict[str, float] = {}
+
+    def _row(self, i: int) -> Dict[str, Any]:
+        snap = self.watcher.aircraft
+        value = Snapshot.value
+        return {
+            "flight": snap.flight[i] or None,
+            "reg": snap.r[i] or None,
+            "type": snap.t[i] or None,
+            "lat": value(snap.lat, i),
+            "lon": value(snap.lon, i),
+            "alt": value(snap.alt_baro, i),
+            "gs": value(snap.gs, i),
+            "track": value(snap.track, i),
+            "squawk": snap.squawk[i] or None,
+            "distance_nm": self.watcher.geometry.distance(i),
+        }
+
+    def events(self) -> List[Dict[str, Any]]:
+        """Events for the watcher's latest refresh, from its SeenDelta."""
+        watcher = self.watcher
+        snap = watcher.aircraft
+        delta = watcher.delta
+        now = watcher.last_refresh.isoformat()
+        events: List[Dict[str, Any]] = []
+        for hex in delta.new:
+            i = snap.index_of(hex)
+            events.append({
+                "event": "new",
+                "time": now,
+                "hex": hex,
+                **self._row(i),
+                "helicopter": watcher.is_helicopter(snap.t[i]),
+                "interesting": watcher.is_interesting(hex),
+            })
+            self._closest[hex] = watcher.seen[hex].closestApproach
+        for hex, fields in delta.updated.items():
+            if "closestApproach" not in fields:
+                continue
+            closest = watcher.seen[hex].closestApproach
+            if closest <= self._closest.get(hex, float("inf")) - self.closest_step:
+                events.append({"event": "closest", "time": now, "hex": hex, **self._row(snap.index_of(hex))})
+                self._closest[hex] = closest
+        for hex in delta.disappeared:
+            self._misses[hex] = 0
+        for hex in delta.appeared:
+            self._misses.pop(hex, None)
+        for hex in list(self._misses):
+            self._misses[hex] += 1
+            if self._misses[hex] >= self.leave_after:
+                del self._misses[hex]
+                # the tracked closest approach, not the last one reported
+                ac = watcher.seen.get(hex)
+                closest = ac.closestApproach if ac is not None else self._closest.get(hex)
+                events.append({
+                    "event": "left",
+                    "time": now,
+                    "hex": hex,
+                    "closest_nm": None if closest is None or closest == float("inf") else closest,
+                })
+        for hex in delta.evicted:
+            self._closest.pop(hex, None)
+        for alert in watcher.alert_events:
+            events.append({
+                "event": "alert",
+                "time": alert.at.isoformat(),
+                "hex": alert.hex,
+                "kind": alert.kind,
+                "rule": alert.rule,
+                "detail": alert.detail,
+                "previous": alert.previous,
+            })
+        if self.zone is not None:
+            for event in events:
+                event["zone"] = self.zone
+        return events
+
+
+class Daemon:
+    """Polls a PlaneWatcher, or every zone of a MultiSiteWatcher, into an EventStream."""
+
+    def __init__(
+        self,
+        watcher: Union[PlaneWatcher, MultiSiteWatcher],
+        stream: EventStream,
+        interval: float = 5.0,
+        closest_step: float = 0.1,
+        leave_after: int = 2,
+        metrics_file: Optional[str] = None,
+        scheduler: Optional[PollScheduler] = None,
+    ) -> None:
+        self.watcher = watcher
+        self.stream = stream
+        self.interval = interval
+        self.scheduler = scheduler
+        self.closest_step = closest_step
+        self.leave_after = leave_after
+        self.metrics_file = metrics_file
+        if isinstance(watcher, MultiSiteWatcher):
+            zones = [ZoneEvents(w, name, closest_step, leave_after) for name, w in watcher.watchers.items()]
+        else:
+            zones = [ZoneEvents(watcher, None, closest_step, leave_after)]
+        self.zones: List[ZoneEvents] = zones
+        self.polls: int = 0
+        self._stop = asyncio.Event()
+
+    def events(self) -> List[Dict[str, Any]]:
+        """Events for the latest refresh of every zone."""
+        return [event for zone in self.zones for event in zone.events()]
+
+    def follow_events(self, reported: List[FollowedAircraft]) -> List[Dict[str, Any]]:
+        return [
+            {
+                "event": "follow",
+                "time": ac.at.isoformat(),
+                "hex": ac.hex,
+                "flight": ac.flight or None,
+                "lat": ac.lat,
+                "lon": ac.lon,
+                "alt": ac.alt,
+                "gs": ac.gs,
+                "track": ac.track,
+                "distance_nm": ac.distance_nm,
+            }
+            for ac in reported
+        ]
+
+    async def poll(self) -> None:
+        """Refresh once and write the resulting events as one batch."""
+        await self.watcher.refresh_async()
+        self.polls += 1
+        for event in self.events():
+            await self.stream.emit(event)
+        await self.stream.flush()
+        if self.metrics_file:
+            write_metrics(self.watcher.metrics, self.metrics_file)
+
+    def stop(self) -> None:
+        self._stop.set()
+
+    async def run(self) -> None:
+        """Poll until stop() (SIGINT/SIGTERM under main) or the replay ends."""
+        await self.stream.start()
+        try:
+            scheduler = self.scheduler
+            while not self._stop.is_set():
+                interval = self.interval
+                if scheduler is not None:
+                    scheduler.limit_retries(self.watcher.async_client)
+                try:
+                    await self.poll()
+                except ReplayFinished:
+                    logger.warning("Replay finished")
+                    return
+                except (httpx.HTTPError, ValueError) as e:
+                    logger.error(f"Refresh failed: {e}")
+                    if scheduler is not None:
+                        interval = scheduler.after_error(e)
+                else:
+                    if scheduler is not None:
+                        interval = scheduler.after_poll(self.watcher)
+                    if scheduler is not None and isinstance(self.watcher, PlaneWatcher):
+                        interval, reported = await follow_between_polls(self.watcher, scheduler, interval)
+                        # one batch per /hex round, like a poll
+                        for event in self.follow_events(reported):
+                            await self.stream.emit(event)
+                        await self.stream.flush()
+                try:
+                    await asyncio.wait_for(self._stop.wait(), interval)
+                except asyncio.TimeoutError:
+                    pass
+        finally:
+            await self.stream.aclose()
+            await self.watcher.aclose()
+
+
+def parse_zones(ctx: click.Context, param: click.Parameter, values: tuple[str, ...]) -> List[WatchZone]:
+    """click callback: each --zone is NAME,LAT,LON,RADIUS_NM."""
+    zones = []
+    for value in values:
+        parts = [p.strip() for p in value.split(",")]
+        try:
+            name, lat, lon, radius = parts
+            zones.append(WatchZone(name, float(lat), float(lon), float(radius)))
+        except ValueError:
+            raise click.BadParameter(f"{value!r} is not NAME,LAT,LON,RADIUS_NM", ctx, param)
+        if not name:
+            raise click.BadParameter(f"{value!r} has no zone name", ctx, param)
+    return zones
+
+
+@click.command()
+@click.option("--lat", type=float, default=None, help="Latitude of the location to monitor")
+@click.option("--lon", type=float, default=None, help="Longitude of the location to monitor")
+@click.option("--range", type=int, default=None, help="Range in nautical miles to monitor (default: 5)")
+@click.option(
+    "--zone",
+    "zones",
+    multiple=True,
+    callback=parse_zones,
+    help="Watch a named zone, NAME,LAT,LON,RADIUS_NM, instead of --lat/--lon/--range. "
+    "Repeatable; events carry the zone name",
+)
+@click.option(
+    "--interval",
+    type=click.FloatRange(min=0, min_open=True),
+    default=5.0,
+    help="Seconds between polls for ordinary traffic (default: 5; 0 when replaying)",
+)
+@click.option(
+    "--fast-interval",
+    type=click.FloatRange(min=0, min_open=True),
+    default=2.0,
+    help="Seconds between polls while a notable aircraft or close pass is in range (default: 2)",
+)
+@click.option(
+    "--idle-interval",
+    type=click.FloatRange(min=0, min_open=True),
+    default=15.0,
+    help="Longest wait between polls while the sky is empty (default: 15)",
+)
+@click.option(
+    "--quota",
+    type=click.IntRange(min=1),
+    default=None,
+    help="Never make more than this many API requests in any hour",
+)
+@click.option(
+    "--follow",
+    is_flag=True,
+    default=False,
+    help="Keep following alert list aircraft with /hex after they leave the range",
+)
+@click.option(
+    "-o",
+    "--output",
+    "outputs",
+    multiple=True,
+    default=["-"],
+    help='Where to write events: "-" (stdout), a file, or unix:PATH. Repeatable',
+)
+@click.option(
+    "--closest-step",
+    type=click.FloatRange(min=0),
+    default=0.1,
+    help="Report a closer approach only when it improves by this many nm (default: 0.1)",
+)
+@click.option("--max-seen", type=int, default=None, help="Keep at most this many seen aircraft")
+@click.option("--max-seen-age", type=float, default=None, help="Drop aircraft not seen for this many hours")
+@click.option(
+    "--decoder",
+    type=click.Choice(["auto", *DECODERS]),
+    default="json",
+    help="JSON decoder backend for API responses (default: json)",
+)
+@click.option(
+    "--rules",
+    "rules_path",
+    type=click.Path(exists=True, dir_okay=False),
+    default=None,
+    help="JSON file of alert rules (default: emergency squawks)",
+)
+@click.option(
+    "--replay",
+    type=click.Path(exists=True, dir_okay=False),
+    default=None,
+    help="Run offline from a recording; --lat/--lon/--range default to the recorded ones",
+)
+@click.option(
+    "--replay-speed",
+    type=click.FloatRange(min=0),
+    default=1.0,
+    help="Replay speed as a multiple of real time, 0 for as fast as possible (default: 1)",
+)
+@click.option(
+    "--history",
+    type=click.Path(dir_okay=False),
+    default=None,
+    help="Keep sightings and positions in this SQLite database and restore them on startup",
+)
+@click.option(
+    "--history-hours",
+    type=click.FloatRange(min=0),
+    default=24.0,
+    help="Hours of history to restore on startup (default: 24)",
+)
+@click.option("--metrics-port", type=int, default=None, help="Serve Prometheus metrics on this port")
+@click.option("--metrics-file", type=click.Path(dir_okay=False), default=None, help="Rewrite this file with the metrics after every poll")
+def main(
+    lat: float | None,
+    lon: float | None,
+    range: int | None,
+    zones: List[WatchZone],
+    interval: float,
+    fast_interval: float,
+    idle_interval: float,
+    quota: int | None,
+    follow: bool,
+    outputs: tuple[str, ...],
+    closest_step: float,
+    max_seen: int | None,
+    max_seen_age: float | None,
+    decoder: str,
+    rules_path: str | None,
+    replay: str | None,
+    replay_speed: float,
+    metrics_port: int | None,
+    metrics_file: str | None,
+    history: str | None,
+    history_hours: float,
+) -> None:
+    from AlertRules import DEFAULT_RULES, load_rules
+    from Recording import Replay, first_point
+
+    args: Dict[str, Any] = {}
+    adaptive = not replay
+    if zones:
+        if lat is not None or lon is not None or range is not None:
+            raise click.UsageError("--zone replaces --lat/--lon/--range")
+        if follow or history:
+            raise click.UsageError("--follow and --history watch a single zone; drop them or --zone")
+    if replay:
+        if not zones and (lat is None or lon is None):
+            point = first_point(replay)
+            if point is None:
+                raise click.UsageError(f"{replay} has no /point responses to replay")
+            lat, lon, recorded_range = point
+            range = recorded_range if range is None else range
+        source = Replay(replay, speed=replay_speed)
+        args.update(client=source.client(decoder), async_client=source.async_client(decoder), clock=source.now)
+        # a replay paces itself to the recording
+        interval = 0
+    if not zones and (lat is None or lon is None):
+        raise click.UsageError("--lat and --lon or --zone are required (unless replaying)")
+    # --interval alone moves the other two out of its way
+    fast_interval, idle_interval = min(fast_interval, interval), max(idle_interval, interval)
+    metrics = Metrics()
+    store = HistoryStore(history, restore_hours=history_hours, metrics=metrics) if history else None
+    try:
+        rules = load_rules(rules_path) if rules_path else DEFAULT_RULES
+    except ValueError as e:
+        raise click.UsageError(f"{rules_path}: {e}")
+    watcher: Union[PlaneWatcher, MultiSiteWatcher]
+    if zones:
+        try:
+            watcher = MultiSiteWatcher(
+                zones,
+                max_seen=max_seen,
+                max_seen_age=timedelta(hours=max_seen_age) if max_seen_age else None,
+                decoder=decoder,
+                rules=rules,
+                metrics=metrics,
+                **args,
+            )
+        except ValueError as e:
+            raise click.UsageError(str(e))
+    else:
+        watcher = PlaneWatcher(
+            lat,
+            lon,
+            5 if range is None else range,
+            max_seen=max_seen,
+            max_seen_age=timedelta(hours=max_seen_age) if max_seen_age else None,
+            decoder=decoder,
+            rules=rules,
+            metrics=metrics,
+            history=store,
+            follow=FollowList() if follow and adaptive else None,
+            **args,
+        )
+    daemon = Daemon(
+        watcher,
+        EventStream([open_sink(target) for target in outputs]),
+        interval=interval,
+        closest_step=closest_step,
+        metrics_file=metrics_file,
+        scheduler=PollScheduler(
+            interval,
+            fast_interval,
+            idle_interval,
+            max_interval=max(MAX_INTERVAL, idle_interval),
+            quota_per_hour=quota,
+            metrics=metrics,
+        ) if adaptive else None,
+    )
+    server = MetricsServer(watcher.metrics, metrics_port) if metrics_port is not None else None
+
+    async def run() -> None:
+        loop = asyncio.get_running_loop()
+        for sig in (signal.SIGINT, signal.SIGTERM):
+            loop.add_signal_handler(sig, daemon.stop)
+        await daemon.run()
+
+    try:
+        asyncio.run(run())
+    except FileExistsError as e:  # -o unix:PATH over something that is not a socket
+        raise click.ClickException(str(e))
+    finally:
+        if server is not None:
+            server.close()
+        if store is not None:
+            store.close()
+
+
+if __name__ == "__main__":
+    main()
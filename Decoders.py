@@ -0,0 +1,212 @@
+"""Pluggable JSON decoders for Airplanes.live responses.
+
+A dense /point response is several hundred KB per poll, so decoding is a
+visible part of each refresh. The client delegates decoding to one of these
+backends:
+
+- "json": the stdlib, via httpx's Response.json() (always available)
+- "orjson": orjson.loads on the raw body
+- "msgspec": msgspec's untyped decoder on the raw body
+- "msgspec-schema": msgspec decoding the /point envelope straight into
+  typed AircraftRecord structs. Only the fields the model declares are
+  built; everything else in the payload is skipped without ever becoming
+  a Python object.
+
+"auto" picks the fastest installed backend. orjson and msgspec are
+optional (`pip install skyalert[fast]`).
+"""
+from __future__ import annotations
+
+import json
+import logging
+from typing import TYPE_CHECKING, Any, Callable, Dict, List, Optional, Sequence, Union
+
+if TYPE_CHECKING:  # only for annotations; keeps httpx off the App's startup path
+    import httpx
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - optional dependency
+    orjson = None
+
+try:
+    import msgspec
+except ImportError:  # pragma: no cover - optional dependency
+    msgspec = None
+
+logger = logging.getLogger(__name__)
+
+
+def aircraft_list(data: Any) -> List[Any] | None:
+    """Pull the aircraft list out of a /point style response."""
+    if not data:
+        return None
+    if isinstance(data, list):
+        return data
+    return data.get('ac',[])
+
+
+class JsonDecoder:
+    """Stdlib decoder; the default, and the base for the other backends."""
+
+    name = "json"
+
+    def decode(self, content: bytes) -> Any:
+        return json.loads(content)
+
+    def decode_response(self, resp: httpx.Response) -> Any:
+        return resp.json()
+
+    def decode_point(self, content: bytes) -> List[Any] | None:
+        return aircraft_list(self.decode(content))
+
+    def decode_point_response(self, resp: httpx.Response) -> List[Any] | None:
+        return aircraft_list(self.decode_response(resp))
+
+
+class OrjsonDecoder(JsonDecoder):
+    name = "orjson"
+
+    def __init__(self) -> None:
+        if orjson is None:
+            raise ImportError("orjson is not installed")
+
+    def decode(self, content: bytes) -> Any:
+        return orjson.loads(content)
+
+    def decode_response(self, resp: httpx.Response) -> Any:
+        return orjson.loads(resp.content)
+
+
+class MsgspecDecoder(JsonDecoder):
+    name = "msgspec"
+
+    def __init__(self) -> None:
+        if msgspec is None:
+            raise ImportError("msgspec is not installed")
+        self._decoder = msgspec.json.Decoder()
+
+    def decode(self, content: bytes) -> Any:
+        return self._decoder.decode(content)
+
+    def decode_response(self, resp: httpx.Response) -> Any:
+        return self._decoder.decode(resp.content)
+
+
+if msgspec is not None:
+
+    class AircraftRecord(msgspec.Struct, gc=False):
+        """Typed aircraft record mirroring AircraftResp's fields.
+
+        Provides the `.get()` that Snapshot and AircraftResp.from_dict use,
+        so it can stand in for the decoded dict everywhere. Fields the API
+        sends that are not declared here are skipped by the decoder.
+        """
+
+        hex: str = ""
+        type: str = ""
+        flight: Optional[str] = None
+        r: str = ""
+        t: str = ""
+        desc: Optional[str] = None
+        alt_baro: Union[float, str, None] = None
+        alt_geom: Optional[float] = None
+        gs: Optional[float] = None
+        track: Optional[float] = None
+        baro_rate: Optional[float] = None
+        nav_qnh: Optional[float] = None
+        nav_altitude_mcp: Optional[float] = None
+        nav_heading: Optional[float] = None
+        lat: Optional[float] = None
+        lon: Optional[float] = None
+        nic: Optional[int] = None
+        rc: Optional[int] = None
+        seen_pos: Optional[float] = None
+        squawk: Optional[str] = None
+        emergency: Optional[str] = None
+        category: Optional[str] = None
+        sil: Optional[int] = None
+        sil_type: Optional[str] = None
+        gva: Optional[int] = None
+        sda: Optional[int] = None
+        alert: Optional[int] = None
+        spi: Optional[int] = None
+        mlat: Optional[List[Any]] = None
+        tisb: Optional[List[Any]] = None
+        messages: Optional[int] = None
+        seen: Optional[float] = None
+        rssi: Optional[float] = None
+        dst: Optional[float] = None
+        dir: Optional[float] = None
+        version: Optional[int] = None
+        nic_baro: Optional[int] = None
+        nac_p: Optional[int] = None
+        nac_v: Optional[int] = None
+
+        def get(self, name: str, default: Any = None) -> Any:
+            # like dict.get on a record without the key: absent fields are
+            # None here, so they give the caller's default too
+            value = getattr(self, name, None)
+            return default if value is None else value
+
+    class PointEnvelope(msgspec.Struct):
+        ac: List[AircraftRecord] = []
+
+else:
+    AircraftRecord = None
+    PointEnvelope = None
+
+
+class MsgspecSchemaDecoder(MsgspecDecoder):
+    name = "msgspec-schema"
+
+    def __init__(self) -> None:
+        super().__init__()
+        # strict=False lets numbers sent as strings (and vice versa) through
+        self._point_decoder = msgspec.json.Decoder(PointEnvelope, strict=False)
+
+    def decode_point_response(self, resp: httpx.Response) -> List[Any] | None:
+        return self.decode_point(resp.content)
+
+    def decode_point(self, content: bytes) -> List[Any] | None:
+        try:
+            return self._point_decoder.decode(content).ac
+        except msgspec.ValidationError as e:
+            # the API changed a field's type; fall back to untyped records
+            logger.warning("Schema decode failed (%s), falling back to untyped decode", e)
+            return aircraft_list(self.decode(content))
+
+
+DECODERS: Dict[str, Callable[[], JsonDecoder]] = {
+    "json": JsonDecoder,
+    "orjson": OrjsonDecoder,
+    "msgspec": MsgspecDecoder,
+    "msgspec-schema": MsgspecSchemaDecoder,
+}
+
+# fastest first
+_AUTO_ORDER: Sequence[str] = ("msgspec-schema", "orjson", "json")
+
+
+def available_decoders() -> List[str]:
+    names = ["json"]
+    if orjson is not None:
+        names.append("orjson")
+    if msgspec is not None:
+        names.extend(["msgspec", "msgspec-schema"])
+    return names
+
+
+def get_decoder(decoder: Union[str, JsonDecoder, None] = "json") -> JsonDecoder:
+    """Resolve a decoder name ("auto" for the fastest installed) or instance."""
+    if isinstance(decoder, JsonDecoder):
+        return decoder
+    name = decoder or "json"
+    if name == "auto":
+        installed = available_decoders()
+        name = next(n for n in _AUTO_ORDER if n in installed)
+    try:
+        factory = DECODERS[name]
+    except KeyError:
+        raise ValueError(f"Unknown decoder {name!r}; choose from {', '.join(DECODERS)} or auto")
+    return factory()
@@ -0,0 +1,185 @@
+"""Buffered NDJSON event output for the headless daemon.
+
+Events are plain dicts, encoded one per line (orjson when installed) into
+an in-memory buffer. The buffer goes out to every sink as a single write
+when `flush()` is called (once per poll), or earlier if it grows past
+`max_buffer` bytes. So a poll that produces hundreds of events costs one
+write per sink, not one per event.
+
+Sinks:
+- StreamSink: a binary file object such as stdout or an append-mode file
+- UnixSocketSink: a local stream socket that any number of readers can
+  connect to (`nc -U /run/skyalert.sock`). Every reader gets the events
+  from the moment it connects. A reader that falls behind by more than
+  `max_backlog` bytes is disconnected instead of slowing the daemon down.
+
+`open_sink("-" | "path" | "unix:/path")` builds one from a CLI argument.
+"""
+from __future__ import annotations
+
+import asyncio
+import json
+from abc import ABC, abstractmethod
+import logging
+import os
+import stat
+import sys
+from typing import Any, BinaryIO, Dict, List, Optional, Sequence, Set
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - optional dependency
+    orjson = None
+
+logger = logging.getLogger(__name__)
+
+# bytes read at a time from (and dropped by) a socket reader
+READ_CHUNK = 4096
+
+
+def encode_event(event: Dict[str, Any]) -> bytes:
+    if orjson is not None:
+        return orjson.dumps(event, default=str) + b"\n"
+    return json.dumps(event, separators=(",", ":"), default=str).encode() + b"\n"
+
+
+class Sink(ABC):
+    """Where EventStream batches go; subclasses must implement write()."""
+
+    async def start(self) -> None:
+        pass
+
+    @abstractmethod
+    async def write(self, data: bytes) -> None:
+        """Write one batch of encoded events."""
+
+    async def aclose(self) -> None:
+        pass
+
+
+class StreamSink(Sink):
+    """Writes batches to a binary file object and flushes after each."""
+
+    def __init__(self, stream: BinaryIO, close: bool = False) -> None:
+        self.stream = stream
+        self._close = close
+
+    async def write(self, data: bytes) -> None:
+        self.stream.write(data)
+        self.stream.flush()
+
+    async def aclose(self) -> None:
+        if self._close:
+            self.stream.close()
+
+
+class UnixSocketSink(Sink):
+    """Broadcasts batches to every reader connected to a Unix socket."""
+
+    def __init__(self, path: str, max_backlog: int = 4 * 2**20) -> None:
+        self.path = path
+        self.max_backlog = max_backlog
+        self._server: Optional[asyncio.AbstractServer] = None
+        self._readers: Set[asyncio.StreamWriter] = set()
+        self.dropped: int = 0
+
+    async def start(self) -> None:
+        try:
+            mode = os.lstat(self.path).st_mode
+        except FileNotFoundError:
+            pass
+        else:
+            if not stat.S_ISSOCK(mode):
+                raise FileExistsError(f"{self.path} exists and is not a socket; not replacing it")
+            os.unlink(self.path)  # stale socket from an earlier run
+        self._server = await asyncio.start_unix_server(self._connected, path=self.path)
+
+    async def _connected(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        self._readers.add(writer)
+        try:
+            # readers only listen: discard whatever they send, EOF means
+            # they went away
+            while await reader.read(READ_CHUNK):
+                pass
+        finally:
+            self._readers.discard(writer)
+            writer.close()
+
+    @property
+    def readers(self) -> int:
+        return len(self._readers)
+
+    async def write(self, data: bytes) -> None:
+        for writer in list(self._readers):
+            if writer.is_closing():
+                self._readers.discard(writer)
+            elif writer.transport.get_write_buffer_size() > self.max_backlog:
+                logger.warning("Dropping a slow event stream reader")
+                self.dropped += 1
+                self._readers.discard(writer)
+                writer.close()
+            else:
+                writer.write(data)
+
+    async def aclose(self) -> None:
+        for writer in self._readers:
+            writer.close()
+        self._readers.clear()
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+            self._server = None
+            # only our own socket, never whatever start() refused to replace
+            if os.path.exists(self.path) and stat.S_ISSOCK(os.lstat(self.path).st_mode):
+                os.unlink(self.path)
+
+
+def open_sink(target: str) -> Sink:
+    """"-" for stdout, "unix:/path" for a socket, anything else is a file."""
+    if target == "-":
+        return StreamSink(sys.stdout.buffer)
+    if target.startswith("unix:"):
+        return UnixSocketSink(target[len("unix:"):])
+    return StreamSink(open(target, "ab"), close=True)
+
+
+class EventStream:
+    """Encodes events into a buffer and writes it to all sinks in batches."""
+
+    def __init__(self, sinks: Sequence[Sink], max_buffer: int = 256 * 1024) -> None:
+        self.sinks: List[Sink] = list(sinks)
+        self.max_buffer = max_buffer
+        self._buffer: List[bytes] = []
+        self._size: int = 0
+        self.emitted: int = 0
+        self.batches: int = 0
+
+    async def start(self) -> None:
+        for sink in self.sinks:
+            await sink.start()
+
+    async def emit(self, event: Dict[str, Any]) -> None:
+        line = encode_event(event)
+        self._buffer.append(line)
+        self._size += len(line)
+        self.emitted += 1
+        if self._size >= self.max_buffer:
+            await self.flush()
+
+    async def flush(self) -> None:
+        if not self._buffer:
+            return
+        data = b"".join(self._buffer)
+        self._buffer.clear()
+        self._size = 0
+        self.batches += 1
+        for sink in self.sinks:
+            try:
+                await sink.write(data)
+            except (OSError, ValueError) as e:
+                logger.error("Event sink %r failed: %s", sink, e)
+
+    async def aclose(self) -> None:
+        await self.flush()
+        for sink in self.sinks:
+            await sink.aclose()
@@ -0,0 +1,251 @@
+"""Per-aircraft flight paths in bounded typed-array buffers.
+
+Each Track keeps its samples (time, lat, lon, alt, gs, track) column by
+column in `array` buffers, 48 bytes per sample on every platform
+(doubles and a 64-bit altitude), instead of a list of objects. Memory
+per aircraft is bounded by two limits:
+
+- the newest `capacity` samples are kept at full resolution;
+- when those are full, the oldest `segment` of them are simplified
+  with Douglas-Peucker (points within `tolerance_nm` of the simplified
+  line are dropped) and moved to the older part of the track. When that
+  grows past `max_older` samples it is simplified again with twice the
+  tolerance, and the oldest samples are dropped as a last resort.
+
+Straight legs shrink to their end points and turns keep their shape, so
+an hour-long track usually fits in a few hundred samples.
+
+TrackHistory holds one Track per selected aircraft (by default: on the
+alert list, helicopters and emergencies). PlaneWatcher feeds it every
+snapshot and exposes it through `get_track(hex)`.
+"""
+from __future__ import annotations
+
+import math
+from array import array
+from datetime import datetime
+from typing import Callable, Dict, List, Mapping, NamedTuple, Optional, Sequence
+
+from Geometry import NM_PER_DEG
+from SeenAircraft import SeenAircraft
+from Snapshot import MISSING_ALT, Snapshot
+
+
+class TrackPoint(NamedTuple):
+    t: float  # Unix timestamp
+    lat: float
+    lon: float
+    alt: Optional[int]
+    gs: Optional[float]
+    track: Optional[float]
+
+
+def simplify(lat: Sequence[float], lon: Sequence[float], tolerance_nm: float) -> List[int]:
+    """Indices kept by Douglas-Peucker on a local flat projection.
+
+    The first and last points are always kept.
+    """
+    n = len(lat)
+    if n <= 2:
+        return list(range(n))
+    scale = math.cos(math.radians(lat[0])) * NM_PER_DEG
+    xs = [(x - lon[0]) * scale for x in lon]
+    ys = [(y - lat[0]) * NM_PER_DEG for y in lat]
+    keep = [False] * n
+    keep[0] = keep[-1] = True
+    stack = [(0, n - 1)]
+    while stack:
+        first, last = stack.pop()
+        x0, y0 = xs[first], ys[first]
+        dx, dy = xs[last] - x0, ys[last] - y0
+        length = math.hypot(dx, dy)
+        worst, worst_i = -1.0, -1
+        for i in range(first + 1, last):
+            px, py = xs[i] - x0, ys[i] - y0
+            if length:
+                # distance to the segment, not the infinite line, so
+                # out-and-back legs keep their far end
+                u = max(0.0, min(1.0, (px * dx + py * dy) / (length * length)))
+                d = math.hypot(px - u * dx, py - u * dy)
+            else:
+                d = math.hypot(px, py)
+            if d > worst:
+                worst, worst_i = d, i
+        if worst > tolerance_nm:
+            keep[worst_i] = True
+            stack.append((first, worst_i))
+            stack.append((worst_i, last))
+    return [i for i in range(n) if keep[i]]
+
+
+class _Columns:
+    """Parallel typed arrays, one per TrackPoint field."""
+
+    __slots__ = ("t", "lat", "lon", "alt", "gs", "track")
+
+    def __init__(self) -> None:
+        self.t = array("d")
+        self.lat = array("d")
+        self.lon = array("d")
+        # "q", not "l": a C long is only 4 bytes on Windows
+        self.alt = array("q")
+        self.gs = array("d")
+        self.track = array("d")
+
+    def __len__(self) -> int:
+        return len(self.t)
+
+    def append(self, t: float, lat: float, lon: float, alt: int, gs: float, track: float) -> None:
+        self.t.append(t)
+        self.lat.append(lat)
+        self.lon.append(lon)
+        self.alt.append(alt)
+        self.gs.append(gs)
+        self.track.append(track)
+
+    def keep(self, indices: Sequence[int]) -> None:
+        for name in self.__slots__:
+            column = getattr(self, name)
+            setattr(self, name, array(column.typecode, [column[i] for i in indices]))
+
+    def drop_oldest(self, n: int) -> None:
+        for name in self.__slots__:
+            del getattr(self, name)[:n]
+
+    def point(self, i: int) -> TrackPoint:
+        alt, gs, track = self.alt[i], self.gs[i], self.track[i]
+        return TrackPoint(
+            self.t[i],
+            self.lat[i],
+            self.lon[i],
+            None if alt == MISSING_ALT else alt,
+            None if gs != gs else gs,
+            None if track != track else track,
+        )
+
+    def nbytes(self) -> int:
+        return sum(len(getattr(self, name)) * getattr(self, name).itemsize for name in self.__slots__)
+
+
+class Track:
+    """One aircraft's path: recent samples at full resolution plus simplified history."""
+
+    __slots__ = ("capacity", "segment", "max_older", "tolerance_nm", "_recent", "_older")
+
+    def __init__(
+        self,
+        capacity: int = 256,
+        segment: int = 64,
+        max_older: int = 256,
+        tolerance_nm: float = 0.05,
+    ) -> None:
+        if not 0 < segment <= capacity:
+            raise ValueError("segment must be between 1 and capacity")
+        self.capacity = capacity
+        self.segment = segment
+        self.max_older = max_older
+        self.tolerance_nm = tolerance_nm
+        # arrays grow on demand, so a brief sighting costs a few samples
+        self._recent = _Columns()
+        self._older = _Columns()
+
+    def __len__(self) -> int:
+        return len(self._older) + len(self._recent)
+
+    @property
+    def last_time(self) -> Optional[float]:
+        for part in (self._recent, self._older):
+            if len(part):
+                return part.t[-1]
+        return None
+
+    def append(self, t: float, lat: float, lon: float, alt: int = MISSING_ALT, gs: float = math.nan, track: float = math.nan) -> None:
+        if len(self._recent) >= self.capacity:
+            self._compact()
+        self._recent.append(t, lat, lon, alt, gs, track)
+
+    def _compact(self) -> None:
+        """Move the oldest `segment` recent samples, simplified, to history."""
+        recent, older = self._recent, self._older
+        n = self.segment
+        for i in simplify(recent.lat[:n], recent.lon[:n], self.tolerance_nm):
+            older.append(recent.t[i], recent.lat[i], recent.lon[i], recent.alt[i], recent.gs[i], recent.track[i])
+        # a memmove of at most `capacity` samples per `segment` appends
+        recent.drop_oldest(n)
+        tolerance = self.tolerance_nm
+        for _ in range(4):
+            if len(older) <= self.max_older:
+                return
+            tolerance *= 2
+            older.keep(simplify(older.lat, older.lon, tolerance))
+        if len(older) > self.max_older:
+            older.drop_oldest(len(older) - self.max_older)
+
+    def points(self, since: Optional[float] = None) -> List[TrackPoint]:
+        """Samples oldest first, optionally only those at or after `since`."""
+        out: List[TrackPoint] = []
+        for part in (self._older, self._recent):
+            times = part.t
+            out.extend(part.point(i) for i in range(len(part)) if since is None or times[i] >= since)
+        return out
+
+    def nbytes(self) -> int:
+        return self._recent.nbytes() + self._older.nbytes()
+
+
+def is_notable(ac: SeenAircraft) -> bool:
+    """Default selection: alert list aircraft, helicopters and emergencies."""
+    return ac.is_interesting or ac.is_helicopter or (ac.emergency not in (None, "none", "False"))
+
+
+class TrackHistory:
+    """Tracks for the aircraft `select` picks, keyed by hex."""
+
+    def __init__(
+        self,
+        select: Optional[Callable[[SeenAircraft], bool]] = is_notable,
+        capacity: int = 256,
+        segment: int = 64,
+        max_older: int = 256,
+        tolerance_nm: float = 0.05,
+    ) -> None:
+        # select=None records every aircraft
+        self.select = select
+        self._params = dict(capacity=capacity, segment=segment, max_older=max_older, tolerance_nm=tolerance_nm)
+        self.tracks: Dict[str, Track] = {}
+
+    def __len__(self) -> int:
+        return len(self.tracks)
+
+    def __contains__(self, hex: object) -> bool:
+        return hex in self.tracks
+
+    def get(self, hex: str) -> Optional[Track]:
+        return self.tracks.get(hex)
+
+    def observe(self, snap: Snapshot, seen: Mapping[str, SeenAircraft], at: datetime) -> None:
+        """Append one sample per selected aircraft with a position."""
+        t = at.timestamp()
+        select = self.select
+        tracks = self.tracks
+        lat, lon, alt, gs, trk = snap.lat, snap.lon, snap.alt_baro, snap.gs, snap.track
+        for i, hex in enumerate(snap.hex):
+            y, x = lat[i], lon[i]
+            if y != y or x != x:
+                continue
+            track = tracks.get(hex)
+            if track is None:
+                if select is not None:
+                    ac = seen.get(hex)
+                    if ac is None or not select(ac):
+                        continue
+                track = tracks[hex] = Track(**self._params)
+            elif track.last_time == t:
+                continue
+            track.append(t, y, x, alt[i], gs[i], trk[i])
+
+    def discard(self, hex: str) -> None:
+        self.tracks.pop(hex, None)
+
+    def nbytes(self) -> int:
+        return sum(track.nbytes() for track in self.tracks.values())
@@ -0,0 +1,171 @@
+"""Follow alert list aircraft after they leave the /point radius.
+
+Widening /point to keep an eye on one aircraft pulls in every other
+aircraft in the area. Instead, an aircraft on the alert list that
+disappears from the zone is followed by hex: PlaneWatcher asks /hex for
+a batch of followed aircraft at a time (`/hex/a1b2c3,d4e5f6,...`), so
+the payload and the parse cost grow with the number followed, not with
+the area.
+
+- An aircraft is followed when it disappears from /point while it is
+  interesting (SeenAircraft.is_interesting), up to `max_aircraft`.
+- It stops being followed when it comes back into the zone, when it is
+  evicted from seen, when /hex has not returned it for `max_misses`
+  requests in a row (landed, out of coverage), or `follow_for` after it
+  was last seen by either endpoint.
+- `due()` returns the next batch of at most `batch_size` hexes, least
+  recently requested first, so with more followed aircraft than fit in
+  one request every one of them still gets its turn. A batch counts as
+  requested when due() hands it out, so a batch whose request keeps
+  failing does not hold up the others.
+
+How many /hex requests go out between two polls is up to PollScheduler
+(`follow_requests`), so following stays inside the rate and quota
+budget.
+"""
+from __future__ import annotations
+
+import logging
+from datetime import datetime, timedelta
+from typing import Dict, Iterable, List, Mapping, NamedTuple, Optional, Sequence
+
+from SeenAircraft import SeenAircraft, SeenDelta
+from Snapshot import Snapshot
+
+logger = logging.getLogger(__name__)
+
+
+class FollowedAircraft(NamedTuple):
+    """Latest /hex report for a followed aircraft."""
+
+    hex: str
+    at: datetime
+    flight: str
+    lat: Optional[float]
+    lon: Optional[float]
+    alt: Optional[float]
+    gs: Optional[float]
+    track: Optional[float]
+    distance_nm: Optional[float]
+
+
+class _Followed:
+    __slots__ = ("since", "last_seen", "requested", "misses", "latest")
+
+    def __init__(self, at: datetime) -> None:
+        self.since = at
+        self.last_seen = at
+        # due() round it was last handed out in; 0 (never) goes first
+        self.requested: int = 0
+        self.misses = 0
+        self.latest: Optional[FollowedAircraft] = None
+
+
+class FollowList:
+    """Alert list aircraft followed by hex outside the zone, keyed by hex."""
+
+    def __init__(
+        self,
+        max_aircraft: int = 50,
+        batch_size: int = 25,
+        max_misses: int = 3,
+        follow_for: timedelta = timedelta(hours=1),
+    ) -> None:
+        if batch_size < 1:
+            raise ValueError("batch_size must be at least 1")
+        self.max_aircraft = max_aircraft
+        self.batch_size = batch_size
+        self.max_misses = max_misses
+        self.follow_for = follow_for
+        self._followed: Dict[str, _Followed] = {}
+        self._rounds: int = 0
+
+    def __len__(self) -> int:
+        return len(self._followed)
+
+    def __contains__(self, hex: object) -> bool:
+        return hex in self._followed
+
+    def __iter__(self):
+        return iter(self._followed)
+
+    def get(self, hex: str) -> Optional[FollowedAircraft]:
+        """Latest /hex report for `hex`, None before the first one."""
+        state = self._followed.get(hex)
+        return None if state is None else state.latest
+
+    def latest(self) -> List[FollowedAircraft]:
+        return [state.latest for state in self._followed.values() if state.latest is not None]
+
+    def follow(self, hex: str, at: datetime) -> bool:
+        """Start following `hex`; False if already followed or full."""
+        if hex in self._followed:
+            return False
+        if len(self._followed) >= self.max_aircraft:
+            logger.warning(f"Follow list full, not following {hex}")
+            return False
+        self._followed[hex] = _Followed(at)
+        logger.info(f"Following {hex} outside the zone")
+        return True
+
+    def unfollow(self, hex: str) -> None:
+        if self._followed.pop(hex, None) is not None:
+            logger.info(f"Stopped following {hex}")
+
+    def update(self, delta: SeenDelta, seen: Mapping[str, SeenAircraft], at: datetime) -> None:
+        """Apply one /point poll: follow interesting aircraft that left, drop returns."""
+        for hex in delta.disappeared:
+            ac = seen.get(hex)
+            if ac is not None and ac.is_interesting:
+                self.follow(hex, at)
+        for hex in (*delta.appeared, *delta.evicted):
+            self.unfollow(hex)
+        cutoff = at - self.follow_for
+        for hex in [h for h, state in self._followed.items() if state.last_seen < cutoff]:
+            self.unfollow(hex)
+
+    def due(self) -> List[str]:
+        """The next batch to request, least recently requested first.
+
+        The batch is marked as requested here, before the request goes out,
+        so the next call moves on to the others even if this one fails.
+        """
+        self._rounds += 1
+        if len(self._followed) <= self.batch_size:
+            batch = list(self._followed.items())
+        else:
+            batch = sorted(self._followed.items(), key=lambda item: item[1].requested)[: self.batch_size]
+        for _, state in batch:
+            state.requested = self._rounds
+        return [hex for hex, _ in batch]
+
+    def ingest(self, requested: Iterable[str], snap: Snapshot, distances: Sequence[float], at: datetime) -> List[FollowedAircraft]:
+        """Apply one /hex response for the `requested` hexes; returns the aircraft reported."""
+        reported: List[FollowedAircraft] = []
+        value = Snapshot.value
+        for hex in requested:
+            state = self._followed.get(hex)
+            if state is None:
+                continue
+            i = snap.index_of(hex)
+            if i is None:
+                state.misses += 1
+                if state.misses >= self.max_misses:
+                    self.unfollow(hex)
+                continue
+            state.misses = 0
+            state.last_seen = at
+            distance = distances[i]
+            state.latest = FollowedAircraft(
+                hex,
+                at,
+                snap.flight[i],
+                value(snap.lat, i),
+                value(snap.lon, i),
+                value(snap.alt_baro, i),
+                value(snap.gs, i),
+                value(snap.track, i),
+                None if distance != distance else float(distance),
+            )
+            reported.append(state.latest)
+        return reported
@@ -0,0 +1,223 @@
+"""Batched observer-relative geometry for a whole snapshot.
+
+Distance, bearing and closure rate are computed for every aircraft in one
+pass and kept on the snapshot, so update_seen, the tables and the print
+helpers all read the same numbers instead of each recomputing them per
+aircraft. NumPy is used when it is installed (`pip install skyalert[fast]`);
+otherwise the same formulas run in a plain Python loop.
+"""
+from __future__ import annotations
+
+import math
+from typing import Iterable, List, Optional, Sequence
+
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover - exercised when numpy is absent
+    np = None
+
+EARTH_RADIUS_KM = 6371.0088
+KM_PER_NM = 1.852
+EARTH_RADIUS_NM = EARTH_RADIUS_KM / KM_PER_NM
+# one degree of latitude (and of longitude at the equator), flat-plane approximations
+NM_PER_DEG = 60.0
+
+NAN = float("nan")
+
+
+def haversine_km(lat1: float, lon1: float, lat2: float, lon2: float) -> float:
+    """Great-circle distance between two points in kilometres."""
+    phi1 = math.radians(lat1)
+    phi2 = math.radians(lat2)
+    dphi = math.radians(lat2 - lat1)
+    dlambda = math.radians(lon2 - lon1)
+    a = math.sin(dphi / 2.0) ** 2 + math.cos(phi1) * math.cos(phi2) * math.sin(dlambda / 2.0) ** 2
+    return EARTH_RADIUS_KM * 2 * math.atan2(math.sqrt(a), math.sqrt(max(0.0, 1 - a)))
+
+
+def distance_nm(lat1: float, lon1: float, lat2: float, lon2: float) -> float:
+    return haversine_km(lat1, lon1, lat2, lon2) / KM_PER_NM
+
+
+def initial_bearing(lat1: float, lon1: float, lat2: float, lon2: float) -> float:
+    """Initial great-circle bearing from point 1 to point 2 (deg true)."""
+    phi1 = math.radians(lat1)
+    phi2 = math.radians(lat2)
+    dlam = math.radians(lon2 - lon1)
+    y = math.sin(dlam) * math.cos(phi2)
+    x = math.cos(phi1) * math.sin(phi2) - math.sin(phi1) * math.cos(phi2) * math.cos(dlam)
+    return math.degrees(math.atan2(y, x)) % 360.0
+
+
+def destination_point(lat: float, lon: float, bearing_deg: float, dist_nm: float) -> tuple[float, float]:
+    """Point reached travelling `dist_nm` from (lat, lon) on `bearing_deg`."""
+    delta = dist_nm / EARTH_RADIUS_NM
+    theta = math.radians(bearing_deg)
+    phi1 = math.radians(lat)
+    lam1 = math.radians(lon)
+    phi2 = math.asin(
+        math.sin(phi1) * math.cos(delta) + math.cos(phi1) * math.sin(delta) * math.cos(theta)
+    )
+    lam2 = lam1 + math.atan2(
+        math.sin(theta) * math.sin(delta) * math.cos(phi1),
+        math.cos(delta) - math.sin(phi1) * math.sin(phi2),
+    )
+    return math.degrees(phi2), (math.degrees(lam2) + 540.0) % 360.0 - 180.0
+
+
+def _as_float(value: object) -> float:
+    # alt/gs/track can be missing or, for altitudes, the string "ground"
+    if isinstance(value, (int, float)) and not isinstance(value, bool):
+        return float(value)
+    return NAN
+
+
+class SnapshotGeometry:
+    """Distance (nm), bearing (deg true) and closure rate (kt) per aircraft.
+
+    Values are index-aligned with the aircraft list they were built from.
+    Aircraft without a position get NaN; use `distance(i)` and friends to
+    get None instead. Closure rate is positive when the aircraft is getting
+    closer to the observer.
+    """
+
+    __slots__ = ("lat", "lon", "distance_nm", "bearing_deg", "closure_kt")
+
+    def __init__(
+        self,
+        lat: float,
+        lon: float,
+        distance_nm: Sequence[float],
+        bearing_deg: Sequence[float],
+        closure_kt: Sequence[float],
+    ) -> None:
+        self.lat = lat
+        self.lon = lon
+        self.distance_nm = distance_nm
+        self.bearing_deg = bearing_deg
+        self.closure_kt = closure_kt
+
+    def __len__(self) -> int:
+        return len(self.distance_nm)
+
+    @classmethod
+    def compute(
+        cls,
+        lat: float,
+        lon: float,
+        lats: Iterable[object],
+        lons: Iterable[object],
+        tracks: Iterable[object],
+        speeds: Iterable[object],
+    ) -> "SnapshotGeometry":
+        return cls.from_columns(
+            lat,
+            lon,
+            [_as_float(v) for v in lats],
+            [_as_float(v) for v in lons],
+            [_as_float(v) for v in tracks],
+            [_as_float(v) for v in speeds],
+        )
+
+    @classmethod
+    def from_columns(
+        cls,
+        lat: float,
+        lon: float,
+        lats: Sequence[float],
+        lons: Sequence[float],
+        tracks: Sequence[float],
+        speeds: Sequence[float],
+    ) -> "SnapshotGeometry":
+        """Like compute(), for columns that are already floats (NaN = missing).
+
+        array('d') columns are handed to NumPy without copying.
+        """
+        if np is not None:
+            return cls._compute_numpy(lat, lon, lats, lons, tracks, speeds)
+        return cls._compute_python(lat, lon, lats, lons, tracks, speeds)
+
+    @classmethod
+    def from_aircraft(cls, aircraft: Sequence, lat: float, lon: float) -> "SnapshotGeometry":
+        return cls.compute(
+            lat,
+            lon,
+            (ac.lat for ac in aircraft),
+            (ac.lon for ac in aircraft),
+            (ac.track for ac in aircraft),
+            (ac.gs for ac in aircraft),
+        )
+
+    @classmethod
+    def _compute_numpy(cls, lat, lon, lats, lons, tracks, speeds) -> "SnapshotGeometry":
+        phi1 = math.radians(lat)
+        lam1 = math.radians(lon)
+        phi2 = np.radians(np.asarray(lats, dtype=np.float64))
+        lam2 = np.radians(np.asarray(lons, dtype=np.float64))
+        dphi = phi2 - phi1
+        dlam = lam2 - lam1
+        cos_phi1 = math.cos(phi1)
+        sin_phi1 = math.sin(phi1)
+        cos_phi2 = np.cos(phi2)
+        sin_phi2 = np.sin(phi2)
+
+        a = np.sin(dphi / 2.0) ** 2 + cos_phi1 * cos_phi2 * np.sin(dlam / 2.0) ** 2
+        dist = EARTH_RADIUS_NM * 2 * np.arctan2(np.sqrt(a), np.sqrt(np.maximum(0.0, 1 - a)))
+
+        # bearing observer -> aircraft
+        y = np.sin(dlam) * cos_phi2
+        x = cos_phi1 * sin_phi2 - sin_phi1 * cos_phi2 * np.cos(dlam)
+        bearing = np.degrees(np.arctan2(y, x)) % 360.0
+
+        # bearing aircraft -> observer, for the component of ground speed
+        # pointing at the observer
+        yb = -np.sin(dlam) * cos_phi1
+        xb = cos_phi2 * sin_phi1 - sin_phi2 * cos_phi1 * np.cos(dlam)
+        back = np.arctan2(yb, xb)
+        closure = np.asarray(speeds, dtype=np.float64) * np.cos(
+            np.radians(np.asarray(tracks, dtype=np.float64)) - back
+        )
+        return cls(lat, lon, dist, bearing, closure)
+
+    @classmethod
+    def _compute_python(cls, lat, lon, lats, lons, tracks, speeds) -> "SnapshotGeometry":
+        phi1 = math.radians(lat)
+        cos_phi1 = math.cos(phi1)
+        sin_phi1 = math.sin(phi1)
+        dist: List[float] = []
+        bearing: List[float] = []
+        closure: List[float] = []
+        for la, lo, trk, gs in zip(lats, lons, tracks, speeds):
+            if math.isnan(la) or math.isnan(lo):
+                dist.append(NAN)
+                bearing.append(NAN)
+                closure.append(NAN)
+                continue
+            phi2 = math.radians(la)
+            dlam = math.radians(lo - lon)
+            cos_phi2 = math.cos(phi2)
+            sin_phi2 = math.sin(phi2)
+            dist.append(haversine_km(lat, lon, la, lo) / KM_PER_NM)
+            y = math.sin(dlam) * cos_phi2
+            x = cos_phi1 * sin_phi2 - sin_phi1 * cos_phi2 * math.cos(dlam)
+            bearing.append(math.degrees(math.atan2(y, x)) % 360.0)
+            back = math.atan2(
+                -math.sin(dlam) * cos_phi1,
+                cos_phi2 * sin_phi1 - sin_phi2 * cos_phi1 * math.cos(dlam),
+            )
+            closure.append(gs * math.cos(math.radians(trk) - back))
+        return cls(lat, lon, dist, bearing, closure)
+
+    @staticmethod
+    def _value(values: Sequence[float], i: int) -> Optional[float]:
+        v = float(values[i])
+        return None if math.isnan(v) else v
+
+    def distance(self, i: int) -> Optional[float]:
+        return self._value(self.distance_nm, i)
+
+    def bearing(self, i: int) -> Optional[float]:
+        return self._value(self.bearing_deg, i)
+
+    def closure(self, i: int) -> Optional[float]:
+        return self._value(self.closure_kt, i)
@@ -0,0 +1,253 @@
+"""SQLite history of sightings and position samples.
+
+Two tables:
+
+- sightings: one row per hex, the SeenAircraft fields (closest approach,
+  first/last seen, altitude and speed extremes, ...)
+- positions: one row per aircraft per poll (time, hex, lat, lon, alt,
+  gs, track, distance_nm)
+
+Times are Unix timestamps. The database runs in WAL mode, so readers
+(`sqlite3 history.db`, a dashboard) never block the writer.
+
+`record()` is called from the polling path and only queues the batch:
+the snapshot itself (it is never mutated once built) plus rows for the
+sightings the SeenDelta lists as new or updated. A writer thread turns
+each batch into one transaction. If the disk falls `max_pending`
+batches behind, new batches are dropped and counted instead of making
+the poll wait.
+
+`load_seen(now)` reads back the sightings of the last `restore_hours`, which
+PlaneWatcher uses to rebuild `seen` after a restart.
+"""
+from __future__ import annotations
+
+import logging
+import queue
+import sqlite3
+import threading
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import TYPE_CHECKING, Iterable, List, Optional, Sequence, Tuple, Union
+
+from SeenAircraft import SeenAircraft
+from Snapshot import MISSING_ALT, Snapshot
+
+if TYPE_CHECKING:
+    from Instrumentation import Metrics
+
+logger = logging.getLogger(__name__)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS sightings (
+    hex TEXT PRIMARY KEY,
+    type TEXT,
+    type_desc TEXT,
+    tail TEXT,
+    flight TEXT,
+    closest_nm REAL,
+    closest_time REAL,
+    first_seen REAL NOT NULL,
+    last_seen REAL NOT NULL,
+    ground_speed REAL,
+    altitude REAL,
+    emergency TEXT,
+    highest_altitude REAL,
+    lowest_altitude REAL,
+    fastest_gs REAL,
+    slowest_gs REAL
+);
+CREATE INDEX IF NOT EXISTS sightings_last_seen ON sightings (last_seen);
+CREATE INDEX IF NOT EXISTS sightings_closest ON sightings (closest_nm);
+CREATE TABLE IF NOT EXISTS positions (
+    time REAL NOT NULL,
+    hex TEXT NOT NULL,
+    lat REAL,
+    lon REAL,
+    alt REAL,
+    gs REAL,
+    track REAL,
+    distance_nm REAL
+);
+CREATE INDEX IF NOT EXISTS positions_hex_time ON positions (hex, time);
+CREATE INDEX IF NOT EXISTS positions_time ON positions (time);
+CREATE INDEX IF NOT EXISTS positions_distance ON positions (distance_nm);
+"""
+
+_COLUMNS = (
+    "hex, type, type_desc, tail, flight, closest_nm, closest_time, first_seen, last_seen, "
+    "ground_speed, altitude, emergency, highest_altitude, lowest_altitude, fastest_gs, slowest_gs"
+)
+_UPSERT = (
+    f"INSERT INTO sightings ({_COLUMNS}) VALUES ({', '.join('?' * 16)}) "
+    "ON CONFLICT (hex) DO UPDATE SET "
+    + ", ".join(f"{c} = excluded.{c}" for c in _COLUMNS.split(", ")[1:] if c != "first_seen")
+)
+
+SightingRow = Tuple
+# (time, snapshot, distances, sighting rows)
+Batch = Tuple[float, Snapshot, Sequence[float], List[SightingRow]]
+
+
+def _finite(value: float) -> Optional[float]:
+    return None if value != value or value == float("inf") else value
+
+
+def sighting_row(ac: SeenAircraft) -> SightingRow:
+    return (
+        ac.hex,
+        ac.type,
+        ac.typeDesc,
+        ac.tail,
+        ac.flight,
+        _finite(ac.closestApproach),
+        ac.closestTime.timestamp(),
+        ac.firstSeen.timestamp(),
+        ac.lastSeen.timestamp(),
+        ac.groundSpeed,
+        ac.altitude,
+        ac.emergency,
+        ac.highest_altitude,
+        ac.lowest_altitude,
+        ac.fastestGs,
+        ac.slowestGs,
+    )
+
+
+def _sighting(row: sqlite3.Row) -> SeenAircraft:
+    closest = row["closest_nm"]
+    return SeenAircraft(
+        hex=row["hex"],
+        type=row["type"] or "",
+        typeDesc=row["type_desc"],
+        tail=row["tail"],
+        flight=row["flight"],
+        closestApproach=float("inf") if closest is None else closest,
+        closestTime=datetime.fromtimestamp(row["closest_time"]),
+        firstSeen=datetime.fromtimestamp(row["first_seen"]),
+        lastSeen=datetime.fromtimestamp(row["last_seen"]),
+        groundSpeed=row["ground_speed"] or 0,
+        altitude=row["altitude"] or 0,
+        emergency=row["emergency"],
+        highest_altitude=row["highest_altitude"],
+        lowest_altitude=row["lowest_altitude"],
+        fastestGs=row["fastest_gs"],
+        slowestGs=row["slowest_gs"],
+    )
+
+
+def connect(path: Union[str, Path]) -> sqlite3.Connection:
+    db = sqlite3.connect(str(path), check_same_thread=False)
+    db.row_factory = sqlite3.Row
+    db.execute("PRAGMA journal_mode=WAL")
+    # WAL keeps the database consistent without a sync per commit; a
+    # power cut can lose the last few polls, not corrupt the file
+    db.execute("PRAGMA synchronous=NORMAL")
+    db.executescript(SCHEMA)
+    return db
+
+
+class HistoryStore:
+    def __init__(
+        self,
+        path: Union[str, Path],
+        restore_hours: float = 24.0,
+        max_pending: int = 100,
+        metrics: Optional["Metrics"] = None,
+    ) -> None:
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.restore_hours = restore_hours
+        self.metrics = metrics
+        self._db = connect(self.path)
+        self._queue: "queue.Queue[Optional[Batch]]" = queue.Queue(maxsize=max_pending)
+        self.written: int = 0
+        self.dropped: int = 0
+        self._thread = threading.Thread(target=self._writer, name="history-writer", daemon=True)
+        self._thread.start()
+
+    # --- polling side ---
+    def record(self, at: datetime, snapshot: Snapshot, distances: Sequence[float], changed: Iterable[SeenAircraft]) -> None:
+        """Queue one poll: its position samples and the changed sightings."""
+        if not snapshot:
+            return
+        batch = (at.timestamp(), snapshot, distances, [sighting_row(ac) for ac in changed])
+        try:
+            self._queue.put_nowait(batch)
+        except queue.Full:
+            self.dropped += 1
+            logger.warning("History writer is behind; dropped a snapshot")
+
+    def flush(self, timeout: Optional[float] = None) -> None:
+        """Wait until everything queued so far is committed."""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self._queue.all_tasks_done:
+            while self._queue.unfinished_tasks:
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    break
+                self._queue.all_tasks_done.wait(remaining)
+
+    def close(self) -> None:
+        """Commit what is queued and stop the writer."""
+        self._queue.put(None)
+        self._thread.join()
+        self._db.close()
+
+    # --- writer thread ---
+    def _writer(self) -> None:
+        while True:
+            batch = self._queue.get()
+            try:
+                if batch is None:
+                    return
+                t0 = time.perf_counter()
+                self._write(*batch)
+                if self.metrics is not None:
+                    self.metrics.observe("history_write_seconds", time.perf_counter() - t0)
+                self.written += 1
+            except sqlite3.Error as e:
+                logger.error(f"Writing history failed: {e}")
+            finally:
+                self._queue.task_done()
+
+    def _write(self, t: float, snap: Snapshot, distances: Sequence[float], sightings: List[SightingRow]) -> None:
+        alt = [None if a == MISSING_ALT else a for a in snap.alt_baro]
+        positions = zip(
+            [t] * len(snap), snap.hex, map(_finite, snap.lat), map(_finite, snap.lon), alt,
+            map(_finite, snap.gs), map(_finite, snap.track), map(_finite, distances),
+        )
+        with self._db:
+            self._db.executemany("INSERT INTO positions VALUES (?, ?, ?, ?, ?, ?, ?, ?)", positions)
+            self._db.executemany("UPDATE sightings SET last_seen = ? WHERE hex = ?", ((t, hex) for hex in snap.hex))
+            self._db.executemany(_UPSERT, sightings)
+
+    # --- reading ---
+    def load_seen(self, now: Optional[datetime] = None) -> List[SeenAircraft]:
+        """Sightings last seen within `restore_hours` of `now`, most recent last."""
+        since = (now or datetime.now()).timestamp() - self.restore_hours * 3600
+        db = sqlite3.connect(str(self.path))
+        db.row_factory = sqlite3.Row
+        try:
+            rows = db.execute("SELECT * FROM sightings WHERE last_seen >= ? ORDER BY last_seen", (since,))
+            return [_sighting(row) for row in rows]
+        finally:
+            db.close()
+
+    def positions(self, hex: str, since: float = 0.0) -> List[sqlite3.Row]:
+        """Position samples of one aircraft, oldest first."""
+        db = sqlite3.connect(str(self.path))
+        db.row_factory = sqlite3.Row
+        try:
+            return db.execute(
+                "SELECT * FROM positions WHERE hex = ? AND time >= ? ORDER BY time", (hex, since)
+            ).fetchall()
+        finally:
+            db.close()
+
+    def __enter__(self) -> "HistoryStore":
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        self.close()
@@ -0,0 +1,276 @@
+"""Per-stage timings and counters for the refresh pipeline.
+
+A refresh goes through these stages, each observed into a histogram of
+seconds:
+
+- throttle_wait_seconds: time spent waiting on the rate limiter
+- http_seconds: one HTTP round trip
+- decode_seconds: turning the body into Python objects
+- fetch_seconds: the whole client call, throttling and retries included
+- snapshot_seconds: building the columnar Snapshot
+- rules_seconds: evaluating the alert rules
+- tracking_seconds: update_seen and eviction
+- follow_seconds: one /hex request for followed aircraft, throttling
+  and retries included
+- render_seconds{table=...}: one App table update
+- history_write_seconds: committing one poll to the history database
+  (on its writer thread, off the polling path)
+- poll_interval_seconds{reason=...}: the wait PollScheduler chose
+  before the next poll, by reason
+
+Retries and failures are counters. Each histogram has cumulative
+Prometheus buckets and a rolling window of recent observations for
+percentiles. Observing costs a dict lookup, a bisect and a deque append,
+so instrumentation stays on all the time.
+
+Metrics.to_prometheus() and to_json() export everything. MetricsServer
+serves both over HTTP from a background thread (/metrics and
+/metrics.json), and write_metrics() writes them to a file, e.g. for the
+node_exporter textfile collector.
+"""
+from __future__ import annotations
+
+import json
+import math
+import os
+import tempfile
+import threading
+import time
+from bisect import bisect_left
+from collections import deque
+from contextlib import contextmanager
+from typing import Any, Deque, Dict, Iterator, List, Optional, Sequence, Tuple
+
+# seconds; from sub-millisecond parsing up to slow, retried requests
+DEFAULT_BUCKETS: Tuple[float, ...] = (
+    0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0,
+)
+
+DESCRIPTIONS: Dict[str, str] = {
+    "throttle_wait_seconds": "Time spent waiting for the rate limiter",
+    "http_seconds": "HTTP round trip of one request attempt",
+    "decode_seconds": "Decoding a response body",
+    "fetch_seconds": "Whole API call including throttling and retries",
+    "snapshot_seconds": "Building the columnar snapshot from the decoded response",
+    "rules_seconds": "Evaluating alert rules on a snapshot",
+    "tracking_seconds": "Updating seen aircraft and evicting old ones",
+    "follow_seconds": "Whole /hex call for a batch of followed aircraft",
+    "render_seconds": "Updating one UI table",
+    "history_write_seconds": "Committing one poll to the history database",
+    "poll_interval_seconds": "Wait chosen before the next poll, by reason",
+    "requests_total": "HTTP request attempts",
+    "retries_total": "Request attempts that were retried",
+    "request_errors_total": "Requests that failed after all retries",
+}
+
+Labels = Tuple[Tuple[str, str], ...]
+
+
+def _labels(labels: Dict[str, Any]) -> Labels:
+    return tuple(sorted((k, str(v)) for k, v in labels.items()))
+
+
+def _format_labels(labels: Labels, extra: Optional[Tuple[str, str]] = None) -> str:
+    items = list(labels) + ([extra] if extra else [])
+    if not items:
+        return ""
+    return "{" + ",".join(f'{k}="{v}"' for k, v in items) + "}"
+
+
+def _rank(ordered: Sequence[float], q: float) -> Optional[float]:
+    """q-th percentile (0-100) of sorted values, nearest rank."""
+    if not ordered:
+        return None
+    return ordered[min(len(ordered) - 1, max(0, math.ceil(q / 100 * len(ordered)) - 1))]
+
+
+def _format_le(bound: float) -> str:
+    return "+Inf" if math.isinf(bound) else repr(bound)
+
+
+class Histogram:
+    """Cumulative bucket counts plus a rolling window of recent values."""
+
+    __slots__ = ("buckets", "counts", "sum", "count", "recent", "last")
+
+    def __init__(self, buckets: Sequence[float] = DEFAULT_BUCKETS, window: int = 512) -> None:
+        self.buckets: Tuple[float, ...] = tuple(sorted(buckets)) + (math.inf,)
+        self.counts: List[int] = [0] * len(self.buckets)
+        self.sum: float = 0.0
+        self.count: int = 0
+        self.recent: Deque[float] = deque(maxlen=window)
+        self.last: Optional[float] = None
+
+    def observe(self, value: float) -> None:
+        # counts are per bucket here and made cumulative on export
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+        self.recent.append(value)
+        self.last = value
+
+    def percentile(self, q: float) -> Optional[float]:
+        """q-th percentile (0-100) of the rolling window."""
+        return _rank(sorted(self.recent), q)
+
+    def summary(self) -> Dict[str, Any]:
+        ordered = sorted(self.recent)
+        return {
+            "count": self.count,
+            "sum": self.sum,
+            "last": self.last,
+            "p50": _rank(ordered, 50),
+            "p90": _rank(ordered, 90),
+            "p99": _rank(ordered, 99),
+            "max": ordered[-1] if ordered else None,
+            "window": len(ordered),
+        }
+
+    def cumulative(self) -> Iterator[Tuple[float, int]]:
+        total = 0
+        for bound, n in zip(self.buckets, self.counts):
+            total += n
+            yield bound, total
+
+
+class Metrics:
+    """Registry of histograms and counters, keyed by name and labels.
+
+    Safe to share between threads; recording holds a lock for a few
+    microseconds.
+    """
+
+    def __init__(self, buckets: Sequence[float] = DEFAULT_BUCKETS, window: int = 512) -> None:
+        self.buckets = tuple(buckets)
+        self.window = window
+        self._histograms: Dict[str, Dict[Labels, Histogram]] = {}
+        self._counters: Dict[str, Dict[Labels, float]] = {}
+        self._lock = threading.Lock()
+
+    def histogram(self, name: str, **labels: Any) -> Histogram:
+        key = _labels(labels)
+        with self._lock:
+            series = self._histograms.setdefault(name, {})
+            h = series.get(key)
+            if h is None:
+                h = series[key] = Histogram(self.buckets, self.window)
+            return h
+
+    def observe(self, name: str, seconds: float, **labels: Any) -> None:
+        h = self.histogram(name, **labels)
+        with self._lock:
+            h.observe(seconds)
+
+    def count(self, name: str, n: float = 1, **labels: Any) -> None:
+        key = _labels(labels)
+        with self._lock:
+            series = self._counters.setdefault(name, {})
+            series[key] = series.get(key, 0) + n
+
+    def counter(self, name: str, **labels: Any) -> float:
+        return self._counters.get(name, {}).get(_labels(labels), 0)
+
+    @contextmanager
+    def time(self, name: str, **labels: Any) -> Iterator[None]:
+        """Observe the wall time of the `with` block (also when it raises)."""
+        t0 = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(name, time.perf_counter() - t0, **labels)
+
+    def stages(self) -> List[Tuple[str, Labels, Dict[str, Any]]]:
+        """(name, labels, summary) for every histogram, sorted by name."""
+        with self._lock:
+            return [
+                (name, labels, h.summary())
+                for name in sorted(self._histograms)
+                for labels, h in sorted(self._histograms[name].items())
+            ]
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            histograms = {
+                name: [dict(labels=dict(labels), **h.summary()) for labels, h in sorted(series.items())]
+                for name, series in sorted(self._histograms.items())
+            }
+            counters = {
+                name: [{"labels": dict(labels), "value": v} for labels, v in sorted(series.items())]
+                for name, series in sorted(self._counters.items())
+            }
+        return {"histograms": histograms, "counters": counters}
+
+    def to_json(self) -> str:
+        return json.dumps(self.snapshot())
+
+    def to_prometheus(self, prefix: str = "skyalert_") -> str:
+        """Text exposition format (version 0.0.4)."""
+        lines: List[str] = []
+        with self._lock:
+            for name, series in sorted(self._histograms.items()):
+                full = prefix + name
+                lines.append(f"# HELP {full} {DESCRIPTIONS.get(name, name)}")
+                lines.append(f"# TYPE {full} histogram")
+                for labels, h in sorted(series.items()):
+                    for bound, total in h.cumulative():
+                        lines.append(f"{full}_bucket{_format_labels(labels, ('le', _format_le(bound)))} {total}")
+                    lines.append(f"{full}_sum{_format_labels(labels)} {h.sum!r}")
+                    lines.append(f"{full}_count{_format_labels(labels)} {h.count}")
+            for name, series in sorted(self._counters.items()):
+                full = prefix + name
+                lines.append(f"# HELP {full} {DESCRIPTIONS.get(name, name)}")
+                lines.append(f"# TYPE {full} counter")
+                for labels, v in sorted(series.items()):
+                    lines.append(f"{full}{_format_labels(labels)} {v}")
+        return "\n".join(lines) + "\n"
+
+
+def write_metrics(metrics: Metrics, path: str, fmt: str = "prometheus") -> None:
+    """Atomically replace `path` with the current metrics ("prometheus" or "json")."""
+    text = metrics.to_json() if fmt == "json" else metrics.to_prometheus()
+    directory = os.path.dirname(os.path.abspath(path))
+    fd, tmp = tempfile.mkstemp(dir=directory, prefix=".metrics-")
+    try:
+        with os.fdopen(fd, "w") as f:
+            f.write(text)
+        os.replace(tmp, path)
+    except BaseException:
+        os.unlink(tmp)
+        raise
+
+
+class MetricsServer:
+    """Serves /metrics (Prometheus) and /metrics.json on a daemon thread."""
+
+    def __init__(self, metrics: Metrics, port: int = 9464, host: str = "127.0.0.1") -> None:
+        # imported here to keep http.server off the App's startup path
+        from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+        registry = metrics
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self) -> None:
+                if self.path == "/metrics":
+                    body, ctype = registry.to_prometheus().encode(), "text/plain; version=0.0.4"
+                elif self.path == "/metrics.json":
+                    body, ctype = registry.to_json().encode(), "application/json"
+                else:
+                    self.send_error(404)
+                    return
+                self.send_response(200)
+                self.send_header("Content-Type", ctype)
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format: str, *args: Any) -> None:
+                pass
+
+        self.httpd = ThreadingHTTPServer((host, port), Handler)
+        self.port: int = self.httpd.server_address[1]
+        self._thread = threading.Thread(target=self.httpd.serve_forever, name="metrics-server", daemon=True)
+        self._thread.start()
+
+    def close(self) -> None:
+        self.httpd.shutdown()
+        self.httpd.server_close()
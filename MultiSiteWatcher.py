@@ -0,0 +1,245 @@
+"""Watch many sites from one process with as few /point queries as possible.
+
+Each WatchZone gets its own PlaneWatcher with its own seen-tracking. The
+zones are not polled one by one. `plan_queries` covers all of them with a
+small set of /point circles: nearby and overlapping zones are merged
+greedily as long as the enclosing circle stays within the API's 250 nm
+limit. Each poll runs one request per circle. Every zone then takes the
+aircraft within its radius out of its circle's snapshot, using the
+snapshot's spatial index.
+
+All zones share the AircraftTypes and AlertList reference data, one
+connection pool, one rate limiter and one pair of clients. So API calls
+and memory grow with the number of distinct areas, not the number of
+sites.
+"""
+from __future__ import annotations
+
+import logging
+import math
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+from AircraftTypes import AircraftTypes
+from AirplanesLive_Client import AirplanesClient, AsyncAirplanesClient
+from AlertList import AlertList
+from AlertRules import Rule
+from ConnectionPool import SharedPool
+from Geometry import destination_point, distance_nm, initial_bearing
+from Instrumentation import Metrics
+from PlaneWatcher import PlaneWatcher
+from RateLimiter import TokenBucket
+from Snapshot import Snapshot
+
+logger = logging.getLogger(__name__)
+
+MAX_QUERY_RADIUS_NM = 250.0
+# slack added to merged circles for rounding and spherical error
+_MARGIN_NM = 0.05
+
+
+@dataclass(frozen=True)
+class WatchZone:
+    name: str
+    lat: float
+    lon: float
+    radius_nm: float
+
+
+@dataclass(frozen=True)
+class QueryCircle:
+    """One /point query and the zones it covers."""
+
+    lat: float
+    lon: float
+    radius_nm: float
+    zones: Tuple[str, ...]
+
+    def covers(self, zone: WatchZone) -> bool:
+        return distance_nm(self.lat, self.lon, zone.lat, zone.lon) + zone.radius_nm <= self.radius_nm
+
+
+def _enclose(a: Tuple[float, float, float], b: Tuple[float, float, float]) -> Tuple[float, float, float]:
+    """Smallest circle (lat, lon, radius) containing circles a and b."""
+    d = distance_nm(a[0], a[1], b[0], b[1])
+    if d + b[2] <= a[2]:
+        return a
+    if d + a[2] <= b[2]:
+        return b
+    r = (d + a[2] + b[2]) / 2
+    lat, lon = destination_point(a[0], a[1], initial_bearing(a[0], a[1], b[0], b[1]), r - a[2])
+    return lat, lon, r
+
+
+def _padded(r: float) -> float:
+    return math.ceil((r + _MARGIN_NM) * 10) / 10
+
+
+def plan_queries(
+    zones: Sequence[WatchZone], max_radius_nm: float = MAX_QUERY_RADIUS_NM
+) -> List[QueryCircle]:
+    """Cover `zones` with few /point circles of at most `max_radius_nm`.
+
+    Greedy agglomeration: start with one circle per zone and keep merging
+    the pair whose enclosing circle is smallest, until no pair fits under
+    the limit. Lower `max_radius_nm` to trade more requests for smaller
+    responses.
+    """
+    clusters: Dict[int, Tuple[Tuple[float, float, float], Tuple[WatchZone, ...]]] = {}
+    for i, zone in enumerate(zones):
+        if not 0 < zone.radius_nm <= max_radius_nm:
+            raise ValueError(f"Zone {zone.name!r} radius must be between 0 and {max_radius_nm} nm")
+        clusters[i] = ((zone.lat, zone.lon, zone.radius_nm), (zone,))
+
+    # merged circle for every pair that still fits, keyed by cluster ids
+    pairs: Dict[Tuple[int, int], Tuple[float, float, float]] = {}
+
+    def consider(i: int, j: int) -> None:
+        circle = _enclose(clusters[i][0], clusters[j][0])
+        if _padded(circle[2]) <= max_radius_nm:
+            pairs[(i, j)] = circle
+
+    ids = list(clusters)
+    for n, i in enumerate(ids):
+        for j in ids[n + 1:]:
+            consider(i, j)
+
+    next_id = len(zones)
+    while pairs:
+        (i, j), circle = min(pairs.items(), key=lambda kv: kv[1][2])
+        members = clusters.pop(i)[1] + clusters.pop(j)[1]
+        pairs = {k: v for k, v in pairs.items() if i not in k and j not in k}
+        others = list(clusters)
+        clusters[next_id] = (circle, members)
+        for k in others:
+            consider(k, next_id)
+        next_id += 1
+
+    queries = []
+    for (lat, lon, r), members in clusters.values():
+        # a single zone is queried exactly; merged circles get some slack
+        radius = r if len(members) == 1 else _padded(r)
+        queries.append(QueryCircle(round(lat, 6), round(lon, 6), radius, tuple(z.name for z in members)))
+    return queries
+
+
+class MultiSiteWatcher:
+    """Seen-tracking for many zones fed by a shared, coalesced set of queries."""
+
+    def __init__(
+        self,
+        zones: Iterable[WatchZone],
+        max_query_radius_nm: float = MAX_QUERY_RADIUS_NM,
+        max_seen: Optional[int] = None,
+        max_seen_age: Optional[timedelta] = None,
+        decoder: str = "json",
+        pool: Optional[SharedPool] = None,
+        limiter: Optional[TokenBucket] = None,
+        aircraft_types: Optional[AircraftTypes] = None,
+        alert_list: Optional[AlertList] = None,
+        rules: Optional[Sequence[Rule]] = None,
+        client: Optional[AirplanesClient] = None,
+        async_client: Optional[AsyncAirplanesClient] = None,
+        clock: Callable[[], datetime] = datetime.now,
+        metrics: Optional[Metrics] = None,
+    ) -> None:
+        self.zones: Dict[str, WatchZone] = {}
+        for zone in zones:
+            if zone.name in self.zones:
+                raise ValueError(f"Duplicate zone name {zone.name!r}")
+            self.zones[zone.name] = zone
+        self.queries: List[QueryCircle] = plan_queries(list(self.zones.values()), max_query_radius_nm)
+
+        # as in PlaneWatcher, clients passed in are shared and not closed here
+        self._owns_pool: bool = pool is None
+        self._owns_client: bool = client is None
+        self._owns_async_client: bool = async_client is None
+        # one set of metrics for every zone and the shared clients
+        self.metrics: Metrics = metrics if metrics is not None else Metrics()
+        self.pool: SharedPool = pool if pool is not None else SharedPool()
+        self.limiter: TokenBucket = limiter if limiter is not None else TokenBucket()
+        self.client: AirplanesClient = client if client is not None else AirplanesClient(
+            decoder=decoder, pool=self.pool, limiter=self.limiter, metrics=self.metrics
+        )
+        self.async_client: AsyncAirplanesClient = async_client if async_client is not None else AsyncAirplanesClient(
+            decoder=decoder, pool=self.pool, limiter=self.limiter, metrics=self.metrics
+        )
+        # loaded once for all zones
+        self.aircraft_types: AircraftTypes = aircraft_types if aircraft_types is not None else AircraftTypes()
+        self.alert_list: AlertList = alert_list if alert_list is not None else AlertList()
+
+        self.watchers: Dict[str, PlaneWatcher] = {
+            name: PlaneWatcher(
+                zone.lat,
+                zone.lon,
+                zone.radius_nm,
+                max_seen=max_seen,
+                max_seen_age=max_seen_age,
+                client=self.client,
+                async_client=self.async_client,
+                aircraft_types=self.aircraft_types,
+                alert_list=self.alert_list,
+                pool=self.pool,
+                limiter=self.limiter,
+                rules=rules,
+                clock=clock,
+                metrics=self.metrics,
+            )
+            for name, zone in self.zones.items()
+        }
+        self.snapshots: List[Snapshot] = [Snapshot() for _ in self.queries]
+        self.api_calls: int = 0
+        logger.info("Watching %d zones with %d queries", len(self.zones), len(self.queries))
+
+    def __getitem__(self, name: str) -> PlaneWatcher:
+        return self.watchers[name]
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self.watchers)
+
+    def __len__(self) -> int:
+        return len(self.watchers)
+
+    def refresh(self) -> None:
+        for i, query in enumerate(self.queries):
+            self.api_calls += 1
+            self.ingest(i, self.client.get_point(query.lat, query.lon, query.radius_nm))
+
+    async def refresh_async(self) -> None:
+        # sequential on purpose: the shared limiter would serialize them anyway
+        for i, query in enumerate(self.queries):
+            self.api_calls += 1
+            self.ingest(i, await self.async_client.get_point(query.lat, query.lon, query.radius_nm))
+
+    def ingest(self, query_index: int, data: List[dict] | Snapshot | None) -> None:
+        """Fan the response of query `query_index` out to the zones it covers."""
+        query = self.queries[query_index]
+        snap = data if isinstance(data, Snapshot) else Snapshot.from_payload(data)
+        self.snapshots[query_index] = snap
+        for name in query.zones:
+            zone = self.zones[name]
+            if (zone.lat, zone.lon, zone.radius_nm) == (query.lat, query.lon, query.radius_nm):
+                self.watchers[name].ingest(snap)
+                continue
+            # one grid index per query snapshot, shared by all of its zones
+            index = snap.spatial_index()
+            self.watchers[name].ingest(snap.take(index.within(zone.lat, zone.lon, zone.radius_nm)))
+
+    def close(self) -> None:
+        for watcher in self.watchers.values():
+            watcher.close()
+        if self._owns_client:
+            self.client.close()
+        if self._owns_pool:
+            self.pool.close()
+
+    async def aclose(self) -> None:
+        for watcher in self.watchers.values():
+            await watcher.aclose()
+        if self._owns_client:
+            self.client.close()
+        if self._owns_async_client:
+            await self.async_client.aclose()
+        if self._owns_pool:
+            await self.pool.aclose()
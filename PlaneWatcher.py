@@ -1,12 +1,27 @@
 import time
 
-from AirplanesLive_Client import AirplanesClient
-from datetime import datetime
-from AircraftResp import AircraftResp
+from AirplanesLive_Client import AirplanesClient, AsyncAirplanesClient
+from ConnectionPool import SharedPool
+from Instrumentation import Metrics
+from RateLimiter import TokenBucket
+from ReferenceData import ReferenceData
+from datetime import datetime, timedelta
 from AircraftTypes import AircraftTypes
-from SeenAircraft import SeenAircraft
-from typing import Any, List
-from AlertList import AlertList
+from FlightTrack import TrackHistory, TrackPoint
+from FollowList import FollowedAircraft, FollowList
+from Geometry import SnapshotGeometry
+from Prediction import Prediction
+from Snapshot import Snapshot
+from SpatialIndex import Polygon
+from SeenAircraft import SeenAircraft, SeenDelta
+from TrackStore import TrackStore
+from typing import TYPE_CHECKING, Callable, List, Optional, Sequence, Set, Tuple
+from AlertList import AlertList, AlertRecord
+from AlertRules import AlertEvent, Rule, RuleEngine
+
+if TYPE_CHECKING:
+    from HistoryStore import HistoryStore
+    from Recording import ResponseRecorder
 
 # importing module
 import logging
@@ -19,123 +34,380 @@ logging.basicConfig(
 
 
 class PlaneWatcher:
-    def __init__(self, lat: float, lon: float, rad: int):
-        self.client: AirplanesClient = AirplanesClient()
-        self.aircraft: List[AircraftResp] = []
-        self.__aircraft_types: AircraftTypes = AircraftTypes()
-        self.interestingData:AlertList = AlertList()
-        self.__interesting_hexes: List = self.interestingData.interesting_hexes
+    def __init__(
+        self,
+        lat: float,
+        lon: float,
+        rad: int,
+        max_seen: Optional[int] = None,
+        max_seen_age: Optional[timedelta] = None,
+        decoder: str = "json",
+        pool: Optional[SharedPool] = None,
+        limiter: Optional[TokenBucket] = None,
+        client: Optional[AirplanesClient] = None,
+        async_client: Optional[AsyncAirplanesClient] = None,
+        aircraft_types: Optional[AircraftTypes] = None,
+        alert_list: Optional[AlertList] = None,
+        rules: Optional[Sequence[Rule]] = None,
+        background_load: bool = False,
+        recorder: Optional["ResponseRecorder"] = None,
+        clock: Callable[[], datetime] = datetime.now,
+        metrics: Optional[Metrics] = None,
+        history: Optional["HistoryStore"] = None,
+        tracks: Optional[TrackHistory] = None,
+        follow: Optional[FollowList] = None,
+    ):
+        # the sync and async clients share one pool and one rate limit; pass
+        # `pool` / `limiter` to share them with other watchers too. Clients
+        # and reference data passed in are shared and not closed here.
+        self._owns_pool: bool = pool is None
+        self._owns_client: bool = client is None
+        self._owns_async_client: bool = async_client is None
+        # per-stage timings, shared with the clients created here
+        self.metrics: Metrics = metrics if metrics is not None else Metrics()
+        self.pool: SharedPool = pool if pool is not None else SharedPool()
+        self.limiter: TokenBucket = limiter if limiter is not None else TokenBucket()
+        self.client: AirplanesClient = client if client is not None else AirplanesClient(
+            decoder=decoder, pool=self.pool, limiter=self.limiter, recorder=recorder, metrics=self.metrics
+        )
+        self.async_client: AsyncAirplanesClient = async_client if async_client is not None else AsyncAirplanesClient(
+            decoder=decoder, pool=self.pool, limiter=self.limiter, recorder=recorder, metrics=self.metrics
+        )
+        # time source for last_refresh; Recording.Replay.now replays recorded time
+        self.clock: Callable[[], datetime] = clock
+        self.aircraft: Snapshot = Snapshot()
+        # with background_load the reference data loads on a thread and,
+        # until apply_reference() swaps it in, lookups run against empty
+        # placeholders: nothing is a helicopter or interesting yet
+        self.reference: ReferenceData = ReferenceData(aircraft_types, alert_list, background=background_load)
+        self.reference_ready: bool = False
+        self.__aircraft_types: AircraftTypes = AircraftTypes([])
+        self.interestingData:AlertList = AlertList([])
+        self.__interesting_hexes: Set[str] = self.interestingData.interesting_hexes
         
         self.lat: float = lat
         self.lon: float = lon
         self.radius: int = rad
-        self.last_refresh: datetime = datetime.now()
-        self.seen: dict[str, SeenAircraft] = {}
+        self.last_refresh: datetime = clock()
+        self.seen: TrackStore = TrackStore(max_entries=max_seen, max_age=max_seen_age)
+        self.rules: Optional[RuleEngine] = (
+            RuleEngine(rules, self.__aircraft_types, self.interestingData) if rules else None
+        )
+        # alert transitions produced by the last ingest()
+        self.alert_events: List[AlertEvent] = []
+        # what the last ingest() changed in `seen`, and the hexes it saw
+        self.delta: SeenDelta = SeenDelta()
+        self._present: Set[str] = set()
+        # sightings and positions go to disk after every ingest; the last
+        # `history.restore_hours` of sightings come back on startup
+        self.history: Optional["HistoryStore"] = history
+        # flight paths of notable aircraft (see FlightTrack.py), get_track()
+        self.tracks: TrackHistory = tracks if tracks is not None else TrackHistory()
+        # alert list aircraft that left the zone, followed with /hex batches
+        # between polls (see FollowList.py); None disables following
+        self.follow: Optional[FollowList] = follow
+        self._prediction: Optional[Tuple[Snapshot, Prediction]] = None
+        if history is not None:
+            for seenac in history.load_seen(self.last_refresh):
+                self.seen[seenac.hex] = seenac
+        self.apply_reference()
+
+    def apply_reference(self) -> bool:
+        """Switch to the loaded reference data once it is ready.
+
+        Reclassifies everything already in `seen`. Returns True if the data
+        was applied by this call. ingest() calls it, so a watcher that is
+        only polled picks the data up on the next refresh. Call it directly
+        to reclassify sooner. It must run on the thread that polls.
+        """
+        if self.reference_ready or not self.reference.ready:
+            return False
+        self.reference_ready = True
+        if self.reference.error is not None:
+            # keep the empty placeholders; tracking still works unclassified
+            logger.error(f"Reference data unavailable: {self.reference.error}")
+            return False
+        self.__aircraft_types, self.interestingData = self.reference.result()
+        self.__interesting_hexes = self.interestingData.interesting_hexes
+        if self.rules is not None:
+            self.rules.set_reference(self.__aircraft_types, self.interestingData)
+        for seenac in self.seen.values():
+            seenac.is_helicopter = self.is_helicopter(seenac.type)
+            seenac.is_interesting = self.is_interesting(seenac.hex)
+        return True
 
     def refresh(self):
-        self.last_refresh = datetime.now()
         logger.info("Fetching nearby aircraft...")
-        data: List[dict] | None = self.client.get_point(
-            self.lat, self.lon, self.radius
+        with self.metrics.time("fetch_seconds"):
+            data: List[dict] | None = self.client.get_point(
+                self.lat, self.lon, self.radius
+            )
+        self.ingest(data)
+
+    async def refresh_async(self):
+        """Same as refresh(), but awaits the API through async_client."""
+        logger.info("Fetching nearby aircraft...")
+        with self.metrics.time("fetch_seconds"):
+            data: List[dict] | None = await self.async_client.get_point(
+                self.lat, self.lon, self.radius
+            )
+        self.ingest(data)
+
+    def refresh_followed(self) -> Optional[List[FollowedAircraft]]:
+        """Request the next due batch of followed aircraft from /hex.
+
+        Returns the aircraft reported, or None if nothing was due (no
+        request made).
+        """
+        batch = self.follow.due() if self.follow is not None else []
+        if not batch:
+            return None
+        with self.metrics.time("follow_seconds"):
+            data: List[dict] | None = self.client.get_hex_aircraft(batch)
+        return self.ingest_followed(batch, data)
+
+    async def refresh_followed_async(self) -> Optional[List[FollowedAircraft]]:
+        """Same as refresh_followed(), but awaits the API through async_client."""
+        batch = self.follow.due() if self.follow is not None else []
+        if not batch:
+            return None
+        with self.metrics.time("follow_seconds"):
+            data: List[dict] | None = await self.async_client.get_hex_aircraft(batch)
+        return self.ingest_followed(batch, data)
+
+    def ingest_followed(self, requested: Sequence[str], data: List[dict] | Snapshot | None) -> List[FollowedAircraft]:
+        """Apply a /hex response for `requested`; extends their flight paths too.
+
+        Leaves the current snapshot, seen and the alert rules alone: those
+        describe the zone.
+        """
+        at = self.clock()
+        snap = data if isinstance(data, Snapshot) else Snapshot.from_payload(data)
+        reported = self.follow.ingest(requested, snap, snap.geometry(self.lat, self.lon).distance_nm, at)
+        self.tracks.observe(snap, self.seen, at)
+        return reported
+
+    def ingest(self, data: List[dict] | Snapshot | None) -> None:
+        """Replace the current snapshot with `data` and update seen state."""
+        self.apply_reference()
+        self.last_refresh = self.clock()
+        with self.metrics.time("snapshot_seconds"):
+            self.aircraft = data if isinstance(data, Snapshot) else Snapshot.from_payload(data)
+        if self.rules is not None:
+            # also for an empty snapshot, so aircraft that vanish still "leave"
+            with self.metrics.time("rules_seconds"):
+                self.alert_events = self.rules.evaluate(self.aircraft, self.last_refresh)
+        with self.metrics.time("tracking_seconds"):
+            # also for an empty snapshot, so the delta reports what went away
+            delta = self.update_seen()
+            self.tracks.observe(self.aircraft, self.seen, self.last_refresh)
+            delta.evicted = self.seen.evict(self.last_refresh)
+            for hex in delta.evicted:
+                self.tracks.discard(hex)
+                logger.info(f"Evicted aircraft: {hex}")
+            if self.follow is not None:
+                self.follow.update(delta, self.seen, self.last_refresh)
+        if self.history is not None:
+            entries = self.seen
+            changed = [entries[hex] for hex in (*delta.new, *delta.updated) if hex in entries]
+            self.history.record(self.last_refresh, self.aircraft, self.geometry.distance_nm, changed)
+
+    @property
+    def geometry(self) -> SnapshotGeometry:
+        """Distance/bearing/closure for the current snapshot (cached on it)."""
+        return self.aircraft.geometry(self.lat, self.lon)
+
+    @property
+    def prediction(self) -> Prediction:
+        """Dead reckoning and CPA for the current snapshot (built once per snapshot)."""
+        cached = self._prediction
+        if cached is None or cached[0] is not self.aircraft:
+            cached = self._prediction = (self.aircraft, Prediction(self.aircraft, self.lat, self.lon, self.last_refresh))
+        return cached[1]
+
+    def aircraft_within(self, radius_nm: float, lat: Optional[float] = None, lon: Optional[float] = None) -> List[int]:
+        """Snapshot indices of aircraft within `radius_nm` of a point (default: the observer)."""
+        return self.aircraft.spatial_index().within(
+            self.lat if lat is None else lat, self.lon if lon is None else lon, radius_nm
         )
-        if not data:
-            self.aircraft = []
-            return
-        self.aircraft = [AircraftResp.from_dict(x) for x in data]
-        self.update_seen()
 
-    def update_seen(self) -> None:
-        for ac in self.aircraft:
-            dist = ac.distance_to(lat=self.lat, lon=self.lon, unit="nm")
+    def aircraft_in(self, polygon: Polygon) -> List[int]:
+        """Snapshot indices of aircraft inside `polygon`."""
+        return self.aircraft.spatial_index().in_polygon(polygon)
 
-            if not dist:
+    def nearest(self, k: int = 1) -> List[Tuple[float, int]]:
+        """(distance_nm, snapshot index) of the `k` aircraft closest to the observer."""
+        return self.aircraft.spatial_index().nearest(self.lat, self.lon, k)
+
+    def update_seen(self) -> SeenDelta:
+        """Fold the current snapshot into `seen` and return what changed.
+
+        Aircraft already tracked are updated in place, field by field, and
+        only the fields that changed are listed in the delta; an aircraft
+        whose values did not change costs no allocation. Altitude and
+        speed extremes are updated on every observation; groundSpeed and
+        altitude are the values at the closest approach. The result is
+        also kept as `self.delta`.
+        """
+        snap = self.aircraft
+        geometry = self.geometry
+        value = Snapshot.value
+        seen = self.seen
+        now = self.last_refresh
+        delta = SeenDelta(at=now)
+        previous = self._present
+        present = set(snap.hex)
+        for i, hex in enumerate(snap.hex):
+            dist = geometry.distance(i)
+            if dist is None:
                 dist = float("inf")
+            gs = value(snap.gs, i)
+            alt = value(snap.alt_geom, i)
+            if hex not in previous:
+                delta.appeared.append(hex)
+            seenac = seen.get(hex)
+            if seenac is None:
+                seen[hex] = SeenAircraft(
+                    hex=hex,
+                    type=snap.t[i],
+                    typeDesc=snap.desc[i],
+                    tail=snap.r[i],
+                    flight=snap.flight[i],
+                    closestApproach=dist,
+                    closestTime=now,
+                    firstSeen=now,
+                    lastSeen=now,
+                    is_helicopter=self.is_helicopter(snap.t[i]),
+                    is_interesting=self.is_interesting(hex),
+                    groundSpeed=gs if gs is not None else 0,
+                    altitude=alt if alt is not None else 0,
+                    emergency=snap.emergency[i],
+                    highest_altitude=alt,
+                    lowest_altitude=alt,
+                    fastestGs=gs,
+                    slowestGs=gs,
+                )
+                delta.new.append(hex)
+                logger.info(f"New aircraft seen: {hex} ({snap.flight[i]})")
+                continue
 
-            seenac = SeenAircraft(
-                hex=ac.hex,
-                type=ac.t,
-                typeDesc=ac.desc,
-                tail=ac.r,
-                flight=ac.flight,
-                closestApproach=dist,
-                firstSeen=self.last_refresh,
-                lastSeen=self.last_refresh,
-                is_helicopter=self.is_helicopter(ac.t),
-                is_interesting=self.is_interesting(ac.hex),
-                groundSpeed=ac.gs if ac.gs is not None else 0,
-                altitude=ac.alt_geom if ac.alt_geom and ac.alt_geom != "ground" else 0,
-                emergency=ac.emergency,
-                highest_altitude=ac.alt_geom if ac.alt_geom and ac.alt_geom != "ground" else 0,
-                lowest_altitude=ac.alt_geom if ac.alt_geom and ac.alt_geom != "ground" else 0,
-                fastestGs=ac.gs if ac.gs is not None else 0,
-                slowestGs=ac.gs if ac.gs is not None else 0,
-            )
-            if ac.hex not in self.seen:
-                self.seen[ac.hex] = seenac
-                logger.info(f"New aircraft seen: {ac.hex} ({ac.flight})")
-            else:
-                self.seen[ac.hex].lastSeen = self.last_refresh
-                if dist is not None:
-                    if (
-                        self.seen[ac.hex].closestApproach is None
-                        or dist < self.seen[ac.hex].closestApproach
-                    ):
-                        self.seen[ac.hex].closestTime = self.last_refresh
-                        self.seen[ac.hex].closestApproach = dist
-                        self.seen[ac.hex].flight = ac.flight
-                        self.seen[ac.hex].groundSpeed=ac.gs if ac.gs is not None else float(0)
-                        self.seen[ac.hex].altitude=ac.alt_geom if ac.alt_geom != "ground" and ac.alt_geom else float(0)
-                        self.seen[ac.hex].emergency=ac.emergency if ac.emergency is not None or ac.emergency != "False" else "False"
-                        self.seen[ac.hex].highest_altitude = ac.alt_geom if ac.alt_geom and ac.alt_geom >= self.seen[ac.hex].highest_altitude else self.seen[ac.hex].highest_altitude
-                        self.seen[ac.hex].lowest_altitude = ac.alt_geom if ac.alt_geom and (self.seen[ac.hex].lowest_altitude == 0 or ac.alt_geom <= self.seen[ac.hex].lowest_altitude) else self.seen[ac.hex].lowest_altitude
-                        self.seen[ac.hex].fastestGs = ac.gs if ac.gs and ac.gs >= self.seen[ac.hex].fastestGs else self.seen[ac.hex].fastestGs
-                        self.seen[ac.hex].slowestGs = ac.gs if ac.gs and (self.seen[ac.hex].slowestGs == 0 or ac.gs <= self.seen[ac.hex].slowestGs) else self.seen[ac.hex].slowestGs
+            # grows only when something changed; () is a shared singleton
+            changed: Tuple[str, ...] = ()
+            flight = snap.flight[i]
+            if flight and flight != seenac.flight:
+                seenac.flight = flight
+                changed += ("flight",)
+            emergency = snap.emergency[i]
+            if emergency != seenac.emergency:
+                seenac.emergency = emergency
+                changed += ("emergency",)
+            type_str = snap.t[i]
+            if type_str and type_str != seenac.type:
+                seenac.type = type_str
+                seenac.typeDesc = snap.desc[i]
+                seenac.is_helicopter = self.is_helicopter(type_str)
+                changed += ("type", "typeDesc", "is_helicopter")
+            tail = snap.r[i]
+            if tail and tail != seenac.tail:
+                seenac.tail = tail
+                changed += ("tail",)
+            if dist < seenac.closestApproach:
+                seenac.closestApproach = dist
+                seenac.closestTime = now
+                seenac.groundSpeed = gs if gs is not None else 0
+                seenac.altitude = alt if alt is not None else 0
+                changed += ("closestApproach", "closestTime", "groundSpeed", "altitude")
+            if alt is not None:
+                if seenac.highest_altitude is None or alt > seenac.highest_altitude:
+                    seenac.highest_altitude = alt
+                    changed += ("highest_altitude",)
+                if seenac.lowest_altitude is None or alt < seenac.lowest_altitude:
+                    seenac.lowest_altitude = alt
+                    changed += ("lowest_altitude",)
+            if gs is not None:
+                if seenac.fastestGs is None or gs > seenac.fastestGs:
+                    seenac.fastestGs = gs
+                    changed += ("fastestGs",)
+                if seenac.slowestGs is None or gs < seenac.slowestGs:
+                    seenac.slowestGs = gs
+                    changed += ("slowestGs",)
+            if changed:
+                delta.updated[hex] = changed
+            seenac.lastSeen = now
+            seen.touch(hex)
+        delta.disappeared = [hex for hex in previous if hex not in present]
+        self._present = present
+        self.delta = delta
+        return delta
+
+    def close(self) -> None:
+        if self._owns_client:
+            self.client.close()
+        if self._owns_pool:
+            self.pool.close()
+
+    async def aclose(self) -> None:
+        if self._owns_client:
+            self.client.close()
+        if self._owns_async_client:
+            await self.async_client.aclose()
+        if self._owns_pool:
+            await self.pool.aclose()
 
     def is_helicopter(self, type_str: str) -> bool:
-        for item in self.__aircraft_types.aircraft_types:
-            if item["Designator"] == type_str:
-                return (
-                    item["AircraftDescription"] == "Helicopter"
-                    or item["AircraftDescription"] == "Tiltrotor"
-                )
-        return False
+        return self.__aircraft_types.is_rotorcraft(type_str)
 
     def print_helicopters(self):
-        helicopters = [
-            ac
-            for ac in self.aircraft
-            if self.is_helicopter(ac.t)
-        ]
-        for heli in helicopters:
-            dist = heli.distance_to(lat=self.lat, lon=self.lon, unit="nm")
+        snap = self.aircraft
+        geometry = self.geometry
+        for i, type_str in enumerate(snap.t):
+            if not self.is_helicopter(type_str):
+                continue
+            dist = geometry.distance(i)
             dist_str = "unknown" if dist is None else f"{dist:.2f} nm"
             print(
-                f"{self.last_refresh}\t{heli.hex}\t{heli.flight}\t{heli.desc}\t{dist_str}"
+                f"{self.last_refresh}\t{snap.hex[i]}\t{snap.flight[i]}\t{snap.desc[i]}\t{dist_str}"
             )
 
     def print_aircraft(self):
-        for aircraft in self.aircraft:
-            dist = aircraft.distance_to(lat=self.lat, lon=self.lon, unit="nm")
+        snap = self.aircraft
+        geometry = self.geometry
+        for i, hex in enumerate(snap.hex):
+            dist = geometry.distance(i)
             dist_str = "unknown" if dist is None else f"{dist:.2f} nm"
             print(
-                f"{self.last_refresh}\t{aircraft.hex}\t{aircraft.flight}\t{aircraft.desc}\t{dist_str}"
+                f"{self.last_refresh}\t{hex}\t{snap.flight[i]}\t{snap.desc[i]}\t{dist_str}"
             )
 
     def is_interesting(self, hex:str) -> bool:
         return hex.lower() in self.__interesting_hexes
     
-    def get_interesting(self, hex:str) -> dict[str,Any]:
-        x =  [x for x in self.interestingData.interesting_aircraft if x['$ICAO'].lower() == hex.lower()]
-        if len(x) > 0:
-            return x[0]
-        return {}
+    def get_interesting(self, hex:str) -> Optional[AlertRecord]:
+        return self.interestingData.get(hex)
+
+    def get_track(self, hex: str, since: Optional[datetime] = None) -> List[TrackPoint]:
+        """Recorded path of `hex`, oldest first; empty if it is not tracked."""
+        track = self.tracks.get(hex)
+        if track is None:
+            return []
+        return track.points(since.timestamp() if since is not None else None)
 
 
 if __name__ == "__main__":
+    import httpx
+
+    from PollScheduler import PollScheduler
+
     watcher = PlaneWatcher(42.5197568, -71.417856, 10)
+    scheduler = PollScheduler(metrics=watcher.metrics)
     while True:
-        watcher.refresh()
+        try:
+            watcher.refresh()
+        except httpx.HTTPError as e:
+            print(f"Refresh failed: {e}")
+            time.sleep(scheduler.after_error(e))
+            continue
         for k in watcher.seen.keys():
             print(watcher.seen[k], watcher.is_helicopter(watcher.seen[k].type))
-        print("----")
-        time.sleep(5)
+        print("----", scheduler.summary())
+        time.sleep(scheduler.after_poll(watcher))
@@ -0,0 +1,276 @@
+"""Adaptive poll interval, driven by traffic, alerts and API errors.
+
+After every poll the scheduler picks how long to wait before the next
+one, and why:
+
+- fast_interval while something worth watching is in the zone: an
+  emergency squawk, an active alert, a helicopter or an alert list
+  aircraft, or an aircraft predicted to pass within `close_nm` in the
+  next `close_horizon` seconds (PlaneWatcher.prediction.close_passes)
+- interval for ordinary traffic
+- up to idle_interval when the sky is empty, doubling per empty poll
+- after a 429, a 5xx or a network error, interval doubled per failure
+  in a row (up to max_interval), or the server's Retry-After if longer.
+  The clients have already retried by then, so this is a slower retry.
+
+With `quota_per_hour`, API requests in any rolling hour never exceed
+it: past half the quota the interval is at least the average pace
+(3600 / quota), and once it is spent the next poll waits for the oldest
+one to leave the window. Fast polling can use up half the budget
+early and then falls back to the average pace. With `metrics` shared
+with the clients, the window counts every request attempt the clients
+made (requests_total), so retries of a failing poll count too; a poll
+or follow-up always counts at least once. limit_retries() caps the
+clients' attempts per request to what is left of the quota.
+
+Between two polls, follow mode (FollowList.py) may spend part of the
+wait on /hex requests: at most `follow_per_poll`, one per second of the
+wait with a second left over for the next poll, and with a quota only
+as many as the average pace leaves room for. They count against the
+quota like polls. follow_between_polls() runs them for App and Daemon.
+
+Every decision is appended to `decisions` (the last `log_size`) and, with
+`metrics`, observed into poll_interval_seconds{reason=...}, so the
+choices can be tuned from the stats panel or /metrics.
+"""
+from __future__ import annotations
+
+import logging
+import time
+from collections import deque
+from typing import TYPE_CHECKING, Any, Callable, Deque, Dict, List, NamedTuple, Optional, Tuple, Union
+
+import httpx
+
+from FlightTrack import is_notable
+from Instrumentation import Metrics
+from RateLimiter import MAX_RETRY_AFTER, parse_retry_after
+
+if TYPE_CHECKING:
+    from FollowList import FollowedAircraft
+    from MultiSiteWatcher import MultiSiteWatcher
+    from PlaneWatcher import PlaneWatcher
+
+logger = logging.getLogger(__name__)
+
+HOUR = 3600.0
+# default cap on the wait after errors; raised to idle_interval if that is longer
+MAX_INTERVAL = 300.0
+
+
+class PollDecision(NamedTuple):
+    t: float  # scheduler clock when the decision was made
+    interval: float  # seconds until the next poll
+    reason: str
+    requests_last_hour: int
+
+
+class PollScheduler:
+    """Chooses the wait before each poll; see the module docstring.
+
+    `clock` must be monotonic and is only swappable for tests.
+    """
+
+    def __init__(
+        self,
+        interval: float = 5.0,
+        fast_interval: float = 2.0,
+        idle_interval: float = 15.0,
+        max_interval: float = MAX_INTERVAL,
+        quota_per_hour: Optional[int] = None,
+        close_nm: float = 1.0,
+        close_horizon: float = 120.0,
+        follow_per_poll: int = 1,
+        log_size: int = 256,
+        metrics: Optional[Metrics] = None,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        if not 0 < fast_interval <= interval <= idle_interval <= max_interval:
+            raise ValueError("need 0 < fast_interval <= interval <= idle_interval <= max_interval")
+        if quota_per_hour is not None and quota_per_hour < 1:
+            raise ValueError("quota_per_hour must be at least 1")
+        self.interval = interval
+        self.fast_interval = fast_interval
+        self.idle_interval = idle_interval
+        self.max_interval = max_interval
+        self.quota_per_hour = quota_per_hour
+        self.close_nm = close_nm
+        self.close_horizon = close_horizon
+        self.follow_per_poll = follow_per_poll
+        self.metrics = metrics
+        self._clock = clock
+        self.decisions: Deque[PollDecision] = deque(maxlen=log_size)
+        # clock times of the request attempts (polls, follow-ups and their
+        # retries) in the last hour
+        self._polls: Deque[float] = deque()
+        self._attempts: float = metrics.counter("requests_total") if metrics is not None else 0.0
+        # client -> its configured max_retries, restored once the quota allows
+        self._max_retries: Dict[object, int] = {}
+        self.empty_polls: int = 0
+        self.failures: int = 0
+
+    @property
+    def last(self) -> Optional[PollDecision]:
+        return self.decisions[-1] if self.decisions else None
+
+    def requests_last_hour(self) -> int:
+        self._expire(self._clock())
+        return len(self._polls)
+
+    def _expire(self, now: float) -> None:
+        polls = self._polls
+        while polls and polls[0] <= now - HOUR:
+            polls.popleft()
+
+    def _count(self, now: float) -> None:
+        """Add the attempts made since the last call to the window."""
+        n = 1
+        if self.metrics is not None:
+            total = self.metrics.counter("requests_total")
+            n = max(1, int(total - self._attempts))
+            self._attempts = total
+        self._polls.extend([now] * n)
+
+    def record_request(self) -> None:
+        """Count an extra request (e.g. a /hex follow-up) against the quota."""
+        self._count(self._clock())
+
+    def limit_retries(self, *clients: Any) -> None:
+        """Cap each client's attempts per request to what the quota has left.
+
+        Clients are AirplanesClient / AsyncAirplanesClient; their own
+        max_retries comes back once the window empties again.
+        """
+        if self.quota_per_hour is None:
+            return
+        left = max(1, self.quota_per_hour - self.requests_last_hour())
+        for client in clients:
+            configured = self._max_retries.setdefault(client, client.max_retries)
+            client.max_retries = min(configured, left)
+
+    def follow_requests(self, interval: float) -> int:
+        """How many follow-up requests fit into a wait of `interval` seconds."""
+        n = min(self.follow_per_poll, int(interval) - 1)
+        quota = self.quota_per_hour
+        if quota is not None:
+            used = self.requests_last_hour()
+            # each request costs one average pace of the wait, and the
+            # next poll must still fit into the window
+            n = min(n, int(interval * quota / HOUR) - 1, quota - used - 1)
+        return max(n, 0)
+
+    def _activity(self, watcher: "PlaneWatcher") -> Optional[str]:
+        """Why the zone deserves fast polling, or None."""
+        snap = watcher.aircraft
+        if any(e not in (None, "none", "False") for e in snap.emergency):
+            return "emergency"
+        if watcher.rules is not None and watcher.rules.active():
+            return "alert"
+        seen = watcher.seen
+        for hex in snap.hex:
+            ac = seen.get(hex)
+            if ac is not None and is_notable(ac):
+                return "helicopter" if ac.is_helicopter else "interesting"
+        if watcher.prediction.close_passes(self.close_nm, self.close_horizon):
+            return "close pass"
+        return None
+
+    def after_poll(self, watcher: Union["PlaneWatcher", "MultiSiteWatcher"]) -> float:
+        """Seconds to wait after a successful refresh of `watcher`.
+
+        For a MultiSiteWatcher the busiest zone decides: the sky is empty
+        only when every zone is.
+        """
+        self.failures = 0
+        zones = list(watcher.watchers.values()) if hasattr(watcher, "watchers") else [watcher]
+        if all(len(zone.aircraft) == 0 for zone in zones):
+            self.empty_polls += 1
+            return self._decide(min(self.idle_interval, self.interval * 2 ** self.empty_polls), "empty sky")
+        self.empty_polls = 0
+        for zone in zones:
+            reason = self._activity(zone)
+            if reason is not None:
+                return self._decide(self.fast_interval, reason)
+        return self._decide(self.interval, "traffic")
+
+    def after_error(self, exc: Exception) -> float:
+        """Seconds to wait after a refresh that raised `exc`."""
+        if isinstance(exc, httpx.HTTPStatusError):
+            status = exc.response.status_code
+            if status == 429:
+                reason = "rate limited"
+            elif 500 <= status < 600:
+                reason = "server error"
+            else:
+                return self._decide(self.interval, "error")
+            retry_after = parse_retry_after(exc.response.headers.get("Retry-After"))
+        elif isinstance(exc, httpx.RequestError):
+            reason, retry_after = "network error", None
+        else:
+            # a bad payload is not the server asking us to slow down
+            return self._decide(self.interval, "error")
+        self.failures += 1
+        backoff = min(self.max_interval, self.interval * 2 ** self.failures)
+        if retry_after is not None:
+            backoff = max(backoff, min(retry_after, MAX_RETRY_AFTER))
+        return self._decide(backoff, reason)
+
+    def _decide(self, interval: float, reason: str) -> float:
+        now = self._clock()
+        self._expire(now)
+        polls = self._polls
+        # the poll that just finished counts against the window
+        self._count(now)
+        quota = self.quota_per_hour
+        if quota is not None:
+            if len(polls) >= quota:
+                wait = polls[0] + HOUR - now
+                if wait > interval:
+                    interval, reason = wait, "quota"
+            elif len(polls) >= quota / 2 and interval < HOUR / quota:
+                interval, reason = HOUR / quota, "quota pace"
+        last = self.last
+        decision = PollDecision(now, interval, reason, len(polls))
+        self.decisions.append(decision)
+        if self.metrics is not None:
+            self.metrics.observe("poll_interval_seconds", interval, reason=reason)
+        if last is None or last.reason != reason:
+            logger.info("Polling every %.1fs (%s)", interval, reason)
+        return interval
+
+    def summary(self) -> str:
+        """One line describing the last decision, for status displays."""
+        last = self.last
+        if last is None:
+            return "no polls yet"
+        text = f"next poll in {last.interval:.0f}s ({last.reason})"
+        if self.quota_per_hour is not None:
+            text += f", {last.requests_last_hour}/{self.quota_per_hour} requests this hour"
+        return text
+
+
+async def follow_between_polls(
+    watcher: "PlaneWatcher", scheduler: PollScheduler, interval: float
+) -> Tuple[float, List["FollowedAircraft"]]:
+    """Spend part of a wait on /hex follow-ups; returns (wait left, aircraft reported).
+
+    A failed follow-up is logged and ends the follow-ups for this wait;
+    the next poll goes out on time either way.
+    """
+    reported: List["FollowedAircraft"] = []
+    if not watcher.follow:  # off, or nobody to follow
+        return interval, reported
+    started = time.monotonic()
+    for _ in range(scheduler.follow_requests(interval)):
+        scheduler.limit_retries(watcher.async_client)
+        try:
+            batch = await watcher.refresh_followed_async()
+        except (httpx.HTTPError, ValueError) as e:
+            scheduler.record_request()
+            logger.error(f"Following failed: {e}")
+            break
+        if batch is None:
+            break
+        scheduler.record_request()
+        reported.extend(batch)
+    return max(0.0, interval - (time.monotonic() - started)), reported
@@ -0,0 +1,144 @@
+"""Dead reckoning between polls and closest point of approach (CPA).
+
+A poll tells us where each aircraft was, how fast it is going (gs, kt),
+which way (track, deg true) and how fast it climbs (baro_rate, ft/min).
+Prediction extrapolates that in a straight line, so the UI can move
+distances every second while the API is polled every few seconds.
+
+Positions are kept relative to the observer on a flat east/north plane in
+nm. The starting point comes from the snapshot's SnapshotGeometry
+(distance and bearing), so a prediction at the poll time matches the
+great-circle numbers exactly. For the ranges /point serves, the flat
+plane is accurate to well under 1%.
+
+CPA treats the aircraft as moving in a straight line at constant speed
+past a fixed observer:
+
+    t_cpa = -(p . v) / |v|^2   (0 if it is already moving away)
+    d_cpa = |p + v * t_cpa|
+
+Extrapolation stops after `max_horizon` seconds, so a stalled poll
+loop freezes positions instead of flying them off the map. Aircraft
+without a track or ground speed stay where they were reported.
+NumPy is used when Geometry.py uses it.
+"""
+from __future__ import annotations
+
+import math
+from datetime import datetime, timedelta
+from typing import List, Optional, Sequence, Tuple
+
+# np is Geometry's backend choice: the module, or None without NumPy
+from Geometry import NAN, NM_PER_DEG, np
+from Snapshot import MISSING_ALT, Snapshot
+
+
+class Prediction:
+    __slots__ = ("at", "lat", "lon", "max_horizon", "x0", "y0", "vx", "vy", "alt0", "vs", "cpa_seconds", "cpa_nm")
+
+    def __init__(self, snap: Snapshot, lat: float, lon: float, at: datetime, max_horizon: float = 30.0) -> None:
+        self.at = at
+        self.lat = lat
+        self.lon = lon
+        self.max_horizon = max_horizon
+        geometry = snap.geometry(lat, lon)
+        if np is not None:
+            self._init_numpy(snap, geometry)
+        else:
+            self._init_python(snap, geometry)
+
+    def _init_numpy(self, snap: Snapshot, geometry) -> None:
+        dist = np.asarray(geometry.distance_nm, dtype=np.float64)
+        bearing = np.radians(np.asarray(geometry.bearing_deg, dtype=np.float64))
+        self.x0 = dist * np.sin(bearing)
+        self.y0 = dist * np.cos(bearing)
+        gs = np.nan_to_num(np.asarray(snap.gs, dtype=np.float64)) / 3600.0
+        track = np.radians(np.asarray(snap.track, dtype=np.float64))
+        # no track: assume stationary rather than poisoning the position
+        self.vx = np.where(np.isnan(track), 0.0, gs * np.sin(track))
+        self.vy = np.where(np.isnan(track), 0.0, gs * np.cos(track))
+        alt = np.asarray(snap.alt_geom, dtype=np.float64)
+        self.alt0 = np.where(alt == MISSING_ALT, np.nan, alt)
+        self.vs = np.nan_to_num(np.asarray(snap.baro_rate, dtype=np.float64)) / 60.0
+        speed2 = self.vx ** 2 + self.vy ** 2
+        with np.errstate(invalid="ignore", divide="ignore"):
+            t = np.where(speed2 > 0, -(self.x0 * self.vx + self.y0 * self.vy) / speed2, 0.0)
+        t = np.maximum(t, 0.0)
+        self.cpa_seconds = np.where(np.isnan(dist), np.nan, t)
+        self.cpa_nm = np.hypot(self.x0 + self.vx * t, self.y0 + self.vy * t)
+
+    def _init_python(self, snap: Snapshot, geometry) -> None:
+        self.x0, self.y0, self.vx, self.vy = [], [], [], []
+        self.alt0, self.vs, self.cpa_seconds, self.cpa_nm = [], [], [], []
+        for d, b, gs, trk, alt, rate in zip(
+            geometry.distance_nm, geometry.bearing_deg, snap.gs, snap.track, snap.alt_geom, snap.baro_rate
+        ):
+            x0, y0 = d * math.sin(math.radians(b)), d * math.cos(math.radians(b))
+            speed = 0.0 if gs != gs else gs / 3600.0
+            vx = 0.0 if trk != trk else speed * math.sin(math.radians(trk))
+            vy = 0.0 if trk != trk else speed * math.cos(math.radians(trk))
+            speed2 = vx * vx + vy * vy
+            t = max(0.0, -(x0 * vx + y0 * vy) / speed2) if speed2 > 0 else 0.0
+            self.x0.append(x0)
+            self.y0.append(y0)
+            self.vx.append(vx)
+            self.vy.append(vy)
+            self.alt0.append(NAN if alt == MISSING_ALT else float(alt))
+            self.vs.append(0.0 if rate != rate else rate / 60.0)
+            self.cpa_seconds.append(NAN if d != d else t)
+            self.cpa_nm.append(math.hypot(x0 + vx * t, y0 + vy * t))
+
+    def __len__(self) -> int:
+        return len(self.x0)
+
+    def elapsed(self, at: datetime) -> float:
+        """Seconds of extrapolation used for `at` (0 to max_horizon)."""
+        return min(max((at - self.at).total_seconds(), 0.0), self.max_horizon)
+
+    def distances(self, at: datetime) -> Sequence[float]:
+        """Predicted distance (nm) of every aircraft at `at`; NaN without a position."""
+        dt = self.elapsed(at)
+        if np is not None:
+            return np.hypot(self.x0 + self.vx * dt, self.y0 + self.vy * dt)
+        return [math.hypot(x + vx * dt, y + vy * dt) for x, y, vx, vy in zip(self.x0, self.y0, self.vx, self.vy)]
+
+    def distance(self, i: int, at: datetime) -> Optional[float]:
+        dt = self.elapsed(at)
+        d = math.hypot(self.x0[i] + self.vx[i] * dt, self.y0[i] + self.vy[i] * dt)
+        return None if d != d else float(d)
+
+    def altitude(self, i: int, at: datetime) -> Optional[float]:
+        alt = self.alt0[i]
+        return None if alt != alt else float(alt + self.vs[i] * self.elapsed(at))
+
+    def position(self, i: int, at: datetime) -> Optional[Tuple[float, float]]:
+        """Predicted (lat, lon) of aircraft `i` at `at`."""
+        dt = self.elapsed(at)
+        x, y = self.x0[i] + self.vx[i] * dt, self.y0[i] + self.vy[i] * dt
+        if x != x or y != y:
+            return None
+        lat = self.lat + y / NM_PER_DEG
+        return float(lat), float(self.lon + x / (NM_PER_DEG * math.cos(math.radians(self.lat))))
+
+    def cpa(self, i: int) -> Optional[Tuple[datetime, float]]:
+        """(time, distance nm) of the closest point of approach of aircraft `i`.
+
+        The time is the poll time for aircraft already moving away.
+        """
+        t = self.cpa_seconds[i]
+        if t != t:
+            return None
+        return self.at + timedelta(seconds=float(t)), float(self.cpa_nm[i])
+
+    def close_passes(self, within_nm: float, horizon: float) -> List[Tuple[float, int]]:
+        """(seconds from the poll, index) of CPAs within `within_nm` in the next `horizon` seconds, soonest first."""
+        if np is not None:
+            idx = np.nonzero((self.cpa_seconds <= horizon) & (self.cpa_nm <= within_nm))[0]
+            return sorted((float(self.cpa_seconds[i]), int(i)) for i in idx)
+        hits = [
+            (float(t), i)
+            for i, (t, d) in enumerate(zip(self.cpa_seconds, self.cpa_nm))
+            if t == t and t <= horizon and d <= within_nm
+        ]
+        hits.sort()
+        return hits
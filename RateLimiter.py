@@ -0,0 +1,137 @@
+"""Token-bucket rate limiting shared by the Airplanes.live clients.
+
+The API allows about one request per second per source address, so the
+limit belongs to the process, not to a client instance. A TokenBucket can
+be handed to any number of sync and async clients (and watchers). Each
+request attempt takes a token. Tokens refill at `rate` per second, up to
+`burst` tokens.
+
+Acquiring reserves a token under a short lock and returns how long the
+caller must wait for it. The wait happens outside the lock, with time.sleep
+or asyncio.sleep. That keeps the bucket safe across threads and event
+loops, and waiters are served in the order they arrived.
+
+A 429 with Retry-After calls `penalize`, which pushes the next token out
+for every client sharing the bucket, not just the one that got the 429.
+"""
+from __future__ import annotations
+
+import asyncio
+import math
+import random
+import threading
+import time
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from typing import Callable, Optional
+
+# never trust a Retry-After beyond this many seconds
+MAX_RETRY_AFTER = 300.0
+
+
+class TokenBucket:
+    """Thread- and asyncio-safe token bucket.
+
+    `rate` is tokens per second; 0 (or inf) disables limiting. `clock` must
+    be monotonic and is only swappable for tests.
+    """
+
+    def __init__(
+        self,
+        rate: float = 1.0,
+        burst: float = 1.0,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        if burst < 1:
+            raise ValueError("burst must be at least 1")
+        self.rate: float = float(rate)
+        self.burst: float = float(burst)
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._tokens: float = self.burst
+        self._updated: float = clock()
+        self.acquired: int = 0
+        self.waited: float = 0.0
+
+    @classmethod
+    def per_interval(cls, seconds: float, burst: float = 1.0) -> "TokenBucket":
+        """A bucket allowing one request every `seconds` (0 = unlimited)."""
+        return cls(rate=1.0 / seconds if seconds > 0 else 0.0, burst=burst)
+
+    @property
+    def unlimited(self) -> bool:
+        return self.rate <= 0 or math.isinf(self.rate)
+
+    def _refill(self, now: float) -> None:
+        self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def reserve(self) -> float:
+        """Take a token and return the seconds to wait before using it."""
+        with self._lock:
+            self.acquired += 1
+            if self.unlimited:
+                return 0.0
+            self._refill(self._clock())
+            self._tokens -= 1.0
+            wait = -self._tokens / self.rate if self._tokens < 0 else 0.0
+            self.waited += wait
+            return wait
+
+    def acquire(self) -> float:
+        """Block the calling thread until a token is available."""
+        wait = self.reserve()
+        if wait > 0:
+            time.sleep(wait)
+        return wait
+
+    async def acquire_async(self) -> float:
+        """Wait for a token without blocking the event loop."""
+        wait = self.reserve()
+        if wait > 0:
+            await asyncio.sleep(wait)
+        return wait
+
+    def penalize(self, seconds: float) -> None:
+        """Hold every user of the bucket off for `seconds` (e.g. Retry-After)."""
+        if self.unlimited or seconds <= 0:
+            return
+        with self._lock:
+            self._refill(self._clock())
+            # the next reserve() then waits exactly `seconds`, or longer if
+            # waiters are already queued behind the bucket
+            self._tokens = min(self._tokens, 1.0 - seconds * self.rate)
+
+
+def parse_retry_after(value: Optional[str], now: Optional[datetime] = None) -> Optional[float]:
+    """Seconds from a Retry-After header (delta-seconds or HTTP-date)."""
+    if not value:
+        return None
+    value = value.strip()
+    try:
+        seconds = float(value)
+    except ValueError:
+        try:
+            when = parsedate_to_datetime(value)
+        except (TypeError, ValueError):
+            return None
+        if when.tzinfo is None:
+            when = when.replace(tzinfo=timezone.utc)
+        seconds = (when - (now or datetime.now(timezone.utc))).total_seconds()
+    if math.isnan(seconds):
+        return None
+    return min(max(0.0, seconds), MAX_RETRY_AFTER)
+
+
+def backoff_delay(
+    attempt: int,
+    base: float = 1.0,
+    cap: float = 60.0,
+    rand: Callable[[], float] = random.random,
+) -> float:
+    """Exponential backoff with jitter: a random delay in [d/2, d], d = base * 2**attempt.
+
+    The jitter keeps watchers that failed together from retrying together.
+    """
+    delay = min(cap, base * 2 ** attempt)
+    return delay / 2 + rand() * delay / 2
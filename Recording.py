@@ -0,0 +1,340 @@
+"""Record API responses and play them back without the network.
+
+A recording is gzip-compressed NDJSON. It is append-only: every recorder
+session adds a new gzip member, which gzip readers simply concatenate.
+Each line holds one response:
+
+    {"t": 1760000000.123, "path": "/point/42.5/-71.4/10", "status": 200, "body": {...}}
+
+`t` is the wall-clock time the response arrived. `body` is the response
+body verbatim, so replay hands the exact same bytes to the decoders as
+the live API did. Bodies that do not parse as JSON (error pages, or an
+HTML or truncated body behind a 200) are stored as a string with
+`"text": true`. Responses are encoded and written on a background thread,
+so recording never blocks the event loop, and the file is flushed after
+every response; close() writes whatever is still queued.
+
+Playback goes through `Replay`. Its `client()` / `async_client()` have
+the endpoint interface of AirplanesClient / AsyncAirplanesClient. Each
+request returns the next recorded response for the same path, paced to
+the recorded timeline at `speed` times real time (0 for as fast as
+possible). Use `Replay.now` as PlaneWatcher's clock so seen times follow
+the recording instead of the wall clock. When a path runs out of
+responses, the request raises ReplayFinished.
+"""
+from __future__ import annotations
+
+import asyncio
+import gzip
+import json
+import logging
+import queue
+import threading
+import time
+import zlib
+from collections import deque
+from dataclasses import dataclass
+from datetime import datetime
+from pathlib import Path
+from typing import IO, Any, Callable, Deque, Dict, Iterator, Mapping, Optional, Tuple, Union
+
+import httpx
+
+from AirplanesLive_Client import _Endpoints, _point_path
+from Decoders import JsonDecoder, get_decoder
+
+logger = logging.getLogger(__name__)
+
+FORMAT = "skyalert-recording"
+VERSION = 1
+_BODY = b',"body":'
+
+
+class ReplayFinished(Exception):
+    """The recording has no more responses for the requested path."""
+
+
+@dataclass(frozen=True, slots=True)
+class RecordedResponse:
+    t: float
+    path: str
+    status: int
+    body: bytes
+    params: Optional[Dict[str, Any]] = None
+
+    @property
+    def at(self) -> datetime:
+        return datetime.fromtimestamp(self.t)
+
+    def to_response(self, base_url: str = "https://api.airplanes.live/v2") -> httpx.Response:
+        """An httpx.Response carrying the recorded status and body."""
+        return httpx.Response(
+            self.status,
+            content=self.body,
+            headers={"content-type": "application/json"},
+            request=httpx.Request("GET", base_url + self.path, params=self.params),
+        )
+
+
+class ResponseRecorder:
+    """Appends responses to a recording file. Safe to share between clients.
+
+    record() only queues the response; a writer thread encodes it and
+    appends it, as HistoryStore does for sightings. If the writer falls
+    more than `max_pending` responses behind, new ones are dropped and
+    counted in `dropped`.
+    """
+
+    def __init__(self, path: Union[str, Path], compresslevel: int = 6, max_pending: int = 100) -> None:
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._file: IO[bytes] = gzip.open(self.path, "ab", compresslevel=compresslevel)
+        self.recorded: int = 0
+        self.dropped: int = 0
+        self._write(json.dumps({"format": FORMAT, "version": VERSION}).encode() + b"\n")
+        self._queue: "queue.Queue[Optional[Tuple[float, str, Optional[Mapping[str, Any]], httpx.Response]]]" = queue.Queue(
+            maxsize=max_pending
+        )
+        self._thread = threading.Thread(target=self._writer, name="recording-writer", daemon=True)
+        self._thread.start()
+
+    def _write(self, line: bytes) -> None:
+        self._file.write(line)
+        # flush per line: everything written so far is readable even if we die now
+        self._file.flush()
+
+    def record(self, path: str, params: Optional[Mapping[str, Any]], resp: httpx.Response, t: Optional[float] = None) -> None:
+        """Queue one response; `t` defaults to now."""
+        try:
+            self._queue.put_nowait((time.time() if t is None else t, path, dict(params) if params else None, resp))
+        except queue.Full:
+            self.dropped += 1
+            logger.warning("Recording writer is behind; dropped a response")
+
+    def _writer(self) -> None:
+        while True:
+            item = self._queue.get()
+            try:
+                if item is None:
+                    return
+                self._write(encode_response(*item))
+                self.recorded += 1
+            except OSError as e:
+                logger.error(f"Recording a response failed: {e}")
+            finally:
+                self._queue.task_done()
+
+    def flush(self) -> None:
+        """Wait until everything queued so far is written."""
+        self._queue.join()
+
+    def close(self) -> None:
+        """Write what is queued, stop the writer and close the file."""
+        self._queue.put(None)
+        self._thread.join()
+        self._file.close()
+
+    def __enter__(self) -> "ResponseRecorder":
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        self.close()
+
+
+def encode_response(t: float, path: str, params: Optional[Mapping[str, Any]], resp: httpx.Response) -> bytes:
+    """One recording line for `resp`."""
+    header: Dict[str, Any] = {"t": round(t, 3), "path": path, "status": resp.status_code}
+    if params:
+        header["params"] = dict(params)
+    body = resp.content
+    raw: Optional[bytes] = None
+    if resp.is_success and body:
+        try:
+            parsed = json.loads(body)
+        except ValueError:
+            pass  # an HTML page or a truncated body behind a 200: keep it as text
+        else:
+            # keep one response per line; the API normally sends compact JSON
+            raw = body if b"\n" not in body and b"\r" not in body else json.dumps(parsed, separators=(",", ":")).encode()
+    if raw is None:
+        header["text"] = True
+        raw = json.dumps(resp.text).encode()
+    return json.dumps(header, separators=(",", ":")).encode()[:-1] + _BODY + raw + b"}\n"
+
+
+def _parse_line(line: bytes) -> Optional[RecordedResponse]:
+    line = line.rstrip(b"\r\n")
+    if not line:
+        return None
+    i = line.find(_BODY)
+    if i < 0:
+        header = json.loads(line)
+        if header.get("format") != FORMAT:
+            raise ValueError(f"Not a {FORMAT} line: {line[:80]!r}")
+        if header.get("version", VERSION) > VERSION:
+            raise ValueError(f"Unsupported recording version {header['version']}")
+        return None
+    header = json.loads(line[:i] + b"}")
+    body = line[i + len(_BODY):-1]
+    if header.get("text"):
+        body = json.loads(body).encode()
+    return RecordedResponse(header["t"], header["path"], header["status"], body, header.get("params"))
+
+
+def read_recording(path: Union[str, Path]) -> Iterator[RecordedResponse]:
+    """Responses in a recording, in file order.
+
+    A truncated last line or gzip member (a recorder that was killed) ends
+    the iteration quietly.
+    """
+    with gzip.open(path, "rb") as f:
+        try:
+            for line in f:
+                try:
+                    record = _parse_line(line)
+                except json.JSONDecodeError:
+                    logger.warning("Skipping truncated line in %s", path)
+                    return
+                if record is not None:
+                    yield record
+        except (EOFError, zlib.error, gzip.BadGzipFile):
+            logger.warning("Recording %s ends in a truncated block", path)
+
+
+def first_point(path: Union[str, Path]) -> Optional[Tuple[float, float, Union[int, float]]]:
+    """(lat, lon, radius_nm) of the first /point request in a recording."""
+    for record in read_recording(path):
+        parts = record.path.strip("/").split("/")
+        if parts[0] == "point" and len(parts) == 4:
+            # keep "10" an int so the replayed request path matches exactly
+            radius = int(parts[3]) if parts[3].isdigit() else float(parts[3])
+            return float(parts[1]), float(parts[2]), radius
+    return None
+
+
+class Replay:
+    """Plays a recording back, shared by its sync and async clients.
+
+    The file is streamed. Responses for other paths are buffered until
+    asked for, so replaying one watcher's recording holds a single
+    response in memory.
+    """
+
+    def __init__(
+        self,
+        source: Union[str, Path, Iterator[RecordedResponse]],
+        speed: float = 1.0,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        if speed < 0:
+            raise ValueError("speed must be positive, or 0 for as fast as possible")
+        self.speed: float = speed
+        self.clock = clock
+        self._records: Iterator[RecordedResponse] = (
+            read_recording(source) if isinstance(source, (str, Path)) else iter(source)
+        )
+        self._pending: Dict[str, Deque[RecordedResponse]] = {}
+        self._lock = threading.Lock()
+        # (wall clock, recorded time) of the first response played
+        self._anchor: Optional[Tuple[float, float]] = None
+        self.last: Optional[RecordedResponse] = None
+        self.played: int = 0
+
+    def now(self) -> datetime:
+        """Current time on the recorded timeline (wall clock before the first response).
+
+        Between responses it moves on at `speed` times real time, so
+        anything ticking between polls (the prediction tick) sees time
+        pass. At speed 0 it is the time of the latest response played.
+        """
+        last = self.last
+        if last is None:
+            return datetime.now()
+        if not self.speed:
+            return last.at
+        wall0, t0 = self._anchor
+        return datetime.fromtimestamp(max(last.t, t0 + (self.clock() - wall0) * self.speed))
+
+    def _next(self, path: str) -> Tuple[RecordedResponse, float]:
+        """The next response for `path` and how long to wait before returning it."""
+        with self._lock:
+            queue = self._pending.get(path)
+            while not queue:
+                try:
+                    record = next(self._records)
+                except StopIteration:
+                    raise ReplayFinished(f"No more recorded responses for {path}") from None
+                self._pending.setdefault(record.path, deque()).append(record)
+                queue = self._pending.get(path)
+            record = queue.popleft()
+            if self._anchor is None:
+                self._anchor = (self.clock(), record.t)
+            self.last = record
+            self.played += 1
+            if not self.speed:
+                return record, 0.0
+            wall0, t0 = self._anchor
+            return record, wall0 + (record.t - t0) / self.speed - self.clock()
+
+    def client(self, decoder: Union[str, JsonDecoder] = "json") -> "ReplayClient":
+        return ReplayClient(self, decoder)
+
+    def async_client(self, decoder: Union[str, JsonDecoder] = "json") -> "AsyncReplayClient":
+        return AsyncReplayClient(self, decoder)
+
+
+class _ReplayEndpoints(_Endpoints):
+    def __init__(self, replay: Replay, decoder: Union[str, JsonDecoder] = "json") -> None:
+        self.replay = replay
+        self.decoder: JsonDecoder = get_decoder(decoder)
+
+    @staticmethod
+    def _decode(record: RecordedResponse, decode: Optional[Callable[[httpx.Response], Any]], default: Callable) -> Any:
+        resp = record.to_response()
+        resp.raise_for_status()
+        return (decode or default)(resp)
+
+    def _penalize(self, exc: Exception) -> None:
+        pass
+
+
+class ReplayClient(_ReplayEndpoints):
+    """AirplanesClient look-alike that answers from a Replay."""
+
+    def _request(
+        self,
+        path: str,
+        params: Optional[Mapping[str, Any]] = None,
+        decode: Optional[Callable[[httpx.Response], Any]] = None,
+    ) -> Any:
+        record, wait = self.replay._next(path)
+        if wait > 0:
+            time.sleep(wait)
+        return self._decode(record, decode, self.decoder.decode_response)
+
+    def get_point(self, lat: float, lon: float, radius_nm: float) -> Any:
+        return self._request(_point_path(lat, lon, radius_nm), decode=self.decoder.decode_point_response)
+
+    def close(self) -> None:
+        pass
+
+
+class AsyncReplayClient(_ReplayEndpoints):
+    """AsyncAirplanesClient look-alike that answers from a Replay."""
+
+    async def _request(
+        self,
+        path: str,
+        params: Optional[Mapping[str, Any]] = None,
+        decode: Optional[Callable[[httpx.Response], Any]] = None,
+    ) -> Any:
+        record, wait = self.replay._next(path)
+        if wait > 0:
+            await asyncio.sleep(wait)
+        return self._decode(record, decode, self.decoder.decode_response)
+
+    async def get_point(self, lat: float, lon: float, radius_nm: float) -> Any:
+        return await self._request(_point_path(lat, lon, radius_nm), decode=self.decoder.decode_point_response)
+
+    async def aclose(self) -> None:
+        pass
@@ -0,0 +1,403 @@
+"""Memory-mapped binary cache for the reference data files.
+
+Parsing AircraftTypes.json (7.4k models) and alertlist.csv (15.8k rows) on
+every start took most of the startup time, and both files were read
+relative to the working directory. This module compiles each source file
+once into a flat binary file. Later starts mmap that file read-only, so
+loading costs a stat and a small header parse. Records are decoded lazily,
+only when they are looked up. The mapping is read-only and backed by the
+page cache, so every process using the same cache shares one copy.
+
+File layout (native-endian u32 arrays, 4-byte aligned sections):
+
+    magic | u32 header length | JSON header | sections...
+
+- strings: u32 offsets[S + 1] and a UTF-8 blob; every value is a string id
+- per table: rows as u32 string ids (NULL for None), row-major
+- per index: key string ids sorted by UTF-8 bytes (the same order as code
+  points), u32 posting offsets[K + 1] and the row numbers, in source order
+
+A cache is reused when the source's mtime and size match the header.
+If only the mtime changed, the source is re-hashed: a matching SHA-256
+still reuses it (e.g. after a fresh git checkout). Anything else triggers
+a rebuild. The cache lives in $SKYALERT_CACHE_DIR, else
+$XDG_CACHE_HOME/skyalert, else ~/.cache/skyalert. If that is not
+writable, the compiled bytes are used from memory. SKYALERT_NO_CACHE=1
+skips the on-disk cache only: the source is still compiled into this
+format, in memory, on every load.
+"""
+from __future__ import annotations
+
+import hashlib
+import json
+import logging
+import mmap
+import os
+import sys
+import tempfile
+from array import array
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterator, List, Mapping, Optional, Sequence, Tuple, TypeVar, Union
+
+logger = logging.getLogger(__name__)
+
+MAGIC = b"SKYREF\x00\x01"
+NULL = 0xFFFFFFFF
+# repository root; the reference files ship next to the modules
+DATA_DIR = Path(__file__).resolve().parent
+
+V = TypeVar("V")
+
+
+def cache_enabled() -> bool:
+    return os.environ.get("SKYALERT_NO_CACHE", "") in ("", "0")
+
+
+def cache_dir() -> Path:
+    if os.environ.get("SKYALERT_CACHE_DIR"):
+        return Path(os.environ["SKYALERT_CACHE_DIR"])
+    base = os.environ.get("XDG_CACHE_HOME") or os.path.join(os.path.expanduser("~"), ".cache")
+    return Path(base) / "skyalert"
+
+
+def file_sha256(path: Path) -> str:
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+@dataclass
+class TableSpec:
+    """A table to compile: typed columns, rows and (key, row) index entries."""
+
+    columns: List[Tuple[str, str]]  # (name, "str" | "bool")
+    rows: List[Sequence[Any]]
+    indexes: Dict[str, List[Tuple[str, int]]] = field(default_factory=dict)
+
+
+def _u32(values: Sequence[int]) -> bytes:
+    return array("I", values).tobytes()
+
+
+def compile_tables(tables: Mapping[str, TableSpec], source: Mapping[str, Any]) -> bytes:
+    """Serialize `tables` into the cache format; `source` goes in the header."""
+    strings: Dict[str, int] = {}
+
+    def sid(value: Any) -> int:
+        if value is None:
+            return NULL
+        if isinstance(value, bool):
+            value = "1" if value else ""
+        elif not isinstance(value, str):
+            value = str(value)
+        i = strings.get(value)
+        if i is None:
+            i = strings[value] = len(strings)
+        return i
+
+    sections: List[bytes] = []
+    header: Dict[str, Any] = {"source": dict(source), "byteorder": sys.byteorder, "tables": {}}
+
+    def add(payload: bytes) -> int:
+        sections.append(payload)
+        return len(sections) - 1
+
+    for name, spec in tables.items():
+        width = len(spec.columns)
+        flat = array("I")
+        for row in spec.rows:
+            if len(row) != width:
+                raise ValueError(f"Row width {len(row)} does not match {width} columns in {name}")
+            flat.extend(sid(v) for v in row)
+        indexes = {}
+        for index_name, entries in spec.indexes.items():
+            postings: Dict[str, List[int]] = {}
+            for key, row in entries:
+                postings.setdefault(key, []).append(row)
+            keys = sorted(postings, key=lambda k: k.encode("utf-8"))
+            starts = [0]
+            post: List[int] = []
+            for k in keys:
+                post.extend(postings[k])
+                starts.append(len(post))
+            indexes[index_name] = {
+                "count": len(keys),
+                "keys": add(_u32([sid(k) for k in keys])),
+                "starts": add(_u32(starts)),
+                "post": add(_u32(post)),
+            }
+        header["tables"][name] = {
+            "columns": spec.columns,
+            "rows": len(spec.rows),
+            "data": add(flat.tobytes()),
+            "indexes": indexes,
+        }
+
+    encoded = [s.encode("utf-8") for s in strings]
+    offsets = [0]
+    for b in encoded:
+        offsets.append(offsets[-1] + len(b))
+    header["strings"] = {"count": len(encoded), "offsets": add(_u32(offsets)), "blob": add(b"".join(encoded))}
+
+    # resolve section numbers to absolute, 4-byte aligned (offset, length)
+    def layout(start: int) -> List[Tuple[int, int]]:
+        spans = []
+        pos = start
+        for s in sections:
+            pos += -pos % 4
+            spans.append((pos, len(s)))
+            pos += len(s)
+        return spans
+
+    def resolve(node: Any, spans: List[Tuple[int, int]]) -> Any:
+        if isinstance(node, dict):
+            return {
+                k: (list(spans[v]) if k in ("keys", "starts", "post", "data", "offsets", "blob") else resolve(v, spans))
+                for k, v in node.items()
+            }
+        return node
+
+    # the header length depends on the offsets it contains; iterate to a fixed point
+    size = 0
+    while True:
+        start = len(MAGIC) + 4 + size
+        start += -start % 4
+        spans = layout(start)
+        blob = json.dumps(resolve(header, spans), separators=(",", ":")).encode()
+        if len(blob) == size:
+            break
+        size = len(blob)
+    out = bytearray(MAGIC)
+    out += len(blob).to_bytes(4, "little")
+    out += blob
+    for (pos, _), s in zip(spans, sections):
+        out += b"\0" * (pos - len(out))
+        out += s
+    return bytes(out)
+
+
+class MappedFile:
+    """A compiled cache file, mmapped (or held in memory) read-only."""
+
+    def __init__(self, buffer: Union[mmap.mmap, bytes], path: Optional[Path] = None) -> None:
+        self.path = path
+        self._buffer = buffer
+        view = memoryview(buffer)
+        if bytes(view[: len(MAGIC)]) != MAGIC:
+            raise ValueError("Not a reference data cache")
+        length = int.from_bytes(view[len(MAGIC) : len(MAGIC) + 4], "little")
+        start = len(MAGIC) + 4
+        self.header: Dict[str, Any] = json.loads(bytes(view[start : start + length]))
+        if self.header.get("byteorder") != sys.byteorder or array("I").itemsize != 4:
+            raise ValueError("Cache was written on a different platform")
+        self._view = view
+        strings = self.header["strings"]
+        self._offsets = self.u32(strings["offsets"])
+        blob_off, blob_len = strings["blob"]
+        self._blob = view[blob_off : blob_off + blob_len]
+        self._tables: Dict[str, MappedTable] = {}
+
+    @classmethod
+    def open(cls, path: Path) -> "MappedFile":
+        with open(path, "rb") as f:
+            buffer = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        return cls(buffer, path)
+
+    @property
+    def source(self) -> Dict[str, Any]:
+        return self.header["source"]
+
+    def u32(self, span: Sequence[int]) -> memoryview:
+        off, length = span
+        return self._view[off : off + length].cast("I")
+
+    def string(self, i: int) -> Optional[str]:
+        if i == NULL:
+            return None
+        return str(self._blob[self._offsets[i] : self._offsets[i + 1]], "utf-8")
+
+    def string_bytes(self, i: int) -> bytes:
+        return bytes(self._blob[self._offsets[i] : self._offsets[i + 1]])
+
+    def table(self, name: str) -> "MappedTable":
+        t = self._tables.get(name)
+        if t is None:
+            t = self._tables[name] = MappedTable(self, self.header["tables"][name])
+        return t
+
+
+class MappedTable(Sequence[Dict[str, Any]]):
+    """Rows of a compiled table, decoded into dicts on access."""
+
+    def __init__(self, file: MappedFile, spec: Dict[str, Any]) -> None:
+        self._file = file
+        self.columns: List[str] = [c[0] for c in spec["columns"]]
+        self._bools = [c[1] == "bool" for c in spec["columns"]]
+        self._rows: int = spec["rows"]
+        self._data = file.u32(spec["data"])
+        self._index_specs: Dict[str, Dict[str, Any]] = spec["indexes"]
+
+    def __len__(self) -> int:
+        return self._rows
+
+    def __getitem__(self, i):
+        if isinstance(i, slice):
+            return [self[j] for j in range(*i.indices(len(self)))]
+        if i < 0:
+            i += self._rows
+        if not 0 <= i < self._rows:
+            raise IndexError(i)
+        width = len(self.columns)
+        base = i * width
+        string = self._file.string
+        row = {}
+        for c, name in enumerate(self.columns):
+            value = string(self._data[base + c])
+            row[name] = (value == "1") if self._bools[c] and value is not None else value
+        return row
+
+    def index(self, name: str) -> "MappedIndex":
+        return MappedIndex(self._file, self._index_specs[name])
+
+
+class MappedIndex(Mapping[str, Tuple[int, ...]]):
+    """Key -> row numbers, found by binary search over the sorted keys."""
+
+    def __init__(self, file: MappedFile, spec: Dict[str, Any]) -> None:
+        self._file = file
+        self._count: int = spec["count"]
+        self._keys = file.u32(spec["keys"])
+        self._starts = file.u32(spec["starts"])
+        self._post = file.u32(spec["post"])
+
+    def _find(self, key: str) -> int:
+        target = key.encode("utf-8")
+        lo, hi = 0, self._count
+        key_bytes = self._file.string_bytes
+        while lo < hi:
+            mid = (lo + hi) // 2
+            probe = key_bytes(self._keys[mid])
+            if probe < target:
+                lo = mid + 1
+            elif probe > target:
+                hi = mid
+            else:
+                return mid
+        return -1
+
+    def __getitem__(self, key: str) -> Tuple[int, ...]:
+        pos = self._find(key) if isinstance(key, str) else -1
+        if pos < 0:
+            raise KeyError(key)
+        return tuple(self._post[self._starts[pos] : self._starts[pos + 1]])
+
+    def __contains__(self, key: object) -> bool:
+        return isinstance(key, str) and self._find(key) >= 0
+
+    def __len__(self) -> int:
+        return self._count
+
+    def __iter__(self) -> Iterator[str]:
+        string = self._file.string
+        for i in range(self._count):
+            yield string(self._keys[i])
+
+
+class LazyMapping(Mapping[str, V]):
+    """Read-only mapping over an index that builds values on first access."""
+
+    def __init__(self, index: MappedIndex, build: Callable[[Tuple[int, ...]], V]) -> None:
+        self._index = index
+        self._build = build
+        self._memo: Dict[str, V] = {}
+        self._missing: set = set()
+
+    def __getitem__(self, key: str) -> V:
+        value = self._memo.get(key)
+        if value is not None:
+            return value
+        if key in self._missing:
+            raise KeyError(key)
+        try:
+            rows = self._index[key]
+        except KeyError:
+            if len(self._missing) > 100_000:
+                self._missing.clear()
+            self._missing.add(key)
+            raise
+        value = self._memo[key] = self._build(rows)
+        return value
+
+    def __contains__(self, key: object) -> bool:
+        if key in self._memo:
+            return True
+        try:
+            self[key]  # type: ignore[index]
+        except (KeyError, TypeError):
+            return False
+        return True
+
+    def __len__(self) -> int:
+        return len(self._index)
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._index)
+
+
+def _source_meta(source: Path) -> Dict[str, Any]:
+    st = source.stat()
+    return {"path": str(source), "mtime_ns": st.st_mtime_ns, "size": st.st_size}
+
+
+def default_cache_path(source: Path) -> Path:
+    tag = hashlib.sha1(str(source).encode()).hexdigest()[:12]
+    return cache_dir() / f"{source.stem}-{tag}.skyref"
+
+
+def load(
+    source: Union[str, Path],
+    compile_fn: Callable[[Path], Mapping[str, TableSpec]],
+    cache_path: Optional[Path] = None,
+    version: int = 1,
+) -> MappedFile:
+    """Open the compiled form of `source`, (re)building it when stale.
+
+    `version` is stored in the header; bump it when `compile_fn` changes
+    what it writes so existing caches are rebuilt.
+    """
+    source = Path(source).resolve()
+    meta = _source_meta(source)
+    path = cache_path or default_cache_path(source)
+
+    if cache_enabled():
+        try:
+            cached = MappedFile.open(path)
+            old = cached.source
+            if old.get("version") == version and old.get("size") == meta["size"]:
+                if old.get("mtime_ns") == meta["mtime_ns"]:
+                    return cached
+                if old.get("sha256") == file_sha256(source):
+                    logger.debug("%s touched but unchanged, reusing %s", source.name, path)
+                    return cached
+        except (OSError, ValueError, KeyError) as e:
+            logger.debug("No usable cache for %s at %s: %s", source.name, path, e)
+
+    meta["sha256"] = file_sha256(source)
+    meta["version"] = version
+    data = compile_tables(compile_fn(source), meta)
+    if not cache_enabled():
+        return MappedFile(data)
+    try:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        fd, tmp = tempfile.mkstemp(dir=path.parent, prefix=path.name, suffix=".tmp")
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+        os.replace(tmp, path)
+        logger.info("Compiled %s into %s (%d bytes)", source.name, path, len(data))
+        return MappedFile.open(path)
+    except OSError as e:
+        logger.warning("Cannot write reference data cache %s (%s); using it from memory", path, e)
+        return MappedFile(data)
@@ -0,0 +1,87 @@
+"""AircraftTypes and AlertList, optionally loaded off the startup path.
+
+With a cold cache, parsing AircraftTypes.json and alertlist.csv takes
+about a second (see RefDataCache.py). With `background=True` the loading
+runs on a daemon thread, so the caller can draw its UI and send its first
+request in the meantime. Callers check `ready` (or register a callback)
+and switch from their placeholder data to the loaded instances when it
+flips.
+
+Instances passed in are used as-is. Only the missing ones are loaded.
+"""
+from __future__ import annotations
+
+import logging
+import threading
+import time
+from concurrent.futures import Future
+from typing import Callable, Dict, Optional, Tuple
+
+from AircraftTypes import AircraftTypes
+from AlertList import AlertList
+
+logger = logging.getLogger(__name__)
+
+
+class ReferenceData:
+    """The AircraftTypes/AlertList pair, loaded now or in the background."""
+
+    def __init__(
+        self,
+        aircraft_types: Optional[AircraftTypes] = None,
+        alert_list: Optional[AlertList] = None,
+        background: bool = False,
+    ) -> None:
+        # wall-clock seconds spent loading each part, for startup profiling
+        self.timings: Dict[str, float] = {}
+        self._future: Future[Tuple[AircraftTypes, AlertList]] = Future()
+        if background and (aircraft_types is None or alert_list is None):
+            threading.Thread(
+                target=self._run, args=(aircraft_types, alert_list), name="reference-data", daemon=True
+            ).start()
+        else:
+            self._run(aircraft_types, alert_list)
+
+    def _run(self, aircraft_types: Optional[AircraftTypes], alert_list: Optional[AlertList]) -> None:
+        try:
+            if aircraft_types is None:
+                t0 = time.perf_counter()
+                aircraft_types = AircraftTypes()
+                self.timings["aircraft_types"] = time.perf_counter() - t0
+            if alert_list is None:
+                t0 = time.perf_counter()
+                alert_list = AlertList()
+                self.timings["alert_list"] = time.perf_counter() - t0
+        except Exception as e:
+            logger.error("Loading reference data failed: %s", e)
+            self._future.set_exception(e)
+        else:
+            self._future.set_result((aircraft_types, alert_list))
+
+    @property
+    def ready(self) -> bool:
+        """True once loading finished, successfully or not."""
+        return self._future.done()
+
+    @property
+    def error(self) -> Optional[BaseException]:
+        return self._future.exception() if self._future.done() else None
+
+    def wait(self, timeout: Optional[float] = None) -> bool:
+        """Block until loading finished; False if `timeout` ran out first."""
+        try:
+            self._future.exception(timeout)
+        except TimeoutError:
+            return False
+        return True
+
+    def result(self, timeout: Optional[float] = None) -> Tuple[AircraftTypes, AlertList]:
+        """(aircraft_types, alert_list), waiting for them; re-raises a load error."""
+        return self._future.result(timeout)
+
+    def add_done_callback(self, fn: Callable[["ReferenceData"], None]) -> None:
+        """Call `fn(self)` when loading finishes, on the loader thread.
+
+        Runs immediately if it already has.
+        """
+        self._future.add_done_callback(lambda _: fn(self))
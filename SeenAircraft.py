@@ -1,9 +1,9 @@
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 from typing import Any, Dict, List, Optional, Tuple
 from datetime import datetime
 
 
-@dataclass
+@dataclass(slots=True)
 class SeenAircraft:
     hex: str
     type: str = ""
@@ -19,7 +19,33 @@ class SeenAircraft:
     groundSpeed: float = 0
     altitude: float = 0
     emergency: Optional[str] = "False"
-    highest_altitude: float = altitude
-    lowest_altitude: float = altitude
-    fastestGs: float = groundSpeed
-    slowestGs: float = groundSpeed
\ No newline at end of file
+    # running extremes over every observation; None until one is reported
+    highest_altitude: Optional[float] = None
+    lowest_altitude: Optional[float] = None
+    fastestGs: Optional[float] = None
+    slowestGs: Optional[float] = None
+
+
+@dataclass(slots=True)
+class SeenDelta:
+    """What one snapshot changed in PlaneWatcher.seen.
+
+    - appeared: in this snapshot but not the previous one (new or back)
+    - new: first sighting, added to seen (a subset of `appeared`)
+    - updated: hex -> names of the SeenAircraft fields that changed, for
+      aircraft that were already tracked. `lastSeen` moves for every
+      aircraft in the snapshot and is not listed.
+    - disappeared: in the previous snapshot but not this one
+    - evicted: dropped from seen by the retention limits
+    """
+
+    at: Optional[datetime] = None
+    appeared: List[str] = field(default_factory=list)
+    new: List[str] = field(default_factory=list)
+    updated: Dict[str, Tuple[str, ...]] = field(default_factory=dict)
+    disappeared: List[str] = field(default_factory=list)
+    evicted: List[str] = field(default_factory=list)
+
+    def __bool__(self) -> bool:
+        return bool(self.appeared or self.updated or self.disappeared or self.evicted)
+
@@ -0,0 +1,238 @@
+"""Columnar representation of one /point response.
+
+Parsing every aircraft into a 40-field AircraftResp costs 40 dict lookups
+and an object per aircraft, although the refresh path only reads a handful
+of fields. Snapshot pulls just those fields out into columns (typed float
+arrays for the numeric ones, NaN when missing). The remaining AircraftResp
+fields are packed into one tuple per aircraft (COLD_FIELDS order), so the
+decoded dicts can be freed while a full AircraftResp can still be
+materialized on demand from the columns plus that tuple.
+
+A Snapshot is a Sequence of AircraftResp, so code that indexes or iterates
+`PlaneWatcher.aircraft` keeps working; it just pays for materialization.
+Hot paths should read the columns instead.
+"""
+from __future__ import annotations
+
+from array import array
+from typing import Any, Dict, Iterator, List, Mapping, Optional, Sequence, Tuple, overload
+
+from AircraftResp import AircraftResp
+from Geometry import SnapshotGeometry
+from SpatialIndex import SpatialIndex
+
+NAN = float("nan")
+# altitudes are whole feet, so they go in an integer column with a sentinel
+MISSING_ALT = -(2**31)
+
+
+# AircraftResp fields without a column, packed per aircraft in this order
+COLD_FIELDS: Tuple[str, ...] = (
+    "type", "nav_qnh", "nav_altitude_mcp", "nav_heading", "nic", "rc", "seen_pos", "category",
+    "sil", "sil_type", "gva", "sda", "alert", "spi", "mlat", "tisb", "messages", "seen", "rssi",
+    "dst", "dir", "version", "nic_baro", "nac_p", "nac_v",
+)
+
+
+def _num(value: Any) -> float:
+    if isinstance(value, (int, float)) and not isinstance(value, bool):
+        return float(value)
+    return NAN
+
+
+def _alt(value: Any) -> int:
+    if isinstance(value, (int, float)) and not isinstance(value, bool):
+        return int(value)
+    return MISSING_ALT
+
+
+class Snapshot(Sequence[AircraftResp]):
+    """Aircraft from one poll, stored column by column.
+
+    Columns (index-aligned):
+    - strings: hex, flight, r (registration), t (type designator), desc,
+      squawk, emergency
+    - float arrays (NaN when missing): lat, lon, gs, track, baro_rate
+    - int arrays (MISSING_ALT when missing): alt_geom, alt_baro
+    - on_ground: 1 where alt_baro was reported as "ground"
+
+    Use `Snapshot.value(column, i)` to read a numeric cell as None-or-number.
+    """
+
+    __slots__ = (
+        "hex",
+        "flight",
+        "r",
+        "t",
+        "desc",
+        "squawk",
+        "emergency",
+        "lat",
+        "lon",
+        "alt_geom",
+        "alt_baro",
+        "gs",
+        "track",
+        "baro_rate",
+        "on_ground",
+        "_cold",
+        "_materialized",
+        "_index",
+        "_geometry",
+        "_spatial_index",
+    )
+
+    def __init__(self, records: Sequence[Mapping[str, Any]] = ()) -> None:
+        self._cold: List[Tuple[Any, ...]] = []
+        self._materialized: Dict[int, AircraftResp] = {}
+        self._index: Optional[Dict[str, int]] = None
+        self._geometry: Optional[Tuple[float, float, SnapshotGeometry]] = None
+        self._spatial_index: Optional[SpatialIndex] = None
+
+        self.hex: List[str] = []
+        self.flight: List[Optional[str]] = []
+        self.r: List[str] = []
+        self.t: List[str] = []
+        self.desc: List[Optional[str]] = []
+        self.squawk: List[Optional[str]] = []
+        self.emergency: List[Optional[str]] = []
+        lat: List[float] = []
+        lon: List[float] = []
+        alt_geom: List[int] = []
+        alt_baro: List[int] = []
+        gs: List[float] = []
+        track: List[float] = []
+        baro_rate: List[float] = []
+        on_ground: List[int] = []
+        cold = self._cold
+
+        for rec in records:
+            get = rec.get
+            cold.append(tuple(map(get, COLD_FIELDS)))
+            self.hex.append(get("hex", ""))
+            self.flight.append(get("flight", ""))
+            self.r.append(get("r", ""))
+            self.t.append(get("t", ""))
+            self.desc.append(get("desc"))
+            self.squawk.append(get("squawk") or None)
+            self.emergency.append(get("emergency"))
+            lat.append(_num(get("lat")))
+            lon.append(_num(get("lon")))
+            alt_geom.append(_alt(get("alt_geom")))
+            baro = get("alt_baro")
+            alt_baro.append(_alt(baro))
+            on_ground.append(baro == "ground")
+            gs.append(_num(get("gs")))
+            track.append(_num(get("track")))
+            baro_rate.append(_num(get("baro_rate")))
+
+        self.lat = array("d", lat)
+        self.lon = array("d", lon)
+        self.alt_geom = array("l", alt_geom)
+        self.alt_baro = array("l", alt_baro)
+        self.gs = array("d", gs)
+        self.track = array("d", track)
+        self.baro_rate = array("d", baro_rate)
+        self.on_ground = array("b", on_ground)
+
+    @classmethod
+    def from_payload(cls, data: Optional[Sequence[Mapping[str, Any]]]) -> "Snapshot":
+        return cls(data or ())
+
+    def take(self, indices: Sequence[int]) -> "Snapshot":
+        """A new Snapshot holding only the aircraft at `indices`.
+
+        Columns and the packed cold fields are copied by index, not
+        re-parsed.
+        """
+        sub = Snapshot.__new__(Snapshot)
+        sub._cold = [self._cold[i] for i in indices]
+        sub._materialized = {}
+        sub._index = None
+        sub._geometry = None
+        sub._spatial_index = None
+        for name in ("hex", "flight", "r", "t", "desc", "squawk", "emergency"):
+            column = getattr(self, name)
+            setattr(sub, name, [column[i] for i in indices])
+        for name in ("lat", "lon", "alt_geom", "alt_baro", "gs", "track", "baro_rate", "on_ground"):
+            column = getattr(self, name)
+            setattr(sub, name, array(column.typecode, [column[i] for i in indices]))
+        return sub
+
+    def __len__(self) -> int:
+        return len(self.hex)
+
+    @overload
+    def __getitem__(self, i: int) -> AircraftResp: ...
+
+    @overload
+    def __getitem__(self, i: slice) -> List[AircraftResp]: ...
+
+    def __getitem__(self, i):
+        if isinstance(i, slice):
+            return [self[j] for j in range(*i.indices(len(self)))]
+        if i < 0:
+            i += len(self)
+        ac = self._materialized.get(i)
+        if ac is None:
+            ac = self._materialize(i)
+            self._materialized[i] = ac
+        return ac
+
+    def _materialize(self, i: int) -> AircraftResp:
+        value = Snapshot.value
+        cold = dict(zip(COLD_FIELDS, self._cold[i]))
+        # from_dict defaults a missing "type" to ""
+        cold["type"] = cold["type"] or ""
+        return AircraftResp(
+            hex=self.hex[i],
+            flight=self.flight[i],
+            r=self.r[i],
+            t=self.t[i],
+            desc=self.desc[i],
+            alt_baro="ground" if self.on_ground[i] else value(self.alt_baro, i),
+            alt_geom=value(self.alt_geom, i),
+            gs=value(self.gs, i),
+            track=value(self.track, i),
+            baro_rate=value(self.baro_rate, i),
+            lat=value(self.lat, i),
+            lon=value(self.lon, i),
+            squawk=self.squawk[i],
+            emergency=self.emergency[i],
+            **cold,
+        )
+
+    def __iter__(self) -> Iterator[AircraftResp]:
+        for i in range(len(self)):
+            yield self[i]
+
+    def index_of(self, hex: str) -> Optional[int]:
+        """Position of `hex` in this snapshot, or None."""
+        if self._index is None:
+            self._index = {h: i for i, h in enumerate(self.hex)}
+        return self._index.get(hex)
+
+    def get(self, hex: str) -> Optional[AircraftResp]:
+        i = self.index_of(hex)
+        return None if i is None else self[i]
+
+    def geometry(self, lat: float, lon: float) -> SnapshotGeometry:
+        """Observer-relative geometry, cached per observer position."""
+        cached = self._geometry
+        if cached is not None and cached[0] == lat and cached[1] == lon:
+            return cached[2]
+        geom = SnapshotGeometry.from_columns(lat, lon, self.lat, self.lon, self.track, self.gs)
+        self._geometry = (lat, lon, geom)
+        return geom
+
+    def spatial_index(self) -> SpatialIndex:
+        """Grid index over this snapshot's positions, built on first use."""
+        if self._spatial_index is None:
+            self._spatial_index = SpatialIndex(self.lat, self.lon)
+        return self._spatial_index
+
+    @staticmethod
+    def value(column: Sequence[Any], i: int) -> Optional[Any]:
+        """Read a numeric column, mapping NaN / MISSING_ALT back to None."""
+        v = column[i]
+        return None if v != v or v == MISSING_ALT else v
@@ -0,0 +1,216 @@
+"""Grid index over the positions in one snapshot.
+
+Aircraft are bucketed into square lat/lon cells (`cell_nm` of latitude on
+a side), so proximity and zone queries only look at the cells that can
+contain a match instead of every aircraft in the snapshot:
+
+- within(lat, lon, radius_nm): aircraft within a radius of a point
+- in_polygon(polygon): aircraft inside a lat/lon Polygon
+- nearest(lat, lon, k): the k closest aircraft, by expanding rings of cells
+
+Queries return snapshot indices, in snapshot order for the zone queries.
+The index is rebuilt for every snapshot (Snapshot.spatial_index() caches
+it). Building it is a single pass over the lat/lon columns. Aircraft
+without a position are not indexed.
+
+Polygons and radii are not split across the antimeridian.
+"""
+from __future__ import annotations
+
+import heapq
+import math
+from typing import Dict, Iterator, List, Sequence, Tuple
+
+from Geometry import EARTH_RADIUS_NM, NM_PER_DEG, distance_nm
+
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover - exercised when numpy is absent
+    np = None
+
+# above this many candidates distances are computed with NumPy in one go
+_VECTOR_MIN = 64
+
+Cell = Tuple[int, int]
+
+
+class Polygon:
+    """A simple lat/lon polygon (vertices in order, not closed).
+
+    Containment is even-odd ray casting in lat/lon space, which is accurate
+    for geofence-sized polygons away from the poles.
+    """
+
+    __slots__ = ("vertices", "min_lat", "max_lat", "min_lon", "max_lon")
+
+    def __init__(self, vertices: Sequence[Tuple[float, float]]) -> None:
+        if len(vertices) < 3:
+            raise ValueError("A polygon needs at least 3 vertices")
+        self.vertices: Tuple[Tuple[float, float], ...] = tuple((float(a), float(o)) for a, o in vertices)
+        lats = [v[0] for v in self.vertices]
+        lons = [v[1] for v in self.vertices]
+        self.min_lat, self.max_lat = min(lats), max(lats)
+        self.min_lon, self.max_lon = min(lons), max(lons)
+
+    def __repr__(self) -> str:
+        return f"Polygon({list(self.vertices)!r})"
+
+    def contains(self, lat: float, lon: float) -> bool:
+        if not (self.min_lat <= lat <= self.max_lat and self.min_lon <= lon <= self.max_lon):
+            return False
+        inside = False
+        vs = self.vertices
+        j = len(vs) - 1
+        for i in range(len(vs)):
+            lat_i, lon_i = vs[i]
+            lat_j, lon_j = vs[j]
+            if (lat_i > lat) != (lat_j > lat):
+                cross = lon_i + (lat - lat_i) * (lon_j - lon_i) / (lat_j - lat_i)
+                if lon < cross:
+                    inside = not inside
+            j = i
+        return inside
+
+
+class SpatialIndex:
+    """Uniform lat/lon grid of snapshot indices."""
+
+    __slots__ = ("cell_deg", "lat", "lon", "cells", "_max_abs_lat")
+
+    def __init__(self, lat: Sequence[float], lon: Sequence[float], cell_nm: float = 10.0) -> None:
+        if cell_nm <= 0:
+            raise ValueError("cell_nm must be positive")
+        self.cell_deg: float = cell_nm / NM_PER_DEG
+        self.lat = lat
+        self.lon = lon
+        self.cells: Dict[Cell, List[int]] = {}
+        self._max_abs_lat: float = 0.0
+
+        if np is not None:
+            lats = np.asarray(lat, dtype=np.float64)
+            lons = np.asarray(lon, dtype=np.float64)
+            valid = np.flatnonzero(~(np.isnan(lats) | np.isnan(lons)))
+            if len(valid):
+                rows = np.floor(lats[valid] / self.cell_deg).astype(np.int64).tolist()
+                cols = np.floor(lons[valid] / self.cell_deg).astype(np.int64).tolist()
+                self._max_abs_lat = float(np.abs(lats[valid]).max())
+                cells = self.cells
+                for i, key in zip(valid.tolist(), zip(rows, cols)):
+                    bucket = cells.get(key)
+                    if bucket is None:
+                        cells[key] = [i]
+                    else:
+                        bucket.append(i)
+        else:
+            for i, (la, lo) in enumerate(zip(lat, lon)):
+                if la != la or lo != lo:
+                    continue
+                self.cells.setdefault(self._cell(la, lo), []).append(i)
+                self._max_abs_lat = max(self._max_abs_lat, abs(la))
+
+    def __len__(self) -> int:
+        return sum(len(b) for b in self.cells.values())
+
+    def _cell(self, lat: float, lon: float) -> Cell:
+        return math.floor(lat / self.cell_deg), math.floor(lon / self.cell_deg)
+
+    def _cells_in_box(self, min_lat: float, max_lat: float, min_lon: float, max_lon: float) -> Iterator[List[int]]:
+        r0, c0 = self._cell(min_lat, min_lon)
+        r1, c1 = self._cell(max_lat, max_lon)
+        cells = self.cells
+        if (r1 - r0 + 1) * (c1 - c0 + 1) > len(cells):
+            # box covers more cells than are occupied: walk the occupied ones
+            for (r, c), bucket in cells.items():
+                if r0 <= r <= r1 and c0 <= c <= c1:
+                    yield bucket
+            return
+        for r in range(r0, r1 + 1):
+            for c in range(c0, c1 + 1):
+                bucket = cells.get((r, c))
+                if bucket:
+                    yield bucket
+
+    def _distances(self, lat: float, lon: float, candidates: List[int]) -> Sequence[float]:
+        if np is not None and len(candidates) >= _VECTOR_MIN:
+            idx = np.asarray(candidates)
+            phi1 = math.radians(lat)
+            phi2 = np.radians(np.asarray(self.lat, dtype=np.float64)[idx])
+            dphi = phi2 - phi1
+            dlam = np.radians(np.asarray(self.lon, dtype=np.float64)[idx] - lon)
+            a = np.sin(dphi / 2.0) ** 2 + math.cos(phi1) * np.cos(phi2) * np.sin(dlam / 2.0) ** 2
+            return EARTH_RADIUS_NM * 2 * np.arctan2(np.sqrt(a), np.sqrt(np.maximum(0.0, 1 - a)))
+        return [distance_nm(lat, lon, self.lat[i], self.lon[i]) for i in candidates]
+
+    def within(self, lat: float, lon: float, radius_nm: float) -> List[int]:
+        """Indices of aircraft within `radius_nm` of (lat, lon), in snapshot order."""
+        dlat = radius_nm / NM_PER_DEG
+        cos_lat = math.cos(math.radians(min(89.9, abs(lat) + dlat)))
+        dlon = min(180.0, dlat / max(cos_lat, 1e-6))
+        candidates = [
+            i
+            for bucket in self._cells_in_box(lat - dlat, lat + dlat, lon - dlon, lon + dlon)
+            for i in bucket
+        ]
+        distances = self._distances(lat, lon, candidates)
+        return sorted(i for i, d in zip(candidates, distances) if d <= radius_nm)
+
+    def in_polygon(self, polygon: Polygon) -> List[int]:
+        """Indices of aircraft inside `polygon`, in snapshot order."""
+        lat, lon = self.lat, self.lon
+        return sorted(
+            i
+            for bucket in self._cells_in_box(polygon.min_lat, polygon.max_lat, polygon.min_lon, polygon.max_lon)
+            for i in bucket
+            if polygon.contains(lat[i], lon[i])
+        )
+
+    def nearest(self, lat: float, lon: float, k: int = 1) -> List[Tuple[float, int]]:
+        """The `k` aircraft closest to (lat, lon) as (distance_nm, index), closest first."""
+        if k <= 0 or not self.cells:
+            return []
+        r0, c0 = self._cell(lat, lon)
+        # smallest cell side in nm anywhere in the index: a cell `ring` steps
+        # away is at least (ring - 1) of these from the query point
+        side_nm = self.cell_deg * NM_PER_DEG * math.cos(
+            math.radians(min(89.9, max(self._max_abs_lat, abs(lat)) + self.cell_deg))
+        )
+        occupied_rows = [r for r, _ in self.cells]
+        max_ring = max(abs(r0 - min(occupied_rows)), abs(r0 - max(occupied_rows)))
+        max_ring = max(max_ring, max(abs(c - c0) for _, c in self.cells))
+
+        if (2 * max_ring + 1) ** 2 > 4 * len(self.cells):
+            # far from (or around) everything: rings would visit mostly empty cells
+            candidates = [i for bucket in self.cells.values() for i in bucket]
+            ranked = sorted(zip((float(d) for d in self._distances(lat, lon, candidates)), candidates))
+            return ranked[:k]
+
+        best: List[Tuple[float, int]] = []  # max-heap via negated distances
+        for ring in range(max_ring + 1):
+            if len(best) == k and -best[0][0] <= (ring - 1) * side_nm:
+                break
+            candidates = [i for bucket in self._ring(r0, c0, ring) for i in bucket]
+            for i, d in zip(candidates, self._distances(lat, lon, candidates)):
+                d = float(d)
+                if len(best) < k:
+                    heapq.heappush(best, (-d, i))
+                elif d < -best[0][0]:
+                    heapq.heapreplace(best, (-d, i))
+        return sorted((-d, i) for d, i in best)
+
+    def _ring(self, r0: int, c0: int, ring: int) -> Iterator[List[int]]:
+        cells = self.cells
+        if ring == 0:
+            bucket = cells.get((r0, c0))
+            if bucket:
+                yield bucket
+            return
+        for c in range(c0 - ring, c0 + ring + 1):
+            for r in (r0 - ring, r0 + ring):
+                bucket = cells.get((r, c))
+                if bucket:
+                    yield bucket
+        for r in range(r0 - ring + 1, r0 + ring):
+            for c in (c0 - ring, c0 + ring):
+                bucket = cells.get((r, c))
+                if bucket:
+                    yield bucket
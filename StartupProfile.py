@@ -0,0 +1,43 @@
+"""Timing breakdown of application startup (`App.py --profile-startup`).
+
+Stages are marked in order as they finish, each with its offset from the
+profile's start and the time since the previous mark. Work running in
+parallel (the background reference-data load) is added with its own
+duration and does not count as the gap between marks.
+"""
+from __future__ import annotations
+
+import time
+from typing import List, Optional, Tuple
+
+
+class StartupProfile:
+    def __init__(self, t0: Optional[float] = None) -> None:
+        self.t0: float = time.perf_counter() if t0 is None else t0
+        self._last: float = self.t0
+        # (stage, offset from t0, duration) in seconds
+        self.stages: List[Tuple[str, float, float]] = []
+        self._marked: set[str] = set()
+
+    def mark(self, stage: str) -> None:
+        """Record that `stage` just finished. Only the first mark of a stage counts."""
+        if stage in self._marked:
+            return
+        self._marked.add(stage)
+        now = time.perf_counter()
+        self.stages.append((stage, now - self.t0, now - self._last))
+        self._last = now
+
+    def add(self, stage: str, seconds: float) -> None:
+        """Record `stage` that took `seconds` alongside the marked ones."""
+        self.stages.append((stage, time.perf_counter() - self.t0, seconds))
+
+    def __contains__(self, stage: object) -> bool:
+        return stage in self._marked
+
+    def report(self) -> str:
+        width = max((len(s) for s, _, _ in self.stages), default=5)
+        lines = [f"{'stage':<{width}} {'at (ms)':>9} {'took (ms)':>10}"]
+        for stage, at, took in self.stages:
+            lines.append(f"{stage:<{width}} {at * 1000:>9.1f} {took * 1000:>10.1f}")
+        return "\n".join(lines)
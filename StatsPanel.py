@@ -0,0 +1,48 @@
+"""Textual panel showing rolling per-stage timings from a Metrics registry."""
+from __future__ import annotations
+
+from typing import List, Optional
+
+from textual.widgets import DataTable
+
+from Instrumentation import Metrics
+from TableSync import Row, SyncStats, TableSync
+
+COLUMNS = ("Stage", "Last ms", "p50", "p90", "p99", "Max", "Count")
+COUNTERS = ("requests_total", "retries_total", "request_errors_total")
+
+
+def _ms(seconds: Optional[float]) -> str:
+    return "-" if seconds is None else f"{seconds * 1000:.1f}"
+
+
+def stats_rows(metrics: Metrics) -> List[Row]:
+    """(key, cells) per histogram series and request counter, keyed by name and labels."""
+    rows: List[Row] = []
+    for name, labels, s in metrics.stages():
+        stage = name.removesuffix("_seconds")
+        if labels:
+            stage += " " + ",".join(v for _, v in labels)
+        key = name + "{" + ",".join(f"{k}={v}" for k, v in labels) + "}"
+        rows.append((key, (stage, _ms(s["last"]), _ms(s["p50"]), _ms(s["p90"]), _ms(s["p99"]), _ms(s["max"]), str(s["count"]))))
+    for name in COUNTERS:
+        rows.append((name, (name.removesuffix("_total"), "", "", "", "", "", f"{metrics.counter(name):g}")))
+    return rows
+
+
+class StatsPanel(DataTable):
+    """One row per stage: last, p50, p90, p99 and max in ms over the rolling window.
+
+    Rows are keyed by metric name and labels and kept in step with
+    TableSync, so a refresh only touches the cells that changed.
+    """
+
+    def on_mount(self) -> None:
+        self.cursor_type = "none"
+        self.zebra_stripes = True
+        for label in COLUMNS:
+            self.add_column(label, key=label)
+        self.table_sync = TableSync(self, COLUMNS)
+
+    def update_from(self, metrics: Metrics) -> SyncStats:
+        return self.table_sync.sync(stats_rows(metrics))
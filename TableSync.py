@@ -0,0 +1,102 @@
+"""Incremental row diffing for Textual DataTables.
+
+Rebuilding a table every tick (clear() + add_row() for every row) costs time
+and allocations proportional to the whole table, even when only a handful
+of cells changed. TableSync remembers the cells it last wrote for each row
+key and turns a new full set of rows into the minimal set of DataTable
+operations: add_row for new keys, remove_row for keys that are gone,
+update_cell for cells whose value changed, and a sort() (which only
+reorders row locations) when the row order changed.
+"""
+from __future__ import annotations
+
+from dataclasses import dataclass
+from typing import Any, Dict, Iterable, List, Sequence, Tuple
+
+from textual.widgets import DataTable
+
+Row = Tuple[str, Tuple[Any, ...]]
+
+
+@dataclass
+class SyncStats:
+    added: int = 0
+    removed: int = 0
+    updated_cells: int = 0
+    reordered: bool = False
+
+    @property
+    def changed(self) -> bool:
+        return bool(self.added or self.removed or self.updated_cells or self.reordered)
+
+
+class TableSync:
+    """Keep a DataTable in step with a keyed, ordered list of rows."""
+
+    def __init__(self, table: DataTable, column_keys: Sequence[str]) -> None:
+        self.table = table
+        self.column_keys: List[str] = list(column_keys)
+        self._rows: Dict[str, Tuple[Any, ...]] = {}
+        self._order: List[str] = []
+
+    def __len__(self) -> int:
+        return len(self._rows)
+
+    def reset(self) -> None:
+        """Forget all rows and clear the table."""
+        self.table.clear()
+        self._rows.clear()
+        self._order.clear()
+
+    def sync(self, rows: Iterable[Row]) -> SyncStats:
+        """Make the table show exactly `rows`, in the given order.
+
+        Each row is a `(key, cells)` pair; cells must line up with
+        `column_keys`. If a key repeats, the first occurrence wins.
+        """
+        stats = SyncStats()
+        desired: Dict[str, Tuple[Any, ...]] = {}
+        for key, cells in rows:
+            if key not in desired:
+                desired[key] = tuple(cells)
+
+        for key in [k for k in self._rows if k not in desired]:
+            self.table.remove_row(key)
+            del self._rows[key]
+            stats.removed += 1
+
+        appended: List[str] = []
+        for key, cells in desired.items():
+            old = self._rows.get(key)
+            if old is None:
+                self.table.add_row(*cells, key=key)
+                appended.append(key)
+                stats.added += 1
+            elif old != cells:
+                for column, before, after in zip(self.column_keys, old, cells):
+                    if before != after:
+                        self.table.update_cell(key, column, after)
+                        stats.updated_cells += 1
+            self._rows[key] = cells
+
+        # Where the table currently has the rows: survivors keep their
+        # relative order and new rows were appended at the end.
+        current = [k for k in self._order if k in desired] + appended
+        order = list(desired)
+        if current != order:
+            self._reorder(order)
+            stats.reordered = True
+        self._order = order
+        return stats
+
+    def _reorder(self, order: List[str]) -> None:
+        # DataTable.sort hands the key function the row's cell values rather
+        # than its RowKey, so map each row's cells to its target position.
+        position = {self._rows[key]: i for i, key in enumerate(order)}
+        if len(position) == len(order):
+            self.table.sort(key=lambda cells: position[tuple(cells)])
+            return
+        # Two rows render identically, so positions are ambiguous: rebuild.
+        self.table.clear()
+        for key in order:
+            self.table.add_row(*self._rows[key], key=key)
@@ -0,0 +1,199 @@
+"""Bounded store for SeenAircraft records.
+
+PlaneWatcher.seen used to be a plain dict that only ever grew. TrackStore
+behaves like that dict (hex -> SeenAircraft) but adds:
+
+- retention: an optional cap on the number of entries and on the age of
+  `lastSeen`, enforced by `evict()`. Entries are dropped least recently
+  updated first, and protected entries (interesting aircraft by default)
+  are never evicted;
+- sorted views kept up to date as entries change, so the UI does not
+  re-sort the whole store every tick;
+- a memory footprint estimate.
+
+Records are mutated in place by their owner, so after changing a record
+call `touch(hex)` to refresh its LRU position and sorted-view placement.
+"""
+from __future__ import annotations
+
+import sys
+from bisect import bisect_left, insort
+from collections import OrderedDict
+from datetime import datetime, timedelta
+from typing import Any, Callable, Dict, Iterator, List, MutableMapping, Optional, Tuple
+
+from SeenAircraft import SeenAircraft
+
+
+def recent_key(ac: SeenAircraft) -> Tuple[Any, ...]:
+    """Most recently seen first, closest first among equals.
+
+    Same ordering as sorting by (lastSeen, -closestApproach) in reverse.
+    """
+    return (-ac.lastSeen.timestamp(), ac.closestApproach, ac.hex)
+
+
+def closest_key(ac: SeenAircraft) -> Tuple[Any, ...]:
+    return (ac.closestApproach, ac.hex)
+
+
+def _is_interesting(ac: SeenAircraft) -> bool:
+    return ac.is_interesting
+
+
+class SortedView:
+    """A list of hexes kept sorted by `key(record)` under inserts/removals."""
+
+    def __init__(self, key: Callable[[SeenAircraft], Tuple[Any, ...]]) -> None:
+        self.key = key
+        self._sorted: List[Tuple[Tuple[Any, ...], str]] = []
+        self._keys: Dict[str, Tuple[Any, ...]] = {}
+
+    def __len__(self) -> int:
+        return len(self._sorted)
+
+    def add(self, ac: SeenAircraft) -> None:
+        k = self.key(ac)
+        old = self._keys.get(ac.hex)
+        if old == k:
+            return
+        if old is not None:
+            self._remove_entry(old, ac.hex)
+        self._keys[ac.hex] = k
+        insort(self._sorted, (k, ac.hex))
+
+    def discard(self, hex: str) -> None:
+        old = self._keys.pop(hex, None)
+        if old is not None:
+            self._remove_entry(old, hex)
+
+    def _remove_entry(self, k: Tuple[Any, ...], hex: str) -> None:
+        i = bisect_left(self._sorted, (k, hex))
+        del self._sorted[i]
+
+    def hexes(self) -> Iterator[str]:
+        return (hex for _, hex in self._sorted)
+
+    def hexes_reversed(self) -> Iterator[str]:
+        return (hex for _, hex in reversed(self._sorted))
+
+    def memory_footprint(self) -> int:
+        total = sys.getsizeof(self._sorted) + sys.getsizeof(self._keys)
+        for entry in self._sorted:
+            total += sys.getsizeof(entry) + sys.getsizeof(entry[0])
+        return total
+
+
+class TrackStore(MutableMapping[str, SeenAircraft]):
+    """hex -> SeenAircraft mapping with retention limits and sorted views."""
+
+    def __init__(
+        self,
+        max_entries: Optional[int] = None,
+        max_age: Optional[timedelta] = None,
+        protect: Callable[[SeenAircraft], bool] = _is_interesting,
+    ) -> None:
+        self.max_entries: Optional[int] = max_entries
+        self.max_age: Optional[timedelta] = max_age
+        self.protect = protect
+        # insertion order doubles as LRU order: least recently touched first
+        self._entries: "OrderedDict[str, SeenAircraft]" = OrderedDict()
+        self._views: Dict[str, SortedView] = {
+            "recent": SortedView(recent_key),
+            "closest": SortedView(closest_key),
+        }
+        self.evicted: int = 0
+
+    # --- mapping protocol ---
+    def __getitem__(self, hex: str) -> SeenAircraft:
+        return self._entries[hex]
+
+    def __setitem__(self, hex: str, ac: SeenAircraft) -> None:
+        self._entries[hex] = ac
+        self._entries.move_to_end(hex)
+        for view in self._views.values():
+            view.add(ac)
+
+    def __delitem__(self, hex: str) -> None:
+        del self._entries[hex]
+        for view in self._views.values():
+            view.discard(hex)
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._entries)
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __contains__(self, hex: object) -> bool:
+        return hex in self._entries
+
+    def get(self, hex: str, default: Optional[SeenAircraft] = None) -> Optional[SeenAircraft]:
+        # skips Mapping.get's __getitem__ / KeyError round trip
+        return self._entries.get(hex, default)
+
+    # --- tracking ---
+    def touch(self, hex: str) -> None:
+        """Record that the entry for `hex` was updated in place."""
+        ac = self._entries[hex]
+        self._entries.move_to_end(hex)
+        for view in self._views.values():
+            view.add(ac)
+
+    def add_view(self, name: str, key: Callable[[SeenAircraft], Tuple[Any, ...]]) -> None:
+        """Maintain an extra sorted view; keys must be unique per record."""
+        view = SortedView(key)
+        for ac in self._entries.values():
+            view.add(ac)
+        self._views[name] = view
+
+    def sorted_view(self, name: str = "recent") -> List[SeenAircraft]:
+        """Records in the order of the named view ("recent" or "closest")."""
+        entries = self._entries
+        return [entries[hex] for hex in self._views[name].hexes()]
+
+    def evict(self, now: Optional[datetime] = None) -> List[str]:
+        """Apply the retention limits; returns the evicted hexes."""
+        if self.max_age is None and self.max_entries is None:
+            return []
+        evicted: List[str] = []
+        if self.max_age is not None:
+            cutoff = (now or datetime.now()) - self.max_age
+            # the tail of the "recent" view holds the oldest lastSeen values
+            for hex in self._views["recent"].hexes_reversed():
+                ac = self._entries[hex]
+                if ac.lastSeen >= cutoff:
+                    break
+                if not self.protect(ac):
+                    evicted.append(hex)
+            for hex in evicted:
+                del self[hex]
+        if self.max_entries is not None and len(self._entries) > self.max_entries:
+            excess = len(self._entries) - self.max_entries
+            victims = []
+            for hex, ac in self._entries.items():
+                if len(victims) >= excess:
+                    break
+                if not self.protect(ac):
+                    victims.append(hex)
+            for hex in victims:
+                del self[hex]
+            evicted.extend(victims)
+        self.evicted += len(evicted)
+        return evicted
+
+    def memory_footprint(self) -> int:
+        """Approximate bytes held by the store, records and sorted views."""
+        total = sys.getsizeof(self._entries)
+        seen_objects = set()
+        for ac in self._entries.values():
+            total += sys.getsizeof(ac)
+            for field in SeenAircraft.__slots__:
+                value = getattr(ac, field)
+                # small ints, bools and shared defaults are counted once
+                if id(value) not in seen_objects:
+                    seen_objects.add(id(value))
+                    total += sys.getsizeof(value)
+        for view in self._views.values():
+            total += view.memory_footprint()
+        return total
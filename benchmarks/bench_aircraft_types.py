@@ -0,0 +1,57 @@
+"""Per-refresh classification cost: linear scan vs. the indexed registry.
+
+Each refresh classifies every aircraft in range about three times
+(update_seen, App.update_current, print_helicopters), so the benchmark
+times 3 x N lookups with designators drawn from the real type list.
+
+Run from the repository root:
+    python -m benchmarks.bench_aircraft_types
+"""
+from __future__ import annotations
+
+import random
+import timeit
+from typing import List
+
+from AircraftTypes import AircraftTypes
+
+FLEET_SIZES = (50, 200, 1000)
+CALLS_PER_AIRCRAFT = 3
+
+
+def linear_is_helicopter(records: List[dict], type_str: str) -> bool:
+    """The scan PlaneWatcher.is_helicopter used before the registry."""
+    for item in records:
+        if item["Designator"] == type_str:
+            return (
+                item["AircraftDescription"] == "Helicopter"
+                or item["AircraftDescription"] == "Tiltrotor"
+            )
+    return False
+
+
+def main() -> None:
+    types = AircraftTypes()
+    records = types.aircraft_types
+    designators = [r["Designator"] for r in records] + ["", "ZZZZ"]
+    rng = random.Random(42)
+
+    print(f"{'aircraft':>8} {'linear (ms)':>12} {'indexed (ms)':>13} {'speedup':>8}")
+    for n in FLEET_SIZES:
+        fleet = [rng.choice(designators) for _ in range(n)] * CALLS_PER_AIRCRAFT
+
+        def linear() -> None:
+            for t in fleet:
+                linear_is_helicopter(records, t)
+
+        def indexed() -> None:
+            for t in fleet:
+                types.is_rotorcraft(t)
+
+        lin = min(timeit.repeat(linear, number=1, repeat=3)) * 1000
+        idx = min(timeit.repeat(indexed, number=1, repeat=3)) * 1000
+        print(f"{n:>8} {lin:>12.2f} {idx:>13.3f} {lin / idx:>7.0f}x")
+
+
+if __name__ == "__main__":
+    main()
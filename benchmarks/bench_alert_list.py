@@ -0,0 +1,58 @@
+"""Alert-list lookups per table refresh: linear scan vs. the hex index.
+
+App.update_aircraft_table looks up every row of all three tables on each
+tick, so the benchmark times one get_interesting per row for growing
+seen-table sizes.
+
+Run from the repository root:
+    python -m benchmarks.bench_alert_list
+"""
+from __future__ import annotations
+
+import random
+import timeit
+from typing import Any, Dict, List
+
+from AlertList import AlertList
+
+ROW_COUNTS = (50, 500, 5000)
+
+
+def linear_get_interesting(rows: List[Dict[str, Any]], hex: str) -> Dict[str, Any]:
+    """The scan PlaneWatcher.get_interesting used before the index."""
+    x = [x for x in rows if x["$ICAO"].lower() == hex.lower()]
+    if len(x) > 0:
+        return x[0]
+    return {}
+
+
+def main() -> None:
+    al = AlertList()
+    rows = al.interesting_aircraft
+    known = sorted(al.interesting_hexes)
+    rng = random.Random(42)
+
+    print(f"{'rows':>6} {'linear (ms)':>12} {'indexed (ms)':>13} {'speedup':>8}")
+    for n in ROW_COUNTS:
+        # roughly one in ten aircraft is on the alert list
+        hexes = [
+            rng.choice(known) if rng.random() < 0.1 else f"{rng.getrandbits(24):06x}"
+            for _ in range(n)
+        ]
+
+        def linear() -> None:
+            for h in hexes:
+                linear_get_interesting(rows, h)
+
+        def indexed() -> None:
+            for h in hexes:
+                al.get(h)
+
+        repeat = 1 if n > 500 else 3
+        lin = min(timeit.repeat(linear, number=1, repeat=repeat)) * 1000
+        idx = min(timeit.repeat(indexed, number=1, repeat=3)) * 1000
+        print(f"{n:>6} {lin:>12.1f} {idx:>13.3f} {lin / idx:>7.0f}x")
+
+
+if __name__ == "__main__":
+    main()
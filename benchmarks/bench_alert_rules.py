@@ -0,0 +1,88 @@
+"""Rule evaluation: compiled RuleEngine vs. checking every rule per aircraft.
+
+Builds rule sets of growing size (a mix of squawk, speed, type-class,
+alert-list and polygon rules) and times one evaluation over a synthetic
+snapshot. The naive column tests each rule against each aircraft, which
+is what extending the colour-coding in App.row_cells would amount to.
+
+Run from the repository root:
+    python -m benchmarks.bench_alert_rules
+"""
+from __future__ import annotations
+
+import json
+import random
+import timeit
+
+from AircraftTypes import AircraftTypes
+from AlertList import AlertList
+from AlertRules import AlertListRule, AltitudeInPolygonRule, RuleEngine, SpeedRule, SquawkRule, TypeClassRule
+from Snapshot import MISSING_ALT, Snapshot
+from SpatialIndex import Polygon
+from benchmarks.payloads import TYPES, make_point_payload
+
+RULE_COUNTS = (5, 50, 500)
+FLEET = 5000
+
+
+def make_rules(n: int, rng: random.Random):
+    rules = []
+    for i in range(n):
+        kind = i % 5
+        if kind == 0:
+            rules.append(SquawkRule(f"sq{i}", frozenset({f"{rng.randint(0, 7777):04d}"})))
+        elif kind == 1:
+            rules.append(SpeedRule(f"spd{i}", above_kt=rng.uniform(100, 600)))
+        elif kind == 2:
+            rules.append(TypeClassRule(f"type{i}", designators=frozenset({rng.choice(TYPES)})))
+        elif kind == 3:
+            rules.append(AlertListRule(f"tag{i}", tags=frozenset({f"tag{rng.randint(0, 20)}"})))
+        else:
+            lat, lon = 42.52 + rng.uniform(-3, 3), -71.42 + rng.uniform(-3, 3)
+            box = Polygon([(lat, lon), (lat + 0.2, lon), (lat + 0.2, lon + 0.3), (lat, lon + 0.3)])
+            rules.append(AltitudeInPolygonRule(f"geo{i}", box, below_ft=rng.uniform(1000, 10000)))
+    return rules
+
+
+def naive(rules, snap: Snapshot, types: AircraftTypes, alerts: AlertList):
+    found = set()
+    for i, hex in enumerate(snap.hex):
+        for rule in rules:
+            if isinstance(rule, SquawkRule):
+                hit = snap.squawk[i] in rule.squawks
+            elif isinstance(rule, SpeedRule):
+                hit = snap.gs[i] > rule.above_kt
+            elif isinstance(rule, TypeClassRule):
+                hit = rule.matches(snap.t[i], types)
+            elif isinstance(rule, AlertListRule):
+                rec = alerts.get(hex)
+                hit = rec is not None and any(t.casefold() in rule.tags for t in rec.tags)
+            else:
+                alt = snap.alt_baro[i]
+                hit = alt != MISSING_ALT and alt < rule.below_ft and rule.polygon.contains(snap.lat[i], snap.lon[i])
+            if hit:
+                found.add((rule.name, hex))
+    return found
+
+
+def main() -> None:
+    rng = random.Random(5)
+    snap = Snapshot.from_payload(json.loads(make_point_payload(FLEET))["ac"])
+    types = AircraftTypes()
+    rows = [{"$ICAO": h, "$Tag 1": f"tag{rng.randint(0, 20)}"} for h in rng.sample(snap.hex, 300)]
+    alerts = AlertList(rows)
+
+    print(f"{FLEET} aircraft")
+    print(f"{'rules':>6} {'naive (ms)':>11} {'engine (ms)':>12} {'matches':>8}")
+    for n in RULE_COUNTS:
+        rules = make_rules(n, rng)
+        engine = RuleEngine(rules, types, alerts)
+        engine.matches(snap)  # warm the per-hex static cache, as after the first poll
+        assert set(engine.matches(snap)) == naive(rules, snap, types, alerts)
+        t_naive = min(timeit.repeat(lambda: naive(rules, snap, types, alerts), number=1, repeat=3)) * 1000
+        t_engine = min(timeit.repeat(lambda: engine.matches(snap), number=1, repeat=5)) * 1000
+        print(f"{n:>6} {t_naive:>11.1f} {t_engine:>12.1f} {len(engine.matches(snap)):>8}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,53 @@
+"""Decode time and peak memory of each JSON backend on /point payloads.
+
+Each row decodes a full /point body into the aircraft list the snapshot is
+built from, then builds the Snapshot, so the typed msgspec path is compared
+end to end with the dict-based ones.
+
+Run from the repository root:
+    python -m benchmarks.bench_decoders [recorded_point.json ...]
+"""
+from __future__ import annotations
+
+import sys
+import timeit
+import tracemalloc
+
+from Decoders import available_decoders, get_decoder
+from Snapshot import Snapshot
+from benchmarks.payloads import load_payloads, make_point_payload
+
+FLEET_SIZES = (250, 1000, 5000)
+
+
+def peak_bytes(fn) -> int:
+    tracemalloc.start()
+    result = fn()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del result
+    return peak
+
+
+def main(argv) -> None:
+    if argv:
+        payloads = [(f"file {i}", p) for i, p in enumerate(load_payloads(argv))]
+    else:
+        payloads = [(f"{n} ac", make_point_payload(n)) for n in FLEET_SIZES]
+
+    print(f"{'payload':>9} {'size KiB':>9} {'backend':>15} {'decode (ms)':>12} {'+snapshot (ms)':>15} {'peak KiB':>9}")
+    for label, body in payloads:
+        for name in available_decoders():
+            decoder = get_decoder(name)
+            decode = lambda: decoder.decode_point(body)
+            full = lambda: Snapshot.from_payload(decoder.decode_point(body))
+            dt = min(timeit.repeat(decode, number=1, repeat=5)) * 1000
+            ft = min(timeit.repeat(full, number=1, repeat=5)) * 1000
+            print(
+                f"{label:>9} {len(body) / 1024:>9.0f} {name:>15} {dt:>12.2f} {ft:>15.2f}"
+                f" {peak_bytes(full) / 1024:>9.0f}"
+            )
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
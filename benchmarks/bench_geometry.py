@@ -0,0 +1,63 @@
+"""Snapshot geometry: per-aircraft distance_to loop vs. one batched pass.
+
+A 250 nm /point sweep over a busy region returns 1,000+ aircraft. The
+per-object path calls AircraftResp.distance_to once per consumer
+(update_seen, the current table and the print helpers); the batched path
+computes distance, bearing and closure rate once for the whole snapshot.
+
+Run from the repository root:
+    python -m benchmarks.bench_geometry
+"""
+from __future__ import annotations
+
+import random
+import timeit
+
+import Geometry
+from AircraftResp import AircraftResp
+from Geometry import SnapshotGeometry
+
+FLEET_SIZES = (100, 1000, 5000)
+CONSUMERS = 3
+OBS = (42.52, -71.42)
+
+
+def make_fleet(n: int, rng: random.Random) -> list[AircraftResp]:
+    # roughly a 250 nm box around the observer
+    return [
+        AircraftResp(
+            hex=f"{i:06x}",
+            lat=OBS[0] + rng.uniform(-4.0, 4.0),
+            lon=OBS[1] + rng.uniform(-5.5, 5.5),
+            track=rng.uniform(0, 360),
+            gs=rng.uniform(80, 500),
+        )
+        for i in range(n)
+    ]
+
+
+def main() -> None:
+    rng = random.Random(42)
+    numpy_mod = Geometry.np
+    print(f"{'aircraft':>8} {'per-object (ms)':>16} {'python batch (ms)':>18} {'numpy batch (ms)':>17}")
+    for n in FLEET_SIZES:
+        fleet = make_fleet(n, rng)
+
+        def per_object() -> None:
+            for _ in range(CONSUMERS):
+                for ac in fleet:
+                    ac.distance_to(*OBS, unit="nm")
+
+        def batched() -> None:
+            SnapshotGeometry.from_aircraft(fleet, *OBS)
+
+        loop = min(timeit.repeat(per_object, number=1, repeat=5)) * 1000
+        Geometry.np = None
+        py = min(timeit.repeat(batched, number=1, repeat=5)) * 1000
+        Geometry.np = numpy_mod
+        vec = min(timeit.repeat(batched, number=1, repeat=5)) * 1000 if numpy_mod else float("nan")
+        print(f"{n:>8} {loop:>16.2f} {py:>18.2f} {vec:>17.2f}")
+
+
+if __name__ == "__main__":
+    main()
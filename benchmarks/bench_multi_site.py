@@ -0,0 +1,55 @@
+"""Multi-site watching: one PlaneWatcher per site vs. MultiSiteWatcher.
+
+For N random sites around New England, reports the /point requests per
+poll, the time to plan the coalesced queries, and the memory held by N
+independent PlaneWatchers (each loading its own reference data) against
+one MultiSiteWatcher. Nothing is fetched from the API.
+
+Run from the repository root:
+    python -m benchmarks.bench_multi_site
+"""
+from __future__ import annotations
+
+import random
+import timeit
+import tracemalloc
+
+from MultiSiteWatcher import MultiSiteWatcher, WatchZone, plan_queries
+from PlaneWatcher import PlaneWatcher
+
+SITE_COUNTS = (1, 4, 12)
+
+
+def make_zones(n: int, seed: int = 1) -> list[WatchZone]:
+    rng = random.Random(seed)
+    return [
+        WatchZone(f"site{i}", rng.uniform(41.0, 44.5), rng.uniform(-73.5, -69.9), rng.choice([5, 10, 25]))
+        for i in range(n)
+    ]
+
+
+def held_bytes(fn) -> int:
+    tracemalloc.start()
+    result = fn()
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del result
+    return current
+
+
+def main() -> None:
+    print(f"{'sites':>5} {'req/poll (single)':>18} {'req/poll (multi)':>17} {'plan (ms)':>10} {'single MiB':>11} {'multi MiB':>10}")
+    for n in SITE_COUNTS:
+        zones = make_zones(n)
+        plan_ms = min(timeit.repeat(lambda: plan_queries(zones), number=1, repeat=3)) * 1000
+        queries = plan_queries(zones)
+        single = held_bytes(lambda: [PlaneWatcher(z.lat, z.lon, z.radius_nm) for z in zones])
+        multi = held_bytes(lambda: MultiSiteWatcher(zones))
+        print(
+            f"{n:>5} {n:>18} {len(queries):>17} {plan_ms:>10.2f}"
+            f" {single / 2**20:>11.1f} {multi / 2**20:>10.1f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
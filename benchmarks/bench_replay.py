@@ -0,0 +1,91 @@
+"""Tracking throughput on a replayed recording.
+
+Plays a recording (see Recording.py) through PlaneWatcher as fast as
+possible, once per decoder, and reports snapshots and aircraft processed
+per second. The whole pipeline runs except the network: decode, snapshot,
+geometry, update_seen and the alert rules. Without a recording argument
+a synthetic one is written first: a fleet drifting across 60 polls.
+
+Record a real evening with `App.py --record evening.ndjson.gz`, then:
+    python -m benchmarks.bench_replay evening.ndjson.gz
+"""
+from __future__ import annotations
+
+import json
+import os
+import sys
+import tempfile
+import time
+
+import httpx
+
+from AircraftTypes import AircraftTypes
+from AlertList import AlertList
+from Decoders import available_decoders
+from PlaneWatcher import PlaneWatcher
+from Recording import Replay, ReplayFinished, ResponseRecorder, first_point
+from benchmarks.payloads import OBS, make_point_response
+
+FLEET = 1000
+POLLS = 60
+
+
+def write_synthetic(path: str, fleet: int = FLEET, polls: int = POLLS) -> None:
+    base = make_point_response(fleet)
+    request_path = f"/point/{OBS[0]}/{OBS[1]}/250"
+    with ResponseRecorder(path) as recorder:
+        for poll in range(polls):
+            for ac in base["ac"]:
+                if "lat" in ac:
+                    ac["lat"] += 0.002
+                    ac["lon"] += 0.002
+            body = json.dumps(base, separators=(",", ":")).encode()
+            recorder.record(request_path, None, httpx.Response(200, content=body), t=1760000000.0 + 5 * poll)
+
+
+def run(path: str, decoder: str, aircraft_types, alert_list) -> tuple[float, int, int]:
+    """Replay `path` through a PlaneWatcher: (seconds, snapshots, aircraft)."""
+    lat, lon, radius = first_point(path)
+    replay = Replay(path, speed=0)
+    watcher = PlaneWatcher(
+        lat, lon, radius,
+        client=replay.client(decoder), async_client=replay.async_client(decoder), clock=replay.now,
+        aircraft_types=aircraft_types, alert_list=alert_list,
+    )
+    snapshots = aircraft = 0
+    t0 = time.perf_counter()
+    while True:
+        try:
+            watcher.refresh()
+        except ReplayFinished:
+            break
+        except httpx.HTTPStatusError:
+            continue  # a recorded 429/5xx
+        snapshots += 1
+        aircraft += len(watcher.aircraft)
+    elapsed = time.perf_counter() - t0
+    watcher.close()
+    return elapsed, snapshots, aircraft
+
+
+def main(argv) -> None:
+    # loaded once, outside the timed runs
+    aircraft_types, alert_list = AircraftTypes(), AlertList()
+    with tempfile.TemporaryDirectory() as tmp:
+        if argv:
+            path = argv[0]
+        else:
+            path = os.path.join(tmp, "synthetic.ndjson.gz")
+            write_synthetic(path)
+        print(f"{path}: {os.path.getsize(path) / 2**20:.1f} MiB")
+        print(f"{'decoder':>15} {'snapshots':>10} {'seconds':>8} {'snapshots/s':>12} {'aircraft/s':>11}")
+        for decoder in available_decoders():
+            elapsed, snapshots, aircraft = run(path, decoder, aircraft_types, alert_list)
+            print(
+                f"{decoder:>15} {snapshots:>10} {elapsed:>8.2f}"
+                f" {snapshots / elapsed:>12.1f} {aircraft / elapsed:>11.0f}"
+            )
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
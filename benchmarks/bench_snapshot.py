@@ -0,0 +1,83 @@
+"""Snapshot parsing: list of AircraftResp vs. the columnar Snapshot.
+
+Times turning a decoded /point response into the per-poll representation
+and measures the memory it holds once the rest of the response is gone
+(tracemalloc from the raw bytes, so whatever the result keeps of the
+decoded payload is counted). "payload KiB" is the decoded list itself.
+The "+ refresh path" columns also compute geometry and read the fields
+update_seen needs, which for the list path means touching every object.
+
+Run from the repository root:
+    python -m benchmarks.bench_snapshot [recorded_point.json ...]
+"""
+from __future__ import annotations
+
+import json
+import sys
+import timeit
+import tracemalloc
+
+from AircraftResp import AircraftResp
+from Geometry import SnapshotGeometry
+from Snapshot import Snapshot
+from benchmarks.payloads import load_payloads, make_point_payload
+
+FLEET_SIZES = (250, 1000, 5000)
+OBS = (42.52, -71.42)
+
+
+def as_list(data):
+    return [AircraftResp.from_dict(x) for x in data]
+
+
+def list_refresh(data):
+    aircraft = as_list(data)
+    geom = SnapshotGeometry.from_aircraft(aircraft, *OBS)
+    for ac in aircraft:
+        (ac.hex, ac.flight, ac.gs, ac.alt_geom, ac.emergency)
+    return aircraft, geom
+
+
+def snapshot_refresh(data):
+    snap = Snapshot.from_payload(data)
+    geom = snap.geometry(*OBS)
+    for i in range(len(snap)):
+        (snap.hex[i], snap.flight[i], snap.gs[i], snap.alt_geom[i], snap.emergency[i])
+    return snap, geom
+
+
+def held_bytes(fn, raw: bytes) -> int:
+    """Bytes still allocated while fn's result is alive, decoding included."""
+    tracemalloc.start()
+    before = tracemalloc.take_snapshot()
+    result = fn(json.loads(raw)["ac"])
+    after = tracemalloc.take_snapshot()
+    tracemalloc.stop()
+    del result
+    return sum(s.size_diff for s in after.compare_to(before, "filename"))
+
+
+def main(argv) -> None:
+    if argv:
+        payloads = [(len(json.loads(p).get("ac", [])), p) for p in load_payloads(argv)]
+    else:
+        payloads = [(n, make_point_payload(n)) for n in FLEET_SIZES]
+
+    print(
+        f"{'aircraft':>8} {'list parse (ms)':>16} {'snap parse (ms)':>16}"
+        f" {'list + refresh':>15} {'snap + refresh':>15}"
+        f" {'payload KiB':>12} {'list KiB':>9} {'snap KiB':>9}"
+    )
+    for n, raw in payloads:
+        data = json.loads(raw)["ac"]
+        t = lambda fn: min(timeit.repeat(lambda: fn(data), number=1, repeat=5)) * 1000
+        print(
+            f"{n:>8} {t(as_list):>16.2f} {t(Snapshot.from_payload):>16.2f}"
+            f" {t(list_refresh):>15.2f} {t(snapshot_refresh):>15.2f}"
+            f" {held_bytes(lambda d: d, raw) / 1024:>12.0f}"
+            f" {held_bytes(as_list, raw) / 1024:>9.0f} {held_bytes(Snapshot.from_payload, raw) / 1024:>9.0f}"
+        )
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
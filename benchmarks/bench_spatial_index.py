@@ -0,0 +1,74 @@
+"""Zone and proximity queries: linear scans vs. the snapshot grid index.
+
+For each fleet size, times building the index, then a batch of 50 small
+radius queries at random points (as geofences or multi-site fan-out would
+issue), 50 polygon queries and a nearest-10 query, each against the
+equivalent full pass over the snapshot.
+
+Run from the repository root:
+    python -m benchmarks.bench_spatial_index
+"""
+from __future__ import annotations
+
+import json
+import random
+import timeit
+
+from Geometry import SnapshotGeometry
+from Snapshot import Snapshot
+from SpatialIndex import Polygon, SpatialIndex
+from benchmarks.payloads import make_point_payload
+
+FLEET_SIZES = (1000, 5000, 10000)
+OBS = (42.52, -71.42)
+QUERIES = 50
+
+
+def best_ms(fn) -> float:
+    return min(timeit.repeat(fn, number=1, repeat=5)) * 1000
+
+
+def main() -> None:
+    rng = random.Random(7)
+    points = [(OBS[0] + rng.uniform(-2, 2), OBS[1] + rng.uniform(-2, 2)) for _ in range(QUERIES)]
+    polys = [Polygon([(a, o), (a + 0.3, o), (a + 0.3, o + 0.4), (a, o + 0.4)]) for a, o in points]
+
+    print(
+        f"{'aircraft':>8} {'build (ms)':>10} {'radius scan':>12} {'radius idx':>11}"
+        f" {'poly scan':>10} {'poly idx':>9} {'k10 scan':>9} {'k10 idx':>8}"
+    )
+    for n in FLEET_SIZES:
+        snap = Snapshot.from_payload(json.loads(make_point_payload(n))["ac"])
+        index = SpatialIndex(snap.lat, snap.lon)
+
+        def radius_scan():
+            for lat, lon in points:
+                d = SnapshotGeometry.from_columns(lat, lon, snap.lat, snap.lon, snap.track, snap.gs).distance_nm
+                [i for i in range(len(snap)) if d[i] <= 15]
+
+        def radius_idx():
+            for lat, lon in points:
+                index.within(lat, lon, 15)
+
+        def poly_scan():
+            for poly in polys:
+                [i for i in range(len(snap)) if poly.contains(snap.lat[i], snap.lon[i])]
+
+        def poly_idx():
+            for poly in polys:
+                index.in_polygon(poly)
+
+        def k_scan():
+            d = SnapshotGeometry.from_columns(*OBS, snap.lat, snap.lon, snap.track, snap.gs).distance_nm
+            sorted((float(d[i]), i) for i in range(len(snap)) if d[i] == d[i])[:10]
+
+        print(
+            f"{n:>8} {best_ms(lambda: SpatialIndex(snap.lat, snap.lon)):>10.2f}"
+            f" {best_ms(radius_scan):>12.2f} {best_ms(radius_idx):>11.2f}"
+            f" {best_ms(poly_scan):>10.2f} {best_ms(poly_idx):>9.2f}"
+            f" {best_ms(k_scan):>9.2f} {best_ms(lambda: index.nearest(*OBS, 10)):>8.2f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,63 @@
+"""Reference-data startup: parsing the sources vs. the mmap caches.
+
+Loads AircraftTypes and AlertList three ways, each in a fresh interpreter
+so nothing is shared between runs:
+
+- parse: SKYALERT_NO_CACHE=1, the JSON/CSV is parsed and compiled in
+  memory, with no cache directory involved
+- compile: empty cache directory, the sources are parsed and compiled
+- cached: the cache written by the compile run is mapped
+
+Then classifies and looks up a few aircraft, so the lazy paths are part
+of the measurement.
+
+Run from the repository root:
+    python -m benchmarks.bench_startup
+"""
+from __future__ import annotations
+
+import os
+import subprocess
+import sys
+import tempfile
+
+REPEAT = 3
+
+PROBE = """
+import time
+t0 = time.perf_counter()
+from AircraftTypes import AircraftTypes
+from AlertList import AlertList
+t1 = time.perf_counter()
+types = AircraftTypes()
+t2 = time.perf_counter()
+alerts = AlertList()
+t3 = time.perf_counter()
+for d in ("B738", "EC35", "C172", "H60", "XXXX"):
+    types.classify(d)
+for h in ("ae1234", "a00001", "ffffff"):
+    alerts.get(h)
+t4 = time.perf_counter()
+print((t1 - t0) * 1000, (t2 - t1) * 1000, (t3 - t2) * 1000, (t4 - t3) * 1000)
+"""
+
+
+def run(env: dict) -> list[float]:
+    out = subprocess.run(
+        [sys.executable, "-c", PROBE], env={**os.environ, **env}, capture_output=True, text=True, check=True
+    )
+    return [float(x) for x in out.stdout.split()]
+
+
+def main() -> None:
+    print(f"{'mode':>8} {'import (ms)':>12} {'types (ms)':>11} {'alerts (ms)':>12} {'lookups (ms)':>13}")
+    with tempfile.TemporaryDirectory() as tmp:
+        parse = min((run({"SKYALERT_NO_CACHE": "1"}) for _ in range(REPEAT)), key=sum)
+        compile_ = run({"SKYALERT_CACHE_DIR": tmp})
+        cached = min((run({"SKYALERT_CACHE_DIR": tmp}) for _ in range(REPEAT)), key=sum)
+    for mode, times in (("parse", parse), ("compile", compile_), ("cached", cached)):
+        print(f"{mode:>8} " + " ".join(f"{t:>{w}.1f}" for t, w in zip(times, (12, 11, 12, 13))))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,99 @@
+"""Frame time for redrawing a table: clear-and-rebuild vs. TableSync diffing.
+
+Each simulated tick changes the altitude of ~10% of the rows, moves those
+rows to the top (as the seen table does when lastSeen updates) and adds one
+new aircraft. Frame time is the table update plus the following redraw in a
+headless Textual app; the update column is the table operations alone.
+
+Run from the repository root:
+    python -m benchmarks.bench_table_sync
+"""
+from __future__ import annotations
+
+import asyncio
+import random
+import statistics
+import time
+from typing import List, Tuple
+
+from textual.app import App, ComposeResult
+from textual.widgets import DataTable
+
+from TableSync import TableSync
+
+ROW_COUNTS = (50, 500, 5000)
+TICKS = 20
+COLUMNS = ["Hex", "Type", "Reg", "Flight", "Closest", "Altitude", "Speed"]
+
+
+class BenchApp(App):
+    def compose(self) -> ComposeResult:
+        yield DataTable()
+
+    def on_mount(self) -> None:
+        table = self.query_one(DataTable)
+        for key in COLUMNS:
+            table.add_column(key, key=key)
+
+
+def make_row(rng: random.Random, hex_id: str) -> Tuple[str, Tuple[str, ...]]:
+    return hex_id, (
+        hex_id.upper(),
+        rng.choice(["B738", "A320", "EC35", "C172"]),
+        f"N{rng.randint(100, 999)}",
+        f"FLT{rng.randint(1, 999)}",
+        f"{rng.uniform(0, 10):.2f}",
+        f"{rng.randint(0, 40000)} ft",
+        f"{rng.randint(0, 500)} kt",
+    )
+
+
+def next_tick(rng: random.Random, rows: List[Tuple[str, Tuple[str, ...]]]) -> List[Tuple[str, Tuple[str, ...]]]:
+    rows = list(rows)
+    moved = []
+    for _ in range(max(1, len(rows) // 10)):
+        i = rng.randrange(len(rows))
+        key, cells = rows.pop(i)
+        moved.append((key, cells[:5] + (f"{rng.randint(0, 40000)} ft",) + cells[6:]))
+    moved.append(make_row(rng, f"{rng.getrandbits(32):08x}"))
+    return moved + rows
+
+
+def rebuild(table: DataTable, rows) -> None:
+    table.clear()
+    for key, cells in rows:
+        table.add_row(*cells, key=key)
+
+
+async def measure(n: int, diff: bool) -> Tuple[float, float]:
+    rng = random.Random(n)
+    rows = [make_row(rng, f"{i:06x}") for i in range(n)]
+    app = BenchApp()
+    updates: List[float] = []
+    frames: List[float] = []
+    async with app.run_test(size=(160, 50)) as pilot:
+        table = app.query_one(DataTable)
+        sync = TableSync(table, COLUMNS)
+        update = sync.sync if diff else (lambda r: rebuild(table, r))
+        update(rows)
+        await pilot.pause()
+        for _ in range(TICKS):
+            rows = next_tick(rng, rows)
+            start = time.perf_counter()
+            update(rows)
+            updates.append(time.perf_counter() - start)
+            await pilot.pause()
+            frames.append(time.perf_counter() - start)
+    return statistics.median(updates) * 1000, statistics.median(frames) * 1000
+
+
+async def main() -> None:
+    print(f"{'rows':>6} {'rebuild update/frame (ms)':>26} {'diff update/frame (ms)':>23}")
+    for n in ROW_COUNTS:
+        full_u, full_f = await measure(n, diff=False)
+        inc_u, inc_f = await measure(n, diff=True)
+        print(f"{n:>6} {full_u:>12.2f} / {full_f:>9.2f} {inc_u:>10.2f} / {inc_f:>9.2f}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
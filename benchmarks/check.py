@@ -0,0 +1,55 @@
+"""Run the benchmark suite against the committed baseline; this is the CI gate.
+
+The baseline is .benchmarks/<machine id>/0001_baseline.json, one per
+platform, Python version and word size (pytest-benchmark's machine id).
+The check fails if any benchmark's mean is more than MAX_SLOWDOWN slower
+than the baseline, and fails outright if this machine id has no
+baseline, instead of silently comparing nothing.
+
+Run from the repository root:
+    python -m benchmarks.check           # compare, exit non-zero on a regression
+    python -m benchmarks.check --save    # replace this machine's baseline
+
+Extra arguments go to pytest, e.g. `python -m benchmarks.check -k 1000ac`.
+Refresh the baseline, on the machine CI runs on, in the same commit as a
+change that is expected to move the numbers.
+"""
+from __future__ import annotations
+
+import sys
+from pathlib import Path
+from typing import List
+
+import pytest
+from pytest_benchmark.utils import get_machine_id
+
+ROOT = Path(__file__).resolve().parent.parent
+STORAGE = ROOT / ".benchmarks"
+BASELINE = "0001_baseline"
+MAX_SLOWDOWN = "mean:20%"
+
+
+def baseline_path() -> Path:
+    return STORAGE / get_machine_id() / f"{BASELINE}.json"
+
+
+def main(argv: List[str]) -> int:
+    args = [str(ROOT / "benchmarks"), f"--benchmark-storage={STORAGE}"]
+    if argv[:1] == ["--save"]:
+        # saved runs are numbered; drop the old ones so the new one is 0001
+        for old in baseline_path().parent.glob("*.json"):
+            old.unlink()
+        return pytest.main([*args, "--benchmark-save=baseline", *argv[1:]])
+    if not baseline_path().exists():
+        print(f"No benchmark baseline for {get_machine_id()}; run `python -m benchmarks.check --save`", file=sys.stderr)
+        return 2
+    return pytest.main([
+        *args,
+        f"--benchmark-compare={BASELINE}",
+        f"--benchmark-compare-fail={MAX_SLOWDOWN}",
+        *argv,
+    ])
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
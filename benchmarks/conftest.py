@@ -0,0 +1,49 @@
+"""Fixtures for the pytest-benchmark suite (benchmarks/test_*.py).
+
+The suite is not part of the unit test run (testpaths = ["tests"]). CI
+runs it from the repository root against the committed baseline in
+.benchmarks/:
+
+    python -m benchmarks.check           # fails if any mean is >20% slower
+    python -m benchmarks.check --save    # replaces the baseline
+
+See benchmarks/check.py. Use -k "1000ac" or similar to run a single
+fleet size.
+"""
+from __future__ import annotations
+
+from typing import Any, Dict, List
+
+import pytest
+
+from AircraftTypes import AircraftTypes
+from AlertList import AlertList
+from benchmarks.payloads import OBS, make_point_response
+
+FLEET_SIZES = (10, 100, 1000, 10000)
+
+
+@pytest.fixture(scope="session")
+def aircraft_types() -> AircraftTypes:
+    return AircraftTypes()
+
+
+@pytest.fixture(scope="session")
+def alert_list() -> AlertList:
+    return AlertList()
+
+
+@pytest.fixture(scope="session")
+def observer() -> tuple:
+    return OBS
+
+
+@pytest.fixture(scope="session", params=FLEET_SIZES, ids=lambda n: f"{n}ac")
+def fleet(request, alert_list) -> List[Dict[str, Any]]:
+    """A /point aircraft list; about one in ten hexes is on the alert list."""
+    records = make_point_response(request.param)["ac"]
+    known = sorted(alert_list.interesting_hexes)
+    for i, ac in enumerate(records):
+        if i % 10 == 5:
+            ac["hex"] = known[i % len(known)]
+    return records
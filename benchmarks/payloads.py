@@ -0,0 +1,91 @@
+"""Synthetic /point payloads for benchmarks.
+
+There are no recorded responses in the repository, so these mimic the
+shape of a real airplanes.live /point response: every aircraft carries the
+full field set the API returns, with a mix of ground traffic, aircraft
+without positions and the occasional squawk/emergency.
+"""
+from __future__ import annotations
+
+import json
+import random
+from typing import Any, Dict, List
+
+OBS = (42.52, -71.42)
+TYPES = ["B738", "A320", "A21N", "E75L", "C172", "PC12", "EC35", "H60", "B77W", "CRJ9"]
+
+
+def make_aircraft(i: int, rng: random.Random, spread_deg: float = 4.0) -> Dict[str, Any]:
+    on_ground = rng.random() < 0.05
+    has_pos = rng.random() > 0.03
+    alt = rng.randint(500, 41000)
+    ac: Dict[str, Any] = {
+        "hex": f"{rng.getrandbits(24):06x}" if i % 50 else f"~{i:06x}",
+        "type": rng.choice(["adsb_icao", "mlat", "adsr_icao", "tisb_icao"]),
+        "flight": f"{rng.choice(['DAL', 'JBU', 'AAL', 'N'])}{rng.randint(1, 9999):<4}",
+        "r": f"N{rng.randint(100, 99999)}",
+        "t": rng.choice(TYPES),
+        "desc": "SYNTHETIC AIRCRAFT",
+        "alt_baro": "ground" if on_ground else alt,
+        "alt_geom": None if on_ground else alt + rng.randint(-200, 200),
+        "gs": round(rng.uniform(0 if on_ground else 60, 30 if on_ground else 520), 1),
+        "track": round(rng.uniform(0, 360), 2),
+        "baro_rate": rng.choice([0, 64, -64, 1280, -1024, 2048]),
+        "squawk": f"{rng.randint(0, 7777):04d}",
+        "emergency": "none",
+        "category": rng.choice(["A1", "A3", "A5", "A7"]),
+        "nav_qnh": 1013.6,
+        "nav_altitude_mcp": 36000,
+        "nav_heading": round(rng.uniform(0, 360), 2),
+        "nic": 8,
+        "rc": 186,
+        "seen_pos": round(rng.uniform(0, 10), 3),
+        "version": 2,
+        "nic_baro": 1,
+        "nac_p": 9,
+        "nac_v": 1,
+        "sil": 3,
+        "sil_type": "perhour",
+        "gva": 2,
+        "sda": 2,
+        "alert": 0,
+        "spi": 0,
+        "mlat": [],
+        "tisb": [],
+        "messages": rng.randint(100, 100000),
+        "seen": round(rng.uniform(0, 5), 1),
+        "rssi": round(rng.uniform(-30, -3), 1),
+        "dst": round(rng.uniform(0, 250), 3),
+        "dir": round(rng.uniform(0, 360), 1),
+    }
+    if has_pos:
+        ac["lat"] = OBS[0] + rng.uniform(-spread_deg, spread_deg)
+        ac["lon"] = OBS[1] + rng.uniform(-spread_deg * 1.35, spread_deg * 1.35)
+    if rng.random() < 0.002:
+        ac["squawk"] = "7700"
+        ac["emergency"] = "general"
+    return ac
+
+
+def make_point_response(n: int, seed: int = 42) -> Dict[str, Any]:
+    rng = random.Random(seed)
+    return {
+        "ac": [make_aircraft(i, rng) for i in range(n)],
+        "msg": "No error",
+        "now": 1760000000000,
+        "total": n,
+        "ctime": 1760000000000,
+        "ptime": 12,
+    }
+
+
+def make_point_payload(n: int, seed: int = 42) -> bytes:
+    return json.dumps(make_point_response(n, seed)).encode()
+
+
+def load_payloads(paths: List[str]) -> List[bytes]:
+    out = []
+    for path in paths:
+        with open(path, "rb") as f:
+            out.append(f.read())
+    return out
@@ -0,0 +1,96 @@
+"""The per-refresh hot path at fleet sizes of 10 to 10,000 aircraft.
+
+Covers parsing (AircraftResp.from_dict), distances, PlaneWatcher's seen
+tracking and reference lookups, and App.update_aircraft_table in a
+headless Textual app. See conftest.py for running the suite and keeping
+baselines.
+"""
+from __future__ import annotations
+
+import asyncio
+from dataclasses import replace
+
+import pytest
+
+from AircraftResp import AircraftResp
+from App import SkyAlertApp
+from PlaneWatcher import PlaneWatcher
+from textual.widgets import DataTable
+
+
+@pytest.fixture
+def watcher(aircraft_types, alert_list, observer):
+    w = PlaneWatcher(*observer, 250, aircraft_types=aircraft_types, alert_list=alert_list, rules=[])
+    yield w
+    w.close()
+
+
+def test_from_dict(benchmark, fleet):
+    benchmark(lambda: [AircraftResp.from_dict(d) for d in fleet])
+
+
+def test_distance_to(benchmark, fleet, observer):
+    aircraft = [AircraftResp.from_dict(d) for d in fleet]
+    lat, lon = observer
+    benchmark(lambda: [ac.distance_to(lat, lon, unit="nm") for ac in aircraft])
+
+
+def test_update_seen_first_sight(benchmark, watcher, fleet):
+    watcher.ingest(fleet)
+
+    def reset():
+        watcher.seen.clear()
+
+    benchmark.pedantic(watcher.update_seen, setup=reset, rounds=20 if len(fleet) < 10000 else 5)
+
+
+def test_update_seen_tracked(benchmark, watcher, fleet):
+    # every aircraft already seen: the steady state of a long session
+    watcher.ingest(fleet)
+    benchmark(watcher.update_seen)
+
+
+def test_is_helicopter(benchmark, watcher, fleet):
+    types = [ac.get("t") for ac in fleet]
+    benchmark(lambda: [watcher.is_helicopter(t) for t in types])
+
+
+def test_is_interesting(benchmark, watcher, fleet):
+    hexes = [ac["hex"] for ac in fleet]
+    benchmark(lambda: [watcher.is_interesting(h) for h in hexes])
+
+
+def test_get_interesting(benchmark, watcher, fleet):
+    hexes = [ac["hex"] for ac in fleet]
+    benchmark(lambda: [watcher.get_interesting(h) for h in hexes])
+
+
+class HeadlessApp(SkyAlertApp):
+    CSS_PATH = None
+
+    def poll_aircraft(self) -> None:
+        pass  # tables are driven by the benchmark
+
+
+def test_update_aircraft_table(benchmark, watcher, fleet):
+    """One tick of the seen table: ~10% of the rows change altitude."""
+    watcher.ingest(fleet)
+    before = watcher.seen.sorted_view("recent")
+    after = [replace(ac, altitude=ac.altitude + 100) if i % 10 == 0 else ac for i, ac in enumerate(before)]
+    ticks = [before, after]
+
+    app = HeadlessApp(watcher.lat, watcher.lon, watcher.radius)
+    app.watcher = watcher
+
+    async def run() -> None:
+        async with app.run_test():
+            table = app.get_widget_by_id("seen_table", expect_type=DataTable)
+            app.update_aircraft_table(table, before)
+
+            def tick() -> None:
+                ticks.reverse()
+                app.update_aircraft_table(table, ticks[0])
+
+            benchmark.pedantic(tick, rounds=20 if len(fleet) < 10000 else 5)
+
+    asyncio.run(run())
@@ -0,0 +1,63 @@
+from AircraftTypes import AircraftType, AircraftTypes
+
+
+SAMPLE = [
+    {"Designator": "A21N", "AircraftDescription": "LandPlane", "WTC": "M", "EngineType": "Jet", "EngineCount": "2"},
+    {"Designator": "H60", "AircraftDescription": "Helicopter", "WTC": "M", "EngineType": "Turboprop/Turboshaft", "EngineCount": "2"},
+    {"Designator": "V22", "AircraftDescription": "Tiltrotor", "WTC": "M", "EngineType": "Turboprop/Turboshaft", "EngineCount": "2"},
+    # same designator, disagreeing models: the majority wins
+    {"Designator": "AS32", "AircraftDescription": "Helicopter", "WTC": "M", "EngineType": "Turboprop/Turboshaft", "EngineCount": "2"},
+    {"Designator": "AS32", "AircraftDescription": "LandPlane", "WTC": "M", "EngineType": "Turboprop/Turboshaft", "EngineCount": "2"},
+    {"Designator": "AS32", "AircraftDescription": "Helicopter", "WTC": "M", "EngineType": "Turboprop/Turboshaft", "EngineCount": "2"},
+    # tie: the first entry wins
+    {"Designator": "VSON", "AircraftDescription": "LandPlane", "WTC": "L", "EngineType": "Piston", "EngineCount": "1"},
+    {"Designator": "VSON", "AircraftDescription": "LandPlane", "WTC": "L", "EngineType": "Turboprop/Turboshaft", "EngineCount": "1"},
+]
+
+
+def test_rotorcraft_lookup():
+    types = AircraftTypes(SAMPLE)
+
+    assert types.is_rotorcraft("H60") is True
+    assert types.is_rotorcraft("V22") is True
+    assert types.is_rotorcraft("A21N") is False
+    assert types.is_rotorcraft("NOPE") is False
+    assert types.is_rotorcraft("") is False
+    assert types.is_rotorcraft(None) is False
+
+
+def test_attribute_lookups():
+    types = AircraftTypes(SAMPLE)
+
+    assert types.wtc("A21N") == "M"
+    assert types.engine_type("A21N") == "Jet"
+    assert types.engine_count("A21N") == 2
+    assert types.wtc("NOPE") is None
+    assert types.engine_count("NOPE") is None
+
+
+def test_designator_with_several_models():
+    types = AircraftTypes(SAMPLE)
+
+    assert len(types.models("AS32")) == 3
+    assert all(isinstance(m, AircraftType) for m in types.models("AS32"))
+    assert types.is_rotorcraft("AS32") is True
+    assert types.engine_type("VSON") == "Piston"
+    assert len(types) == 5
+    assert "AS32" in types
+
+
+def test_reassigning_records_rebuilds_index():
+    types = AircraftTypes(SAMPLE)
+    types.aircraft_types = [{"Designator": "A21N", "AircraftDescription": "Helicopter"}]
+
+    assert types.is_rotorcraft("A21N") is True
+    assert types.is_rotorcraft("H60") is False
+
+
+def test_loads_bundled_file():
+    types = AircraftTypes()
+
+    assert types.is_rotorcraft("EC35") is True
+    assert types.is_rotorcraft("B738") is False
+    assert types.wtc("B744") == "H"
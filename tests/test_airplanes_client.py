@@ -198,3 +198,85 @@ def test_request_error_retries_and_raises(client, monkeypatch):
 
     with pytest.raises(httpx.RequestError):
         client.get_icao("x")
+
+
+def test_async_get_point_success(monkeypatch):
+    import asyncio
+    from unittest.mock import AsyncMock
+
+    from AirplanesLive_Client import AsyncAirplanesClient
+
+    client = AsyncAirplanesClient(rate_limit_seconds=0, max_retries=1)
+    expected = [{"hex": "abc123"}]
+    get_mock = AsyncMock(return_value=make_resp({"ac": expected}))
+    client.client = Mock(get=get_mock)
+
+    result = asyncio.run(client.get_point(51.5, -0.12, 50))
+
+    assert result == expected
+    assert get_mock.call_args[0][0] == "/point/51.5/-0.12/50"
+
+
+def test_async_retry_uses_asyncio_sleep(monkeypatch):
+    import asyncio
+    from unittest.mock import AsyncMock
+
+    from AirplanesLive_Client import AsyncAirplanesClient
+
+    client = AsyncAirplanesClient(rate_limit_seconds=0, max_retries=3)
+    req = httpx.Request("GET", "https://api.airplanes.live/v2/icao/whatever")
+    http_exc = httpx.HTTPStatusError(
+        "Server error", request=req, response=httpx.Response(503, request=req)
+    )
+    get_mock = AsyncMock(side_effect=[make_resp(raise_exc=http_exc), make_resp({"ok": True})])
+    client.client = Mock(get=get_mock)
+
+    sleeps = []
+
+    async def fake_sleep(s):
+        sleeps.append(s)
+
+    monkeypatch.setattr(asyncio, "sleep", fake_sleep)
+    monkeypatch.setattr(time, "sleep", Mock(side_effect=AssertionError("blocking sleep")))
+
+    assert asyncio.run(client.get_icao("whatever")) == {"ok": True}
+    # jittered backoff for attempt 1: somewhere in [1, 2] seconds
+    assert len(sleeps) == 1 and 1.0 <= sleeps[0] <= 2.0
+
+
+def test_429_retry_after_is_honored_and_shared(monkeypatch):
+    from RateLimiter import TokenBucket
+
+    clock = [0.0]
+    limiter = TokenBucket(rate=1.0, clock=lambda: clock[0])
+    client = AirplanesClient(max_retries=2, limiter=limiter)
+    req = httpx.Request("GET", "https://api.airplanes.live/v2/icao/x")
+    http_exc = httpx.HTTPStatusError(
+        "Too many", request=req, response=httpx.Response(429, headers={"Retry-After": "7"}, request=req)
+    )
+    client.client = Mock(get=Mock(side_effect=[make_resp(raise_exc=http_exc), make_resp({"ok": True})]))
+
+    sleeps = []
+
+    def fake_sleep(s):
+        sleeps.append(s)
+        clock[0] += s
+
+    monkeypatch.setattr(time, "sleep", fake_sleep)
+
+    assert client.get_icao("x") == {"ok": True}
+    assert sleeps == [7.0]
+
+    # a second client on the same bucket is held off as well
+    other = AirplanesClient(limiter=limiter)
+    assert other.limiter.reserve() == pytest.approx(1.0)
+
+
+def test_endpoints_subclass_must_implement_request():
+    from AirplanesLive_Client import _Endpoints
+
+    class NoRequest(_Endpoints):
+        pass
+
+    with pytest.raises(TypeError, match="_request"):
+        NoRequest()
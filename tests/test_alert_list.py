@@ -0,0 +1,49 @@
+from AlertList import AlertList, AlertRecord
+
+
+ROWS = [
+    {"$ICAO": "AE1234", "$Registration": "12-3456", "$Operator": "USAF", "$ICAO Type": "H60",
+     "#CMPG": "Mil", "$Tag 1": "Rescue", "$#Tag 2": "Jolly", "$#Tag 3": "", "Category": "USAF"},
+    {"$ICAO": "a0b1c2", "$Registration": "N911PD", "$Operator": "Some PD", "$ICAO Type": "EC35",
+     "#CMPG": "Pol", "$Tag 1": "Police Squad", "$#Tag 2": "", "$#Tag 3": "", "Category": "Police Forces"},
+    {"$ICAO": "A0B1C2", "$Registration": "DUPE", "$Operator": "Duplicate", "$ICAO Type": "EC35",
+     "#CMPG": "Pol", "$Tag 1": "", "$#Tag 2": "", "$#Tag 3": "", "Category": "Police Forces"},
+    {"$ICAO": "", "$Registration": "NOHEX"},
+]
+
+
+def test_hex_lookup_is_normalized():
+    al = AlertList(ROWS)
+
+    rec = al.get(" ae1234 ")
+    assert isinstance(rec, AlertRecord)
+    assert rec.operator == "USAF"
+    assert rec.tags == ("Rescue", "Jolly")
+    assert "AE1234" in al
+    assert "ae1234" in al.interesting_hexes
+    assert al.get("ffffff") is None
+    assert al.get(None) is None
+
+
+def test_duplicate_hex_keeps_first_row():
+    al = AlertList(ROWS)
+
+    assert al.get("A0B1C2").operator == "Some PD"
+    assert len(al) == 2
+
+
+def test_secondary_indexes():
+    al = AlertList(ROWS)
+
+    assert [r.icao for r in al.by_registration("n911pd")] == ["a0b1c2"]
+    assert len(al.by_icao_type("ec35")) == 2
+    assert len(al.by_category("police forces")) == 2
+    assert [r.icao for r in al.by_tag("RESCUE")] == ["ae1234"]
+    assert al.by_tag("nothing") == ()
+
+
+def test_loads_bundled_file():
+    al = AlertList()
+
+    assert len(al.interesting_aircraft) > 10000
+    assert al.get("000004").operator == "Colombian Air Force"
@@ -0,0 +1,156 @@
+import json
+from datetime import datetime, timedelta
+
+import pytest
+
+from AircraftTypes import AircraftTypes
+from AlertList import AlertList
+from AlertRules import (
+    AlertListRule,
+    AltitudeInPolygonRule,
+    RuleEngine,
+    SpeedRule,
+    SquawkRule,
+    TypeClassRule,
+    load_rules,
+    rules_from_dicts,
+)
+from Snapshot import Snapshot
+from SpatialIndex import Polygon
+
+T0 = datetime(2025, 1, 1, 12, 0, 0)
+BOX = Polygon([(42.0, -72.0), (43.0, -72.0), (43.0, -71.0), (42.0, -71.0)])
+
+
+@pytest.fixture
+def types():
+    return AircraftTypes([
+        {"Designator": "EC35", "AircraftDescription": "Helicopter", "WTC": "L", "EngineType": "Turboshaft"},
+        {"Designator": "B738", "AircraftDescription": "LandPlane", "WTC": "M", "EngineType": "Jet"},
+        {"Designator": "B748", "AircraftDescription": "LandPlane", "WTC": "H", "EngineType": "Jet"},
+    ])
+
+
+@pytest.fixture
+def alerts():
+    return AlertList([
+        {"$ICAO": "AAA001", "$Tag 1": "Police", "Category": "Law Enforcement"},
+        {"$ICAO": "AAA002", "$Tag 1": "Survey", "Category": "Other"},
+    ])
+
+
+def ac(hex_id, t="B738", squawk=None, gs=250.0, alt=5000, lat=42.5, lon=-71.5):
+    return {"hex": hex_id, "t": t, "squawk": squawk, "gs": gs, "alt_baro": alt, "lat": lat, "lon": lon}
+
+
+def snap(*records):
+    return Snapshot.from_payload(list(records))
+
+
+def pairs(engine, s):
+    return set(engine.matches(s))
+
+
+def test_each_rule_kind_matches(types, alerts):
+    engine = RuleEngine(
+        [
+            SquawkRule("emergency"),
+            AltitudeInPolygonRule("low in box", BOX, below_ft=1000),
+            AlertListRule("police", tags=["police"]),
+            AlertListRule("listed"),
+            TypeClassRule("rotorcraft", descriptions=["Helicopter"]),
+            TypeClassRule("heavy jet", wtc=["H"], engine_types=["Jet"]),
+            SpeedRule("fast", above_kt=400),
+            SpeedRule("slow", below_kt=60),
+            SpeedRule("band", above_kt=100, below_kt=200),
+        ],
+        types,
+        alerts,
+    )
+    s = snap(
+        ac("e1", squawk="7700"),
+        ac("low", alt=800),
+        ac("out", alt=800, lat=44.0),
+        ac("aaa001", t="EC35", gs=50),
+        ac("aaa002", gs=150),
+        ac("big", t="B748", gs=480),
+        ac("gnd", alt="ground"),
+    )
+    assert pairs(engine, s) == {
+        ("emergency", "e1"),
+        ("low in box", "low"),
+        ("police", "aaa001"),
+        ("listed", "aaa001"),
+        ("listed", "aaa002"),
+        ("rotorcraft", "aaa001"),
+        ("slow", "aaa001"),
+        ("band", "aaa002"),
+        ("heavy jet", "big"),
+        ("fast", "big"),
+    }
+
+
+def test_transitions_are_deduplicated(types, alerts):
+    engine = RuleEngine([SquawkRule("emergency")], types, alerts, leave_after=2)
+
+    events = engine.evaluate(snap(ac("e1", squawk="7600")), T0)
+    assert [(e.kind, e.rule, e.hex, e.detail) for e in events] == [("enter", "emergency", "e1", "7600")]
+
+    # same condition on the next poll: nothing new
+    assert engine.evaluate(snap(ac("e1", squawk="7600")), T0 + timedelta(seconds=5)) == []
+
+    (change,) = engine.evaluate(snap(ac("e1", squawk="7700")), T0 + timedelta(seconds=10))
+    assert (change.kind, change.detail, change.previous) == ("change", "7700", "7600")
+
+    # one missed poll is tolerated, the second clears it
+    assert engine.evaluate(snap(), T0 + timedelta(seconds=15)) == []
+    assert engine.active() == [("emergency", "e1")]
+    (leave,) = engine.evaluate(snap(), T0 + timedelta(seconds=20))
+    assert (leave.kind, leave.previous) == ("leave", "7700")
+    assert engine.active() == []
+
+
+def test_static_matches_follow_type_changes(types, alerts):
+    engine = RuleEngine([TypeClassRule("rotorcraft", descriptions=["helicopter"])], types, alerts, leave_after=1)
+    assert pairs(engine, snap(ac("x1", t="EC35"))) == {("rotorcraft", "x1")}
+    assert pairs(engine, snap(ac("x1", t="B738"))) == set()
+
+
+def test_rules_from_json(tmp_path, types, alerts):
+    path = tmp_path / "rules.json"
+    path.write_text(json.dumps([
+        {"type": "squawk", "name": "hijack", "squawks": ["7500"]},
+        {"type": "altitude_in_polygon", "name": "low", "below_ft": 1500,
+         "polygon": [[42.0, -72.0], [43.0, -72.0], [43.0, -71.0]]},
+        {"type": "speed", "name": "fast", "above_kt": 300},
+    ]))
+    rules = load_rules(str(path))
+    assert [type(r).__name__ for r in rules] == ["SquawkRule", "AltitudeInPolygonRule", "SpeedRule"]
+    assert rules[0].squawks == frozenset({"7500"})
+
+    with pytest.raises(ValueError):
+        rules_from_dicts([{"type": "nope", "name": "x"}])
+    (numeric,) = rules_from_dicts([{"type": "squawk", "name": "codes", "squawks": [7700, 20, "7600"]}])
+    assert numeric.squawks == frozenset({"7700", "0020", "7600"})
+    with pytest.raises(ValueError, match="'codes': '7800'"):
+        rules_from_dicts([{"type": "squawk", "name": "codes", "squawks": [7800]}])
+    with pytest.raises(ValueError, match="'codes': squawks must be a list"):
+        rules_from_dicts([{"type": "squawk", "name": "codes", "squawks": "7700"}])
+    with pytest.raises(ValueError, match="rule fast: unknown field 'above_kts'"):
+        rules_from_dicts([{"type": "speed", "name": "fast", "above_kts": 300}])
+    with pytest.raises(ValueError, match=r"rule \(unnamed\): "):
+        rules_from_dicts([{"type": "squawk"}])
+    with pytest.raises(ValueError):
+        RuleEngine([SquawkRule("a"), SquawkRule("a")], types, alerts)
+    with pytest.raises(ValueError):
+        SpeedRule("no threshold")
+
+
+def test_planewatcher_reports_events(types, alerts):
+    from PlaneWatcher import PlaneWatcher
+
+    watcher = PlaneWatcher(42.5, -71.5, 10, aircraft_types=types, alert_list=alerts, rules=[SquawkRule("emergency")])
+    watcher.ingest([ac("e1", squawk="7700")])
+    assert [(e.kind, e.hex) for e in watcher.alert_events] == [("enter", "e1")]
+    watcher.ingest([ac("e1", squawk="7700")])
+    assert watcher.alert_events == []
@@ -0,0 +1,120 @@
+import asyncio
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from AirplanesLive_Client import AirplanesClient, AsyncAirplanesClient
+from ConnectionPool import PoolConfig, SharedPool, h2
+
+POLLS = 12
+
+
+class _PointHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def setup(self):
+        super().setup()
+        self.server.connections += 1
+
+    def do_GET(self):
+        body = json.dumps({"ac": [{"hex": "abc123", "lat": 42.5, "lon": -71.4}]}).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def server():
+    srv = ThreadingHTTPServer(("127.0.0.1", 0), _PointHandler)
+    srv.daemon_threads = True
+    srv.connections = 0
+    thread = threading.Thread(target=srv.serve_forever, daemon=True)
+    thread.start()
+    yield srv
+    srv.shutdown()
+    srv.server_close()
+
+
+def _base_url(srv):
+    return f"http://127.0.0.1:{srv.server_address[1]}"
+
+
+def _poll(client, n=POLLS):
+    for _ in range(n):
+        assert client.get_point(42.5, -71.4, 10)[0]["hex"] == "abc123"
+
+
+def test_shared_pool_reuses_one_connection(server):
+    pool = SharedPool()
+    clients = [AirplanesClient(base_url=_base_url(server), rate_limit_seconds=0, pool=pool) for _ in range(3)]
+    for c in clients:
+        _poll(c)
+    for c in clients:
+        c.close()
+
+    assert server.connections == 1
+    assert pool.metrics.requests == 3 * POLLS
+    assert pool.metrics.tcp_connects == 1
+    assert pool.metrics.reused == 3 * POLLS - 1
+
+    # closing the clients leaves a caller-owned pool usable
+    c = AirplanesClient(base_url=_base_url(server), rate_limit_seconds=0, pool=pool)
+    _poll(c, 1)
+    assert server.connections == 1
+    pool.close()
+
+
+def test_without_keepalive_every_poll_connects(server):
+    pool = SharedPool(PoolConfig(max_keepalive_connections=0))
+    client = AirplanesClient(base_url=_base_url(server), rate_limit_seconds=0, pool=pool)
+    _poll(client)
+    client.close()
+    pool.close()
+
+    assert server.connections == POLLS
+    assert pool.metrics.tcp_connects == POLLS
+    assert pool.metrics.reuse_ratio == 0.0
+
+
+def test_async_client_shares_pool_metrics(server):
+    pool = SharedPool()
+
+    async def run():
+        async with AsyncAirplanesClient(base_url=_base_url(server), rate_limit_seconds=0, pool=pool) as c:
+            for _ in range(POLLS):
+                await c.get_point(42.5, -71.4, 10)
+        await pool.aclose()
+
+    asyncio.run(run())
+    assert server.connections == 1
+    assert pool.metrics.as_dict()["reused"] == POLLS - 1
+
+
+def test_private_pool_closed_with_client(server):
+    client = AirplanesClient(base_url=_base_url(server), rate_limit_seconds=0)
+    _poll(client, 1)
+    client.close()
+    assert client.pool._sync is None
+
+
+def test_trace_callback_is_chained(server):
+    pool = SharedPool()
+    events = []
+    with pool.client(_base_url(server), 5.0) as client:
+        client.get("/point/1/2/3", extensions={"trace": lambda name, info: events.append(name)})
+    pool.close()
+    assert "connection.connect_tcp.complete" in events
+    assert pool.metrics.tcp_connects == 1
+
+
+@pytest.mark.skipif(h2 is not None, reason="h2 installed")
+def test_http2_without_h2_is_a_clear_error():
+    with pytest.raises(ImportError, match="http2"):
+        SharedPool(PoolConfig(http2=True))
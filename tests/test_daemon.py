@@ -0,0 +1,230 @@
+import asyncio
+import io
+import json
+import socket
+
+import pytest
+
+from AircraftTypes import AircraftTypes
+from AlertList import AlertList
+from AlertRules import DEFAULT_RULES
+from Daemon import Daemon
+from EventStream import EventStream, Sink, StreamSink, UnixSocketSink
+from MultiSiteWatcher import MultiSiteWatcher, WatchZone
+from PlaneWatcher import PlaneWatcher
+from Recording import RecordedResponse, Replay
+
+POINT = "/point/42.52/-71.42/10"
+
+
+def point_body(*aircraft):
+    """aircraft: (hex, lat, squawk) tuples."""
+    return json.dumps({"ac": [
+        {"hex": h, "lat": lat, "lon": -71.42, "t": "R44", "flight": f"F{h}", "squawk": sq}
+        for h, lat, sq in aircraft
+    ]}).encode()
+
+
+def make_daemon(polls, sink, **kwargs):
+    records = [RecordedResponse(1000.0 + 5 * i, POINT, 200, point_body(*ac)) for i, ac in enumerate(polls)]
+    replay = Replay(records, speed=0)
+    watcher = PlaneWatcher(
+        42.52, -71.42, 10,
+        client=replay.client(),
+        async_client=replay.async_client(),
+        clock=replay.now,
+        aircraft_types=AircraftTypes([{"Designator": "R44", "AircraftDescription": "Helicopter"}]),
+        alert_list=AlertList([]),
+        rules=DEFAULT_RULES,
+    )
+    return Daemon(watcher, EventStream([sink]), interval=0, **kwargs)
+
+
+def test_daemon_emits_lifecycle_events_in_one_batch_per_poll():
+    out = io.BytesIO()
+    writes = []
+    sink = StreamSink(out)
+    write = sink.write
+
+    async def counting_write(data):
+        writes.append(data)
+        await write(data)
+
+    sink.write = counting_write
+    polls = [
+        [("aaa111", 42.60, "1200"), ("bbb222", 42.70, "1200")],
+        [("aaa111", 42.55, "7700"), ("bbb222", 42.70, "1200")],
+        # 0.06 nm closer is below the step; bbb222 misses its first poll
+        [("aaa111", 42.549, "7700")],
+        [("aaa111", 42.53, "1200")],
+        [("aaa111", 42.53, "1200")],
+    ]
+    daemon = make_daemon(polls, sink, closest_step=0.1)
+    asyncio.run(daemon.run())
+
+    events = [json.loads(line) for line in out.getvalue().splitlines()]
+    assert [(e["event"], e["hex"], e.get("kind")) for e in events] == [
+        ("new", "aaa111", None), ("new", "bbb222", None),
+        ("closest", "aaa111", None), ("alert", "aaa111", "enter"),
+        ("closest", "aaa111", None), ("left", "bbb222", None),
+        ("alert", "aaa111", "leave"),
+    ]
+    new = events[0]
+    assert (new["flight"], new["type"], new["helicopter"]) == ("Faaa111", "R44", True)
+    assert round(new["distance_nm"], 1) == 4.8
+    assert round(events[4]["distance_nm"], 1) == 0.6
+    assert round(events[5]["closest_nm"], 1) == 10.8
+    assert events[3]["detail"] == "7700"
+    # one write per poll that produced events; poll 3 produced none
+    assert daemon.polls == 5
+    assert len(writes) == 4
+
+
+def test_closest_step_and_leave_after():
+    out = io.BytesIO()
+    polls = [
+        [("aaa111", 42.60, "1200"), ("bbb222", 42.70, "1200")],
+        [("aaa111", 42.599, "1200")],
+        [("aaa111", 42.50, "1200")],
+        [("aaa111", 42.50, "1200")],
+    ]
+    daemon = make_daemon(polls, StreamSink(out), closest_step=0.1, leave_after=2)
+    asyncio.run(daemon.run())
+
+    events = [json.loads(line) for line in out.getvalue().splitlines()]
+    assert [(e["event"], e["hex"]) for e in events] == [
+        ("new", "aaa111"), ("new", "bbb222"),
+        ("closest", "aaa111"), ("left", "bbb222"),
+    ]
+    assert events[2]["distance_nm"] < 2
+    assert events[3]["closest_nm"] > 10
+
+
+def test_zones_share_a_query_and_tag_their_events():
+    # both zones fit into one /point circle around "home"
+    records = [
+        RecordedResponse(1000.0, "/point/42.52/-71.42/10.1", 200, point_body(("aaa111", 42.60, "1200"), ("bbb222", 42.45, "1200"))),
+        RecordedResponse(1005.0, "/point/42.52/-71.42/10.1", 200, point_body(("bbb222", 42.45, "1200"))),
+        RecordedResponse(1010.0, "/point/42.52/-71.42/10.1", 200, point_body(("bbb222", 42.45, "1200"))),
+    ]
+    replay = Replay(records, speed=0)
+    watcher = MultiSiteWatcher(
+        [WatchZone("home", 42.52, -71.42, 10), WatchZone("north", 42.62, -71.42, 3)],
+        client=replay.client(),
+        async_client=replay.async_client(),
+        clock=replay.now,
+        aircraft_types=AircraftTypes([]),
+        alert_list=AlertList([]),
+        rules=[],
+    )
+    out = io.BytesIO()
+    asyncio.run(Daemon(watcher, EventStream([StreamSink(out)]), interval=0).run())
+
+    events = [json.loads(line) for line in out.getvalue().splitlines()]
+    assert [(e["zone"], e["event"], e["hex"]) for e in events] == [
+        ("home", "new", "aaa111"), ("home", "new", "bbb222"),
+        ("north", "new", "aaa111"),
+        ("home", "left", "aaa111"), ("north", "left", "aaa111"),
+    ]
+    # distances are from each zone's own centre
+    assert round(events[0]["distance_nm"], 1) == 4.8
+    assert round(events[2]["distance_nm"], 1) == 1.2
+
+
+
+def test_left_reports_the_closest_approach_below_the_step():
+    out = io.BytesIO()
+    polls = [
+        [("aaa111", 42.60, "1200")],
+        # 0.06 nm closer: no closest event, but it is the closest approach
+        [("aaa111", 42.599, "1200")],
+        [],
+        [],
+    ]
+    daemon = make_daemon(polls, StreamSink(out), closest_step=0.1, leave_after=2)
+    asyncio.run(daemon.run())
+
+    events = [json.loads(line) for line in out.getvalue().splitlines()]
+    assert [e["event"] for e in events] == ["new", "left"]
+    assert events[1]["closest_nm"] == daemon.watcher.seen["aaa111"].closestApproach
+    assert events[1]["closest_nm"] < events[0]["distance_nm"] - 0.05
+
+
+def test_stream_batches_and_flushes_when_full():
+    out = io.BytesIO()
+    stream = EventStream([StreamSink(out)], max_buffer=64)
+
+    async def go():
+        await stream.emit({"event": "new", "hex": "a"})
+        assert out.getvalue() == b""
+        for _ in range(3):
+            await stream.emit({"event": "new", "hex": "b"})
+        assert stream.batches == 1
+        await stream.aclose()
+
+    asyncio.run(go())
+    assert len(out.getvalue().splitlines()) == 4
+    assert stream.batches == 2
+
+
+def test_unix_socket_sink_broadcasts_to_readers(tmp_path):
+    path = str(tmp_path / "events.sock")
+
+    async def go():
+        sink = UnixSocketSink(path)
+        stream = EventStream([sink])
+        await stream.start()
+        readers = [await asyncio.open_unix_connection(path) for _ in range(2)]
+        while sink.readers < 2:
+            await asyncio.sleep(0.01)
+        await stream.emit({"event": "new", "hex": "abc123"})
+        await stream.flush()
+        lines = [await r.readline() for r, _ in readers]
+        await stream.aclose()
+        for _, w in readers:
+            w.close()
+        return lines
+
+    lines = asyncio.run(go())
+    assert [json.loads(line)["hex"] for line in lines] == ["abc123", "abc123"]
+
+
+def test_unix_socket_sink_only_replaces_sockets(tmp_path):
+    path = tmp_path / "events.sock"
+    path.write_text("not a socket")
+
+    with pytest.raises(FileExistsError):
+        asyncio.run(UnixSocketSink(str(path)).start())
+    assert path.read_text() == "not a socket"
+
+    # a stale socket from an earlier run is replaced
+    path.unlink()
+    stale = socket.socket(socket.AF_UNIX)
+    stale.bind(str(path))
+    stale.close()
+
+    async def go():
+        sink = UnixSocketSink(str(path))
+        await sink.start()
+        # a reader that talks back does not pile up in memory
+        reader, writer = await asyncio.open_unix_connection(str(path))
+        while sink.readers < 1:
+            await asyncio.sleep(0.01)
+        writer.write(b"x" * 100_000)
+        await writer.drain()
+        await sink.write(b"{}\n")
+        line = await reader.readline()
+        writer.close()
+        await sink.aclose()
+        return line
+
+    assert asyncio.run(go()) == b"{}\n"
+    assert not path.exists()
+
+
+def test_sink_subclass_must_implement_write():
+    class NoWrite(Sink):
+        pass
+
+    with pytest.raises(TypeError, match="write"):
+        NoWrite()
@@ -0,0 +1,76 @@
+import json
+
+import httpx
+import pytest
+
+import Decoders
+from AirplanesLive_Client import AirplanesClient
+from Decoders import available_decoders, get_decoder
+from Snapshot import Snapshot
+
+PAYLOAD = {
+    "ac": [
+        {"hex": "abc123", "flight": "FLT1", "t": "B738", "lat": 42.5, "lon": -71.4,
+         "alt_baro": "ground", "alt_geom": 3100, "gs": 12, "nav_modes": ["tcas"]},
+        {"hex": "def456", "t": "EC35", "squawk": "7700", "emergency": "general"},
+    ],
+    "msg": "No error",
+    "now": 1760000000000,
+}
+BODY = json.dumps(PAYLOAD).encode()
+
+
+@pytest.fixture(params=["json", "orjson", "msgspec", "msgspec-schema"])
+def decoder_name(request):
+    if request.param not in available_decoders():
+        pytest.skip(f"{request.param} not installed")
+    return request.param
+
+
+def test_decode_point_feeds_snapshot(decoder_name):
+    records = get_decoder(decoder_name).decode_point(BODY)
+    snap = Snapshot.from_payload(records)
+
+    assert snap.hex == ["abc123", "def456"]
+    assert snap.alt_geom[0] == 3100
+    assert list(snap.on_ground) == [1, 0]
+    assert snap.squawk == [None, "7700"]
+    assert snap[0].flight == "FLT1"
+    assert snap[1].emergency == "general"
+
+
+def test_client_get_point_uses_decoder(decoder_name):
+    transport = httpx.MockTransport(lambda request: httpx.Response(200, content=BODY))
+    client = AirplanesClient(rate_limit_seconds=0, max_retries=1, decoder=decoder_name)
+    client.client = httpx.Client(base_url=client.base_url, transport=transport)
+
+    records = client.get_point(42.5, -71.4, 10)
+
+    assert [r.get("hex") for r in records] == ["abc123", "def456"]
+    # a missing field gives the caller's default with every decoder
+    assert records[0].get("squawk", "none") == "none"
+    assert [r.get("flight", "") for r in records] == [r.get("flight", "") for r in json.loads(BODY)["ac"]]
+    assert client.get_icao("abc123")["msg"] == "No error"
+
+
+def test_schema_decoder_falls_back_on_type_change():
+    if "msgspec-schema" not in available_decoders():
+        pytest.skip("msgspec not installed")
+    body = json.dumps({"ac": [{"hex": "abc123", "lat": {"unexpected": True}}]}).encode()
+
+    records = get_decoder("msgspec-schema").decode_point(body)
+
+    assert records == [{"hex": "abc123", "lat": {"unexpected": True}}]
+
+
+def test_auto_and_unknown():
+    assert get_decoder("auto").name in available_decoders()
+    with pytest.raises(ValueError):
+        get_decoder("yaml")
+
+
+def test_missing_optional_backend(monkeypatch):
+    monkeypatch.setattr(Decoders, "orjson", None)
+
+    with pytest.raises(ImportError):
+        get_decoder("orjson")
@@ -0,0 +1,71 @@
+import math
+from datetime import datetime, timedelta
+
+from AircraftTypes import AircraftTypes
+from AlertList import AlertList
+from FlightTrack import Track, TrackHistory, simplify
+from PlaneWatcher import PlaneWatcher
+from Snapshot import MISSING_ALT
+
+
+def test_simplify_keeps_corners_and_drops_straight_legs():
+    # east for 10 points, then north for 10: only the ends and the corner matter
+    lat = [42.0] * 10 + [42.0 + k / 100 for k in range(1, 11)]
+    lon = [-71.0 + k / 100 for k in range(10)] + [-71.0 + 9 / 100] * 10
+    assert simplify(lat, lon, 0.05) == [0, 9, 19]
+    # an out-and-back leg keeps its far end
+    assert simplify([42.0, 42.1, 42.0], [-71.0, -71.0, -71.0], 0.05) == [0, 1, 2]
+
+
+def test_track_memory_stays_bounded():
+    track = Track(capacity=32, segment=8, max_older=16, tolerance_nm=0.05)
+    # a slow circle: every sample is a (slight) turn
+    for k in range(2000):
+        a = k / 50
+        track.append(float(k), 42 + 0.1 * math.sin(a), -71 + 0.1 * math.cos(a), 1000 + k, 120.0, float(k % 360))
+    points = track.points()
+    assert len(track) == len(points) <= 32 + 16
+    assert track.nbytes() <= (32 + 16) * 48
+    # the newest samples are kept at full resolution, oldest first
+    assert [p.t for p in points[-32:]] == [float(k) for k in range(1968, 2000)]
+    assert points == sorted(points, key=lambda p: p.t)
+    assert points[-1].alt == 2999 and points[-1].gs == 120.0
+    assert [p.t for p in track.points(since=1990.0)] == [float(k) for k in range(1990, 2000)]
+
+
+def test_straight_flight_compacts_to_few_points():
+    track = Track(capacity=16, segment=8)
+    for k in range(100):
+        track.append(float(k), 42.0, -71.0 + k / 100, MISSING_ALT)
+    points = track.points()
+    assert len(points) < 16 + 20
+    assert points[0].t == 0.0 and points[0].alt is None and points[0].gs is None
+
+
+def test_watcher_tracks_notable_aircraft():
+    types = AircraftTypes([{"Designator": "H60", "AircraftDescription": "Helicopter"}])
+    t0 = now = datetime(2025, 10, 1, 12, 0)
+    watcher = PlaneWatcher(
+        42.52, -71.42, 10, aircraft_types=types, alert_list=AlertList([]), rules=[], tracks=TrackHistory(),
+        clock=lambda: now,
+    )
+    for k in range(3):
+        now = t0 + timedelta(seconds=5 * k)
+        watcher.ingest([
+            {"hex": "heli01", "t": "H60", "lat": 42.50 + k / 100, "lon": -71.42, "alt_baro": 800, "gs": 90},
+            {"hex": "plane1", "t": "B738", "lat": 42.60, "lon": -71.42 + k / 100},
+            {"hex": "nopos1", "t": "H60"},
+        ])
+    assert "plane1" not in watcher.tracks and "nopos1" not in watcher.tracks
+    path = watcher.get_track("heli01")
+    assert [(p.lat, p.alt, p.gs) for p in path] == [(42.50, 800, 90.0), (42.51, 800, 90.0), (42.52, 800, 90.0)]
+    assert path[0].t == t0.timestamp()
+    assert len(watcher.get_track("heli01", since=t0 + timedelta(seconds=5))) == 2
+    assert watcher.get_track("plane1") == []
+
+    # re-ingesting the same time adds nothing; select=None tracks everyone
+    watcher.ingest(watcher.aircraft)
+    assert len(watcher.get_track("heli01")) == 3
+    everyone = TrackHistory(select=None)
+    everyone.observe(watcher.aircraft, watcher.seen, now)
+    assert "plane1" in everyone
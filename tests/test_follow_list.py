@@ -0,0 +1,97 @@
+import asyncio
+import json
+from datetime import datetime, timedelta
+
+from AlertList import AlertList
+from FollowList import FollowList
+from PlaneWatcher import PlaneWatcher
+from PollScheduler import PollScheduler, follow_between_polls
+from Recording import RecordedResponse, Replay
+from SeenAircraft import SeenAircraft, SeenDelta
+from Snapshot import Snapshot
+
+T0 = datetime(2025, 10, 1, 12, 0)
+POINT = "/point/42.52/-71.42/10"
+
+
+def seen(*hexes, interesting=True):
+    return {h: SeenAircraft(h, is_interesting=interesting) for h in hexes}
+
+
+def test_follows_interesting_aircraft_that_leave():
+    follow = FollowList(batch_size=2, max_misses=2, follow_for=timedelta(minutes=30))
+    entries = {**seen("a1", "a2", "a3"), **seen("plain", interesting=False)}
+    follow.update(SeenDelta(disappeared=["a1", "a2", "a3", "plain"]), entries, T0)
+    assert sorted(follow) == ["a1", "a2", "a3"]
+
+    # more than one batch: least recently requested first, so all get a turn
+    first = follow.due()
+    assert len(first) == 2
+    t1 = T0 + timedelta(seconds=5)
+    snap = Snapshot([{"hex": h, "lat": 43.0, "lon": -71.0, "alt_baro": 5000} for h in first])
+    reported = follow.ingest(first, snap, [60.0] * len(first), t1)
+    assert [ac.hex for ac in reported] == first and reported[0].alt == 5000
+    assert follow.get(first[0]).distance_nm == 60.0
+    rest = follow.due()
+    assert set(first) | set(rest) == {"a1", "a2", "a3"}
+
+    # missing from /hex twice in a row: no longer followed
+    for k in range(2):
+        follow.ingest(["a3"], Snapshot(), [], t1 + timedelta(seconds=k))
+    assert "a3" not in follow
+
+    # back in the zone, or not seen for follow_for: dropped
+    follow.update(SeenDelta(appeared=[first[0]]), entries, t1)
+    assert first[0] not in follow
+    follow.update(SeenDelta(), entries, t1 + timedelta(minutes=31))
+    assert len(follow) == 0
+
+
+def test_failed_batches_do_not_hold_up_the_others():
+    follow = FollowList(batch_size=2)
+    follow.update(SeenDelta(disappeared=["a1", "a2", "a3", "a4", "a5"]), seen("a1", "a2", "a3", "a4", "a5"), T0)
+    # no /hex answer ever comes back, yet every aircraft gets its turn
+    batches = [follow.due() for _ in range(3)]
+    assert batches == [["a1", "a2"], ["a3", "a4"], ["a5", "a1"]]
+
+
+def test_watcher_follows_with_hex_between_polls():
+    body = lambda *ac: json.dumps({"ac": list(ac)}).encode()
+    near = {"hex": "a1b2c3", "lat": 42.55, "lon": -71.42, "flight": "POLICE1"}
+    away = {"hex": "a1b2c3", "lat": 43.52, "lon": -71.42, "alt_baro": 3000, "flight": "POLICE1"}
+    plain = {"hex": "c0ffee", "lat": 42.50, "lon": -71.42}
+    replay = Replay([
+        RecordedResponse(1000.0, POINT, 200, body(near, plain)),
+        RecordedResponse(1005.0, POINT, 200, body(plain)),
+        RecordedResponse(1006.0, "/hex/a1b2c3", 200, body(away)),
+    ], speed=0)
+    watcher = PlaneWatcher(
+        42.52, -71.42, 10,
+        client=replay.client(),
+        async_client=replay.async_client(),
+        clock=replay.now,
+        alert_list=AlertList([{"$ICAO": "A1B2C3", "$Operator": "State Police"}]),
+        rules=[],
+        follow=FollowList(),
+    )
+    scheduler = PollScheduler(interval=5)
+
+    async def run():
+        reports = []
+        for _ in range(2):
+            await watcher.refresh_async()
+            _, reported = await follow_between_polls(watcher, scheduler, scheduler.after_poll(watcher))
+            reports.append(reported)
+        return reports
+
+    first, second = asyncio.run(run())
+    assert first == [] and "a1b2c3" in watcher.follow
+    (ac,) = second
+    assert (ac.hex, ac.alt, ac.flight) == ("a1b2c3", 3000, "POLICE1")
+    assert ac.distance_nm == watcher.follow.get("a1b2c3").distance_nm
+    assert 59 < ac.distance_nm < 61
+    # the zone is untouched, the flight path carries on outside it
+    assert watcher.aircraft.hex == ["c0ffee"]
+    assert [p.lat for p in watcher.get_track("a1b2c3")] == [42.55, 43.52]
+    # the /hex request counted against the budget with the two polls
+    assert scheduler.requests_last_hour() == 3
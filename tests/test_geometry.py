@@ -0,0 +1,68 @@
+import math
+
+import pytest
+
+import Geometry
+from AircraftResp import AircraftResp
+from Geometry import SnapshotGeometry
+
+OBS = (42.52, -71.42)
+
+
+def fleet():
+    return [
+        # 1 deg north of the observer, flying south towards it
+        AircraftResp(hex="n", lat=43.52, lon=-71.42, track=180.0, gs=300.0),
+        # due east, flying east (away)
+        AircraftResp(hex="e", lat=42.52, lon=-70.42, track=90.0, gs=200.0),
+        # no position
+        AircraftResp(hex="x"),
+        # position but no speed/track
+        AircraftResp(hex="s", lat=42.0, lon=-71.0),
+    ]
+
+
+@pytest.fixture(params=["numpy", "python"])
+def backend(request, monkeypatch):
+    if request.param == "python":
+        monkeypatch.setattr(Geometry, "np", None)
+    elif Geometry.np is None:
+        pytest.skip("numpy not installed")
+    return request.param
+
+
+def test_distance_matches_per_aircraft_calculation(backend):
+    aircraft = fleet()
+    geom = SnapshotGeometry.from_aircraft(aircraft, *OBS)
+
+    for i, ac in enumerate(aircraft):
+        expected = ac.distance_to(*OBS, unit="nm")
+        if expected is None:
+            assert geom.distance(i) is None
+        else:
+            assert geom.distance(i) == pytest.approx(expected, rel=1e-9)
+
+
+def test_bearing_and_closure(backend):
+    geom = SnapshotGeometry.from_aircraft(fleet(), *OBS)
+
+    assert geom.bearing(0) == pytest.approx(0.0, abs=1e-6)
+    assert geom.bearing(1) == pytest.approx(89.66, abs=0.05)
+    assert geom.closure(0) == pytest.approx(300.0, rel=1e-6)
+    assert geom.closure(1) == pytest.approx(-200.0, rel=1e-3)
+    assert geom.closure(2) is None
+    assert geom.closure(3) is None
+    assert geom.bearing(2) is None
+
+
+def test_empty_snapshot(backend):
+    geom = SnapshotGeometry.from_aircraft([], *OBS)
+
+    assert len(geom) == 0
+
+
+def test_ground_altitude_strings_are_ignored(backend):
+    geom = SnapshotGeometry.compute(0.0, 0.0, ["ground"], [0.0], [None], [None])
+
+    assert geom.distance(0) is None
+    assert math.isnan(float(geom.distance_nm[0]))
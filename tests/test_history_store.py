@@ -0,0 +1,86 @@
+import sqlite3
+import threading
+from datetime import datetime, timedelta
+
+from HistoryStore import HistoryStore
+from PlaneWatcher import PlaneWatcher
+
+T0 = datetime(2025, 10, 1, 12, 0, 0)
+
+
+def sample(hex_id, lat, alt=1000, gs=120):
+    return {"hex": hex_id, "flight": f"F{hex_id}", "t": "A21N", "lat": lat, "lon": -71.42, "alt_baro": alt, "alt_geom": alt, "gs": gs}
+
+
+class Clock:
+    def __init__(self, now):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+
+def make_watcher(store, clock):
+    return PlaneWatcher(42.52, -71.42, 10, rules=[], history=store, clock=clock)
+
+
+def test_sightings_and_positions_are_written_and_restored(tmp_path):
+    path = tmp_path / "history.db"
+    clock = Clock(T0)
+    with HistoryStore(path) as store:
+        watcher = make_watcher(store, clock)
+        watcher.ingest([sample("ABC123", 42.60), sample("DEF456", 42.70)])
+        clock.now += timedelta(seconds=5)
+        watcher.ingest([sample("ABC123", 42.55, alt=3000)])
+        store.flush(5)
+        assert store.written == 2
+        rows = store.positions("ABC123")
+        assert [r["lat"] for r in rows] == [42.60, 42.55]
+        assert rows[1]["time"] == (T0 + timedelta(seconds=5)).timestamp()
+        assert rows[1]["distance_nm"] < rows[0]["distance_nm"]
+
+    db = sqlite3.connect(path)
+    assert db.execute("PRAGMA journal_mode").fetchone()[0] == "wal"
+    indexes = {r[0] for r in db.execute("SELECT name FROM sqlite_master WHERE type = 'index'")}
+    assert {"positions_hex_time", "positions_time", "positions_distance", "sightings_last_seen"} <= indexes
+    db.close()
+
+    # a restart rebuilds `seen` from the database
+    clock.now += timedelta(hours=1)
+    with HistoryStore(path, restore_hours=2) as store:
+        restarted = make_watcher(store, clock)
+    ac = restarted.seen["ABC123"]
+    assert ac.firstSeen == T0
+    assert ac.lastSeen == T0 + timedelta(seconds=5)
+    assert (ac.highest_altitude, ac.lowest_altitude) == (3000, 1000)
+    assert round(ac.closestApproach, 2) == round(watcher.seen["ABC123"].closestApproach, 2)
+    assert restarted.seen["DEF456"].lastSeen == T0
+
+    # only the last `restore_hours` come back
+    with HistoryStore(path, restore_hours=0.5) as store:
+        assert make_watcher(store, clock).seen == {}
+
+
+def test_polling_never_waits_on_the_writer(tmp_path):
+    store = HistoryStore(tmp_path / "history.db", max_pending=1)
+    entered, release = threading.Event(), threading.Event()
+    write = store._write
+
+    def slow_write(*args):
+        entered.set()
+        release.wait(5)
+        write(*args)
+
+    store._write = slow_write
+    clock = Clock(T0)
+    watcher = make_watcher(store, clock)
+    for i in range(5):
+        clock.now += timedelta(seconds=5)
+        watcher.ingest([sample("ABC123", 42.60 - i / 100)])
+        if i == 0:
+            assert entered.wait(5)
+    # one batch in the writer, one queued, the rest dropped
+    assert store.dropped == 3
+    release.set()
+    store.close()
+    assert store.written == 2
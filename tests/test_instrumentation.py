@@ -0,0 +1,81 @@
+import json
+import urllib.request
+from unittest.mock import Mock, patch
+
+import httpx
+
+from AirplanesLive_Client import AirplanesClient
+from Instrumentation import Histogram, Metrics, MetricsServer, write_metrics
+from PlaneWatcher import PlaneWatcher
+
+
+def test_histogram_buckets_and_rolling_percentiles():
+    h = Histogram(buckets=(0.1, 1.0), window=4)
+    for v in (0.05, 0.1, 0.5, 2.0, 0.2):
+        h.observe(v)
+
+    assert list(h.cumulative()) == [(0.1, 2), (1.0, 4), (float("inf"), 5)]
+    assert h.count == 5 and abs(h.sum - 2.85) < 1e-9
+    # the window keeps the last four observations
+    assert sorted(h.recent) == [0.1, 0.2, 0.5, 2.0]
+    assert h.percentile(50) == 0.2
+    assert h.summary()["max"] == 2.0 and h.last == 0.2
+
+
+def test_prometheus_and_json_exports(tmp_path):
+    m = Metrics(buckets=(0.01,))
+    m.observe("render_seconds", 0.005, table="seen")
+    m.observe("render_seconds", 0.5, table="current")
+    m.count("retries_total", 2)
+
+    text = m.to_prometheus()
+    assert "# TYPE skyalert_render_seconds histogram" in text
+    assert 'skyalert_render_seconds_bucket{table="seen",le="0.01"} 1' in text
+    assert 'skyalert_render_seconds_bucket{table="current",le="+Inf"} 1' in text
+    assert 'skyalert_render_seconds_count{table="current"} 1' in text
+    assert "skyalert_retries_total 2" in text
+
+    data = json.loads(m.to_json())
+    assert [s["labels"]["table"] for s in data["histograms"]["render_seconds"]] == ["current", "seen"]
+    assert data["counters"]["retries_total"][0]["value"] == 2
+
+    path = tmp_path / "metrics.json"
+    write_metrics(m, str(path), "json")
+    assert json.loads(path.read_text()) == data
+
+
+def test_metrics_server_serves_both_formats():
+    m = Metrics()
+    m.observe("http_seconds", 0.2)
+    server = MetricsServer(m, port=0)
+    try:
+        base = f"http://127.0.0.1:{server.port}"
+        assert b"skyalert_http_seconds_count 1" in urllib.request.urlopen(base + "/metrics").read()
+        assert json.loads(urllib.request.urlopen(base + "/metrics.json").read())["histograms"]["http_seconds"]
+    finally:
+        server.close()
+
+
+def test_client_and_watcher_record_each_stage():
+    metrics = Metrics()
+    watcher = PlaneWatcher(42.52, -71.42, 10, metrics=metrics, rules=[])
+    assert watcher.client.metrics is metrics
+
+    req = httpx.Request("GET", "https://api.airplanes.live/v2/point/42.52/-71.42/10")
+    body = b'{"ac": [{"hex": "abc123", "lat": 42.52, "lon": -71.42}]}'
+    watcher.client.client = Mock(get=Mock(side_effect=[httpx.Response(502, request=req), httpx.Response(200, content=body, request=req)]))
+    with patch("time.sleep", return_value=None):
+        watcher.refresh()
+
+    counts = {name: s["count"] for name, _, s in metrics.stages()}
+    assert counts == {
+        "decode_seconds": 1,
+        "fetch_seconds": 1,
+        "http_seconds": 2,
+        "snapshot_seconds": 1,
+        "throttle_wait_seconds": 2,
+        "tracking_seconds": 1,
+    }
+    assert metrics.counter("requests_total") == 2
+    assert metrics.counter("retries_total") == 1
+    assert metrics.counter("request_errors_total") == 0
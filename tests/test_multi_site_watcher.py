@@ -0,0 +1,109 @@
+import asyncio
+from unittest.mock import AsyncMock, Mock
+
+import pytest
+
+from AircraftTypes import AircraftTypes
+from AlertList import AlertList
+from Geometry import destination_point
+from MultiSiteWatcher import MultiSiteWatcher, WatchZone, plan_queries
+
+BOSTON = WatchZone("boston", 42.36, -71.06, 10)
+LOWELL = WatchZone("lowell", 42.64, -71.32, 10)
+WORCESTER = WatchZone("worcester", 42.26, -71.80, 15)
+LAX = WatchZone("lax", 33.94, -118.41, 20)
+
+
+def ac(hex_id, lat, lon):
+    return {"hex": hex_id, "flight": hex_id.upper(), "t": "B738", "lat": lat, "lon": lon, "gs": 250, "alt_geom": 3000}
+
+
+@pytest.fixture
+def ref_data():
+    types = AircraftTypes([{"Designator": "B738", "AircraftDescription": "LandPlane"}])
+    alerts = AlertList([{"$ICAO": "aaa001"}])
+    return types, alerts
+
+
+def test_nearby_zones_share_one_query():
+    queries = plan_queries([BOSTON, LOWELL, WORCESTER, LAX])
+    assert len(queries) == 2
+    by_zone = {name: q for q in queries for name in q.zones}
+    assert by_zone["boston"] is by_zone["lowell"] is by_zone["worcester"]
+    assert by_zone["lax"].zones == ("lax",)
+    for zone in (BOSTON, LOWELL, WORCESTER, LAX):
+        assert by_zone[zone.name].covers(zone)
+        assert by_zone[zone.name].radius_nm <= 250
+
+
+def test_single_zone_queried_exactly():
+    (query,) = plan_queries([LAX])
+    assert (query.lat, query.lon, query.radius_nm) == (LAX.lat, LAX.lon, LAX.radius_nm)
+
+
+def test_max_radius_splits_far_zones():
+    assert len(plan_queries([BOSTON, WORCESTER], max_radius_nm=20)) == 2
+    with pytest.raises(ValueError):
+        plan_queries([WatchZone("big", 0, 0, 300)])
+
+
+def test_ring_of_zones_is_covered():
+    zones = [
+        WatchZone(f"z{i}", *destination_point(42.5, -71.4, i * 30, 60), 15)
+        for i in range(12)
+    ]
+    queries = plan_queries(zones)
+    # twelve sites, one request
+    assert len(queries) == 1
+    assert all(queries[0].covers(z) for z in zones)
+
+
+def test_refresh_fans_out_by_zone(ref_data):
+    types, alerts = ref_data
+    watcher = MultiSiteWatcher([BOSTON, LOWELL, LAX], aircraft_types=types, alert_list=alerts)
+    boston_ac = ac("aaa001", 42.37, -71.05)
+    lowell_ac = ac("bbb002", 42.65, -71.31)
+    between = ac("ccc003", 42.50, -71.19)  # inside the query circle, outside both zones
+    lax_ac = ac("ddd004", 33.95, -118.40)
+
+    def get_point(lat, lon, radius):
+        return [lax_ac] if lat < 40 else [boston_ac, lowell_ac, between]
+
+    watcher.client = Mock(get_point=Mock(side_effect=get_point))
+    watcher.refresh()
+
+    assert watcher.api_calls == 2
+    assert list(watcher["boston"].seen) == ["aaa001"]
+    assert list(watcher["lowell"].seen) == ["bbb002"]
+    assert list(watcher["lax"].seen) == ["ddd004"]
+    assert watcher["boston"].seen["aaa001"].is_interesting
+    assert watcher["boston"].aircraft.hex == ["aaa001"]
+    assert watcher["boston"].aircraft[0].flight == "AAA001"
+
+
+def test_reference_data_and_clients_are_shared(ref_data):
+    types, alerts = ref_data
+    watcher = MultiSiteWatcher([BOSTON, LOWELL, WORCESTER], aircraft_types=types, alert_list=alerts)
+    zones = [watcher[name] for name in watcher]
+    assert all(w.interestingData is alerts for w in zones)
+    assert all(w._PlaneWatcher__aircraft_types is types for w in zones)
+    assert all(w.client is watcher.client and w.limiter is watcher.limiter for w in zones)
+    watcher.close()
+
+
+def test_refresh_async(ref_data):
+    types, alerts = ref_data
+    watcher = MultiSiteWatcher([BOSTON, LOWELL], aircraft_types=types, alert_list=alerts)
+    watcher.async_client = Mock(get_point=AsyncMock(return_value=[ac("aaa001", 42.37, -71.05)]))
+
+    asyncio.run(watcher.refresh_async())
+
+    assert watcher.api_calls == 1
+    assert "aaa001" in watcher["boston"].seen
+    assert len(watcher["lowell"].seen) == 0
+
+
+def test_duplicate_zone_names_rejected(ref_data):
+    types, alerts = ref_data
+    with pytest.raises(ValueError):
+        MultiSiteWatcher([BOSTON, BOSTON], aircraft_types=types, alert_list=alerts)
@@ -67,3 +67,101 @@ def test_is_helicopter_and_print(monkeypatch, capsys):
     # Should print at least one helicopter line containing the heli hex and flight
     assert "HELI01" in out
     assert "HEL1" in out
+
+
+def test_refresh_async_populates_aircraft():
+    import asyncio
+    from unittest.mock import AsyncMock
+
+    watcher = PlaneWatcher(42.52, -71.42, 10)
+    watcher.async_client = Mock(get_point=AsyncMock(return_value=[make_sample("ABC123", "FLT1", "A21N")]))
+
+    asyncio.run(watcher.refresh_async())
+
+    assert [ac.hex for ac in watcher.aircraft] == ["ABC123"]
+    assert "ABC123" in watcher.seen
+
+
+def test_spatial_queries_use_current_snapshot():
+    from SpatialIndex import Polygon
+
+    watcher = PlaneWatcher(42.52, -71.42, 10)
+    near = make_sample("NEAR01", "N1", "A21N", lat=42.53, lon=-71.42)
+    far = make_sample("FAR001", "F1", "A21N", lat=42.70, lon=-71.42)
+    watcher.ingest([far, near])
+
+    assert watcher.aircraft_within(2) == [1]
+    assert watcher.aircraft_within(2, lat=42.70, lon=-71.42) == [0]
+    assert [i for _, i in watcher.nearest(2)] == [1, 0]
+    assert watcher.aircraft_in(Polygon([(42.6, -71.5), (42.8, -71.5), (42.8, -71.3)])) == [0]
+
+
+def test_background_reference_data_reclassifies_seen(monkeypatch):
+    import threading
+
+    import ReferenceData
+    from AircraftTypes import AircraftTypes
+    from AlertList import AlertList
+    from AlertRules import TypeClassRule
+
+    release = threading.Event()
+
+    def slow_types():
+        release.wait(5)
+        return AircraftTypes([{"Designator": "H123", "AircraftDescription": "Helicopter"}])
+
+    monkeypatch.setattr(ReferenceData, "AircraftTypes", slow_types)
+    alerts = AlertList([{"$ICAO": "HELI01", "$Operator": "Police"}])
+    watcher = PlaneWatcher(
+        42.52, -71.42, 10, alert_list=alerts, background_load=True, rules=[TypeClassRule("heli", descriptions=["Helicopter"])]
+    )
+
+    # first poll lands before the data: tracked, but unclassified
+    watcher.ingest([make_sample("HELI01", "HEL1", "H123")])
+    assert not watcher.reference_ready
+    assert not watcher.seen["HELI01"].is_helicopter
+    assert not watcher.is_interesting("HELI01")
+    assert watcher.alert_events == []
+
+    release.set()
+    assert watcher.reference.wait(5)
+    assert watcher.apply_reference() is True
+    assert watcher.seen["HELI01"].is_helicopter
+    assert watcher.seen["HELI01"].is_interesting
+    assert watcher.get_interesting("heli01").operator == "Police"
+    assert watcher.apply_reference() is False
+
+    watcher.ingest([make_sample("HELI01", "HEL1", "H123")])
+    assert [(e.kind, e.rule) for e in watcher.alert_events] == [("enter", "heli")]
+
+
+def test_update_seen_delta_and_running_extremes():
+    def sample(hex_id, lat, alt, gs, flight="FLT1"):
+        return dict(make_sample(hex_id, flight, "A21N", lat=lat), alt_geom=alt, gs=gs)
+
+    watcher = PlaneWatcher(42.52, -71.42, 10, rules=[])
+    # overhead at distance 0 counts as the closest approach
+    watcher.ingest([sample("ABC123", 42.52, 1000, 100), sample("DEF456", 42.60, 2000, 200)])
+    assert watcher.delta.new == watcher.delta.appeared == ["ABC123", "DEF456"]
+    assert watcher.seen["ABC123"].closestApproach == 0
+
+    # moving away: no new closest, but every observation feeds the extremes
+    watcher.ingest([sample("ABC123", 42.55, 3000, 80), sample("DEF456", 42.60, 2000, 200)])
+    ac = watcher.seen["ABC123"]
+    assert (ac.highest_altitude, ac.lowest_altitude, ac.fastestGs, ac.slowestGs) == (3000, 1000, 100, 80)
+    assert ac.closestApproach == 0 and ac.altitude == 1000
+    assert watcher.delta.updated == {"ABC123": ("highest_altitude", "slowestGs")}
+    assert watcher.delta.appeared == watcher.delta.new == []
+    assert not watcher.delta.disappeared
+
+    unchanged = watcher.seen["DEF456"]
+    watcher.ingest([sample("DEF456", 42.60, 2000, 200)])
+    assert watcher.seen["DEF456"] is unchanged
+    assert watcher.delta.updated == {}
+    assert watcher.delta.disappeared == ["ABC123"]
+
+    watcher.ingest([])
+    assert watcher.delta.disappeared == ["DEF456"]
+    watcher.ingest([sample("ABC123", 42.53, 500, 90, flight="FLT9")])
+    assert watcher.delta.appeared == ["ABC123"] and watcher.delta.new == []
+    assert watcher.delta.updated["ABC123"] == ("flight", "lowest_altitude")
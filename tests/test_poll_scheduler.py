@@ -0,0 +1,186 @@
+from datetime import datetime
+
+import httpx
+import pytest
+
+from AircraftTypes import AircraftTypes
+from AlertList import AlertList
+from AlertRules import DEFAULT_RULES
+from Instrumentation import Metrics
+from PlaneWatcher import PlaneWatcher
+from PollScheduler import PollScheduler
+
+OBS = (42.52, -71.42)
+T0 = datetime(2025, 10, 1, 12, 0)
+
+# ~5 nm north, flying north: ordinary traffic
+OUTBOUND = {"hex": "plane1", "t": "B738", "lat": 42.60, "lon": -71.42, "track": 0.0, "gs": 300}
+
+
+def watcher(rules=()):
+    return PlaneWatcher(
+        *OBS, 10,
+        aircraft_types=AircraftTypes([{"Designator": "H60", "AircraftDescription": "Helicopter"}]),
+        alert_list=AlertList([]),
+        rules=list(rules),
+        clock=lambda: T0,
+    )
+
+
+def status_error(status, retry_after=None):
+    request = httpx.Request("GET", "https://api.airplanes.live/v2/point/42.52/-71.42/10")
+    headers = {"Retry-After": retry_after} if retry_after else {}
+    response = httpx.Response(status, headers=headers, request=request)
+    return httpx.HTTPStatusError(f"{status}", request=request, response=response)
+
+
+def test_interval_follows_traffic():
+    w = watcher(DEFAULT_RULES)
+    scheduler = PollScheduler(interval=5, fast_interval=2, idle_interval=15)
+
+    def poll(*aircraft):
+        w.ingest(list(aircraft))
+        return scheduler.after_poll(w), scheduler.last.reason
+
+    assert poll() == (10, "empty sky")
+    assert poll() == (15, "empty sky")
+    assert poll() == (15, "empty sky")
+    assert poll(OUTBOUND) == (5, "traffic")
+    assert poll(OUTBOUND, {"hex": "heli01", "t": "H60", "lat": 42.70, "lon": -71.42}) == (2, "helicopter")
+    assert poll(OUTBOUND, {"hex": "sq7700", "lat": 42.70, "lon": -71.42, "squawk": "7700"}) == (2, "alert")
+    assert poll(OUTBOUND, {"hex": "emerg1", "lat": 42.70, "lon": -71.42, "emergency": "general"}) == (2, "emergency")
+    # 3 nm north, heading straight for the observer at 360 kt: overhead in 30s
+    inbound = {"hex": "inbound", "lat": 42.57, "lon": -71.42, "track": 180.0, "gs": 360}
+    w.rules = None
+    assert poll(OUTBOUND, inbound) == (2, "close pass")
+    assert [d.reason for d in scheduler.decisions][:2] == ["empty sky", "empty sky"]
+    assert scheduler.summary() == "next poll in 2s (close pass)"
+
+
+def test_backs_off_on_errors():
+    metrics = Metrics()
+    scheduler = PollScheduler(interval=5, max_interval=60, metrics=metrics)
+    assert scheduler.after_error(status_error(503)) == 10
+    assert scheduler.after_error(httpx.ConnectError("refused")) == 20
+    assert scheduler.last.reason == "network error"
+    assert scheduler.after_error(status_error(502)) == 40
+    assert scheduler.after_error(status_error(500)) == 60
+    # Retry-After wins when it is longer than the backoff
+    scheduler.failures = 0
+    assert scheduler.after_error(status_error(429, "120")) == 120
+    assert scheduler.last.reason == "rate limited"
+    # neither a 404 nor a bad payload is a reason to slow down
+    assert scheduler.after_error(status_error(404)) == 5
+    assert scheduler.after_error(ValueError("bad json")) == 5
+
+    w = watcher()
+    w.ingest([OUTBOUND])
+    assert scheduler.after_poll(w) == 5 and scheduler.failures == 0
+    assert metrics.histogram("poll_interval_seconds", reason="server error").summary()["count"] == 3
+
+
+def test_quota_caps_polls_per_hour():
+    now = [0.0]
+    scheduler = PollScheduler(interval=5, fast_interval=2, quota_per_hour=10, clock=lambda: now[0])
+    w = watcher()
+    w.ingest([{"hex": "heli01", "t": "H60", "lat": 42.55, "lon": -71.42}])
+
+    waits = []
+    for _ in range(10):
+        wait = scheduler.after_poll(w)
+        waits.append((wait, scheduler.last.reason))
+        now[0] += wait
+    # fast until half the budget is spent, then the average pace
+    assert waits[:4] == [(2, "helicopter")] * 4
+    assert waits[4:9] == [(360, "quota pace")] * 5
+    # the tenth poll in the hour (at 4 * 2 + 5 * 360 s) waits for the first
+    # one to leave the window
+    assert waits[9] == (3600 - 1808, "quota")
+    assert scheduler.requests_last_hour() == 9
+    assert all(d.requests_last_hour <= 10 for d in scheduler.decisions)
+
+
+def test_rejects_inconsistent_intervals():
+    with pytest.raises(ValueError):
+        PollScheduler(interval=5, fast_interval=10)
+    with pytest.raises(ValueError):
+        PollScheduler(quota_per_hour=0)
+
+
+def test_follow_requests_stay_inside_the_budget():
+    now = [0.0]
+    scheduler = PollScheduler(interval=5, fast_interval=2, follow_per_poll=3, clock=lambda: now[0])
+    # one request per second of the wait, keeping a second for the next poll
+    assert scheduler.follow_requests(5) == 3
+    assert scheduler.follow_requests(2) == 1
+    assert scheduler.follow_requests(1) == 0
+
+    # 720/hour is one request every 5s: a 15s wait pays for the poll and two more
+    scheduler = PollScheduler(interval=5, follow_per_poll=3, quota_per_hour=720, clock=lambda: now[0])
+    assert scheduler.follow_requests(15) == 2
+    assert scheduler.follow_requests(5) == 0
+    for _ in range(718):
+        scheduler.record_request()
+    assert scheduler.follow_requests(15) == 1
+
+
+def test_quota_counts_retried_attempts_and_caps_retries(monkeypatch):
+    import asyncio
+
+    from AirplanesLive_Client import AsyncAirplanesClient
+
+    async def no_sleep(seconds):
+        pass
+
+    monkeypatch.setattr(asyncio, "sleep", no_sleep)
+    metrics = Metrics()
+    transport = httpx.MockTransport(lambda request: httpx.Response(503, request=request))
+    client = AsyncAirplanesClient(rate_limit_seconds=0, max_retries=3, metrics=metrics)
+    client.client = httpx.AsyncClient(base_url="https://api.airplanes.live/v2", transport=transport)
+    scheduler = PollScheduler(interval=5, quota_per_hour=5, metrics=metrics)
+
+    async def poll():
+        scheduler.limit_retries(client)
+        try:
+            await client.get_point(*OBS, 10)
+        except httpx.HTTPStatusError as e:
+            return scheduler.after_error(e)
+
+    asyncio.run(poll())
+    # one failed poll, three real requests
+    assert metrics.counter("requests_total") == 3
+    assert scheduler.requests_last_hour() == 3
+    # two left in the hour: the next poll may only try twice
+    asyncio.run(poll())
+    assert client.max_retries == 2
+    assert metrics.counter("requests_total") == 5
+    assert scheduler.requests_last_hour() == 5
+
+
+def test_cli_idle_interval_beyond_the_default_cap(monkeypatch):
+    import asyncio
+
+    from click.testing import CliRunner
+
+    import App
+    import Daemon
+
+    built = []
+
+    async def no_run(self):
+        built.append(self.scheduler)
+        await self.watcher.aclose()
+
+    monkeypatch.setattr(Daemon.Daemon, "run", no_run)
+    result = CliRunner().invoke(Daemon.main, ["--lat", "42.5", "--lon", "-71.4", "--idle-interval", "400", "-o", "-"])
+    assert result.exit_code == 0, result.output
+    (scheduler,) = built
+    assert (scheduler.idle_interval, scheduler.max_interval) == (400, 400)
+
+    monkeypatch.setattr(App.SkyAlertApp, "run", lambda self: built.append(self))
+    result = CliRunner().invoke(App.main, ["--lat", "42.5", "--lon", "-71.4", "--idle-interval", "400"])
+    assert result.exit_code == 0, result.output
+    app = built[-1]
+    watcher = app.build_watcher()
+    assert (app.scheduler.idle_interval, app.scheduler.max_interval) == (400, 400)
+    asyncio.run(watcher.aclose())
@@ -0,0 +1,110 @@
+import re
+from datetime import datetime, timedelta
+
+import pytest
+
+import Geometry
+import Prediction as prediction_module
+from Prediction import Prediction
+from Snapshot import Snapshot
+
+OBS = (42.52, -71.42)
+T0 = datetime(2025, 10, 1, 12, 0, 0)
+
+
+def snapshot():
+    return Snapshot([
+        # 6 nm north, flying south at 360 kt (0.1 nm/s) straight at the observer
+        {"hex": "inbound", "lat": 42.62, "lon": -71.42, "track": 180.0, "gs": 360.0, "alt_geom": 3000, "baro_rate": -600},
+        # 6 nm north, flying north: moving away
+        {"hex": "outbound", "lat": 42.62, "lon": -71.42, "track": 0.0, "gs": 360.0},
+        # 1 nm east of the observer's meridian, flying south: passes abeam at ~1 nm
+        {"hex": "abeam", "lat": 42.62, "lon": -71.3973, "track": 180.0, "gs": 360.0},
+        # no position, no speed
+        {"hex": "nopos"},
+        {"hex": "parked", "lat": 42.53, "lon": -71.42},
+    ])
+
+
+@pytest.fixture(params=["numpy", "python"])
+def backend(request, monkeypatch):
+    if request.param == "python":
+        monkeypatch.setattr(Geometry, "np", None)
+        monkeypatch.setattr(prediction_module, "np", None)
+    elif prediction_module.np is None:
+        pytest.skip("numpy not installed")
+    return request.param
+
+
+def test_dead_reckoning(backend):
+    snap = snapshot()
+    p = Prediction(snap, *OBS, T0, max_horizon=30)
+    geometry = snap.geometry(*OBS)
+
+    # at the poll time the prediction is the great-circle distance
+    assert p.distance(0, T0) == pytest.approx(geometry.distance(0), rel=1e-9)
+    later = T0 + timedelta(seconds=10)
+    assert p.distance(0, later) == pytest.approx(geometry.distance(0) - 1.0, abs=1e-6)
+    assert p.distance(1, later) == pytest.approx(geometry.distance(1) + 1.0, abs=1e-6)
+    assert p.altitude(0, later) == pytest.approx(2900)
+    assert p.distance(3, later) is None and p.altitude(3, later) is None
+    assert p.distance(4, later) == pytest.approx(geometry.distance(4))
+    lat, lon = p.position(0, later)
+    assert lat == pytest.approx(42.62 - 1 / 60, abs=1e-4) and lon == pytest.approx(-71.42)
+
+    # extrapolation stops at the horizon
+    assert p.distance(1, T0 + timedelta(minutes=5)) == pytest.approx(geometry.distance(1) + 3.0, abs=1e-6)
+    assert list(p.distances(later))[0] == pytest.approx(p.distance(0, later))
+
+
+def test_closest_point_of_approach(backend):
+    p = Prediction(snapshot(), *OBS, T0)
+    when, dist = p.cpa(0)
+    assert dist == pytest.approx(0.0, abs=1e-6)
+    assert (when - T0).total_seconds() == pytest.approx(60.0, rel=1e-3)
+    # moving away: the closest point is now
+    assert p.cpa(1)[0] == T0
+    when, dist = p.cpa(2)
+    assert dist == pytest.approx(1.0, abs=0.01)
+    assert (when - T0).total_seconds() == pytest.approx(60.0, rel=1e-2)
+    assert p.cpa(3) is None
+    assert p.cpa(4) == (T0, pytest.approx(p.distance(4, T0)))
+
+    assert [i for _, i in p.close_passes(within_nm=2, horizon=120)] == [4, 0, 2]
+    assert [i for _, i in p.close_passes(within_nm=0.7, horizon=30)] == [4]
+
+
+def test_current_table_moves_between_polls():
+    import asyncio
+
+    from textual.widgets import DataTable
+
+    from App import SkyAlertApp
+    from PlaneWatcher import PlaneWatcher
+
+    class HeadlessApp(SkyAlertApp):
+        CSS_PATH = None
+        PREDICT_INTERVAL = 3600  # ticks are driven by the test
+
+        def poll_aircraft(self) -> None:
+            pass
+
+    watcher = PlaneWatcher(*OBS, 10, rules=[], clock=lambda: T0)
+    watcher.ingest(snapshot())
+    app = HeadlessApp(*OBS, 10)
+    app.watcher = watcher
+
+    async def run():
+        async with app.run_test():
+            table = app.get_widget_by_id("current_table", expect_type=DataTable)
+            cells = []
+            for seconds in (0, 10):
+                app.update_current(T0 + timedelta(seconds=seconds))
+                cells.append((table.get_cell("inbound", "Closest"), table.get_cell("inbound", "CPA")))
+            return cells
+
+    (d0, cpa0), (d10, cpa10) = asyncio.run(run())
+    # distance cells are colour markup around the number: "[white]5.99[/white]"
+    number = lambda cell: float(re.search(r"\][\d.]+\[", cell).group()[1:-1])
+    assert number(d0) - number(d10) == pytest.approx(1.0, abs=0.01)
+    assert cpa0 == "0.00 nm in 60s" and cpa10 == "0.00 nm in 50s"
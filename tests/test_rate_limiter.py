@@ -0,0 +1,105 @@
+import asyncio
+import threading
+from datetime import datetime, timezone
+
+import pytest
+
+from RateLimiter import MAX_RETRY_AFTER, TokenBucket, backoff_delay, parse_retry_after
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_burst_then_steady_rate():
+    clock = FakeClock()
+    bucket = TokenBucket(rate=2.0, burst=3, clock=clock)
+
+    assert [bucket.reserve() for _ in range(3)] == [0.0, 0.0, 0.0]
+    # queued waiters are spaced by 1/rate
+    assert bucket.reserve() == pytest.approx(0.5)
+    assert bucket.reserve() == pytest.approx(1.0)
+
+    clock.now = 10.0
+    # refill is capped at burst
+    assert [bucket.reserve() for _ in range(3)] == [0.0, 0.0, 0.0]
+    assert bucket.reserve() == pytest.approx(0.5)
+
+
+def test_unlimited_never_waits():
+    bucket = TokenBucket.per_interval(0)
+    assert bucket.unlimited
+    assert all(bucket.reserve() == 0.0 for _ in range(100))
+    bucket.penalize(30)
+    assert bucket.reserve() == 0.0
+
+
+def test_penalize_delays_next_token():
+    clock = FakeClock()
+    bucket = TokenBucket(rate=1.0, burst=5, clock=clock)
+    bucket.penalize(10)
+    assert bucket.reserve() == pytest.approx(10.0)
+    assert bucket.reserve() == pytest.approx(11.0)
+
+
+def test_shared_across_threads_and_tasks():
+    clock = FakeClock()
+    bucket = TokenBucket(rate=1.0, clock=clock)
+    waits = []
+    lock = threading.Lock()
+
+    def worker():
+        for _ in range(25):
+            w = bucket.reserve()
+            with lock:
+                waits.append(w)
+
+    threads = [threading.Thread(target=worker) for _ in range(4)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    async def tasks():
+        return await asyncio.gather(*(asyncio.to_thread(bucket.reserve) for _ in range(10)))
+
+    waits.extend(asyncio.run(tasks()))
+    # every reservation got its own one-second slot
+    assert sorted(round(w) for w in waits) == list(range(110))
+    assert bucket.acquired == 110
+
+
+def test_acquire_async_uses_asyncio_sleep(monkeypatch):
+    clock = FakeClock()
+    bucket = TokenBucket(rate=4.0, clock=clock)
+    slept = []
+
+    async def fake_sleep(s):
+        slept.append(s)
+
+    monkeypatch.setattr(asyncio, "sleep", fake_sleep)
+    asyncio.run(bucket.acquire_async())
+    asyncio.run(bucket.acquire_async())
+    assert slept == [pytest.approx(0.25)]
+
+
+def test_parse_retry_after():
+    assert parse_retry_after("12") == 12.0
+    assert parse_retry_after(" 0 ") == 0.0
+    assert parse_retry_after("-3") == 0.0
+    assert parse_retry_after("99999") == MAX_RETRY_AFTER
+    assert parse_retry_after(None) is None
+    assert parse_retry_after("soon") is None
+    now = datetime(2025, 1, 1, 12, 0, 0, tzinfo=timezone.utc)
+    assert parse_retry_after("Wed, 01 Jan 2025 12:00:30 GMT", now=now) == 30.0
+
+
+def test_backoff_delay_is_jittered_and_capped():
+    assert backoff_delay(1, rand=lambda: 0.0) == 1.0
+    assert backoff_delay(1, rand=lambda: 1.0) == 2.0
+    assert backoff_delay(3, rand=lambda: 1.0) == 8.0
+    assert backoff_delay(20, cap=60, rand=lambda: 1.0) == 60.0
@@ -0,0 +1,137 @@
+import asyncio
+import gzip
+import json
+from datetime import datetime
+from unittest.mock import Mock
+
+import httpx
+import pytest
+
+from AirplanesLive_Client import AirplanesClient
+from PlaneWatcher import PlaneWatcher
+from Recording import RecordedResponse, Replay, ReplayFinished, ResponseRecorder, first_point, read_recording
+
+POINT = "/point/42.52/-71.42/10"
+
+
+def point_body(*hexes):
+    return json.dumps({"ac": [{"hex": h, "lat": 42.52, "lon": -71.42, "t": "B738"} for h in hexes]}).encode()
+
+
+def response(status, content, path=POINT):
+    return httpx.Response(status, content=content, request=httpx.Request("GET", "https://x" + path))
+
+
+def test_client_records_every_response(tmp_path):
+    path = tmp_path / "rec.ndjson.gz"
+    recorder = ResponseRecorder(path)
+    client = AirplanesClient(rate_limit_seconds=0, max_retries=2, recorder=recorder)
+    client.client = Mock(get=Mock(side_effect=[response(503, b"<html>busy</html>"), response(200, point_body("abc123"))]))
+
+    with pytest.MonkeyPatch.context() as mp:
+        mp.setattr("time.sleep", lambda s: None)
+        assert client.get_point(42.52, -71.42, 10)[0]["hex"] == "abc123"
+    recorder.close()
+
+    records = list(read_recording(path))
+    assert [(r.path, r.status) for r in records] == [(POINT, 503), (POINT, 200)]
+    assert records[0].body == b"<html>busy</html>"
+    assert records[1].body == point_body("abc123")
+    assert first_point(path) == (42.52, -71.42, 10)
+
+
+def test_sessions_append_and_truncated_tail_is_ignored(tmp_path):
+    path = tmp_path / "rec.ndjson.gz"
+    for i in range(2):
+        with ResponseRecorder(path) as recorder:
+            recorder.record(POINT, None, response(200, b'{"ac":[]}\n'), t=100.0 + i)
+    # a recorder killed mid-write: a gzip member without its trailer
+    with open(path, "ab") as f:
+        f.write(gzip.compress(b'{"t":102.0,"path":"' + POINT.encode() + b'","status":200,"body":{}}\n')[:-12])
+
+    records = list(read_recording(path))
+    assert [r.t for r in records] == [100.0, 101.0]
+    assert records[0].body == b'{"ac":[]}'  # newlines folded to keep one line per response
+
+
+
+def test_unparseable_success_bodies_are_kept_as_text(tmp_path):
+    path = tmp_path / "rec.ndjson.gz"
+    with ResponseRecorder(path) as recorder:
+        recorder.record(POINT, None, response(200, b"<html>maintenance</html>"), t=100.0)
+        recorder.record(POINT, None, response(200, b'{"ac":[{"hex":"abc'), t=101.0)
+        recorder.record(POINT, None, response(200, point_body("abc123")), t=102.0)
+        recorder.flush()
+        assert recorder.recorded == 3
+
+    records = list(read_recording(path))
+    assert [r.body for r in records] == [b"<html>maintenance</html>", b'{"ac":[{"hex":"abc', point_body("abc123")]
+    # the recording still replays: the good response decodes, the bad ones fail like they did live
+    client = Replay(records, speed=0).client()
+    for _ in range(2):
+        with pytest.raises(ValueError):
+            client.get_point(42.52, -71.42, 10)
+    assert client.get_point(42.52, -71.42, 10)[0]["hex"] == "abc123"
+
+
+def test_replay_paces_to_recorded_timeline():
+    records = [RecordedResponse(1000.0 + 5 * i, POINT, 200, point_body(f"a{i}")) for i in range(3)]
+    now = [0.0]
+    slept = []
+
+    def sleep(s):
+        slept.append(s)
+        now[0] += s
+
+    replay = Replay(records, speed=2.0, clock=lambda: now[0])
+    client = replay.client()
+    with pytest.MonkeyPatch.context() as mp:
+        mp.setattr("time.sleep", sleep)
+        hexes = [client.get_point(42.52, -71.42, 10)[0]["hex"] for _ in range(3)]
+        with pytest.raises(ReplayFinished):
+            client.get_point(42.52, -71.42, 10)
+
+    assert hexes == ["a0", "a1", "a2"]
+    assert slept == [2.5, 2.5]
+    assert replay.now() == datetime.fromtimestamp(1010.0)
+    # between responses the recorded clock keeps moving, at replay speed
+    now[0] += 1.5
+    assert replay.now() == datetime.fromtimestamp(1013.0)
+
+
+def test_replay_routes_by_path_and_raises_recorded_errors():
+    other = "/hex/abc123"
+    records = [
+        RecordedResponse(1.0, other, 200, b'{"ac":[{"hex":"abc123"}]}'),
+        RecordedResponse(2.0, POINT, 429, b"slow down"),
+        RecordedResponse(3.0, POINT, 200, point_body("b1")),
+    ]
+    client = Replay(records, speed=0).async_client()
+
+    async def run():
+        with pytest.raises(httpx.HTTPStatusError):
+            await client.get_point(42.52, -71.42, 10)
+        point = await client.get_point(42.52, -71.42, 10)
+        hexes = await client.get_hex(["abc123"])
+        return point, hexes
+
+    point, hexes = asyncio.run(run())
+    assert point[0]["hex"] == "b1"
+    assert hexes["ac"][0]["hex"] == "abc123"
+
+
+def test_planewatcher_runs_offline_on_recorded_time():
+    records = [
+        RecordedResponse(1000.0, POINT, 200, point_body("abc123")),
+        RecordedResponse(1005.0, POINT, 200, point_body("abc123", "def456")),
+    ]
+    replay = Replay(records, speed=0)
+    watcher = PlaneWatcher(
+        42.52, -71.42, 10, client=replay.client(), async_client=replay.async_client(), clock=replay.now
+    )
+    watcher.refresh()
+    asyncio.run(watcher.refresh_async())
+
+    assert set(watcher.seen) == {"abc123", "def456"}
+    assert watcher.seen["abc123"].firstSeen == datetime.fromtimestamp(1000.0)
+    assert watcher.seen["abc123"].lastSeen == datetime.fromtimestamp(1005.0)
@@ -0,0 +1,150 @@
+import csv
+import json
+import os
+
+import pytest
+
+import RefDataCache
+from AircraftTypes import AircraftTypes
+from AlertList import AlertList
+from RefDataCache import MappedFile, TableSpec, compile_tables
+
+TYPES = [
+    {"Designator": "EC35", "AircraftDescription": "Helicopter", "WTC": "L", "WTG": None,
+     "EngineType": "Turboshaft", "EngineCount": "2", "ShowInPart3Only": False},
+    {"Designator": "B738", "AircraftDescription": "LandPlane", "WTC": "M", "WTG": "D",
+     "EngineType": "Jet", "EngineCount": "2", "ShowInPart3Only": True},
+    {"Designator": "AS32", "AircraftDescription": "Helicopter", "WTC": "M", "WTG": "C",
+     "EngineType": "Turboshaft", "EngineCount": "2", "ShowInPart3Only": False},
+    {"Designator": "AS32", "AircraftDescription": "Gyrocopter", "WTC": "L", "WTG": "C",
+     "EngineType": "Piston", "EngineCount": "1", "ShowInPart3Only": False},
+]
+
+ALERT_COLUMNS = ["$ICAO", "$Registration", "$Operator", "$ICAO Type", "$Tag 1", "$#Tag 2", "Category"]
+ALERTS = [
+    ["AE1234", "N1", "Navy", "H60", "Mil", "Hawk", "USAF"],
+    ["ae1234", "N1-DUP", "Dup", "", "", "", ""],
+    ["A00001", "N2", "Ünïcode Ops", "B738", "", "", "Civ"],
+    ["", "NOHEX", "", "", "", "", ""],
+]
+
+
+@pytest.fixture(autouse=True)
+def cache_dir(tmp_path, monkeypatch):
+    monkeypatch.setenv("SKYALERT_CACHE_DIR", str(tmp_path / "cache"))
+    monkeypatch.delenv("SKYALERT_NO_CACHE", raising=False)
+    return tmp_path / "cache"
+
+
+@pytest.fixture
+def types_path(tmp_path):
+    path = tmp_path / "types.json"
+    path.write_text(json.dumps(TYPES))
+    return path
+
+
+@pytest.fixture
+def alerts_path(tmp_path):
+    path = tmp_path / "alerts.csv"
+    with open(path, "w", newline="") as f:
+        w = csv.writer(f)
+        w.writerow(ALERT_COLUMNS)
+        w.writerows(ALERTS)
+    return path
+
+
+def test_aircraft_types_cache_matches_in_memory(types_path, cache_dir):
+    cached = AircraftTypes(path=types_path)
+    direct = AircraftTypes(TYPES)
+
+    assert list(cache_dir.iterdir())
+    assert len(cached) == len(direct) == 3
+    for d in ("EC35", "B738", "AS32", "XXXX", "", None):
+        assert cached.classify(d) == direct.classify(d)
+        assert cached.models(d) == direct.models(d)
+    assert cached.is_rotorcraft("AS32") and not cached.is_rotorcraft("B738")
+    assert "B738" in cached and "XXXX" not in cached
+    # the cache stores every AircraftModel column; missing ones come back as None
+    assert [{k: r[k] for k in t} for r, t in zip(cached.aircraft_types, TYPES)] == TYPES
+
+
+def test_alert_list_cache_matches_in_memory(alerts_path):
+    cached = AlertList(path=alerts_path)
+    direct = AlertList([dict(zip(ALERT_COLUMNS, row)) for row in ALERTS])
+
+    assert len(cached) == len(direct) == 2
+    assert set(cached.interesting_hexes) == set(direct.interesting_hexes) == {"ae1234", "a00001"}
+    assert "AE1234" in cached and "ffffff" not in cached
+    assert cached.get("AE1234") == direct.get("ae1234")
+    assert cached.get("AE1234").registration == "N1"  # first row wins
+    assert cached.by_registration("n1-dup") == direct.by_registration("N1-DUP")
+    assert cached.by_tag("hawk") == direct.by_tag("Hawk")
+    assert cached.by_category("civ")[0].operator == "Ünïcode Ops"
+    assert cached.by_icao_type("nope") == ()
+    assert len(cached.interesting_aircraft) == 4
+
+
+def test_cache_is_reused_until_source_changes(types_path, monkeypatch):
+    compiled = []
+    real = RefDataCache.compile_tables
+
+    def counting(tables, source):
+        compiled.append(source["sha256"])
+        return real(tables, source)
+
+    monkeypatch.setattr(RefDataCache, "compile_tables", counting)
+
+    AircraftTypes(path=types_path)
+    AircraftTypes(path=types_path)
+    assert len(compiled) == 1
+
+    # touched but identical: re-hashed and reused
+    st = os.stat(types_path)
+    os.utime(types_path, ns=(st.st_atime_ns, st.st_mtime_ns + 10**9))
+    AircraftTypes(path=types_path)
+    assert len(compiled) == 1
+
+    types_path.write_text(json.dumps(TYPES[:1]))
+    assert len(AircraftTypes(path=types_path)) == 1
+    assert len(compiled) == 2
+
+
+def test_unwritable_or_disabled_cache_falls_back_to_memory(types_path, tmp_path, monkeypatch):
+    blocker = tmp_path / "file"
+    blocker.write_text("not a directory")
+    monkeypatch.setenv("SKYALERT_CACHE_DIR", str(blocker / "cache"))
+    assert AircraftTypes(path=types_path).is_rotorcraft("EC35")
+
+    monkeypatch.setenv("SKYALERT_NO_CACHE", "1")
+    monkeypatch.setenv("SKYALERT_CACHE_DIR", str(tmp_path / "unused"))
+    assert AircraftTypes(path=types_path).is_rotorcraft("EC35")
+    assert not (tmp_path / "unused").exists()
+
+
+def test_corrupt_cache_is_rebuilt(types_path, cache_dir):
+    AircraftTypes(path=types_path)
+    (cache_file,) = cache_dir.iterdir()
+    cache_file.write_bytes(b"garbage")
+    assert AircraftTypes(path=types_path).classify("EC35").wtc == "L"
+    assert MappedFile.open(cache_file).source["size"] == types_path.stat().st_size
+
+
+def test_compile_tables_round_trip():
+    spec = TableSpec(
+        [("name", "str"), ("flag", "bool")],
+        [["b", True], ["a", False], [None, True]],
+        {"name": [("b", 0), ("a", 1), ("b", 2)]},
+    )
+    f = MappedFile(compile_tables({"t": spec}, {"path": "x"}))
+    table = f.table("t")
+    assert [table[i] for i in range(3)] == [
+        {"name": "b", "flag": True},
+        {"name": "a", "flag": False},
+        {"name": None, "flag": True},
+    ]
+    index = table.index("name")
+    assert list(index) == ["a", "b"]
+    assert index["b"] == (0, 2)
+    assert "c" not in index
+    with pytest.raises(ValueError):
+        MappedFile(b"nope" * 10)
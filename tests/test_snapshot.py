@@ -0,0 +1,73 @@
+import math
+
+from AircraftResp import AircraftResp
+from Snapshot import MISSING_ALT, Snapshot
+
+RECORDS = [
+    {"hex": "abc123", "flight": "FLT1", "t": "B738", "r": "N1", "lat": 42.5, "lon": -71.4,
+     "alt_baro": 3000, "alt_geom": 3100, "gs": 250.5, "track": 90.0, "squawk": "1200"},
+    {"hex": "def456", "flight": "FLT2", "t": "EC35", "alt_baro": "ground", "squawk": "",
+     "emergency": "general"},
+]
+
+
+def test_columns_hold_hot_fields():
+    snap = Snapshot.from_payload(RECORDS)
+
+    assert len(snap) == 2
+    assert snap.hex == ["abc123", "def456"]
+    assert snap.t == ["B738", "EC35"]
+    assert snap.lat[0] == 42.5
+    assert math.isnan(snap.lat[1])
+    assert snap.alt_geom[0] == 3100
+    assert snap.alt_baro[1] == MISSING_ALT
+    assert list(snap.on_ground) == [0, 1]
+    assert snap.squawk == ["1200", None]
+    assert snap.emergency == [None, "general"]
+
+
+def test_value_maps_missing_to_none():
+    snap = Snapshot.from_payload(RECORDS)
+
+    assert Snapshot.value(snap.gs, 0) == 250.5
+    assert Snapshot.value(snap.gs, 1) is None
+    assert Snapshot.value(snap.alt_geom, 1) is None
+
+
+def test_materializes_aircraft_lazily_and_caches():
+    snap = Snapshot.from_payload(RECORDS)
+
+    ac = snap[0]
+    assert isinstance(ac, AircraftResp)
+    assert ac.hex == "abc123"
+    assert snap[0] is ac
+    assert snap[-1].hex == "def456"
+    assert [a.hex for a in snap] == ["abc123", "def456"]
+    assert snap.get("def456").t == "EC35"
+    assert snap.get("nope") is None
+
+
+def test_materializes_like_from_dict_without_keeping_the_dicts():
+    from benchmarks.payloads import make_point_response
+
+    records = make_point_response(50)["ac"] + RECORDS
+    snap = Snapshot.from_payload(records)
+    assert not hasattr(snap, "_records")
+    assert [snap[i] for i in range(len(snap))] == [AircraftResp.from_dict(r) for r in records]
+
+
+def test_geometry_is_cached_per_observer():
+    snap = Snapshot.from_payload(RECORDS)
+
+    geom = snap.geometry(42.52, -71.42)
+    assert snap.geometry(42.52, -71.42) is geom
+    assert geom.distance(0) is not None
+    assert geom.distance(1) is None
+    assert snap.geometry(0.0, 0.0) is not geom
+
+
+def test_empty_payload():
+    snap = Snapshot.from_payload(None)
+
+    assert len(snap) == 0
+    assert list(snap) == []
@@ -0,0 +1,92 @@
+import random
+from array import array
+
+import pytest
+
+import SpatialIndex as spatial
+from Geometry import distance_nm
+from Snapshot import Snapshot
+from SpatialIndex import Polygon, SpatialIndex
+
+OBS = (42.52, -71.42)
+NAN = float("nan")
+
+
+@pytest.fixture(params=["numpy", "python"])
+def backend(request, monkeypatch):
+    if request.param == "python":
+        monkeypatch.setattr(spatial, "np", None)
+    elif spatial.np is None:
+        pytest.skip("numpy not installed")
+    return request.param
+
+
+def random_fleet(n=500, seed=3):
+    rng = random.Random(seed)
+    lat = array("d", (OBS[0] + rng.uniform(-3, 3) for _ in range(n)))
+    lon = array("d", (OBS[1] + rng.uniform(-4, 4) for _ in range(n)))
+    lat[7] = NAN
+    lon[8] = NAN
+    return lat, lon
+
+
+def test_within_matches_brute_force(backend):
+    lat, lon = random_fleet()
+    index = SpatialIndex(lat, lon, cell_nm=10)
+    assert len(index) == len(lat) - 2
+
+    for radius in (1, 15, 60, 250):
+        expected = [
+            i for i in range(len(lat))
+            if lat[i] == lat[i] and lon[i] == lon[i] and distance_nm(*OBS, lat[i], lon[i]) <= radius
+        ]
+        assert index.within(*OBS, radius) == expected
+
+
+def test_nearest_matches_brute_force(backend):
+    lat, lon = random_fleet()
+    index = SpatialIndex(lat, lon, cell_nm=10)
+    ranked = sorted(
+        (distance_nm(*OBS, lat[i], lon[i]), i) for i in range(len(lat)) if lat[i] == lat[i] and lon[i] == lon[i]
+    )
+
+    for k in (1, 5, 50):
+        got = index.nearest(*OBS, k)
+        assert [i for _, i in got] == [i for _, i in ranked[:k]]
+        assert [d for d, _ in got] == pytest.approx([d for d, _ in ranked[:k]])
+
+    # far from every aircraft: falls back to ranking everything
+    far = index.nearest(0.0, 0.0, 3)
+    assert [i for _, i in far] == [
+        i for _, i in sorted((distance_nm(0.0, 0.0, lat[i], lon[i]), i) for _, i in ranked)[:3]
+    ]
+    assert SpatialIndex([], []).nearest(*OBS, 3) == []
+
+
+def test_in_polygon(backend):
+    lat, lon = random_fleet()
+    index = SpatialIndex(lat, lon, cell_nm=10)
+    # concave "L" around the observer
+    poly = Polygon([(42.0, -72.0), (43.5, -72.0), (43.5, -71.5), (42.5, -71.5), (42.5, -70.5), (42.0, -70.5)])
+    expected = [i for i in range(len(lat)) if lat[i] == lat[i] and lon[i] == lon[i] and poly.contains(lat[i], lon[i])]
+    assert index.in_polygon(poly) == expected
+    assert expected
+
+    assert poly.contains(43.0, -71.8)
+    assert not poly.contains(43.0, -71.0)  # in the notch
+    assert not poly.contains(45.0, -71.8)
+    with pytest.raises(ValueError):
+        Polygon([(0, 0), (1, 1)])
+
+
+def test_snapshot_caches_index():
+    snap = Snapshot.from_payload([
+        {"hex": "a", "lat": 42.53, "lon": -71.41},
+        {"hex": "b"},
+        {"hex": "c", "lat": 44.0, "lon": -71.41},
+    ])
+    index = snap.spatial_index()
+    assert snap.spatial_index() is index
+    assert index.within(*OBS, 5) == [0]
+    assert [i for _, i in index.nearest(*OBS, 5)] == [0, 2]
+    assert snap.take([0, 2]).spatial_index().within(*OBS, 5) == [0]
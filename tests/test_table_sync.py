@@ -0,0 +1,112 @@
+import asyncio
+
+from textual.app import App, ComposeResult
+from textual.widgets import DataTable
+
+from TableSync import TableSync
+
+COLUMNS = ["Hex", "Alt"]
+
+
+class TableApp(App):
+    def compose(self) -> ComposeResult:
+        yield DataTable()
+
+    def on_mount(self) -> None:
+        table = self.query_one(DataTable)
+        for key in COLUMNS:
+            table.add_column(key, key=key)
+        self.sync = TableSync(table, COLUMNS)
+
+
+def run(check):
+    async def main():
+        app = TableApp()
+        async with app.run_test():
+            check(app.query_one(DataTable), app.sync)
+
+    asyncio.run(main())
+
+
+def rows_of(table):
+    return [tuple(table.get_row_at(i)) for i in range(table.row_count)]
+
+
+def test_adds_updates_and_removes_rows():
+    def check(table, sync):
+        stats = sync.sync([("a", ("A", "1")), ("b", ("B", "2"))])
+        assert (stats.added, stats.removed, stats.updated_cells) == (2, 0, 0)
+
+        stats = sync.sync([("a", ("A", "5")), ("c", ("C", "3"))])
+        assert (stats.added, stats.removed, stats.updated_cells) == (1, 1, 1)
+        assert rows_of(table) == [("A", "5"), ("C", "3")]
+
+    run(check)
+
+
+def test_unchanged_rows_touch_nothing():
+    def check(table, sync):
+        rows = [("a", ("A", "1")), ("b", ("B", "2"))]
+        sync.sync(rows)
+
+        assert sync.sync(rows).changed is False
+
+    run(check)
+
+
+def test_reorders_without_rebuilding():
+    def check(table, sync):
+        sync.sync([("a", ("A", "1")), ("b", ("B", "2")), ("c", ("C", "3"))])
+        stats = sync.sync([("c", ("C", "3")), ("a", ("A", "9")), ("b", ("B", "2"))])
+
+        assert stats.reordered is True
+        assert stats.added == 0
+        assert rows_of(table) == [("C", "3"), ("A", "9"), ("B", "2")]
+
+    run(check)
+
+
+def test_new_rows_are_placed_in_order():
+    def check(table, sync):
+        sync.sync([("b", ("B", "2"))])
+        sync.sync([("a", ("A", "1")), ("b", ("B", "2"))])
+
+        assert rows_of(table) == [("A", "1"), ("B", "2")]
+
+    run(check)
+
+
+def test_stats_panel_updates_only_changed_cells():
+    from Instrumentation import Metrics
+    from StatsPanel import StatsPanel
+
+    class StatsApp(App):
+        def compose(self) -> ComposeResult:
+            yield StatsPanel()
+
+    metrics = Metrics()
+    metrics.observe("http_seconds", 0.010, endpoint="point")
+    metrics.observe("http_seconds", 0.020, endpoint="hex")
+    metrics.observe("decode_seconds", 0.001)
+
+    async def main():
+        async with StatsApp().run_test() as pilot:
+            panel = pilot.app.query_one(StatsPanel)
+            first = panel.update_from(metrics)
+            assert first.added == 6 and panel.row_count == 6
+            assert panel.update_from(metrics).changed is False
+            before = rows_of(panel)
+            metrics.observe("http_seconds", 0.030, endpoint="point")
+            metrics.count("requests_total")
+            again = panel.update_from(metrics)
+            after = rows_of(panel)
+            assert (again.added, again.removed, again.reordered) == (0, 0, False)
+            # only the http point and requests rows changed, cell by cell
+            changed = [(r[0], a) for r, b in zip(after, before) for a, c in zip(r, b) if a != c]
+            assert {stage for stage, _ in changed} == {"http point", "requests"}
+            assert again.updated_cells == len(changed)
+            return after
+
+    rows = asyncio.run(main())
+    assert [r[0] for r in rows] == ["decode", "http hex", "http point", "requests", "retries", "request_errors"]
+    assert rows[2][-1] == "2" and rows[3][-1] == "1"
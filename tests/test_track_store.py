@@ -0,0 +1,87 @@
+from datetime import datetime, timedelta
+
+from SeenAircraft import SeenAircraft
+from TrackStore import TrackStore
+
+T0 = datetime(2025, 1, 1, 12, 0, 0)
+
+
+def make(hex_id, last_seen=T0, closest=1.0, interesting=False):
+    return SeenAircraft(
+        hex=hex_id,
+        lastSeen=last_seen,
+        firstSeen=last_seen,
+        closestApproach=closest,
+        is_interesting=interesting,
+    )
+
+
+def test_behaves_like_a_dict():
+    store = TrackStore()
+    store["a"] = make("a")
+
+    assert "a" in store
+    assert store["a"].hex == "a"
+    assert list(store.keys()) == ["a"]
+    del store["a"]
+    assert len(store) == 0
+
+
+def test_recent_view_matches_full_sort():
+    store = TrackStore()
+    records = [
+        make("a", T0, 3.0),
+        make("b", T0 + timedelta(seconds=5), 2.0),
+        make("c", T0 + timedelta(seconds=5), 1.0),
+        make("d", T0 - timedelta(seconds=5), 0.5),
+    ]
+    for ac in records:
+        store[ac.hex] = ac
+
+    expected = sorted(records, key=lambda ac: (ac.lastSeen, -ac.closestApproach), reverse=True)
+    assert [ac.hex for ac in store.sorted_view()] == [ac.hex for ac in expected]
+    assert [ac.hex for ac in store.sorted_view("closest")] == ["d", "c", "b", "a"]
+
+
+def test_touch_moves_updated_record():
+    store = TrackStore()
+    for ac in (make("a"), make("b", T0 + timedelta(seconds=1))):
+        store[ac.hex] = ac
+
+    store["a"].lastSeen = T0 + timedelta(seconds=10)
+    store.touch("a")
+
+    assert [ac.hex for ac in store.sorted_view()] == ["a", "b"]
+
+
+def test_max_entries_evicts_least_recently_updated_but_keeps_interesting():
+    store = TrackStore(max_entries=2)
+    store["old-interesting"] = make("old-interesting", interesting=True)
+    store["old"] = make("old")
+    store["new"] = make("new")
+    store["newer"] = make("newer")
+
+    evicted = store.evict(T0)
+
+    assert evicted == ["old", "new"]
+    assert set(store) == {"old-interesting", "newer"}
+    assert store.evicted == 2
+
+
+def test_max_age_evicts_stale_entries():
+    store = TrackStore(max_age=timedelta(hours=1))
+    store["stale"] = make("stale", T0 - timedelta(hours=2))
+    store["stale-interesting"] = make("stale-interesting", T0 - timedelta(hours=2), interesting=True)
+    store["fresh"] = make("fresh", T0)
+
+    assert store.evict(T0) == ["stale"]
+    assert set(store) == {"stale-interesting", "fresh"}
+
+
+def test_memory_footprint_grows_with_entries():
+    store = TrackStore()
+    empty = store.memory_footprint()
+    for i in range(100):
+        store[f"{i:06x}"] = make(f"{i:06x}")
+
+    assert store.memory_footprint() > empty